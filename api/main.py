@@ -15,13 +15,18 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from routers import market, strategy, backtest, volatility, analytics, autopilot, journal
 from services.cache import init_database
 from services.cache_service import init_cache
+from services.http_client import close_http_client
+from services.refresh_scheduler import get_refresh_scheduler
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize resources on startup"""
     await init_database()
     await init_cache()  # Initialize Redis cache
+    get_refresh_scheduler().start()  # Keep hot cached endpoints warm
     yield
+    await get_refresh_scheduler().stop()
+    await close_http_client()  # Release pooled upstream connections
 
 app = FastAPI(
     title="Supergraph Pro API",
@@ -28,6 +28,22 @@ nlp_parser = NLPStrategyParser()
 margin_sim = MarginSimulator()
 
 
+def _ensemble_forecast(current_price: float, days: int, iv: float):
+    """Run the ensemble forecaster on (mock) recent history"""
+    import numpy as np
+
+    # Generate mock historical prices for demo
+    historical = [current_price * (1 + np.random.uniform(-0.02, 0.02)) for _ in range(60)]
+    historical.append(current_price)
+
+    return forecaster.forecast(
+        current_price=current_price,
+        historical_prices=historical,
+        days=days,
+        base_iv=iv
+    )
+
+
 @router.get("/forecast/ensemble/{ticker}")
 async def get_ensemble_forecast(
     ticker: str,
@@ -37,24 +53,18 @@ async def get_ensemble_forecast(
 ):
     """
     Get hybrid ensemble forecast (Monte Carlo + GARCH + Trend)
+
+    Cached per parameter set; popular forecasts are recomputed in the
+    background before they expire.
     """
-    import asyncio
-    
-    # Generate mock historical prices for demo
-    import numpy as np
-    historical = [current_price * (1 + np.random.uniform(-0.02, 0.02)) for _ in range(60)]
-    historical.append(current_price)
-    
-    # Run in thread pool to avoid blocking event loop
-    result = await asyncio.to_thread(
-        forecaster.forecast,
-        current_price=current_price,
-        historical_prices=historical,
-        days=days,
-        base_iv=iv
-    )
-    
-    return result
+    from services.refresh_scheduler import get_refresh_scheduler
+
+    async def compute():
+        # Run in thread pool to avoid blocking event loop
+        return await asyncio.to_thread(_ensemble_forecast, current_price, days, iv)
+
+    key = f"forecast:{ticker}:{days}:{current_price}:{iv}"
+    return await get_refresh_scheduler().get_or_compute(key, compute)
 
 
 @router.get("/forecast/probability/{ticker}")
@@ -8,7 +8,7 @@ from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
-from services.montecarlo import monte_carlo_pop, price_distribution
+from services.montecarlo import monte_carlo_pop, price_distribution, expiration_curve
 
 router = APIRouter()
 
@@ -88,8 +88,8 @@ async def run_monte_carlo(request: MonteCarloRequest):
             num_simulations=request.num_simulations
         )
         
-        # Get price distribution
-        distribution = price_distribution(result.final_prices)
+        # Get price distribution (already folded in streaming mode)
+        distribution = result.distribution or price_distribution(result.final_prices)
         
         return {
             "spot": request.spot,
@@ -110,6 +110,27 @@ async def run_monte_carlo(request: MonteCarloRequest):
         raise HTTPException(status_code=400, detail=str(e))
 
 
+class PayoffRequest(BaseModel):
+    spot: float
+    legs: List[OptionLeg]
+    range_percent: float = 0.20
+    num_points: int = 200
+
+
+@router.post("/payoff")
+async def get_expiration_payoff(request: PayoffRequest):
+    """Expiration P/L curve for the payoff chart"""
+    try:
+        legs_dict = [leg.dict() for leg in request.legs]
+        
+        return {
+            "spot": request.spot,
+            **expiration_curve(legs_dict, request.spot, request.range_percent, request.num_points)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/rules")
 async def get_available_rules():
     """Get available strategy rules for backtesting"""
@@ -106,51 +106,55 @@ async def get_implied_volatility(ticker: str):
     return {"ticker": ticker, "iv": iv}
 
 
+async def _open_interest_profile(ticker: str):
+    """OI profile at the current price (None if the price is unavailable)"""
+    from services.open_interest import get_open_interest_profile
+
+    price_data = await alpaca.get_current_price(ticker)
+    if not price_data:
+        return None
+    return await get_open_interest_profile(ticker, price_data["price"])
+
+
+async def _gex_profile(ticker: str):
+    """GEX profile at the current price (None if the price is unavailable)"""
+    from services.open_interest import get_gex_profile
+
+    price_data = await alpaca.get_current_price(ticker)
+    if not price_data:
+        return None
+    return await get_gex_profile(ticker, price_data["price"])
+
+
 @router.get("/oi/{ticker}")
 async def get_open_interest(ticker: str):
-    """Get Open Interest profile for gamma pin analysis with caching."""
-    from services.open_interest import get_open_interest_profile
-    from services.cache_service import get_cache
-    
+    """Get Open Interest profile for gamma pin analysis with caching.
+
+    Hot tickers are refreshed ahead of expiry; a stale profile is served
+    while its refresh runs.
+    """
+    from services.refresh_scheduler import get_refresh_scheduler
+
     try:
-        # Get current price
-        price_data = await alpaca.get_current_price(ticker)
-        if not price_data:
-            raise HTTPException(status_code=404, detail="Could not fetch price")
-        
-        current_price = price_data["price"]
-        
-        # Try cache first
-        cache = await get_cache()
-        cache_key = cache.make_key("oi", ticker, int(current_price))
-        cached = await cache.get(cache_key)
-        
-        if cached:
-            return cached
-        
-        # Compute OI profile
-        result = await get_open_interest_profile(ticker, current_price)
-        
-        # Cache result
-        await cache.set(cache_key, result, cache.ttl["oi"])
-        
-        return result
-        
+        result = await get_refresh_scheduler().get_or_compute(f"oi:{ticker}", _open_interest_profile, None, ticker)
     except Exception as e:
         print(f"[OI] Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    if result is None:
+        raise HTTPException(status_code=404, detail="Could not fetch price")
+    return result
+
 
 @router.get("/gex/{ticker}")
 async def get_gamma_exposure(ticker: str):
-    """Get Gamma Exposure (GEX) profile"""
-    from services.open_interest import get_gex_profile
-    
-    price_data = await alpaca.get_current_price(ticker)
-    if not price_data:
+    """Get Gamma Exposure (GEX) profile (cached, refreshed ahead of expiry)"""
+    from services.refresh_scheduler import get_refresh_scheduler
+
+    result = await get_refresh_scheduler().get_or_compute(f"gex:{ticker}", _gex_profile, None, ticker)
+    if result is None:
         raise HTTPException(status_code=404, detail="Could not fetch price")
-    
-    return await get_gex_profile(ticker, price_data["price"])
+    return result
 
 
 @router.get("/pricing/local-vol/{ticker}")
@@ -257,3 +261,16 @@ async def compare_pricing_models(
     return results
 
 
+
+
+@router.get("/coalescing/stats")
+async def get_coalescing_stats():
+    """Hit/miss/coalesce counters for the shared market-data request layer"""
+    return alpaca.flight.get_stats()
+
+
+@router.get("/refresh/stats")
+async def get_refresh_stats():
+    """Stale-while-revalidate counters for the hot cached endpoints"""
+    from services.refresh_scheduler import get_refresh_scheduler
+    return get_refresh_scheduler().get_stats()
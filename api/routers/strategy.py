@@ -205,7 +205,7 @@ async def analyze_correlations(
     tickers: str = "SPY,QQQ,IWM,GLD,TLT",
     lookback: int = 60
 ):
-    """Get correlation matrix"""
+    """Get correlation matrix (lookback is capped at the 1260 retained bars)"""
     from services.correlation_matrix import analyze_correlations as analyze
     
     ticker_list = [t.strip() for t in tickers.split(",")]
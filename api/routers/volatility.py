@@ -4,7 +4,7 @@ API endpoints for volatility analysis
 """
 
 from fastapi import APIRouter, HTTPException
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
 from services.alpaca import AlpacaService
@@ -14,8 +14,16 @@ from services.volatility import (
     calculate_probability_cone,
     calculate_iv_smile
 )
-from services.maxpain import calculate_max_pain, calculate_gamma_exposure
-from services.greeks import calculate_all_greeks, calculate_portfolio_greeks
+from services.maxpain import (
+    calculate_max_pain, calculate_gamma_exposure,
+    calculate_max_pain_by_expiration, calculate_gamma_exposure_by_expiration
+)
+from services.greeks import (
+    calculate_all_greeks,
+    calculate_greeks_batch,
+    calculate_portfolio_greeks
+)
+from services.iv_solver import implied_vol_batch
 
 router = APIRouter()
 alpaca = AlpacaService()
@@ -30,6 +38,31 @@ class GreeksRequest(BaseModel):
     volatility: float
 
 
+class BatchGreeksRequest(BaseModel):
+    """Struct-of-arrays contract inputs for the columnar Greeks engine"""
+    option_type: List[str]
+    spot: List[float]
+    strike: List[float]
+    time_to_expiry: List[float]  # in years
+    volatility: List[float]
+    risk_free_rate: float = 0.05
+
+
+class BatchIVRequest(BaseModel):
+    """Struct-of-arrays quotes for the vectorized implied-vol solver"""
+    option_type: List[str]
+    price: List[float]
+    strike: List[float]
+    time_to_expiry: List[float]  # in years
+    spot: float
+    risk_free_rate: float = 0.05
+
+
+class PortfolioGreeksRequest(BaseModel):
+    positions: List[dict]
+    spy_price: float = 500
+
+
 @router.get("/surface/{ticker}")
 async def get_iv_surface(ticker: str):
     """Get 3D Implied Volatility Surface data"""
@@ -130,7 +163,7 @@ async def get_iv_smile(ticker: str, expiration: Optional[str] = None):
 
 
 @router.get("/maxpain/{ticker}")
-async def get_max_pain(ticker: str):
+async def get_max_pain(ticker: str, by_expiration: bool = False):
     """Calculate Max Pain price"""
     try:
         options = await alpaca.get_options_chain(ticker)
@@ -138,6 +171,15 @@ async def get_max_pain(ticker: str):
         
         price = current.get("price", 100) if current else 100
         
+        if by_expiration:
+            result = calculate_max_pain_by_expiration(options, price)
+            return {
+                "ticker": ticker,
+                "current_price": price,
+                **result["aggregate"],
+                "expirations": result["expirations"]
+            }
+        
         result = calculate_max_pain(options, price)
         
         return {
@@ -150,7 +192,7 @@ async def get_max_pain(ticker: str):
 
 
 @router.get("/gex/{ticker}")
-async def get_gamma_exposure(ticker: str):
+async def get_gamma_exposure(ticker: str, by_expiration: bool = False):
     """Calculate Gamma Exposure by strike"""
     try:
         options = await alpaca.get_options_chain(ticker)
@@ -158,6 +200,15 @@ async def get_gamma_exposure(ticker: str):
         
         price = current.get("price", 100) if current else 100
         
+        if by_expiration:
+            result = calculate_gamma_exposure_by_expiration(options, price)
+            return {
+                "ticker": ticker,
+                "current_price": price,
+                **result["aggregate"],
+                "expirations": result["expirations"]
+            }
+        
         result = calculate_gamma_exposure(options, price)
         
         return {
@@ -188,3 +239,62 @@ async def calculate_greeks(request: GreeksRequest):
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/greeks/batch")
+async def calculate_greeks_for_chain(request: BatchGreeksRequest):
+    """Calculate Greeks for many contracts in one vectorized pass"""
+    try:
+        result = calculate_greeks_batch(
+            option_type=request.option_type,
+            S=request.spot,
+            K=request.strike,
+            T=request.time_to_expiry,
+            r=request.risk_free_rate,
+            sigma=request.volatility
+        )
+        
+        return {
+            "count": len(request.strike),
+            "greeks": {name: values.tolist() for name, values in result.items()}
+        }
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/iv/batch")
+async def solve_implied_vols(request: BatchIVRequest):
+    """Invert a whole chain of option prices to implied vols in one pass"""
+    try:
+        solution = implied_vol_batch(
+            price=request.price,
+            S=request.spot,
+            K=request.strike,
+            T=request.time_to_expiry,
+            r=request.risk_free_rate,
+            option_type=request.option_type
+        )
+        
+        return {
+            "count": len(request.strike),
+            "implied_volatility": [
+                round(iv, 6) if ok else None
+                for iv, ok in zip(solution.iv.tolist(), solution.converged.tolist())
+            ],
+            "status": solution.status.tolist(),
+            "status_counts": solution.status_counts()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/greeks/portfolio")
+async def get_portfolio_greeks(request: PortfolioGreeksRequest):
+    """Aggregate net and beta-weighted Greeks across a book of positions"""
+    try:
+        return {
+            "positions": len(request.positions),
+            "greeks": calculate_portfolio_greeks(request.positions, request.spy_price)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -3,33 +3,67 @@ Alpaca API Service
 Wrapper for all Alpaca API interactions
 """
 
+import asyncio
 import os
-import requests
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 from dotenv import load_dotenv
 
+from services.http_client import PooledHTTPClient, get_http_client
+from services.single_flight import CoalesceConfig, SingleFlight, coalesced, get_single_flight
+
 # Load environment variables from keys.env
 load_dotenv("/home/aarav/Tradingview/keys.env")
 
 ALPACA_API_KEY = os.getenv("APCA_API_KEY_ID", "")
 ALPACA_API_SECRET = os.getenv("APCA_API_SECRET_KEY", "")
 ALPACA_ENDPOINT = os.getenv("APCA_ENDPOINT", "https://paper-api.alpaca.markets")
+ALPACA_DATA_ENDPOINT = os.getenv("APCA_DATA_ENDPOINT", "https://data.alpaca.markets")
+
+MULTI_SYMBOL_CHUNK = 100  # Symbols per multi-symbol data request
+BARS_PAGE_LIMIT = 10000  # Alpaca maximum bars per page
+
+# Synthetic futures: ticker -> (proxy ETF, price multiplier)
+SYNTHETIC_TICKERS = {"GC": ("GLD", 10.0)}  # Gold ~ 10x GLD
+
+
+def _chunks(items: List[str], size: int = MULTI_SYMBOL_CHUNK) -> List[List[str]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _bars_window(timeframe: str, limit: int) -> Tuple[datetime, datetime]:
+    """Start/end covering `limit` bars of a timeframe (with slack for closed sessions)"""
+    end = datetime.now()
+    
+    if timeframe == "1Day":
+        start = end - timedelta(days=limit * 2)
+    elif timeframe == "1Hour":
+        start = end - timedelta(hours=limit * 2)
+    else:
+        start = end - timedelta(minutes=limit * 5)
+    
+    return start, end
 
 
 class AlpacaService:
     """Async-ready Alpaca API wrapper"""
     
-    def __init__(self):
+    def __init__(self, http: Optional[PooledHTTPClient] = None,
+                 base_url: Optional[str] = None, data_url: Optional[str] = None,
+                 flight: Optional[SingleFlight] = None):
         self.api_key = ALPACA_API_KEY
         self.api_secret = ALPACA_API_SECRET
-        self.base_url = ALPACA_ENDPOINT
-        self.data_url = "https://data.alpaca.markets"
+        self.base_url = base_url or ALPACA_ENDPOINT
+        self.data_url = data_url or ALPACA_DATA_ENDPOINT
+        self.http = http or get_http_client()
+        # Shared across instances so every service's identical calls coalesce
+        self.flight = flight or get_single_flight()
         self.headers = {
             "APCA-API-KEY-ID": self.api_key,
             "APCA-API-SECRET-KEY": self.api_secret
         }
     
+    @coalesced(CoalesceConfig.PRICE_TTL)
     async def get_current_price(self, ticker: str) -> Optional[Dict]:
         """Fetch current stock price"""
         try:
@@ -45,7 +79,7 @@ class AlpacaService:
                 multiplier = 10.0
 
             url = f"{self.data_url}/v2/stocks/{target_ticker}/quotes/latest"
-            response = requests.get(url, headers=self.headers)
+            response = await self.http.get(url, headers=self.headers)
             
             if response.status_code == 200:
                 data = response.json()
@@ -76,13 +110,14 @@ class AlpacaService:
         """Fallback to last trade price"""
         try:
             url = f"{self.data_url}/v2/stocks/{ticker}/trades/latest"
-            response = requests.get(url, headers=self.headers)
+            response = await self.http.get(url, headers=self.headers)
             if response.status_code == 200:
                 return response.json().get("trade", {}).get("p")
             return None
         except:
             return None
     
+    @coalesced(CoalesceConfig.BARS_TTL)
     async def get_historical_bars(self, ticker: str, timeframe: str = "1Day", 
                                    limit: int = 100) -> List[Dict]:
         """Fetch historical OHLCV bars"""
@@ -97,14 +132,7 @@ class AlpacaService:
                 target_ticker = "GLD"
                 multiplier = 10.0
 
-            end = datetime.now()
-            
-            if timeframe == "1Day":
-                start = end - timedelta(days=limit * 2)
-            elif timeframe == "1Hour":
-                start = end - timedelta(hours=limit * 2)
-            else:
-                start = end - timedelta(minutes=limit * 5)
+            start, end = _bars_window(timeframe, limit)
             
             url = f"{self.data_url}/v2/stocks/{target_ticker}/bars"
             
@@ -120,7 +148,7 @@ class AlpacaService:
                 "feed": "sip"
             }
             
-            response = requests.get(url, headers=self.headers, params=params)
+            response = await self.http.get(url, headers=self.headers, params=params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -146,6 +174,7 @@ class AlpacaService:
             print(f"Error fetching bars: {e}")
             return []
     
+    @coalesced(CoalesceConfig.CHAIN_TTL)
     async def get_options_chain(self, ticker: str, expiration: Optional[str] = None) -> Dict:
         """Fetch options chain"""
         try:
@@ -155,7 +184,7 @@ class AlpacaService:
             if expiration:
                 params["expiration_date"] = expiration
             
-            response = requests.get(url, headers=self.headers, params=params)
+            response = await self.http.get(url, headers=self.headers, params=params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -236,6 +265,7 @@ class AlpacaService:
         
         return expirations
     
+    @coalesced(CoalesceConfig.IV_TTL)
     async def get_implied_volatility(self, ticker: str, current_price: float) -> float:
         """Calculate average IV from ATM options"""
         try:
@@ -252,6 +282,132 @@ class AlpacaService:
         except:
             return 0.30
     
+    @coalesced(CoalesceConfig.PRICE_TTL)
+    async def get_snapshots(self, tickers: List[str]) -> Dict[str, Dict]:
+        """
+        Fetch latest quote/trade/bar snapshots for many tickers
+        
+        Symbols are split into MULTI_SYMBOL_CHUNK-sized requests that run
+        concurrently; synthetic tickers are fetched via their proxy.
+        
+        Returns:
+            Dict mapping each requested ticker to its raw snapshot
+            (tickers the API returned nothing for are omitted)
+        """
+        targets = {ticker: SYNTHETIC_TICKERS.get(ticker, (ticker, 1.0))[0] for ticker in tickers}
+        symbols = list(dict.fromkeys(targets.values()))
+        
+        async def fetch(chunk: List[str]) -> Dict:
+            try:
+                url = f"{self.data_url}/v2/stocks/snapshots"
+                params = {"symbols": ",".join(chunk), "feed": "sip"}
+                response = await self.http.get(url, headers=self.headers, params=params)
+                if response.status_code == 200:
+                    return response.json() or {}
+                return {}
+            except Exception as e:
+                print(f"Error fetching snapshots: {e}")
+                return {}
+        
+        snapshots = {}
+        for result in await asyncio.gather(*[fetch(chunk) for chunk in _chunks(symbols)]):
+            snapshots.update(result)
+        
+        return {ticker: snapshots[target] for ticker, target in targets.items() if snapshots.get(target)}
+    
+    async def get_current_prices(self, tickers: List[str]) -> Dict[str, Dict]:
+        """
+        Current prices for many tickers from batched snapshots
+        
+        Returns:
+            Dict mapping ticker to the get_current_price result shape
+        """
+        prices = {}
+        
+        for ticker, snapshot in (await self.get_snapshots(tickers)).items():
+            multiplier = SYNTHETIC_TICKERS.get(ticker, (ticker, 1.0))[1]
+            quote = snapshot.get("latestQuote") or {}
+            bid = quote.get("bp", 0) or 0
+            ask = quote.get("ap", 0) or 0
+            
+            # Mid when both sides are quoted, else the last trade
+            price = (bid + ask) / 2 if bid and ask else (snapshot.get("latestTrade") or {}).get("p")
+            if not price:
+                continue
+            
+            prices[ticker] = {
+                "ticker": ticker,
+                "price": price * multiplier,
+                "bid": bid * multiplier,
+                "ask": ask * multiplier,
+                "timestamp": datetime.now().isoformat()
+            }
+        
+        return prices
+    
+    @coalesced(CoalesceConfig.BARS_TTL)
+    async def get_multi_bars(self, tickers: List[str], timeframe: str = "1Day",
+                             limit: int = 100) -> Dict[str, List[Dict]]:
+        """
+        Fetch historical OHLCV bars for many tickers
+        
+        Each chunk of symbols is one paginated multi-symbol request, so a
+        100-ticker universe costs one or two calls instead of 100.
+        
+        Returns:
+            Dict mapping each ticker to its latest `limit` bars (as
+            get_historical_bars)
+        """
+        targets = {ticker: SYNTHETIC_TICKERS.get(ticker, (ticker, 1.0)) for ticker in tickers}
+        symbols = list(dict.fromkeys(target for target, _ in targets.values()))
+        start, end = _bars_window(timeframe, limit)
+        
+        async def fetch(chunk: List[str]) -> Dict[str, List[Dict]]:
+            bars: Dict[str, List[Dict]] = {}
+            params = {
+                "symbols": ",".join(chunk),
+                "timeframe": timeframe,
+                "start": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "end": end.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "limit": BARS_PAGE_LIMIT,
+                "feed": "sip"
+            }
+            try:
+                while True:
+                    url = f"{self.data_url}/v2/stocks/bars"
+                    response = await self.http.get(url, headers=self.headers, params=params)
+                    if response.status_code != 200:
+                        break
+                    data = response.json()
+                    for symbol, symbol_bars in (data.get("bars") or {}).items():
+                        bars.setdefault(symbol, []).extend(symbol_bars)
+                    if not data.get("next_page_token"):
+                        break
+                    params["page_token"] = data["next_page_token"]
+            except Exception as e:
+                print(f"Error fetching bars: {e}")
+            return bars
+        
+        raw: Dict[str, List[Dict]] = {}
+        for result in await asyncio.gather(*[fetch(chunk) for chunk in _chunks(symbols)]):
+            raw.update(result)
+        
+        # Fan results back out to the requested tickers, latest `limit` bars each
+        return {
+            ticker: [
+                {
+                    "timestamp": bar.get("t", ""),
+                    "open": bar.get("o", 0) * multiplier,
+                    "high": bar.get("h", 0) * multiplier,
+                    "low": bar.get("l", 0) * multiplier,
+                    "close": bar.get("c", 0) * multiplier,
+                    "volume": bar.get("v", 0)
+                }
+                for bar in raw.get(target, [])[-limit:]
+            ]
+            for ticker, (target, multiplier) in targets.items()
+        }
+    
     async def submit_order(self, symbol: str, qty: int, side: str,
                            order_type: str = "market", 
                            time_in_force: str = "day") -> Dict:
@@ -266,7 +422,7 @@ class AlpacaService:
                 "time_in_force": time_in_force
             }
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = await self.http.post(url, headers=self.headers, json=payload)
             
             if response.status_code in [200, 201]:
                 return response.json()
@@ -1,37 +1,174 @@
 """
-Redis Caching Layer
+Tiered Caching Layer
 Provides caching for expensive operations like regime detection and OI calculations.
+
+L1 is a bounded in-process LRU with TTLs; L2 is an optional shared Redis.
 """
 
-import json
-from typing import Optional, Dict, Any
-from datetime import timedelta
 import asyncio
+import fnmatch
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+from typing import Optional, Dict, Any, Iterable, List, Set, Tuple
+
+from services.single_flight import SingleFlight
 
 try:
     import redis.asyncio as redis
     HAS_REDIS = True
 except ImportError:
     HAS_REDIS = False
-    print("⚠️ redis not installed. Caching disabled. Install with: pip install redis")
+    print("⚠️ redis not installed. Using in-process cache only. Install with: pip install redis")
+
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+L1_MAX_BYTES = int(os.getenv("CACHE_L1_MAX_BYTES", str(64 * 1024 * 1024)))
+L1_MAX_ENTRIES = int(os.getenv("CACHE_L1_MAX_ENTRIES", "10000"))
+DEFAULT_TTL = 300  # seconds
+STALE_FACTOR = 1.0  # Stale values stay servable for this multiple of their TTL
+
+
+def _estimate_size(value: Any, depth: int = 0) -> int:
+    """Approximate in-memory footprint of a cached value, in bytes"""
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes + 128
+
+    size = sys.getsizeof(value)
+    if depth >= 6:
+        return size
+    if isinstance(value, dict):
+        size += sum(_estimate_size(k, depth + 1) + _estimate_size(v, depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_estimate_size(v, depth + 1) for v in value)
+    return size
+
+
+@dataclass
+class CacheEntry:
+    """One L1 value with its freshness window"""
+    value: Any
+    fresh_until: float  # Epoch seconds; served normally before this
+    stale_until: float  # Epoch seconds; served stale (and refreshed) before this
+    size: int
+    tags: Tuple[str, ...] = ()
+
+    @property
+    def ttl_remaining(self) -> float:
+        return self.fresh_until - time.time()
+
+
+class L1Cache:
+    """
+    Bounded in-process LRU with per-entry TTLs and tag index
+
+    Evicts least-recently-used entries once either the byte budget or
+    the entry count is exceeded. Values are stored as Python objects, so
+    hits cost a dict lookup rather than a deserialization; callers must
+    treat them as read-only.
+    """
+
+    def __init__(self, max_bytes: int = L1_MAX_BYTES, max_entries: int = L1_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.size = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Entry if still servable (fresh or stale), else None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.stale_until <= time.time():
+            self.delete(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        self.delete(key)
+        self._entries[key] = entry
+        self.size += entry.size
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while self._entries and (self.size > self.max_bytes or len(self._entries) > self.max_entries):
+            oldest = next(iter(self._entries))
+            self.delete(oldest)
+            self.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self.size -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return True
+
+    def keys_for_tag(self, tag: str) -> List[str]:
+        return list(self._tags.get(tag, ()))
+
+    def keys_matching(self, pattern: str) -> List[str]:
+        return [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]
+
+    def clear(self):
+        self._entries.clear()
+        self._tags.clear()
+        self.size = 0
 
 
 class CacheService:
     """
-    Async Redis cache service for API responses.
-    
+    Tiered cache service for API responses.
+
     Caches:
     - Regime detection results (TTL: 60s)
     - Open Interest profiles (TTL: 120s)
     - Ensemble forecasts (TTL: 300s)
     - Market data (TTL: 30s)
+
+    Lookups go L1 (in-process LRU) then L2 (Redis, if connected), and L2
+    hits are promoted to L1. L2 values are pickled envelopes carrying
+    their freshness window and tags, so every process sees the same
+    expiry. The namespace of a key is the part before the first ':';
+    its TTL comes from `ttl` unless one is passed explicitly, and every
+    key is tagged with "ns:<namespace>".
+
+    The L2 Redis must be private to this application (values are pickled).
     """
-    
-    def __init__(self, redis_url: str = "redis://localhost:6379"):
+
+    def __init__(
+        self,
+        redis_url: str = REDIS_URL,
+        max_bytes: int = L1_MAX_BYTES,
+        max_entries: int = L1_MAX_ENTRIES
+    ):
         self.redis_url = redis_url
-        self._client: Optional[redis.Redis] = None
+        self._client: Optional["redis.Redis"] = None
         self._enabled = HAS_REDIS
-        
+        self.l1 = L1Cache(max_bytes, max_entries)
+        self._flight = SingleFlight()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self.stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "stale_served": 0, "refreshes": 0, "refresh_errors": 0}
+
         # TTL settings (in seconds)
         self.ttl = {
             "regime": 60,        # 1 minute
@@ -39,135 +176,315 @@ class CacheService:
             "forecast": 300,     # 5 minutes
             "price": 30,         # 30 seconds
             "sentiment": 180,    # 3 minutes
+            "candles": 60,
+            "chain": 30,
+            "greeks": 10,
+            "gex": 60,
+            "iv": 30,
         }
-    
+
+    @property
+    def l2_connected(self) -> bool:
+        return self._enabled and self._client is not None
+
     async def connect(self):
-        """Initialize Redis connection."""
+        """Initialize the Redis (L2) connection; L1 works without it."""
         if not self._enabled:
             return
-        
+
         try:
-            self._client = await redis.from_url(
-                self.redis_url,
-                encoding="utf-8",
-                decode_responses=True
-            )
+            self._client = redis.from_url(self.redis_url, decode_responses=False)
             await self._client.ping()
-            print("[Cache] Connected to Redis")
+            print("[Cache] Connected to Redis (L2)")
         except Exception as e:
-            print(f"[Cache] Redis connection failed: {e}. Caching disabled.")
+            print(f"[Cache] Redis connection failed: {e}. Using in-process cache only.")
+            self._client = None
             self._enabled = False
-    
+
     async def disconnect(self):
         """Close Redis connection."""
         if self._client:
             await self._client.close()
-    
-    async def get(self, key: str) -> Optional[Dict]:
-        """Get cached value."""
-        if not self._enabled or not self._client:
-            return None
-        
-        try:
-            value = await self._client.get(key)
-            if value:
-                return json.loads(value)
-        except Exception as e:
-            print(f"[Cache] Get error for {key}: {e}")
-        
+            self._client = None
+
+    def namespace(self, key: str) -> str:
+        return key.split(":", 1)[0]
+
+    def ttl_for(self, key: str, ttl: Optional[int] = None) -> float:
+        """Explicit TTL, else the namespace TTL, else DEFAULT_TTL"""
+        return ttl if ttl is not None else self.ttl.get(self.namespace(key), DEFAULT_TTL)
+
+    async def lookup(self, key: str) -> Optional[CacheEntry]:
+        """Servable entry from L1, else L2 (promoted to L1)"""
+        entry = self.l1.get(key)
+        if entry is not None:
+            self.stats["l1_hits"] += 1
+            return entry
+
+        if self.l2_connected:
+            try:
+                blob = await self._client.get(key)
+                if blob:
+                    fresh_until, stale_until, tags, value = pickle.loads(blob)
+                    if stale_until > time.time():
+                        entry = CacheEntry(value, fresh_until, stale_until, _estimate_size(value), tuple(tags))
+                        self.l1.set(key, entry)
+                        self.stats["l2_hits"] += 1
+                        return entry
+            except Exception as e:
+                print(f"[Cache] Get error for {key}: {e}")
+
+        self.stats["misses"] += 1
         return None
-    
-    async def set(self, key: str, value: Dict, ttl: Optional[int] = None):
-        """Set cached value with TTL."""
-        if not self._enabled or not self._client:
-            return
-        
-        try:
-            await self._client.set(
-                key,
-                json.dumps(value),
-                ex=ttl or 300  # Default 5 minutes
-            )
-        except Exception as e:
-            print(f"[Cache] Set error for {key}: {e}")
-    
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get cached value (fresh only)."""
+        entry = await self.lookup(key)
+        if entry is None or entry.ttl_remaining <= 0:
+            return None
+        return entry.value
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Iterable[str] = ()):
+        """Set cached value with TTL (namespace default) and optional tags."""
+        ttl = self.ttl_for(key, ttl)
+        now = time.time()
+        tags = tuple(dict.fromkeys((f"ns:{self.namespace(key)}", *tags)))
+        entry = CacheEntry(value, now + ttl, now + ttl * (1 + STALE_FACTOR), _estimate_size(value), tags)
+        self.l1.set(key, entry)
+
+        if self.l2_connected:
+            try:
+                expire_ms = int(ttl * (1 + STALE_FACTOR) * 1000)
+                blob = pickle.dumps((entry.fresh_until, entry.stale_until, tags, value), protocol=pickle.HIGHEST_PROTOCOL)
+                async with self._client.pipeline(transaction=False) as pipe:
+                    pipe.set(key, blob, px=expire_ms)
+                    for tag in tags:
+                        pipe.sadd(f"tag:{tag}", key)
+                        pipe.pttl(f"tag:{tag}")
+                    results = await pipe.execute()
+                
+                # A tag set must outlive its members: give it this key's
+                # expiry when it has none (PTTL -1, just created) or a
+                # shorter one. PEXPIRE NX/GT would do this server-side but
+                # needs Redis 7
+                extend = [tag for tag, remaining in zip(tags, results[2::2]) if remaining < expire_ms]
+                if extend:
+                    async with self._client.pipeline(transaction=False) as pipe:
+                        for tag in extend:
+                            pipe.pexpire(f"tag:{tag}", expire_ms)
+                        await pipe.execute()
+            except Exception as e:
+                print(f"[Cache] Set error for {key}: {e}")
+
     async def delete(self, key: str):
         """Delete cached value."""
-        if not self._enabled or not self._client:
-            return
-        
-        try:
-            await self._client.delete(key)
-        except Exception as e:
-            print(f"[Cache] Delete error for {key}: {e}")
-    
+        self.l1.delete(key)
+
+        if self.l2_connected:
+            try:
+                await self._client.delete(key)
+            except Exception as e:
+                print(f"[Cache] Delete error for {key}: {e}")
+
+    async def invalidate_tags(self, *tags: str) -> int:
+        """
+        Delete every key carrying any of the tags
+
+        Returns:
+            Number of L1 entries removed (L2 keys are removed as well)
+        """
+        removed = 0
+        for tag in tags:
+            for key in self.l1.keys_for_tag(tag):
+                removed += self.l1.delete(key)
+
+        if self.l2_connected:
+            try:
+                for tag in tags:
+                    members = await self._client.smembers(f"tag:{tag}")
+                    if members:
+                        await self._client.delete(*members)
+                    await self._client.delete(f"tag:{tag}")
+            except Exception as e:
+                print(f"[Cache] Tag invalidation error: {e}")
+
+        return removed
+
     async def clear_pattern(self, pattern: str):
-        """Clear all keys matching pattern."""
-        if not self._enabled or not self._client:
+        """
+        Clear all keys matching pattern.
+
+        Namespace patterns ("oi:*") use the namespace tag; anything else
+        is matched in L1 and incrementally SCANned in L2 (never KEYS).
+        """
+        if pattern.endswith(":*") and "*" not in pattern[:-2] and ":" not in pattern[:-2]:
+            await self.invalidate_tags(f"ns:{pattern[:-2]}")
             return
-        
-        try:
-            keys = await self._client.keys(pattern)
-            if keys:
-                await self._client.delete(*keys)
-                print(f"[Cache] Cleared {len(keys)} keys matching {pattern}")
-        except Exception as e:
-            print(f"[Cache] Clear pattern error: {e}")
-    
+
+        for key in self.l1.keys_matching(pattern):
+            self.l1.delete(key)
+
+        if self.l2_connected:
+            try:
+                batch = []
+                async for key in self._client.scan_iter(match=pattern, count=500):
+                    batch.append(key)
+                    if len(batch) >= 500:
+                        await self._client.delete(*batch)
+                        batch = []
+                if batch:
+                    await self._client.delete(*batch)
+            except Exception as e:
+                print(f"[Cache] Clear pattern error: {e}")
+
     def make_key(self, prefix: str, *args) -> str:
         """Generate cache key."""
         parts = [prefix] + [str(arg) for arg in args]
         return ":".join(parts)
-    
+
+    async def _compute(self, compute_fn, *args, **kwargs) -> Any:
+        result = compute_fn(*args, **kwargs)
+        if inspect.isawaitable(result):
+            return await result
+        return result
+
+    async def recompute(self, key: str, compute_fn, ttl: Optional[int] = None,
+                        tags: Iterable[str] = (), *args, **kwargs) -> Any:
+        """Compute a key now and store the result (concurrent calls share one run)"""
+        async def run():
+            value = await self._compute(compute_fn, *args, **kwargs)
+            if value is not None:
+                await self.set(key, value, ttl, tags)
+            return value
+
+        # Concurrent misses for one key share a single computation
+        return await self._flight.do(key, run, ttl=0)
+
+    def refresh_in_background(self, key: str, compute_fn, ttl=None, tags=(), *args, **kwargs) -> bool:
+        """
+        Recompute a key without blocking the caller
+
+        Returns:
+            False if a refresh of this key is already running
+        """
+        task = self._refreshing.get(key)
+        if task is not None and not task.done():
+            return False
+
+        async def refresh():
+            try:
+                await self.recompute(key, compute_fn, ttl, tags, *args, **kwargs)
+                self.stats["refreshes"] += 1
+            except Exception as e:
+                self.stats["refresh_errors"] += 1
+                print(f"[Cache] Refresh error for {key}: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.get_running_loop().create_task(refresh())
+        return True
+
     async def get_or_compute(
         self,
         key: str,
         compute_fn,
         ttl: Optional[int] = None,
         *args,
+        tags: Iterable[str] = (),
         **kwargs
     ) -> Any:
         """
         Get from cache or compute and cache result.
-        
+
+        A stale value (past its TTL but within the stale window) is
+        returned immediately while a background task recomputes it.
+
         Args:
             key: Cache key
-            compute_fn: Async function to compute value if not cached
-            ttl: Time to live in seconds
+            compute_fn: Sync or async function to compute value if not cached
+            ttl: Time to live in seconds (default: namespace TTL)
             *args, **kwargs: Arguments to pass to compute_fn
-        
+            tags: Extra invalidation tags
+
         Returns:
             Cached or computed value
         """
-        # Try cache first
-        cached = await self.get(key)
-        if cached is not None:
-            return cached
-        
-        # Compute value
-        if asyncio.iscoroutinefunction(compute_fn):
-            value = await compute_fn(*args, **kwargs)
-        else:
-            value = compute_fn(*args, **kwargs)
-        
-        # Cache result
-        await self.set(key, value, ttl)
-        
-        return value
+        entry = await self.lookup(key)
+        if entry is not None:
+            if entry.ttl_remaining <= 0:
+                self.stats["stale_served"] += 1
+                self.refresh_in_background(key, compute_fn, ttl, tags, *args, **kwargs)
+            return entry.value
+
+        return await self.recompute(key, compute_fn, ttl, tuple(tags), *args, **kwargs)
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        lookups = self.stats["l1_hits"] + self.stats["l2_hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate_pct": round(100 * (lookups - self.stats["misses"]) / lookups, 1) if lookups else 0.0,
+            "l1_entries": len(self.l1),
+            "l1_bytes": self.l1.size,
+            "l1_evictions": self.l1.evictions,
+            "l2_connected": self.l2_connected,
+            "refreshing": len(self._refreshing)
+        }
+
+
+def _generate_key(prefix: str, *args, **kwargs) -> str:
+    """Generate a cache key from prefix and arguments"""
+    key_parts = [prefix] + [str(a) for a in args]
+    if kwargs:
+        key_parts.append(hashlib.md5(json.dumps(kwargs, sort_keys=True, default=str).encode()).hexdigest()[:8])
+    return ":".join(key_parts)
+
+
+def cached(prefix: str, ttl: Optional[int] = None, tags: Iterable[str] = ()):
+    """
+    Decorator for caching function results
+
+    The prefix is the namespace, so ttl defaults to the namespace TTL.
+    Expired results are served stale while being recomputed.
+
+    Usage:
+        @cached("price", ttl=5)
+        async def get_price(ticker: str):
+            ...
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = _generate_key(prefix, *args, **kwargs)
+            return await get_cache_instance().get_or_compute(key, func, ttl, *args, tags=tags, **kwargs)
+
+        return wrapper
+    return decorator
 
 
 # Singleton
 _cache: Optional[CacheService] = None
+_connected = False
 
-async def get_cache() -> CacheService:
-    """Get or create cache service singleton."""
+
+def get_cache_instance() -> CacheService:
+    """Cache service singleton (L2 is attached by get_cache/init_cache)."""
     global _cache
     if _cache is None:
         _cache = CacheService()
-        await _cache.connect()
     return _cache
 
 
+async def get_cache() -> CacheService:
+    """Get or create cache service singleton."""
+    global _connected
+    cache = get_cache_instance()
+    if not _connected:
+        _connected = True
+        await cache.connect()
+    return cache
+
+
 async def init_cache():
     """Initialize cache on startup."""
     cache = await get_cache()
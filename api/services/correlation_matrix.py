@@ -3,21 +3,34 @@ Correlation Trading Matrix
 Analyze correlations between assets for pairs trading and hedging
 """
 
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 import math
 import random
 from datetime import datetime, timedelta
 
+import numpy as np
+
+
+def _log_returns(prices: np.ndarray) -> np.ndarray:
+    """Log returns down axis 0, zero where the previous price is not positive"""
+    prev, curr = prices[:-1], prices[1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.log(curr / prev)
+    return np.where(prev > 0, returns, 0.0)
+
+
+def _normalize(cov: np.ndarray) -> np.ndarray:
+    """Covariance to correlation; pairs with a zero-variance leg get 0"""
+    std = np.sqrt(np.maximum(np.diag(cov), 0.0))
+    denom = np.outer(std, std)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = np.where(denom > 0, cov / denom, 0.0)
+    return np.clip(corr, -1.0, 1.0)
+
 
 def calculate_returns(prices: List[float]) -> List[float]:
     """Calculate log returns from price series"""
-    returns = []
-    for i in range(1, len(prices)):
-        if prices[i-1] > 0:
-            returns.append(math.log(prices[i] / prices[i-1]))
-        else:
-            returns.append(0)
-    return returns
+    return _log_returns(np.asarray(prices, dtype=np.float64)).tolist()
 
 
 def calculate_correlation(returns1: List[float], returns2: List[float]) -> float:
@@ -26,20 +39,17 @@ def calculate_correlation(returns1: List[float], returns2: List[float]) -> float
     if n < 2:
         return 0
     
-    mean1 = sum(returns1[:n]) / n
-    mean2 = sum(returns2[:n]) / n
-    
-    numerator = sum((returns1[i] - mean1) * (returns2[i] - mean2) for i in range(n))
+    x = np.asarray(returns1[:n], dtype=np.float64)
+    y = np.asarray(returns2[:n], dtype=np.float64)
+    x = x - x.mean()
+    y = y - y.mean()
     
-    var1 = sum((r - mean1) ** 2 for r in returns1[:n])
-    var2 = sum((r - mean2) ** 2 for r in returns2[:n])
-    
-    denominator = math.sqrt(var1 * var2)
+    denominator = math.sqrt(float(x @ x) * float(y @ y))
     
     if denominator == 0:
         return 0
     
-    return numerator / denominator
+    return float(x @ y) / denominator
 
 
 def calculate_beta(asset_returns: List[float], market_returns: List[float]) -> float:
@@ -63,6 +73,131 @@ def calculate_beta(asset_returns: List[float], market_returns: List[float]) -> f
     return correlation * std_asset / std_market
 
 
+DEFAULT_MAX_HISTORY = 1260  # Bars retained per ticker (~5 years of daily bars)
+PAIR_CHUNK = 4096  # Candidate pairs per vectorized spread computation
+
+
+class RollingCovariance:
+    """
+    Covariance of return rows, maintained in O(n^2) per new row
+    
+    Fixed-window mode keeps the column sums and cross-product matrix of
+    the last `window` rows; exponentially weighted mode keeps the weighted
+    mean and covariance. Both are seeded with one matrix product over the
+    history.
+    """
+    
+    def __init__(
+        self,
+        returns: np.ndarray,
+        window: Optional[int] = None,
+        halflife: Optional[float] = None
+    ):
+        if (window is None) == (halflife is None):
+            raise ValueError("Specify exactly one of window or halflife")
+        
+        self.window = window
+        self.halflife = halflife
+        self.alpha = None if halflife is None else 1.0 - 0.5 ** (1.0 / halflife)
+        self.reset(returns)
+    
+    def reset(self, returns: np.ndarray):
+        """Re-seed from a (rows, assets) block of return history"""
+        self.updates = 0
+        n_assets = returns.shape[1]
+        
+        if self.window is not None:
+            rows = returns[-self.window:]
+            self.count = len(rows)
+            self.sums = rows.sum(axis=0)
+            self.products = rows.T @ rows
+            return
+        
+        self.count = len(returns)
+        if self.count == 0:
+            self.mean = np.zeros(n_assets)
+            self.cov = np.zeros((n_assets, n_assets))
+            return
+        
+        weights = (1.0 - self.alpha) ** np.arange(self.count - 1, -1, -1)
+        weights /= weights.sum()
+        self.mean = weights @ returns
+        centered = returns - self.mean
+        self.cov = centered.T @ (centered * weights[:, None])
+    
+    def update(self, row: np.ndarray, dropped: Optional[np.ndarray] = None):
+        """
+        Fold in a new return row
+        
+        Args:
+            row: Returns of every asset for the new bar
+            dropped: Row leaving a full fixed window (None while filling)
+        """
+        self.updates += 1
+        
+        if self.window is not None:
+            self.sums += row
+            self.products += np.outer(row, row)
+            if dropped is None:
+                self.count += 1
+            else:
+                self.sums -= dropped
+                self.products -= np.outer(dropped, dropped)
+            return
+        
+        if self.count == 0:
+            self.mean = row.astype(np.float64)
+        else:
+            delta = row - self.mean
+            self.mean += self.alpha * delta
+            self.cov = (1.0 - self.alpha) * (self.cov + self.alpha * np.outer(delta, delta))
+        self.count += 1
+    
+    def covariance(self) -> np.ndarray:
+        """Population covariance matrix"""
+        if self.window is None:
+            return self.cov
+        
+        if self.count == 0:
+            return np.zeros_like(self.products)
+        
+        mean = self.sums / self.count
+        cov = self.products / self.count - np.outer(mean, mean)
+        # Variance lost to cancellation (constant returns) is treated as zero
+        flat = np.diag(cov) <= 1e-12 * np.diag(self.products) / self.count
+        cov[flat, :] = 0.0
+        cov[:, flat] = 0.0
+        return cov
+    
+    def correlation(self) -> np.ndarray:
+        """Correlation matrix; zero until two rows have been seen"""
+        if self.count < 2:
+            return np.zeros((len(self.covariance()),) * 2)
+        return _normalize(self.covariance())
+    
+    def pair_correlation(self, i: int, j: int) -> float:
+        """Correlation of one pair without forming the full matrix"""
+        if self.count < 2:
+            return 0.0
+        
+        if self.window is None:
+            cov_ij, var_i, var_j = self.cov[i, j], self.cov[i, i], self.cov[j, j]
+        else:
+            mean_i, mean_j = self.sums[i] / self.count, self.sums[j] / self.count
+            cov_ij = self.products[i, j] / self.count - mean_i * mean_j
+            var_i = self.products[i, i] / self.count - mean_i * mean_i
+            var_j = self.products[j, j] / self.count - mean_j * mean_j
+            if var_i <= 1e-12 * self.products[i, i] / self.count:
+                var_i = 0.0
+            if var_j <= 1e-12 * self.products[j, j] / self.count:
+                var_j = 0.0
+        
+        denominator = math.sqrt(max(var_i, 0.0) * max(var_j, 0.0))
+        if denominator == 0:
+            return 0.0
+        return float(max(-1.0, min(1.0, cov_ij / denominator)))
+
+
 class CorrelationMatrix:
     """
     Multi-asset Correlation Matrix
@@ -72,16 +207,163 @@ class CorrelationMatrix:
     - Correlation breakdown detection
     - Pairs trading opportunities
     - Hedge ratio calculation
+    
+    Prices are held as one (bars, tickers) array. Each lookback that is
+    queried gets a RollingCovariance that append_prices keeps current in
+    O(n^2) per bar, so repeated matrix, pairs and breakdown queries never
+    rescan the history.
+    
+    History is capped at max_history returns (1260 bars, about five years
+    of daily data, by default): older bars are dropped, longer lookbacks
+    are clamped to the cap, and "all history" means the retained window.
     """
     
-    def __init__(self):
-        self.price_data: Dict[str, List[float]] = {}
-        self.returns_data: Dict[str, List[float]] = {}
+    def __init__(self, max_history: int = DEFAULT_MAX_HISTORY):
+        self.max_history = max_history
+        self.tickers: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._prices = np.empty((0, 0))
+        self._size = 0
+        self._pending: Dict[str, np.ndarray] = {}
+        self._windows: Dict[int, RollingCovariance] = {}
+        self._ewm: Dict[float, RollingCovariance] = {}
+    
+    @property
+    def prices(self) -> np.ndarray:
+        """(bars, tickers) retained price history (at most max_history + 1 bars), oldest first"""
+        self._sync()
+        # The buffer holds up to twice the retention between compactions
+        return self._prices[max(self._size - (self.max_history + 1), 0):self._size]
+    
+    @property
+    def returns(self) -> np.ndarray:
+        """(bars - 1, tickers) log returns"""
+        return _log_returns(self.prices)
+    
+    @property
+    def price_data(self) -> Dict[str, np.ndarray]:
+        prices = self.prices
+        return {ticker: prices[:, i] for i, ticker in enumerate(self.tickers)}
+    
+    @property
+    def returns_data(self) -> Dict[str, np.ndarray]:
+        returns = self.returns
+        return {ticker: returns[:, i] for i, ticker in enumerate(self.tickers)}
     
     def add_price_series(self, ticker: str, prices: List[float]):
-        """Add price data for an asset"""
-        self.price_data[ticker] = prices
-        self.returns_data[ticker] = calculate_returns(prices)
+        """
+        Add price data for an asset
+        
+        Series are aligned on their most recent bar and trimmed to the
+        shortest one; the array is rebuilt once, on the next query.
+        """
+        if not self._pending:
+            self._pending = dict(self.price_data)
+        self._pending[ticker] = np.asarray(prices, dtype=np.float64)
+    
+    def set_prices(self, tickers: Sequence[str], prices: np.ndarray):
+        """Replace all data with a (bars, tickers) price block"""
+        prices = np.asarray(prices, dtype=np.float64).reshape(-1, len(tickers))
+        prices = prices[-(self.max_history + 1):]
+        
+        self._prices = np.empty((max(2 * (self.max_history + 1), 64), len(tickers)))
+        self._prices[:len(prices)] = prices
+        self._size = len(prices)
+        self._pending = {}
+        self.tickers = list(tickers)
+        self._index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self._windows.clear()
+        self._ewm.clear()
+    
+    def _sync(self):
+        if not self._pending:
+            return
+        tickers, series = list(self._pending), list(self._pending.values())
+        length = min(len(p) for p in series)
+        self.set_prices(tickers, np.column_stack([p[len(p) - length:] for p in series]))
+    
+    def _return_rows(self, start: int, stop: int) -> np.ndarray:
+        """Return rows start..stop-1 (row k is the move into price bar k + 1)"""
+        return _log_returns(self._prices[start:stop + 1])
+    
+    def append_prices(self, prices: Union[Dict[str, float], Sequence[float]]):
+        """
+        Append one bar for every ticker and update tracked covariances
+        
+        Args:
+            prices: Latest price per ticker, as a dict or in `tickers` order
+        """
+        self._sync()
+        if not self.tickers and isinstance(prices, dict):
+            self.set_prices(list(prices), [list(prices.values())])
+            return
+        
+        if isinstance(prices, dict):
+            row = np.array([prices[ticker] for ticker in self.tickers], dtype=np.float64)
+        else:
+            row = np.asarray(prices, dtype=np.float64)
+        
+        if self._size:
+            n_returns = self._size - 1
+            new_return = _log_returns(np.vstack((self._prices[self._size - 1], row)))[0]
+            
+            for window, state in self._windows.items():
+                dropped = None
+                if n_returns >= window:
+                    dropped = self._return_rows(n_returns - window, n_returns - window + 1)[0]
+                state.update(new_return, dropped)
+            for state in self._ewm.values():
+                state.update(new_return)
+        
+        if self._size == len(self._prices):
+            # Compact to the retained history before the buffer overflows
+            keep = self.max_history + 1
+            self._prices[:keep] = self._prices[self._size - keep:self._size]
+            self._size = keep
+        self._prices[self._size] = row
+        self._size += 1
+        
+        # Re-seed fixed windows once per window length to stop rounding drift
+        for window, state in self._windows.items():
+            if state.updates >= window:
+                state.reset(self._return_rows(max(self._size - 1 - window, 0), self._size - 1))
+    
+    def rolling_covariance(self, lookback: int) -> RollingCovariance:
+        """Tracked fixed-window state for a lookback, seeded on first use"""
+        self._sync()
+        window = max(min(lookback, self.max_history), 1)
+        state = self._windows.get(window)
+        if state is None:
+            n_returns = max(self._size - 1, 0)
+            state = RollingCovariance(self._return_rows(max(n_returns - window, 0), n_returns), window=window)
+            self._windows[window] = state
+        return state
+    
+    def ewm_covariance(self, halflife: float) -> RollingCovariance:
+        """Tracked exponentially weighted state, seeded on first use"""
+        self._sync()
+        state = self._ewm.get(halflife)
+        if state is None:
+            state = RollingCovariance(self.returns, halflife=halflife)
+            self._ewm[halflife] = state
+        return state
+    
+    def correlation_array(self, lookback: Optional[int] = None) -> np.ndarray:
+        """
+        Correlation matrix as an ndarray in `tickers` order
+        
+        Args:
+            lookback: Trailing returns to use (None/0 for all retained
+                history); clamped to max_history
+        """
+        if lookback:
+            return self.rolling_covariance(lookback).correlation()
+        
+        returns = self.returns
+        if len(returns) < 2:
+            return np.zeros((len(self.tickers), len(self.tickers)))
+        centered = returns - returns.mean(axis=0)
+        return _normalize(centered.T @ centered)
     
     def generate_sample_data(self, tickers: List[str], days: int = 252):
         """Generate correlated sample data for testing"""
@@ -123,26 +405,11 @@ class CorrelationMatrix:
     
     def get_correlation_matrix(self, lookback: int = None) -> Dict:
         """Calculate full correlation matrix"""
-        tickers = list(self.returns_data.keys())
-        n = len(tickers)
-        
-        matrix = {}
-        
-        for i, ticker1 in enumerate(tickers):
-            matrix[ticker1] = {}
-            returns1 = self.returns_data[ticker1]
-            if lookback:
-                returns1 = returns1[-lookback:]
-            
-            for j, ticker2 in enumerate(tickers):
-                returns2 = self.returns_data[ticker2]
-                if lookback:
-                    returns2 = returns2[-lookback:]
-                
-                corr = calculate_correlation(returns1, returns2)
-                matrix[ticker1][ticker2] = round(corr, 3)
-        
-        return matrix
+        rows = np.round(self.correlation_array(lookback), 3).tolist()
+        return {
+            ticker: dict(zip(self.tickers, row))
+            for ticker, row in zip(self.tickers, rows)
+        }
     
     def find_pairs_opportunities(
         self,
@@ -150,45 +417,44 @@ class CorrelationMatrix:
         lookback: int = 60
     ) -> List[Dict]:
         """Find potential pairs trading opportunities"""
-        tickers = list(self.returns_data.keys())
+        corr = self.correlation_array(lookback)
+        first, second = np.nonzero(np.triu(np.abs(corr) >= min_correlation, k=1))
+        
+        prices = self.prices[-lookback:]
+        if len(prices) == 0:
+            return []
+        
+        # Simple ratio spread
+        tradable = prices[0, second] > 0
+        first, second = first[tradable], second[tradable]
         opportunities = []
         
-        for i, ticker1 in enumerate(tickers):
-            for j, ticker2 in enumerate(tickers):
-                if i >= j:
-                    continue
-                
-                returns1 = self.returns_data[ticker1][-lookback:]
-                returns2 = self.returns_data[ticker2][-lookback:]
-                
-                corr = calculate_correlation(returns1, returns2)
-                
-                if abs(corr) >= min_correlation:
-                    # Calculate spread statistics
-                    prices1 = self.price_data[ticker1][-lookback:]
-                    prices2 = self.price_data[ticker2][-lookback:]
-                    
-                    # Simple ratio spread
-                    if prices2[0] > 0:
-                        ratio = prices1[0] / prices2[0]
-                        spread = [p1 - ratio * p2 for p1, p2 in zip(prices1, prices2)]
-                        
-                        mean_spread = sum(spread) / len(spread)
-                        std_spread = math.sqrt(sum((s - mean_spread) ** 2 for s in spread) / len(spread))
-                        current_spread = spread[-1]
-                        z_score = (current_spread - mean_spread) / std_spread if std_spread > 0 else 0
-                        
-                        opportunities.append({
-                            "pair": f"{ticker1}/{ticker2}",
-                            "ticker1": ticker1,
-                            "ticker2": ticker2,
-                            "correlation": round(corr, 3),
-                            "hedge_ratio": round(ratio, 4),
-                            "z_score": round(z_score, 2),
-                            "mean_spread": round(mean_spread, 2),
-                            "current_spread": round(current_spread, 2),
-                            "signal": "short_spread" if z_score > 2 else "long_spread" if z_score < -2 else "neutral"
-                        })
+        for start in range(0, len(first), PAIR_CHUNK):
+            i = first[start:start + PAIR_CHUNK]
+            j = second[start:start + PAIR_CHUNK]
+            
+            ratio = prices[0, i] / prices[0, j]
+            spread = prices[:, i] - ratio * prices[:, j]
+            mean_spread = spread.mean(axis=0)
+            std_spread = spread.std(axis=0)
+            current_spread = spread[-1]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                z_scores = np.where(std_spread > 0, (current_spread - mean_spread) / std_spread, 0.0)
+            
+            for k in range(len(i)):
+                ticker1, ticker2 = self.tickers[i[k]], self.tickers[j[k]]
+                z_score = float(z_scores[k])
+                opportunities.append({
+                    "pair": f"{ticker1}/{ticker2}",
+                    "ticker1": ticker1,
+                    "ticker2": ticker2,
+                    "correlation": round(float(corr[i[k], j[k]]), 3),
+                    "hedge_ratio": round(float(ratio[k]), 4),
+                    "z_score": round(z_score, 2),
+                    "mean_spread": round(float(mean_spread[k]), 2),
+                    "current_spread": round(float(current_spread[k]), 2),
+                    "signal": "short_spread" if z_score > 2 else "long_spread" if z_score < -2 else "neutral"
+                })
         
         # Sort by absolute z-score
         opportunities.sort(key=lambda x: abs(x["z_score"]), reverse=True)
@@ -203,14 +469,15 @@ class CorrelationMatrix:
         long_window: int = 60
     ) -> Dict:
         """Detect if correlation is breaking down"""
-        returns1 = self.returns_data.get(ticker1, [])
-        returns2 = self.returns_data.get(ticker2, [])
+        self._sync()
+        i = self._index.get(ticker1)
+        j = self._index.get(ticker2)
         
-        if len(returns1) < long_window or len(returns2) < long_window:
+        if i is None or j is None or self._size - 1 < long_window:
             return {"error": "Insufficient data"}
         
-        short_corr = calculate_correlation(returns1[-short_window:], returns2[-short_window:])
-        long_corr = calculate_correlation(returns1[-long_window:], returns2[-long_window:])
+        short_corr = self.rolling_covariance(short_window).pair_correlation(i, j)
+        long_corr = self.rolling_covariance(long_window).pair_correlation(i, j)
         
         correlation_change = short_corr - long_corr
         
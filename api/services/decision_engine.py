@@ -14,6 +14,7 @@ from services.scanner import get_scanner, ActiveCandidate, SignalType
 from services.sentiment import get_sentiment_engine, TickerSentiment
 from services.regime_detector import get_regime_detector, MarketRegime
 from services.alpaca import AlpacaService
+from indicators import StreamingRSI
 
 
 class Vote(Enum):
@@ -194,22 +195,7 @@ class TechnicianAgent(BaseAgent):
         if len(bars) < period + 1:
             return 50.0
         
-        gains = []
-        losses = []
-        
-        for i in range(1, len(bars)):
-            change = bars[i]["close"] - bars[i-1]["close"]
-            gains.append(max(change, 0))
-            losses.append(max(-change, 0))
-        
-        avg_gain = sum(gains[-period:]) / period
-        avg_loss = sum(losses[-period:]) / period
-        
-        if avg_loss == 0:
-            return 100.0
-        
-        rs = avg_gain / avg_loss
-        return 100 - (100 / (1 + rs))
+        return StreamingRSI(period).update_many(bar["close"] for bar in bars)
     
     def _calculate_bb_position(self, bars: List[Dict], period: int = 20) -> float:
         """Calculate where price is within Bollinger Bands (0 = lower, 1 = upper)."""
@@ -4,7 +4,23 @@ Second-order Greeks: Vanna, Charm, Vomma, Speed
 """
 
 import math
-from typing import Dict
+from typing import Dict, Sequence, Union
+
+import numpy as np
+from scipy.special import ndtr
+
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+GREEK_NAMES = ("delta", "gamma", "theta", "vega", "rho", "vanna", "charm", "vomma", "speed")
+
+# Rounding applied to API-facing results
+GREEK_DECIMALS = {
+    "delta": 4, "gamma": 6, "theta": 4, "vega": 4, "rho": 4,
+    "vanna": 6, "charm": 6, "vomma": 4, "speed": 8
+}
+
+CONTRACT_MULTIPLIER = 100
 
 
 def normal_cdf(x: float) -> float:
@@ -20,6 +36,78 @@ def normal_pdf(x: float) -> float:
     return math.exp(-x * x / 2) / math.sqrt(2 * math.pi)
 
 
+def calculate_greeks_batch(
+    option_type: Union[str, Sequence[str], np.ndarray],
+    S: ArrayLike,  # Spot prices
+    K: ArrayLike,  # Strikes
+    T: ArrayLike,  # Times to expiry (years)
+    r: ArrayLike,  # Risk-free rates
+    sigma: ArrayLike  # Implied volatilities
+) -> Dict[str, np.ndarray]:
+    """
+    Columnar Greeks engine: first- and second-order Greeks for many
+    contracts in one vectorized pass.
+    
+    Inputs are struct-of-arrays and broadcast against each other, so a
+    scalar rate or a single option type applies to every contract.
+    Contracts with T, sigma, S or K <= 0 get zero Greeks, matching
+    calculate_all_greeks.
+    
+    Returns:
+        Dict of unrounded float64 arrays keyed by GREEK_NAMES
+    """
+    is_call = np.char.lower(np.asarray(option_type, dtype=str)) == "call"
+    is_call, S, K, T, r, sigma = np.broadcast_arrays(
+        is_call,
+        np.asarray(S, dtype=float), np.asarray(K, dtype=float),
+        np.asarray(T, dtype=float), np.asarray(r, dtype=float),
+        np.asarray(sigma, dtype=float)
+    )
+    
+    valid = (T > 0) & (sigma > 0) & (S > 0) & (K > 0)
+    # Substitute harmless values for invalid rows so the math stays finite;
+    # those rows are zeroed at the end
+    S = np.where(valid, S, 1.0)
+    K = np.where(valid, K, 1.0)
+    T = np.where(valid, T, 1.0)
+    sigma = np.where(valid, sigma, 1.0)
+    
+    sqrt_T = np.sqrt(T)
+    sigma_sqrt_T = sigma * sqrt_T
+    d1 = (np.log(S / K) + (r + sigma * sigma / 2) * T) / sigma_sqrt_T
+    d2 = d1 - sigma_sqrt_T
+    
+    N_d1 = ndtr(d1)
+    N_d2 = ndtr(d2)
+    n_d1 = np.exp(-d1 * d1 / 2) / math.sqrt(2 * math.pi)
+    discount = np.exp(-r * T)
+    
+    # First-order Greeks
+    decay = -S * n_d1 * sigma / (2 * sqrt_T)
+    delta = np.where(is_call, N_d1, N_d1 - 1)
+    theta = np.where(
+        is_call,
+        decay - r * K * discount * N_d2,
+        decay + r * K * discount * (1 - N_d2)
+    ) / 365
+    rho = np.where(is_call, K * T * discount * N_d2, -K * T * discount * (1 - N_d2)) / 100
+    gamma = n_d1 / (S * sigma_sqrt_T)
+    vega = S * n_d1 * sqrt_T / 100
+    
+    # Second-order Greeks
+    vanna = -n_d1 * d2 / sigma
+    charm = -n_d1 * (2 * r * T - d2 * sigma_sqrt_T) / (2 * T * sigma_sqrt_T)
+    charm = np.where(is_call, charm, charm + r * discount * (1 - N_d1))
+    vomma = vega * d1 * d2 / sigma
+    speed = -gamma / S * (1 + d1 / sigma_sqrt_T)
+    
+    greeks = {
+        "delta": delta, "gamma": gamma, "theta": theta, "vega": vega, "rho": rho,
+        "vanna": vanna, "charm": charm, "vomma": vomma, "speed": speed
+    }
+    return {name: np.where(valid, value, 0.0) for name, value in greeks.items()}
+
+
 def calculate_all_greeks(
     option_type: str,
     S: float,  # Spot price
@@ -34,85 +122,75 @@ def calculate_all_greeks(
     First Order: Delta, Gamma, Theta, Vega, Rho
     Second Order: Vanna, Charm, Vomma, Speed
     """
-    if T <= 0 or sigma <= 0 or S <= 0 or K <= 0:
-        return {
-            "delta": 0, "gamma": 0, "theta": 0, "vega": 0, "rho": 0,
-            "vanna": 0, "charm": 0, "vomma": 0, "speed": 0
-        }
-    
-    sqrt_T = math.sqrt(T)
-    d1 = (math.log(S / K) + (r + sigma * sigma / 2) * T) / (sigma * sqrt_T)
-    d2 = d1 - sigma * sqrt_T
-    
-    # Standard normal values
-    N_d1 = normal_cdf(d1)
-    N_d2 = normal_cdf(d2)
-    N_neg_d1 = normal_cdf(-d1)
-    N_neg_d2 = normal_cdf(-d2)
-    n_d1 = normal_pdf(d1)
-    
-    # First-order Greeks
-    if option_type == "call":
-        delta = N_d1
-        theta = ((-S * n_d1 * sigma / (2 * sqrt_T)) - 
-                 r * K * math.exp(-r * T) * N_d2) / 365
-        rho = K * T * math.exp(-r * T) * N_d2 / 100
-    else:  # put
-        delta = N_d1 - 1
-        theta = ((-S * n_d1 * sigma / (2 * sqrt_T)) + 
-                 r * K * math.exp(-r * T) * N_neg_d2) / 365
-        rho = -K * T * math.exp(-r * T) * N_neg_d2 / 100
-    
-    # Gamma (same for calls and puts)
-    gamma = n_d1 / (S * sigma * sqrt_T)
-    
-    # Vega (same for calls and puts)
-    vega = S * n_d1 * sqrt_T / 100
-    
-    # Second-order Greeks
-    
-    # Vanna: dDelta/dVol = dVega/dSpot
-    vanna = -n_d1 * d2 / sigma
-    
-    # Charm: dDelta/dTime (Delta decay)
-    charm = -n_d1 * (2 * r * T - d2 * sigma * sqrt_T) / (2 * T * sigma * sqrt_T)
-    if option_type == "put":
-        charm = charm + r * math.exp(-r * T) * N_neg_d1
-    
-    # Vomma: dVega/dVol (Vega convexity)
-    vomma = vega * d1 * d2 / sigma
-    
-    # Speed: dGamma/dSpot
-    speed = -gamma / S * (1 + d1 / (sigma * sqrt_T))
+    greeks = calculate_greeks_batch(option_type, S, K, T, r, sigma)
     
     return {
-        "delta": round(delta, 4),
-        "gamma": round(gamma, 6),
-        "theta": round(theta, 4),
-        "vega": round(vega, 4),
-        "rho": round(rho, 4),
-        "vanna": round(vanna, 6),
-        "charm": round(charm, 6),
-        "vomma": round(vomma, 4),
-        "speed": round(speed, 8)
+        name: round(float(greeks[name]), GREEK_DECIMALS[name])
+        for name in GREEK_NAMES
     }
 
 
 def calculate_beta_weighted_delta(
-    position_delta: float,
-    position_price: float,
+    position_delta: ArrayLike,
+    position_price: ArrayLike,
     spy_price: float,
-    beta: float
-) -> float:
+    beta: ArrayLike
+) -> Union[float, np.ndarray]:
     """
     Calculate Beta-Weighted Delta (normalized to SPY)
     
     Beta-Weighted Delta = Position Delta * (Stock Price / SPY Price) * Beta
+    
+    Accepts scalars or arrays; arrays are weighted element-wise.
     """
     if spy_price <= 0:
         return position_delta
     
-    return round(position_delta * (position_price / spy_price) * beta, 4)
+    bwd = np.round(
+        np.asarray(position_delta, dtype=float) *
+        (np.asarray(position_price, dtype=float) / spy_price) *
+        np.asarray(beta, dtype=float),
+        4
+    )
+    return float(bwd) if bwd.ndim == 0 else bwd
+
+
+def _position_columns(positions: list) -> Dict[str, np.ndarray]:
+    """
+    Convert a list of position dicts into struct-of-arrays columns.
+    
+    Positions that carry precomputed Greeks ("delta" key) use them as-is.
+    Positions that instead carry pricing inputs ("strike",
+    "time_to_expiry" in years and "iv" or "volatility") are priced in a
+    single calculate_greeks_batch call.
+    """
+    n = len(positions)
+    columns = {
+        "quantity": np.fromiter((p.get("quantity", 1) for p in positions), float, n),
+        "underlying_price": np.fromiter((p.get("underlying_price", 100) for p in positions), float, n),
+        "beta": np.fromiter((p.get("beta", 1.0) for p in positions), float, n),
+    }
+    for name in GREEK_NAMES:
+        columns[name] = np.fromiter((p.get(name, 0) for p in positions), float, n)
+    
+    priced = np.fromiter(
+        ("delta" not in p and "strike" in p and "time_to_expiry" in p for p in positions),
+        bool, n
+    )
+    if priced.any():
+        rows = [positions[i] for i in np.flatnonzero(priced)]
+        computed = calculate_greeks_batch(
+            [p.get("option_type", "call") for p in rows],
+            columns["underlying_price"][priced],
+            [p["strike"] for p in rows],
+            [p["time_to_expiry"] for p in rows],
+            [p.get("risk_free_rate", 0.05) for p in rows],
+            [p.get("iv", p.get("volatility", 0)) for p in rows]
+        )
+        for name in GREEK_NAMES:
+            columns[name][priced] = computed[name]
+    
+    return columns
 
 
 def calculate_portfolio_greeks(positions: list, spy_price: float = 500) -> Dict:
@@ -120,36 +198,28 @@ def calculate_portfolio_greeks(positions: list, spy_price: float = 500) -> Dict:
     Aggregate greeks across multiple positions
     Returns net exposure and beta-weighted values
     """
+    if not positions:
+        return {
+            "delta": 0, "gamma": 0, "theta": 0, "vega": 0,
+            "vanna": 0, "charm": 0, "beta_weighted_delta": 0
+        }
+    
+    columns = _position_columns(positions)
+    # Options contract size
+    exposure = columns["quantity"] * CONTRACT_MULTIPLIER
+    
     totals = {
-        "delta": 0,
-        "gamma": 0,
-        "theta": 0,
-        "vega": 0,
-        "vanna": 0,
-        "charm": 0,
-        "beta_weighted_delta": 0
+        name: float(np.dot(columns[name], exposure))
+        for name in ("delta", "gamma", "theta", "vega", "vanna", "charm")
     }
     
-    for pos in positions:
-        qty = pos.get("quantity", 1)
-        multiplier = 100  # Options contract size
-        
-        totals["delta"] += pos.get("delta", 0) * qty * multiplier
-        totals["gamma"] += pos.get("gamma", 0) * qty * multiplier
-        totals["theta"] += pos.get("theta", 0) * qty * multiplier
-        totals["vega"] += pos.get("vega", 0) * qty * multiplier
-        totals["vanna"] += pos.get("vanna", 0) * qty * multiplier
-        totals["charm"] += pos.get("charm", 0) * qty * multiplier
-        
-        # Beta-weighted
-        price = pos.get("underlying_price", 100)
-        beta = pos.get("beta", 1.0)
-        bwd = calculate_beta_weighted_delta(
-            pos.get("delta", 0) * qty * multiplier,
-            price,
-            spy_price,
-            beta
-        )
-        totals["beta_weighted_delta"] += bwd
+    # Beta-weighted
+    bwd = calculate_beta_weighted_delta(
+        columns["delta"] * exposure,
+        columns["underlying_price"],
+        spy_price,
+        columns["beta"]
+    )
+    totals["beta_weighted_delta"] = float(np.sum(bwd))
     
     return {k: round(v, 4) for k, v in totals.items()}
@@ -0,0 +1,130 @@
+"""
+Shared HTTP Client
+One pooled, keep-alive async client per process for upstream APIs
+"""
+
+import asyncio
+import os
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HTTPConfig:
+    """HTTP client configuration constants"""
+    CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))  # seconds
+    READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))  # seconds
+    MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+    PER_HOST_LIMIT = int(os.getenv("HTTP_PER_HOST_LIMIT", "16"))  # In-flight requests per host
+
+
+class PooledHTTPClient:
+    """
+    Non-blocking HTTP client shared by all services
+
+    Wraps a single httpx.AsyncClient (HTTP/2 when the h2 package is
+    installed) and caps in-flight requests per host with a semaphore, so
+    a wide asyncio.gather queues locally instead of tripping upstream
+    rate limits. The client is rebuilt if it is first used from a
+    different event loop (e.g. successive asyncio.run calls in scripts).
+    """
+
+    def __init__(
+        self,
+        per_host_limit: int = HTTPConfig.PER_HOST_LIMIT,
+        timeout: Optional[httpx.Timeout] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout or httpx.Timeout(HTTPConfig.READ_TIMEOUT, connect=HTTPConfig.CONNECT_TIMEOUT)
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self.stats = {"requests": 0, "errors": 0, "in_flight": 0}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=HTTPConfig.MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTPConfig.MAX_KEEPALIVE
+                ),
+                transport=self.transport
+            )
+            self._loop = loop
+            self._host_limits = {}
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return limit
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request through the shared pool
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            **kwargs: Passed to httpx (headers, params, json, ...)
+
+        Returns:
+            httpx.Response (raises httpx errors on transport failure/timeout)
+        """
+        client = self._get_client()
+        async with self._host_limit(url):
+            self.stats["requests"] += 1
+            self.stats["in_flight"] += 1
+            try:
+                return await client.request(method, url, **kwargs)
+            except httpx.HTTPError:
+                self.stats["errors"] += 1
+                raise
+            finally:
+                self.stats["in_flight"] -= 1
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+
+# Global instance
+_http_client: Optional[PooledHTTPClient] = None
+
+
+def get_http_client() -> PooledHTTPClient:
+    """Get or create the process-wide HTTP client"""
+    global _http_client
+    if _http_client is None:
+        _http_client = PooledHTTPClient()
+    return _http_client
+
+
+async def close_http_client():
+    """Close the process-wide HTTP client (call on shutdown)"""
+    if _http_client is not None:
+        await _http_client.aclose()
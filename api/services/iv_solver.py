@@ -0,0 +1,179 @@
+"""
+Implied Volatility Solver
+Vectorized, bracketed IV inversion for whole option chains
+"""
+
+import math
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Dict, Sequence, Union
+
+import numpy as np
+from scipy.special import ndtr
+
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+
+class IVStatus(IntEnum):
+    """Per-quote solver outcome"""
+    CONVERGED = 0
+    BELOW_INTRINSIC = 1   # No time value: price at or below intrinsic
+    ABOVE_MAXIMUM = 2     # Price at or above the no-arbitrage bound (or beyond MAX_TOTAL_VOL)
+    NOT_CONVERGED = 3     # Iteration limit reached; iv holds the last bracketed estimate
+    INVALID_INPUT = 4     # Non-finite or non-positive S, K, T, or non-finite price
+
+
+# Upper end of the search bracket in total volatility sigma * sqrt(T)
+MAX_TOTAL_VOL = 10.0
+
+DEFAULT_TOLERANCE = 1e-10  # Relative change in total volatility
+DEFAULT_MAX_ITERATIONS = 64  # Enough for pure bisection to exhaust double precision
+
+_INV_SQRT_2PI = 1.0 / math.sqrt(2.0 * math.pi)
+
+
+@dataclass
+class IVSolution:
+    """Implied vols with per-quote status codes (see IVStatus)"""
+    iv: np.ndarray  # float64, NaN where no vol could be assigned
+    status: np.ndarray  # int8 IVStatus codes
+    iterations: int
+
+    @property
+    def converged(self) -> np.ndarray:
+        return self.status == IVStatus.CONVERGED
+
+    def status_counts(self) -> Dict[str, int]:
+        codes, counts = np.unique(self.status, return_counts=True)
+        return {IVStatus(code).name.lower(): int(count) for code, count in zip(codes, counts)}
+
+
+def _normalized_call(x: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """Black call price divided by sqrt(F*K), with x = ln(F/K) and v = sigma*sqrt(T)"""
+    d1 = x / v + 0.5 * v
+    return np.exp(0.5 * x) * ndtr(d1) - np.exp(-0.5 * x) * ndtr(d1 - v)
+
+
+def _normalized_vega(x: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """Derivative of _normalized_call with respect to v"""
+    d1 = x / v + 0.5 * v
+    return np.exp(0.5 * x) * _INV_SQRT_2PI * np.exp(-0.5 * d1 * d1)
+
+
+def _initial_guess(x: np.ndarray, beta: np.ndarray) -> np.ndarray:
+    """
+    Corrado-Miller closed-form estimate of total volatility
+
+    Falls back to sqrt(2|x|), where vega peaks, when the estimate is
+    undefined (deep out-of-the-money quotes).
+    """
+    half_sum = np.exp(0.5 * x) + np.exp(-0.5 * x)
+    diff = np.exp(0.5 * x) - np.exp(-0.5 * x)
+    centered = beta - 0.5 * diff
+    discriminant = centered * centered - diff * diff / math.pi
+    guess = math.sqrt(2.0 * math.pi) / half_sum * (centered + np.sqrt(np.maximum(discriminant, 0.0)))
+    fallback = np.sqrt(2.0 * np.abs(x))
+    use_fallback = ~np.isfinite(guess) | (guess <= 0) | (discriminant < 0)
+    return np.where(use_fallback, np.maximum(fallback, 0.1), guess)
+
+
+def implied_vol_batch(
+    price: ArrayLike,
+    S: ArrayLike,  # Spot prices
+    K: ArrayLike,  # Strikes
+    T: ArrayLike,  # Times to expiry (years)
+    r: ArrayLike = 0.05,  # Risk-free rates
+    option_type: Union[str, Sequence[str], np.ndarray] = "call",
+    tolerance: float = DEFAULT_TOLERANCE,
+    max_iterations: int = DEFAULT_MAX_ITERATIONS
+) -> IVSolution:
+    """
+    Invert Black-Scholes prices for a whole chain in one vectorized pass
+
+    Every quote is reduced to its out-of-the-money equivalent (put-call
+    parity) and normalized by sqrt(F*K), so calls and puts share one
+    monotone objective in total volatility v = sigma*sqrt(T). Each element
+    keeps its own [lo, hi] bracket and takes a Newton step on log price,
+    falling back to bisection when the step leaves the bracket; converged
+    elements drop out of the active set.
+
+    Args:
+        price: Option prices (e.g. mids)
+        S, K, T, r: Spot, strike, years to expiry and rate (broadcast)
+        option_type: 'call'/'put', scalar or per quote
+        tolerance: Relative convergence tolerance on total volatility
+        max_iterations: Iteration cap
+
+    Returns:
+        IVSolution with annualized vols and IVStatus codes, in input shape
+    """
+    is_call = np.char.lower(np.asarray(option_type, dtype=str)) == "call"
+    price, S, K, T, r, is_call = np.broadcast_arrays(
+        np.asarray(price, dtype=np.float64), np.asarray(S, dtype=np.float64),
+        np.asarray(K, dtype=np.float64), np.asarray(T, dtype=np.float64),
+        np.asarray(r, dtype=np.float64), is_call
+    )
+    shape = price.shape
+    price, S, K, T, r, is_call = (a.ravel() for a in (price, S, K, T, r, is_call))
+
+    iv = np.full(price.size, np.nan)
+    status = np.full(price.size, IVStatus.INVALID_INPUT, dtype=np.int8)
+
+    valid = (np.isfinite(price) & np.isfinite(S) & np.isfinite(K) & np.isfinite(T) & np.isfinite(r)
+             & (S > 0) & (K > 0) & (T > 0))
+    idx = np.flatnonzero(valid)
+
+    # Normalized out-of-the-money price; an OTM put at x prices like an OTM call at -x
+    forward = S[idx] * np.exp(r[idx] * T[idx])
+    strike = K[idx]
+    intrinsic = np.where(is_call[idx], np.maximum(forward - strike, 0.0), np.maximum(strike - forward, 0.0))
+    time_value = price[idx] * np.exp(r[idx] * T[idx]) - intrinsic
+    scale = np.sqrt(forward * strike)
+    x = -np.abs(np.log(forward / strike))
+    beta = time_value / scale
+
+    below = beta <= 0
+    above = beta >= _normalized_call(x, np.full_like(x, MAX_TOTAL_VOL))
+    status[idx[below]] = IVStatus.BELOW_INTRINSIC
+    status[idx[above & ~below]] = IVStatus.ABOVE_MAXIMUM
+
+    solve = ~below & ~above
+    idx, x, beta = idx[solve], x[solve], beta[solve]
+    lo = np.zeros_like(x)
+    hi = np.full_like(x, MAX_TOTAL_VOL)
+    v = np.clip(_initial_guess(x, beta), 1e-8, MAX_TOTAL_VOL * 0.999)
+    done = np.zeros(x.size, dtype=bool)
+
+    active = np.arange(x.size)
+    iterations = 0
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        while active.size and iterations < max_iterations:
+            iterations += 1
+            xa, va, ba = x[active], v[active], beta[active]
+
+            model = _normalized_call(xa, va)
+            low_side = model < ba
+            lo[active] = np.where(low_side, va, lo[active])
+            hi[active] = np.where(low_side, hi[active], va)
+
+            # Newton on log price: well scaled for deep OTM quotes where price is tiny
+            step = (np.log(model) - np.log(ba)) * model / _normalized_vega(xa, va)
+            v_new = va - step
+            converged = (np.abs(step) <= tolerance * va) | (model == ba)
+
+            # Safeguard: bisect the bracket when the Newton step leaves it
+            la, ha = lo[active], hi[active]
+            outside = ~converged & (~np.isfinite(v_new) | (v_new <= la) | (v_new >= ha))
+            v_new = np.where(outside, 0.5 * (la + ha), v_new)
+            v_new = np.where(np.isfinite(v_new), v_new, va)
+
+            v[active] = v_new
+            done[active[converged]] = True
+            active = active[~converged]
+
+    iv[idx] = v / np.sqrt(T[idx])
+    status[idx] = np.where(done, IVStatus.CONVERGED, IVStatus.NOT_CONVERGED)
+
+    return IVSolution(iv=iv.reshape(shape), status=status.reshape(shape), iterations=iterations)
@@ -4,9 +4,21 @@ Better pricing for OTM options and tail risk
 """
 
 import math
-from typing import Dict
+from typing import Dict, Sequence, Tuple, Union
 from functools import lru_cache
 
+import numpy as np
+from scipy.special import gammaln, ndtr
+
+from services.iv_solver import implied_vol_batch
+
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+# The Poisson series is truncated once the neglected weight mass is below this
+SERIES_MASS_TOLERANCE = 1e-12
+MAX_SERIES_TERMS = 200
+
 
 def norm_cdf(x: float) -> float:
     """Standard normal CDF approximation"""
@@ -49,6 +61,19 @@ def black_scholes_put(S: float, K: float, T: float, r: float, sigma: float) -> f
     return K * math.exp(-r * T) * norm_cdf(-d2) - S * norm_cdf(-d1)
 
 
+def black_scholes_call_array(S: ArrayLike, K: ArrayLike, T: ArrayLike, r: ArrayLike,
+                             sigma: ArrayLike) -> np.ndarray:
+    """Vectorized Black-Scholes call price (exact normal CDF, intrinsic value at T <= 0)"""
+    S, K, T, r, sigma = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64) for a in (S, K, T, r, sigma)))
+    live = T > 0
+    safe_T = np.where(live, T, 1.0)
+    sqrt_T = np.sqrt(safe_T)
+    d1 = (np.log(S / K) + (r + 0.5 * sigma * sigma) * safe_T) / (sigma * sqrt_T)
+    d2 = d1 - sigma * sqrt_T
+    price = S * ndtr(d1) - K * np.exp(-r * safe_T) * ndtr(d2)
+    return np.where(live, price, np.maximum(S - K, 0.0))
+
+
 class MertonJumpDiffusion:
     """
     Merton's Jump-Diffusion Model (1976)
@@ -84,50 +109,118 @@ class MertonJumpDiffusion:
         
         # Expected relative jump size
         self.k = math.exp(mu_j + sigma_j * sigma_j / 2) - 1
+        
+        # Truncated series terms per (tenor, tolerance, max_terms)
+        self._series: Dict[Tuple[float, float, int], Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+    
+    def series_terms(
+        self,
+        T: float,
+        tolerance: float = SERIES_MASS_TOLERANCE,
+        max_terms: int = MAX_SERIES_TERMS
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Poisson weights and per-term (r_n, sigma_n) for one tenor
+        
+        Terms are kept until the cumulative Poisson mass reaches
+        1 - tolerance, so short tenors or low intensities need only a
+        handful. Results are cached per tenor.
+        
+        Returns:
+            (weights, r_n, sigma_n) arrays of equal length
+        """
+        key = (T, tolerance, max_terms)
+        cached = self._series.get(key)
+        if cached is not None:
+            return cached
+        
+        lam_prime_T = self.lam * (1 + self.k) * T
+        n = np.arange(max_terms, dtype=np.float64)
+        if lam_prime_T > 0:
+            weights = np.exp(n * math.log(lam_prime_T) - lam_prime_T - gammaln(n + 1))
+            count = int(np.searchsorted(np.cumsum(weights), 1.0 - tolerance)) + 1
+            n, weights = n[:count], weights[:count]
+        else:
+            n, weights = n[:1], np.ones(1)
+        
+        sigma_n = np.sqrt(self.sigma ** 2 + n * self.sigma_j ** 2 / T)
+        r_n = self.rate - self.lam * self.k + n * math.log(1 + self.k) / T
+        
+        terms = (weights, r_n, sigma_n)
+        self._series[key] = terms
+        return terms
     
-    def price_call(self, K: float, T: float, n_terms: int = 50) -> float:
+    def price_calls(self, K: ArrayLike, T: ArrayLike, max_terms: int = MAX_SERIES_TERMS) -> np.ndarray:
+        """
+        Price calls for arrays of strikes and tenors (broadcast)
+        
+        Strikes sharing a tenor are priced together as one
+        (terms x strikes) Black-Scholes matrix contracted with the
+        tenor's Poisson weights.
+        """
+        K, T = np.broadcast_arrays(np.asarray(K, dtype=np.float64), np.asarray(T, dtype=np.float64))
+        prices = np.array(np.maximum(self.spot - K, 0.0))
+        
+        for tenor in np.unique(T[T > 0]):
+            at_tenor = T == tenor
+            weights, r_n, sigma_n = self.series_terms(float(tenor), max_terms=max_terms)
+            components = black_scholes_call_array(
+                self.spot, K[at_tenor][None, :], tenor, r_n[:, None], sigma_n[:, None]
+            )
+            prices[at_tenor] = weights @ components
+        
+        return prices
+    
+    def price_puts(self, K: ArrayLike, T: ArrayLike, max_terms: int = MAX_SERIES_TERMS) -> np.ndarray:
+        """Price puts for arrays of strikes and tenors via put-call parity"""
+        K, T = np.broadcast_arrays(np.asarray(K, dtype=np.float64), np.asarray(T, dtype=np.float64))
+        calls = self.price_calls(K, T, max_terms)
+        return calls - self.spot + K * np.exp(-self.rate * np.maximum(T, 0.0))
+    
+    def black_scholes_prices(self, K: ArrayLike, T: ArrayLike, option_type: str = 'call') -> np.ndarray:
+        """Diffusion-only Black-Scholes prices at the model's sigma"""
+        K, T = np.broadcast_arrays(np.asarray(K, dtype=np.float64), np.asarray(T, dtype=np.float64))
+        calls = black_scholes_call_array(self.spot, K, T, self.rate, self.sigma)
+        if option_type == 'call':
+            return calls
+        return calls - self.spot + K * np.exp(-self.rate * np.maximum(T, 0.0))
+    
+    def compare_chain(self, K: ArrayLike, T: ArrayLike, option_type: str = 'call') -> Dict[str, np.ndarray]:
+        """
+        Jump-diffusion vs Black-Scholes prices for a whole chain
+        
+        Returns:
+            Dict of arrays: jump_price, bs_price, jump_premium
+        """
+        if option_type == 'call':
+            jump = self.price_calls(K, T)
+        else:
+            jump = self.price_puts(K, T)
+        bs = self.black_scholes_prices(K, T, option_type)
+        
+        return {'jump_price': jump, 'bs_price': bs, 'jump_premium': jump - bs}
+    
+    def implied_jump_vols(self, K: ArrayLike, T: ArrayLike) -> np.ndarray:
+        """Black-Scholes vols that reproduce the jump-diffusion call prices"""
+        return implied_vol_batch(self.price_calls(K, T), self.spot, K, T, self.rate, 'call').iv
+    
+    def price_call(self, K: float, T: float, n_terms: int = MAX_SERIES_TERMS) -> float:
         """
         Price a call option using the series expansion
         
-        C = Σ (exp(-λ'T) * (λ'T)^n / n!) * C_BS(S_n, K, T, r_n, σ_n)
+        C = Σ (exp(-λ'T) * (λ'T)^n / n!) * C_BS(S, K, T, r_n, σ_n)
         
         Where:
         - λ' = λ(1+k)
-        - S_n = S * exp(-λkT) * (1+k)^n
         - σ_n² = σ² + n*σ_J²/T
         - r_n = r - λk + n*ln(1+k)/T
         """
-        lam_prime = self.lam * (1 + self.k)
-        
-        total_price = 0.0
-        
-        for n in range(n_terms):
-            # Poisson probability weight
-            poisson_weight = math.exp(-lam_prime * T) * (lam_prime * T) ** n / math.factorial(n)
-            
-            if poisson_weight < 1e-12:
-                break
-            
-            # Adjusted parameters for n jumps
-            sigma_n_sq = self.sigma ** 2 + n * self.sigma_j ** 2 / T if T > 0 else self.sigma ** 2
-            sigma_n = math.sqrt(sigma_n_sq)
-            
-            r_n = self.rate - self.lam * self.k + n * math.log(1 + self.k) / T if T > 0 else self.rate
-            
-            S_n = self.spot * math.exp(-self.lam * self.k * T) * ((1 + self.k) ** n)
-            
-            # Black-Scholes price for this component
-            bs_price = black_scholes_call(S_n, K, T, r_n, sigma_n)
-            
-            total_price += poisson_weight * bs_price
-        
-        return total_price
-    
-    def price_put(self, K: float, T: float, n_terms: int = 50) -> float:
+        return float(self.price_calls(K, T, n_terms))
+    
+    def price_put(self, K: float, T: float, n_terms: int = MAX_SERIES_TERMS) -> float:
         """Price a put option using put-call parity"""
-        call_price = self.price_call(K, T, n_terms)
         # Put-call parity: P = C - S + K*exp(-rT)
-        return call_price - self.spot + K * math.exp(-self.rate * T)
+        return float(self.price_puts(K, T, n_terms))
     
     def price_option(self, K: float, T: float, option_type: str = 'call') -> Dict:
         """
@@ -138,13 +231,11 @@ class MertonJumpDiffusion:
         - bs_price: Black-Scholes price
         - jump_premium: Extra value from accounting for jumps
         """
-        if option_type == 'call':
-            jump_price = self.price_call(K, T)
-            bs_price = black_scholes_call(self.spot, K, T, self.rate, self.sigma)
-        else:
-            jump_price = self.price_put(K, T)
-            bs_price = black_scholes_put(self.spot, K, T, self.rate, self.sigma)
-        
+        chain = self.compare_chain(K, T, option_type)
+        return self._result(K, T, option_type, float(chain['jump_price']), float(chain['bs_price']))
+    
+    def _result(self, K: float, T: float, option_type: str, jump_price: float, bs_price: float) -> Dict:
+        """Format one priced option for the API"""
         # Moneyness
         moneyness = self.spot / K
         
@@ -171,23 +262,7 @@ class MertonJumpDiffusion:
         Calculate the "effective" volatility that would make BS price match jump price
         This shows how much extra vol is needed to account for jumps
         """
-        jump_price = self.price_call(K, T)
-        
-        # Binary search for implied vol
-        vol_low, vol_high = 0.01, 2.0
-        
-        for _ in range(100):
-            vol_mid = (vol_low + vol_high) / 2
-            bs_price = black_scholes_call(self.spot, K, T, self.rate, vol_mid)
-            
-            if abs(bs_price - jump_price) < 0.0001:
-                return vol_mid
-            elif bs_price < jump_price:
-                vol_low = vol_mid
-            else:
-                vol_high = vol_mid
-        
-        return (vol_low + vol_high) / 2
+        return float(self.implied_jump_vols(K, T))
 
 
 # API endpoint helper
@@ -231,10 +306,18 @@ def analyze_tail_risk(
     """
     model = MertonJumpDiffusion(spot=spot, sigma=sigma, lam=jump_intensity)
     
+    chains = {
+        opt_type: model.compare_chain(strikes, expiry_years, opt_type)
+        for opt_type in ['call', 'put']
+    }
+    
     results = []
-    for K in strikes:
+    for i, K in enumerate(strikes):
         for opt_type in ['call', 'put']:
-            result = model.price_option(K, expiry_years, opt_type)
-            results.append(result)
+            chain = chains[opt_type]
+            results.append(model._result(
+                K, expiry_years, opt_type,
+                float(chain['jump_price'][i]), float(chain['bs_price'][i])
+            ))
     
     return results
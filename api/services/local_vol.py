@@ -4,9 +4,24 @@ More accurate option pricing during skew events
 """
 
 import math
-from typing import Dict, Optional
+from dataclasses import dataclass
+from typing import Dict, Optional, Union, Sequence
 from functools import lru_cache
 
+import numpy as np
+from scipy.special import ndtr
+
+from services.iv_solver import implied_vol_batch
+
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+# Dense grid resolution for precomputed surfaces
+SURFACE_STRIKES = 201
+SURFACE_TENORS = 101
+
+DEFAULT_IMPLIED_VOL = 0.25
+
 
 def norm_cdf(x: float) -> float:
     """Standard normal CDF approximation"""
@@ -88,6 +103,171 @@ def implied_vol_from_price(
     return sigma
 
 
+def _bs_call_grid(S: float, K: np.ndarray, T: np.ndarray, r: float, sigma: np.ndarray) -> np.ndarray:
+    """Black-Scholes call prices on a broadcast grid (exact normal CDF)"""
+    sqrt_T = np.sqrt(T)
+    d1 = (np.log(S / K) + (r + 0.5 * sigma * sigma) * T) / (sigma * sqrt_T)
+    d2 = d1 - sigma * sqrt_T
+    return S * ndtr(d1) - K * np.exp(-r * T) * ndtr(d2)
+
+
+def _lower_convex_envelope(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Greatest convex function below the points (x, y), evaluated at x (x ascending)"""
+    hull = [0]
+    for i in range(1, len(x)):
+        while len(hull) >= 2:
+            a, b = hull[-2], hull[-1]
+            # Drop b if it lies on or above the chord from a to i
+            if (y[b] - y[a]) * (x[i] - x[a]) >= (y[i] - y[a]) * (x[b] - x[a]):
+                hull.pop()
+            else:
+                break
+        hull.append(i)
+    return np.interp(x, x[hull], y[hull])
+
+
+def _uniform_index(axis_start: float, step: float, size: int, values: np.ndarray):
+    """Cell index and fractional weight on a uniform axis, clamped to its ends"""
+    position = np.clip((values - axis_start) / step, 0.0, size - 1)
+    index = np.minimum(position.astype(np.intp), size - 2)
+    return index, position - index
+
+
+@dataclass(frozen=True, eq=False)
+class VolSurface:
+    """
+    Immutable implied/local volatility surface on a dense strike x tenor grid
+    
+    Built once from calibrated quotes; lookups are uniform-index bilinear
+    interpolation (O(1) per point, vectorized over arrays) with flat
+    extrapolation beyond the quoted range. The Dupire local-vol grid is
+    precomputed alongside the implied-vol grid.
+    """
+    spot: float
+    rate: float
+    strikes: np.ndarray  # (n_strikes,) uniform
+    tenors: np.ndarray  # (n_tenors,) uniform, years
+    iv: np.ndarray  # (n_tenors, n_strikes)
+    local_vol_grid: np.ndarray  # (n_tenors, n_strikes)
+    
+    @classmethod
+    def from_quotes(
+        cls,
+        quotes: Dict[tuple, float],
+        spot: float,
+        rate: float = 0.05,
+        num_strikes: int = SURFACE_STRIKES,
+        num_tenors: int = SURFACE_TENORS
+    ) -> "VolSurface":
+        """
+        Build a surface from {(strike, expiry_years): implied_vol} quotes
+        
+        Each quoted expiry's smile is interpolated across the strike grid,
+        total variance is made non-decreasing in expiry (calendar
+        arbitrage) and interpolated linearly in time, and where call prices
+        are concave in strike (butterfly arbitrage) they are replaced by
+        their convex envelope and the vols re-implied.
+        """
+        if not quotes:
+            raise ValueError("Cannot build a volatility surface without quotes")
+        
+        points = np.array([(K, T, iv) for (K, T), iv in quotes.items()], dtype=np.float64)
+        quote_K, quote_T, quote_iv = points[:, 0], points[:, 1], points[:, 2]
+        
+        k_min, k_max = quote_K.min(), quote_K.max()
+        t_min, t_max = quote_T.min(), quote_T.max()
+        if k_max == k_min:
+            k_min, k_max = k_min * 0.99, k_max * 1.01
+        if t_max == t_min:
+            t_max = t_min * 1.01 + 1e-6
+        strikes = np.linspace(k_min, k_max, num_strikes)
+        tenors = np.linspace(t_min, t_max, num_tenors)
+        
+        # Smile per quoted expiry, as total variance on the strike grid
+        expiries = np.unique(quote_T)
+        smile_var = np.empty((len(expiries), num_strikes))
+        for row, T in enumerate(expiries):
+            at_T = quote_T == T
+            order = np.argsort(quote_K[at_T])
+            smile_iv = np.interp(strikes, quote_K[at_T][order], quote_iv[at_T][order])
+            smile_var[row] = smile_iv * smile_iv * T
+        smile_var = np.maximum.accumulate(smile_var, axis=0)
+        
+        # Linear in total variance between expiries, flat vol outside
+        total_var = np.empty((num_tenors, num_strikes))
+        for col in range(num_strikes):
+            total_var[:, col] = np.interp(tenors, expiries, smile_var[:, col])
+        iv = np.sqrt(total_var / np.clip(tenors, expiries[0], expiries[-1])[:, None])
+        
+        iv = cls._remove_butterfly_arbitrage(iv, spot, strikes, tenors, rate)
+        local_vol_grid = cls._dupire_grid(iv, spot, strikes, tenors, rate)
+        
+        for array in (strikes, tenors, iv, local_vol_grid):
+            array.flags.writeable = False
+        
+        return cls(spot=spot, rate=rate, strikes=strikes, tenors=tenors,
+                   iv=iv, local_vol_grid=local_vol_grid)
+    
+    @staticmethod
+    def _remove_butterfly_arbitrage(iv, spot, strikes, tenors, rate) -> np.ndarray:
+        """
+        Replace call prices that are concave in strike by their lower convex
+        envelope, re-imply the affected vols, then restore calendar order
+        """
+        K, T = strikes[None, :], tenors[:, None]
+        calls = _bs_call_grid(spot, K, T, rate, iv)
+        concave_rows = np.flatnonzero((np.diff(calls, n=2, axis=1) < -1e-10 * spot).any(axis=1))
+        
+        if concave_rows.size:
+            iv = iv.copy()
+            convex = np.array([_lower_convex_envelope(strikes, calls[row]) for row in concave_rows])
+            solution = implied_vol_batch(
+                convex, spot, strikes[None, :], tenors[concave_rows, None], rate, "call"
+            )
+            iv[concave_rows] = np.where(solution.converged, solution.iv, iv[concave_rows])
+        
+        total_var = np.maximum.accumulate(iv * iv * T, axis=0)
+        return np.sqrt(total_var / T)
+    
+    @staticmethod
+    def _dupire_grid(iv, spot, strikes, tenors, rate) -> np.ndarray:
+        """
+        Local vol on the grid from Dupire's formula applied to call prices
+        
+        Falls back to the implied vol wherever the formula is ill-defined
+        (non-positive curvature or local variance), as local_vol always has.
+        """
+        K, T = strikes[None, :], tenors[:, None]
+        calls = _bs_call_grid(spot, K, T, rate, iv)
+        
+        dC_dT = np.gradient(calls, tenors, axis=0)
+        dC_dK = np.gradient(calls, strikes, axis=1)
+        d2C_dK2 = np.gradient(dC_dK, strikes, axis=1)
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            local_var = (dC_dT + rate * K * dC_dK) / (0.5 * K * K * d2C_dK2)
+        
+        usable = (d2C_dK2 > 0) & np.isfinite(local_var) & (local_var > 0)
+        return np.where(usable, np.sqrt(np.where(usable, local_var, 1.0)), iv)
+    
+    def _lookup(self, grid: np.ndarray, K: ArrayLike, T: ArrayLike) -> np.ndarray:
+        K, T = np.broadcast_arrays(np.asarray(K, dtype=np.float64), np.asarray(T, dtype=np.float64))
+        ik, wk = _uniform_index(self.strikes[0], self.strikes[1] - self.strikes[0], len(self.strikes), K)
+        it, wt = _uniform_index(self.tenors[0], self.tenors[1] - self.tenors[0], len(self.tenors), T)
+        
+        lower = grid[it, ik] * (1 - wk) + grid[it, ik + 1] * wk
+        upper = grid[it + 1, ik] * (1 - wk) + grid[it + 1, ik + 1] * wk
+        return lower * (1 - wt) + upper * wt
+    
+    def evaluate(self, K: ArrayLike, T: ArrayLike) -> np.ndarray:
+        """Implied vol at strikes K and expiries T (broadcast)"""
+        return self._lookup(self.iv, K, T)
+    
+    def local_vol(self, K: ArrayLike, T: ArrayLike) -> np.ndarray:
+        """Dupire local vol at strikes K and expiries T (broadcast)"""
+        return self._lookup(self.local_vol_grid, K, T)
+
+
 class LocalVolatilityModel:
     """
     Dupire Local Volatility Model
@@ -103,99 +283,66 @@ class LocalVolatilityModel:
         self.spot = spot
         self.rate = rate
         self.vol_surface: Dict[tuple, float] = {}  # (K, T) -> implied_vol
+        self._surface: Optional[VolSurface] = None
     
-    def calibrate_from_chain(self, options: list):
+    def calibrate_from_chain(self, options: list) -> Dict[str, int]:
         """
         Calibrate the local vol surface from an options chain
         
+        The whole chain is inverted in one vectorized pass; quotes the
+        solver cannot invert (no time value, above the arbitrage bound,
+        bad inputs) are left out of the surface.
+        
         Args:
             options: List of dicts with keys: strike, expiry_years, price, option_type
-        """
-        for opt in options:
-            K = opt['strike']
-            T = opt['expiry_years']
-            price = opt['price']
-            opt_type = opt.get('option_type', 'call')
             
-            iv = implied_vol_from_price(price, self.spot, K, T, self.rate, opt_type)
-            self.vol_surface[(K, T)] = iv
-    
-    def get_implied_vol(self, K: float, T: float) -> float:
-        """Get implied volatility at strike K and expiry T (with interpolation)"""
-        if (K, T) in self.vol_surface:
-            return self.vol_surface[(K, T)]
-        
-        # Simple bilinear interpolation
-        strikes = sorted(set(k for k, t in self.vol_surface.keys()))
-        expiries = sorted(set(t for k, t in self.vol_surface.keys()))
-        
-        if not strikes or not expiries:
-            return 0.25  # Default
-        
-        # Find surrounding points
-        k_lower = max([s for s in strikes if s <= K], default=strikes[0])
-        k_upper = min([s for s in strikes if s >= K], default=strikes[-1])
-        t_lower = max([e for e in expiries if e <= T], default=expiries[0])
-        t_upper = min([e for e in expiries if e >= T], default=expiries[-1])
-        
-        # Get corner values
-        v11 = self.vol_surface.get((k_lower, t_lower), 0.25)
-        v12 = self.vol_surface.get((k_lower, t_upper), 0.25)
-        v21 = self.vol_surface.get((k_upper, t_lower), 0.25)
-        v22 = self.vol_surface.get((k_upper, t_upper), 0.25)
+        Returns:
+            Count of quotes per solver status (converged, below_intrinsic, ...)
+        """
+        if not options:
+            return {}
         
-        # Interpolate
-        if k_upper == k_lower:
-            k_weight = 0.5
-        else:
-            k_weight = (K - k_lower) / (k_upper - k_lower)
+        strikes = np.array([opt['strike'] for opt in options], dtype=np.float64)
+        expiries = np.array([opt['expiry_years'] for opt in options], dtype=np.float64)
+        prices = np.array([opt['price'] for opt in options], dtype=np.float64)
+        option_types = [opt.get('option_type', 'call') for opt in options]
         
-        if t_upper == t_lower:
-            t_weight = 0.5
-        else:
-            t_weight = (T - t_lower) / (t_upper - t_lower)
+        solution = implied_vol_batch(prices, self.spot, strikes, expiries, self.rate, option_types)
         
-        v1 = v11 * (1 - k_weight) + v21 * k_weight
-        v2 = v12 * (1 - k_weight) + v22 * k_weight
+        converged = solution.converged
+        self.vol_surface.update(zip(
+            zip(strikes[converged].tolist(), expiries[converged].tolist()),
+            solution.iv[converged].tolist()
+        ))
+        self.invalidate_surface()
         
-        return v1 * (1 - t_weight) + v2 * t_weight
+        return solution.status_counts()
+    
+    @property
+    def surface(self) -> Optional[VolSurface]:
+        """Precomputed surface for the current quotes (None when there are none)"""
+        if self._surface is None and self.vol_surface:
+            self._surface = VolSurface.from_quotes(self.vol_surface, self.spot, self.rate)
+        return self._surface
+    
+    def invalidate_surface(self):
+        """Drop the precomputed surface; call after editing vol_surface directly"""
+        self._surface = None
+    
+    def get_implied_vol(self, K: float, T: float) -> float:
+        """Get implied volatility at strike K and expiry T (with interpolation)"""
+        if self.surface is None:
+            return DEFAULT_IMPLIED_VOL
+        return float(self.surface.evaluate(K, T))
     
-    def local_vol(self, K: float, T: float, dK: float = 0.5, dT: float = 0.01) -> float:
+    def local_vol(self, K: float, T: float) -> float:
         """
-        Calculate local volatility using numerical differentiation of Dupire's formula
+        Local volatility at strike K and expiry T, interpolated from the
+        surface's precomputed Dupire grid
         """
-        if T <= dT:
-            return self.get_implied_vol(K, dT)
-        
-        sigma = self.get_implied_vol(K, T)
-        
-        # Numerical derivatives
-        C = black_scholes_price(self.spot, K, T, self.rate, sigma, 'call')
-        C_T_up = black_scholes_price(self.spot, K, T + dT, self.rate, 
-                                     self.get_implied_vol(K, T + dT), 'call')
-        C_K_up = black_scholes_price(self.spot, K + dK, T, self.rate,
-                                     self.get_implied_vol(K + dK, T), 'call')
-        C_K_down = black_scholes_price(self.spot, K - dK, T, self.rate,
-                                       self.get_implied_vol(K - dK, T), 'call')
-        
-        dC_dT = (C_T_up - C) / dT
-        dC_dK = (C_K_up - C_K_down) / (2 * dK)
-        d2C_dK2 = (C_K_up - 2 * C + C_K_down) / (dK * dK)
-        
-        if d2C_dK2 <= 0:
-            return sigma  # Fall back to implied vol
-        
-        numerator = dC_dT + self.rate * K * dC_dK
-        denominator = 0.5 * K * K * d2C_dK2
-        
-        if denominator <= 0:
-            return sigma
-        
-        local_var = numerator / denominator
-        if local_var <= 0:
-            return sigma
-        
-        return math.sqrt(local_var)
+        if self.surface is None:
+            return DEFAULT_IMPLIED_VOL
+        return float(self.surface.local_vol(K, T))
     
     def price_option(
         self,
@@ -212,23 +359,49 @@ class LocalVolatilityModel:
         - local_vol: The local volatility used
         - implied_vol: The implied volatility
         """
-        implied_vol = self.get_implied_vol(K, T)
-        local_v = self.local_vol(K, T)
-        
-        bs_price = black_scholes_price(self.spot, K, T, self.rate, implied_vol, option_type)
-        local_vol_price = black_scholes_price(self.spot, K, T, self.rate, local_v, option_type)
-        
-        return {
-            'strike': K,
-            'expiry': T,
-            'option_type': option_type,
-            'local_vol_price': round(local_vol_price, 4),
-            'bs_price': round(bs_price, 4),
-            'local_vol': round(local_v, 4),
-            'implied_vol': round(implied_vol, 4),
-            'price_diff': round(local_vol_price - bs_price, 4),
-            'vol_diff': round(local_v - implied_vol, 4)
-        }
+        return _price_result(self.spot, K, T, self.rate, self.get_implied_vol(K, T),
+                             self.local_vol(K, T), option_type)
+
+
+def _price_result(spot: float, K: float, T: float, rate: float, implied_vol: float,
+                  local_v: float, option_type: str) -> Dict:
+    """Black-Scholes prices under the implied and the local vol, as returned by price_option"""
+    bs_price = black_scholes_price(spot, K, T, rate, implied_vol, option_type)
+    local_vol_price = black_scholes_price(spot, K, T, rate, local_v, option_type)
+    
+    return {
+        'strike': K,
+        'expiry': T,
+        'option_type': option_type,
+        'local_vol_price': round(local_vol_price, 4),
+        'bs_price': round(bs_price, 4),
+        'local_vol': round(local_v, 4),
+        'implied_vol': round(implied_vol, 4),
+        'price_diff': round(local_vol_price - bs_price, 4),
+        'vol_diff': round(local_v - implied_vol, 4)
+    }
+
+
+# Synthetic surface for quick quotes: moneyness x expiry (years)
+SYNTHETIC_MONEYNESS = (0.85, 0.90, 0.95, 1.0, 1.05, 1.10, 1.15)
+SYNTHETIC_TENORS = (0.083, 0.25, 0.5, 1.0)
+
+
+@lru_cache(maxsize=128)
+def _synthetic_surface(rate: float, base_iv: float) -> VolSurface:
+    """
+    Skewed synthetic surface for a unit spot
+    
+    Quotes sit at fixed moneyness, and option prices scale with spot and
+    strike together, so one surface in moneyness terms serves every spot.
+    """
+    quotes = {}
+    for k_mult in SYNTHETIC_MONEYNESS:
+        # Add skew: OTM puts have higher IV
+        skew = 0.1 * (1 - k_mult) if k_mult < 1 else 0.05 * (k_mult - 1)
+        for t in SYNTHETIC_TENORS:
+            quotes[(k_mult, t)] = base_iv + skew
+    return VolSurface.from_quotes(quotes, 1.0, rate)
 
 
 # API endpoint helper
@@ -240,16 +413,13 @@ async def price_with_local_vol(
     rate: float = 0.05,
     base_iv: float = 0.25
 ) -> Dict:
-    """Quick pricing using local vol approximation"""
-    model = LocalVolatilityModel(spot, rate)
-    
-    # Create synthetic vol surface with skew
-    for k_mult in [0.85, 0.90, 0.95, 1.0, 1.05, 1.10, 1.15]:
-        for t in [0.083, 0.25, 0.5, 1.0]:
-            K = spot * k_mult
-            # Add skew: OTM puts have higher IV
-            skew = 0.1 * (1 - k_mult) if k_mult < 1 else 0.05 * (k_mult - 1)
-            iv = base_iv + skew
-            model.vol_surface[(K, t)] = iv
-    
-    return model.price_option(strike, expiry_years, option_type)
+    """Quick pricing using local vol approximation (surface cached per rate and base IV)"""
+    surface = _synthetic_surface(float(rate), float(base_iv))
+    moneyness = strike / spot
+    
+    return _price_result(
+        spot, strike, expiry_years, rate,
+        float(surface.evaluate(moneyness, expiry_years)),
+        float(surface.local_vol(moneyness, expiry_years)),
+        option_type
+    )
@@ -7,6 +7,8 @@ import numpy as np
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
+from services.montecarlo import PayoffPlan
+
 
 @dataclass
 class Position:
@@ -131,20 +133,12 @@ class MarginSimulator:
         
         Tests portfolio across multiple scenarios and uses worst-case
         """
-        scenario_results = []
+        scenario_pnls = self._calculate_scenario_pnls(positions)
         
-        for scenario in self.stress_scenarios:
-            # Calculate P/L under this scenario
-            total_pnl = 0.0
-            
-            for pos in positions:
-                pos_pnl = self._calculate_position_pnl(pos, scenario)
-                total_pnl += pos_pnl
-            
-            scenario_results.append({
-                'scenario': scenario['name'],
-                'pnl': total_pnl
-            })
+        scenario_results = [
+            {'scenario': scenario['name'], 'pnl': float(pnl)}
+            for scenario, pnl in zip(self.stress_scenarios, scenario_pnls)
+        ]
         
         # Portfolio margin = worst case loss + buffer
         worst_loss = min(0, min(r['pnl'] for r in scenario_results))
@@ -164,48 +158,53 @@ class MarginSimulator:
             'buffer_rate': 0.15
         }
     
-    def _calculate_position_pnl(
-        self, 
-        pos: Position, 
-        scenario: Dict
-    ) -> float:
-        """Calculate P/L for a position under a stress scenario"""
-        price_move = scenario['price_move']
-        vol_move = scenario['vol_move']
+    def _calculate_scenario_pnls(self, positions: List[Position]) -> np.ndarray:
+        """
+        Portfolio P/L under every stress scenario in one pass
+        
+        Intrinsic-value changes come from a PayoffPlan whose premiums are
+        the current intrinsic values, evaluated on a (scenarios x
+        positions) price matrix. PayoffPlan's per-leg payoffs are checked
+        against hand-computed values in api/tests/test_montecarlo.py
+        (test_plan_matches_per_leg_payoffs).
+        """
+        if not positions:
+            return np.zeros(len(self.stress_scenarios))
         
-        new_price = pos.current_price * (1 + price_move)
         multiplier = 100
-        qty = pos.quantity if pos.is_long else -pos.quantity
+        legs = []
+        for pos in positions:
+            is_option = pos.position_type in ['call', 'put']
+            # Options without a strike are excluded (zero quantity)
+            qty = 0 if is_option and pos.strike is None else pos.quantity
+            legs.append({
+                'option_type': pos.position_type,
+                'position': 'long' if pos.is_long else 'short',
+                'strike': pos.current_price if pos.position_type == 'stock' else (pos.strike or 0),
+                'quantity': qty,
+            })
+        base = PayoffPlan.from_legs(legs, option_multiplier=multiplier, stock_multiplier=multiplier)
+        is_option = base.is_call | base.is_put
         
-        if pos.position_type == 'stock':
-            pnl = qty * (new_price - pos.current_price) * multiplier
+        # Premium = current intrinsic value, so P/L is the intrinsic change
+        current = np.array([pos.current_price for pos in positions])
+        intrinsic_now = np.where(is_option, base.leg_values(current), 0.0)
+        plan = PayoffPlan(base.strikes, intrinsic_now, base.weights, base.is_call, base.is_put)
         
-        elif pos.position_type in ['call', 'put']:
-            # Simplified option P/L
-            if pos.strike is None:
-                return 0.0
-            
-            # Intrinsic value change
-            if pos.position_type == 'call':
-                old_intrinsic = max(0, pos.current_price - pos.strike)
-                new_intrinsic = max(0, new_price - pos.strike)
-            else:
-                old_intrinsic = max(0, pos.strike - pos.current_price)
-                new_intrinsic = max(0, pos.strike - new_price)
-            
-            # Time value impact (simplified)
-            days = pos.expiration_days or 30
-            time_factor = np.sqrt(days / 365)
-            vol = 0.25 * (1 + vol_move)  # Base vol with stress
-            
-            time_value_change = vol * time_factor * pos.current_price * 0.4 * vol_move
-            
-            pnl = qty * (new_intrinsic - old_intrinsic + time_value_change) * multiplier
+        price_moves = np.array([sc['price_move'] for sc in self.stress_scenarios])
+        vol_moves = np.array([sc['vol_move'] for sc in self.stress_scenarios])
+        new_prices = current * (1 + price_moves[:, None])
         
-        else:
-            pnl = 0.0
+        intrinsic_pnl = plan.evaluate_per_leg(new_prices)
+        
+        # Time value impact (simplified)
+        days = np.array([pos.expiration_days or 30 for pos in positions])
+        time_factor = np.sqrt(days / 365)
+        vol = 0.25 * (1 + vol_moves[:, None])  # Base vol with stress
+        time_value_change = vol * time_factor * current * 0.4 * vol_moves[:, None]
+        option_weights = np.where(is_option, plan.weights, 0.0)
         
-        return pnl
+        return intrinsic_pnl + time_value_change @ option_weights
     
     def compare_margins(self, positions: List[Position]) -> Dict:
         """
@@ -3,120 +3,214 @@ Max Pain Calculator
 Calculates the strike price where option writers lose the least money
 """
 
-from typing import List, Dict
+from typing import List, Dict, Tuple
+
+import numpy as np
+
+
+CONTRACT_MULTIPLIER = 100
+DEFAULT_OPEN_INTEREST = 100  # Used when a contract has no open_interest
+DEFAULT_GAMMA = 0.05  # Used when a contract has no gamma
+
+
+def _columns(options: List[Dict], field: str, default: float) -> np.ndarray:
+    return np.array([opt.get(field, default) for opt in options], dtype=np.float64)
+
+
+def _expirations(options: List[Dict]) -> np.ndarray:
+    return np.array([opt.get("expiration") or "" for opt in options], dtype=object)
+
+
+def _pain_curve(
+    settlements: np.ndarray,
+    call_strikes: np.ndarray,
+    call_oi: np.ndarray,
+    put_strikes: np.ndarray,
+    put_oi: np.ndarray
+) -> np.ndarray:
+    """
+    Total writer payout at each candidate settlement price
+
+    With strikes sorted, the calls ITM at settlement P are a prefix and
+    the puts ITM are a suffix, so
+        call pain(P) = P * sum(oi) - sum(oi * K)   over calls with K < P
+        put pain(P)  = sum(oi * K) - P * sum(oi)   over puts with K > P
+    and every candidate is one binary search into prefix sums:
+    O((N + S) log N) instead of O(S * N).
+    """
+    pain = np.zeros(len(settlements))
+
+    if len(call_strikes):
+        order = np.argsort(call_strikes, kind="stable")
+        strikes, oi = call_strikes[order], call_oi[order]
+        cum_oi = np.concatenate(([0.0], np.cumsum(oi)))
+        cum_oi_k = np.concatenate(([0.0], np.cumsum(oi * strikes)))
+        itm = np.searchsorted(strikes, settlements, side="left")
+        pain += settlements * cum_oi[itm] - cum_oi_k[itm]
+
+    if len(put_strikes):
+        order = np.argsort(put_strikes, kind="stable")
+        strikes, oi = put_strikes[order], put_oi[order]
+        cum_oi = np.concatenate(([0.0], np.cumsum(oi)))
+        cum_oi_k = np.concatenate(([0.0], np.cumsum(oi * strikes)))
+        otm = np.searchsorted(strikes, settlements, side="right")
+        pain += (cum_oi_k[-1] - cum_oi_k[otm]) - settlements * (cum_oi[-1] - cum_oi[otm])
+
+    return pain * CONTRACT_MULTIPLIER
+
+
+def _max_pain_profile(
+    call_strikes: np.ndarray,
+    call_oi: np.ndarray,
+    put_strikes: np.ndarray,
+    put_oi: np.ndarray,
+    current_price: float
+) -> Dict:
+    """Max pain over the listed strikes, in the calculate_max_pain result shape"""
+    strikes = np.unique(np.concatenate((call_strikes, put_strikes)))
+
+    if not len(strikes):
+        return {"max_pain": current_price, "pain_by_strike": []}
+
+    pain = _pain_curve(strikes, call_strikes, call_oi, put_strikes, put_oi)
+    best = int(np.argmin(pain))
+
+    return {
+        "max_pain": float(strikes[best]),
+        "min_total_pain": float(pain[best]),
+        "pain_by_strike": [
+            {"strike": strike, "pain": value}
+            for strike, value in zip(strikes.tolist(), pain.tolist())
+        ]
+    }
 
 
 def calculate_max_pain(options_chain: Dict, current_price: float) -> Dict:
     """
     Calculate Max Pain price for options expiration
-    
+
     Max Pain = Strike where total $ value of ITM options is minimized
     (i.e., where option writers pay out the least)
     """
     calls = options_chain.get("calls", [])
     puts = options_chain.get("puts", [])
-    
-    # Get unique strikes
-    strikes = set()
-    for opt in calls + puts:
-        strikes.add(opt.get("strike", 0))
-    
-    strikes = sorted(list(strikes))
-    
-    if not strikes:
-        return {"max_pain": current_price, "pain_by_strike": []}
-    
-    pain_by_strike = []
-    min_pain = float("inf")
-    max_pain_strike = current_price
-    
-    for test_strike in strikes:
-        total_pain = 0
-        
-        # Calculate call pain (calls ITM below test_strike)
-        for call in calls:
-            strike = call.get("strike", 0)
-            oi = call.get("open_interest", 100)  # Default OI if not available
-            
-            if test_strike > strike:
-                # Call is ITM, writers pay out
-                pain = (test_strike - strike) * oi * 100
-                total_pain += pain
-        
-        # Calculate put pain (puts ITM above test_strike)
-        for put in puts:
-            strike = put.get("strike", 0)
-            oi = put.get("open_interest", 100)
-            
-            if test_strike < strike:
-                # Put is ITM, writers pay out
-                pain = (strike - test_strike) * oi * 100
-                total_pain += pain
-        
-        pain_by_strike.append({
-            "strike": test_strike,
-            "pain": total_pain
-        })
-        
-        if total_pain < min_pain:
-            min_pain = total_pain
-            max_pain_strike = test_strike
-    
+
+    return _max_pain_profile(
+        _columns(calls, "strike", 0), _columns(calls, "open_interest", DEFAULT_OPEN_INTEREST),
+        _columns(puts, "strike", 0), _columns(puts, "open_interest", DEFAULT_OPEN_INTEREST),
+        current_price
+    )
+
+
+def calculate_max_pain_by_expiration(options_chain: Dict, current_price: float) -> Dict:
+    """
+    Max Pain for every expiration in a multi-expiry chain
+
+    Returns:
+        Dict with the aggregate profile (all expirations pooled, as
+        calculate_max_pain) and a profile per expiration date
+    """
+    calls = options_chain.get("calls", [])
+    puts = options_chain.get("puts", [])
+
+    call_strikes = _columns(calls, "strike", 0)
+    call_oi = _columns(calls, "open_interest", DEFAULT_OPEN_INTEREST)
+    put_strikes = _columns(puts, "strike", 0)
+    put_oi = _columns(puts, "open_interest", DEFAULT_OPEN_INTEREST)
+    call_exp = _expirations(calls)
+    put_exp = _expirations(puts)
+
+    by_expiration = {}
+    for expiration in sorted(set(call_exp.tolist()) | set(put_exp.tolist())):
+        in_calls = call_exp == expiration
+        in_puts = put_exp == expiration
+        by_expiration[expiration] = _max_pain_profile(
+            call_strikes[in_calls], call_oi[in_calls],
+            put_strikes[in_puts], put_oi[in_puts],
+            current_price
+        )
+
     return {
-        "max_pain": max_pain_strike,
-        "min_total_pain": min_pain,
-        "pain_by_strike": pain_by_strike
+        "aggregate": _max_pain_profile(call_strikes, call_oi, put_strikes, put_oi, current_price),
+        "expirations": by_expiration
     }
 
 
-def calculate_gamma_exposure(options_chain: Dict, current_price: float) -> Dict:
+def _gex_matrix(
+    options_chain: Dict,
+    current_price: float
+) -> Tuple[np.ndarray, List[str], np.ndarray, np.ndarray]:
     """
-    Calculate Gamma Exposure (GEX) by strike
-    Helps identify price levels with significant options activity
+    Dealer gamma exposure grouped by (expiration, strike) in one bincount
+
+    Returns:
+        (strikes, expirations, gex, listed): gex is shaped (expirations,
+        strikes) and listed flags the strikes each expiration quotes
     """
     calls = options_chain.get("calls", [])
     puts = options_chain.get("puts", [])
-    
-    gex_by_strike = {}
-    
-    # Process calls (positive gamma for dealers if short calls)
-    for call in calls:
-        strike = call.get("strike", 0)
-        oi = call.get("open_interest", 100)
-        gamma = call.get("gamma", 0.05)
-        
-        # GEX = Gamma * OI * 100 (contract size) * Spot^2 * 0.01
-        gex = gamma * oi * 100 * (current_price ** 2) * 0.01
-        
-        if strike not in gex_by_strike:
-            gex_by_strike[strike] = 0
-        gex_by_strike[strike] += gex  # Calls add positive gamma
-    
-    # Process puts (negative gamma for dealers if short puts)
-    for put in puts:
-        strike = put.get("strike", 0)
-        oi = put.get("open_interest", 100)
-        gamma = put.get("gamma", 0.05)
-        
-        gex = gamma * oi * 100 * (current_price ** 2) * 0.01
-        
-        if strike not in gex_by_strike:
-            gex_by_strike[strike] = 0
-        gex_by_strike[strike] -= gex  # Puts subtract gamma
-    
-    # Convert to list and sort
-    gex_list = [{"strike": k, "gex": v} for k, v in gex_by_strike.items()]
-    gex_list.sort(key=lambda x: x["strike"])
-    
-    # Find flip point (where GEX crosses zero)
-    flip_point = current_price
-    for i in range(1, len(gex_list)):
-        if gex_list[i-1]["gex"] * gex_list[i]["gex"] < 0:
-            flip_point = gex_list[i]["strike"]
-            break
-    
+    options = calls + puts
+
+    strikes = _columns(options, "strike", 0)
+    oi = _columns(options, "open_interest", DEFAULT_OPEN_INTEREST)
+    gamma = _columns(options, "gamma", DEFAULT_GAMMA)
+
+    # GEX = Gamma * OI * 100 (contract size) * Spot^2 * 0.01
+    # Calls add positive gamma for dealers, puts subtract
+    sign = np.concatenate((np.ones(len(calls)), -np.ones(len(puts))))
+    gex = sign * gamma * oi * CONTRACT_MULTIPLIER * (current_price ** 2) * 0.01
+
+    unique_strikes, strike_idx = np.unique(strikes, return_inverse=True)
+    expirations, exp_idx = np.unique(_expirations(options).astype(str), return_inverse=True)
+
+    shape = (len(expirations), len(unique_strikes))
+    group = exp_idx * shape[1] + strike_idx
+    grouped = np.bincount(group, weights=gex, minlength=shape[0] * shape[1]).reshape(shape)
+    listed = np.bincount(group, minlength=shape[0] * shape[1]).reshape(shape) > 0
+
+    return unique_strikes, expirations.tolist(), grouped, listed
+
+
+def _gex_profile(strikes: np.ndarray, gex: np.ndarray, current_price: float) -> Dict:
+    """GEX profile in the calculate_gamma_exposure result shape"""
+    # Find flip point (where GEX crosses zero between adjacent strikes)
+    crossings = np.flatnonzero(gex[:-1] * gex[1:] < 0)
+    flip_point = float(strikes[crossings[0] + 1]) if len(crossings) else current_price
+
     return {
-        "gex_by_strike": gex_list,
+        "gex_by_strike": [
+            {"strike": strike, "gex": value}
+            for strike, value in zip(strikes.tolist(), gex.tolist())
+        ],
         "flip_point": flip_point,
-        "total_gex": sum(g["gex"] for g in gex_list)
+        "total_gex": float(gex.sum())
     }
+
+
+def calculate_gamma_exposure(options_chain: Dict, current_price: float) -> Dict:
+    """
+    Calculate Gamma Exposure (GEX) by strike
+    Helps identify price levels with significant options activity
+    """
+    strikes, _, grouped, _ = _gex_matrix(options_chain, current_price)
+    return _gex_profile(strikes, grouped.sum(axis=0), current_price)
+
+
+def calculate_gamma_exposure_by_expiration(options_chain: Dict, current_price: float) -> Dict:
+    """
+    GEX for every expiration in a multi-expiry chain
+
+    Returns:
+        Dict with the aggregate profile (as calculate_gamma_exposure) and a
+        profile per expiration date, each over the strikes listed for it
+    """
+    strikes, expirations, grouped, listed = _gex_matrix(options_chain, current_price)
+
+    return {
+        "aggregate": _gex_profile(strikes, grouped.sum(axis=0), current_price),
+        "expirations": {
+            expiration: _gex_profile(strikes[listed[row]], grouped[row, listed[row]], current_price)
+            for row, expiration in enumerate(expirations)
+        }
+    }
+
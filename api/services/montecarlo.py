@@ -4,21 +4,47 @@ Price path simulations for probability calculations
 """
 
 import math
-import random
-from typing import List, Dict, Tuple
+from typing import List, Dict, Iterator, Optional, Tuple
 from dataclasses import dataclass
 
+import numpy as np
+
+
+TRADING_DAYS_PER_YEAR = 252
+
+# Paths simulated per block in streaming mode; memory use is bounded by
+# this, not by num_simulations
+DEFAULT_CHUNK_SIZE = 65_536
+
+# Above this many simulations monte_carlo_pop switches to streaming mode
+STREAMING_THRESHOLD = 200_000
+
+# Resolution of the fixed-range histograms used for streaming statistics
+STREAMING_HISTOGRAM_BINS = 8192
+
+# Streaming histograms span +/- this many standard deviations of log price
+STREAMING_RANGE_SIGMAS = 8.0
+
+PERCENTILES = {"5th": 0.05, "25th": 0.25, "50th": 0.50, "75th": 0.75, "95th": 0.95}
+
 
 @dataclass
 class SimulationResult:
     """Results from Monte Carlo simulation"""
-    paths: List[List[float]]  # List of price paths
-    final_prices: List[float]  # Terminal prices
+    paths: List[List[float]]  # Sampled price paths for visualization
+    final_prices: np.ndarray  # Terminal prices (empty in streaming mode)
     pop: float  # Probability of Profit
     expected_return: float  # Average return
     max_profit: float
     max_loss: float
     percentiles: Dict[str, float]
+    distribution: Optional[Dict] = None  # Filled in streaming mode
+
+
+def _make_rng(seed: Optional[int] = None,
+              rng: Optional[np.random.Generator] = None) -> np.random.Generator:
+    """Use the caller's generator if given, otherwise a seeded PCG64 stream"""
+    return rng if rng is not None else np.random.default_rng(seed)
 
 
 def simulate_gbm_paths(
@@ -27,37 +53,230 @@ def simulate_gbm_paths(
     volatility: float,  # Annualized volatility
     days: int,
     num_paths: int = 1000,
-    seed: int = None
-) -> List[List[float]]:
+    seed: int = None,
+    rng: Optional[np.random.Generator] = None
+) -> np.ndarray:
     """
     Simulate price paths using Geometric Brownian Motion
     
     dS = μSdt + σSdW
     
     S(t) = S(0) * exp((μ - σ²/2)t + σW(t))
+    
+    Returns:
+        Array of shape (num_paths, days + 1); column 0 is the spot price
+    """
+    rng = _make_rng(seed, rng)
+    
+    dt = 1 / TRADING_DAYS_PER_YEAR  # Daily step
+    
+    # Generate random shocks and turn them into daily log returns in place
+    log_returns = rng.standard_normal((num_paths, days))
+    log_returns *= volatility * math.sqrt(dt)
+    log_returns += (drift - 0.5 * volatility ** 2) * dt
+    
+    paths = np.empty((num_paths, days + 1))
+    paths[:, 0] = 0.0
+    np.cumsum(log_returns, axis=1, out=paths[:, 1:])
+    np.exp(paths, out=paths)
+    paths *= spot
+    return paths
+
+
+def simulate_terminal_prices(
+    spot: float,
+    drift: float,
+    volatility: float,
+    days: int,
+    num_paths: int = 1000,
+    seed: int = None,
+    rng: Optional[np.random.Generator] = None
+) -> np.ndarray:
+    """
+    Simulate only the terminal GBM price of each path
+    
+    Samples S(T) directly from its lognormal distribution, so the
+    intermediate path is never materialized.
+    """
+    rng = _make_rng(seed, rng)
+    
+    T = days / TRADING_DAYS_PER_YEAR
+    z = rng.standard_normal(num_paths)
+    return spot * np.exp((drift - 0.5 * volatility ** 2) * T + volatility * math.sqrt(T) * z)
+
+
+def iter_terminal_price_chunks(
+    spot: float,
+    drift: float,
+    volatility: float,
+    days: int,
+    num_paths: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    seed: int = None,
+    rng: Optional[np.random.Generator] = None
+) -> Iterator[np.ndarray]:
+    """
+    Yield terminal prices in blocks of at most chunk_size
+    
+    All blocks are drawn from one generator stream, so a seeded run is
+    reproducible regardless of chunk size boundaries in the consumer.
+    """
+    rng = _make_rng(seed, rng)
+    
+    remaining = num_paths
+    while remaining > 0:
+        n = min(chunk_size, remaining)
+        yield simulate_terminal_prices(spot, drift, volatility, days, n, rng=rng)
+        remaining -= n
+
+
+class StreamingHistogram:
     """
-    if seed is not None:
-        random.seed(seed)
+    Fixed-range histogram with exact running moments and extrema
     
-    dt = 1 / 252  # Daily step (252 trading days)
-    paths = []
+    Lets distribution statistics be folded block by block in constant
+    memory. Values outside [low, high] are counted in the edge bins;
+    quantiles are accurate to within one bin width.
+    """
     
-    for _ in range(num_paths):
-        path = [spot]
-        current = spot
+    def __init__(self, low: float, high: float, bins: int = STREAMING_HISTOGRAM_BINS):
+        if high <= low:
+            high = low + 1.0
+        self.low = low
+        self.high = high
+        self.edges = np.linspace(low, high, bins + 1)
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+    
+    def add(self, values: np.ndarray) -> None:
+        """Fold a block of values into the histogram and moments"""
+        n = values.size
+        if n == 0:
+            return
+        
+        self.counts += np.histogram(np.clip(values, self.low, self.high), bins=self.edges)[0]
+        
+        # Chan et al. parallel merge of (count, mean, M2)
+        block_mean = float(values.mean())
+        block_m2 = float(((values - block_mean) ** 2).sum())
+        total = self.count + n
+        delta = block_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += block_m2 + delta * delta * self.count * n / total
+        self.count = total
+        
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+    
+    @property
+    def std(self) -> float:
+        """Population standard deviation"""
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+    
+    def _cdf_at(self, x: np.ndarray) -> np.ndarray:
+        """Cumulative count at x, interpolated linearly within bins"""
+        cumulative = np.concatenate(([0], np.cumsum(self.counts)))
+        return np.interp(x, self.edges, cumulative)
+    
+    def quantile(self, q: float) -> float:
+        """Approximate q-quantile (0 <= q <= 1), clamped to observed extrema"""
+        cumulative = np.concatenate(([0], np.cumsum(self.counts)))
+        value = float(np.interp(q * self.count, cumulative, self.edges))
+        return min(max(value, self.min), self.max)
+    
+    def rebin(self, bins: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Edges and counts for `bins` equal-width bins spanning the observed [min, max]"""
+        edges = np.linspace(self.min, self.max, bins + 1)
+        counts = np.diff(np.rint(self._cdf_at(edges))).astype(np.int64)
+        return edges, counts
+
+
+class PayoffPlan:
+    """
+    Strategy legs compiled once into column arrays for expiration P/L
+    
+    Each leg contributes weight * (value(S) - premium), where value is the
+    call/put intrinsic value or S - strike for stock, and weight folds in
+    direction, quantity and contract multiplier. Building the plan reads
+    the leg dicts once; evaluating it is a single NumPy expression over
+    any array of terminal prices.
+    """
+    
+    def __init__(self, strikes, premiums, weights, is_call, is_put):
+        self.strikes = np.asarray(strikes, dtype=float)
+        self.premiums = np.asarray(premiums, dtype=float)
+        self.weights = np.asarray(weights, dtype=float)
+        self.is_call = np.asarray(is_call, dtype=bool)
+        self.is_put = np.asarray(is_put, dtype=bool)
+    
+    @classmethod
+    def from_legs(cls, legs: List[Dict], option_multiplier: float = 100,
+                  stock_multiplier: float = 1) -> "PayoffPlan":
+        """
+        Compile leg dicts (option_type, position, strike, premium, quantity)
+        
+        Legs of unknown type get zero weight, as calculate_strategy_payoff
+        ignores them.
+        """
+        strikes, premiums, weights, is_call, is_put = [], [], [], [], []
         
-        for _ in range(days):
-            # Generate random shock
-            dW = random.gauss(0, 1) * math.sqrt(dt)
+        for leg in legs:
+            opt_type = leg.get("option_type", "call")
+            sign = 1 if leg.get("position", "long") == "long" else -1
+            qty = leg.get("quantity", 1)
             
-            # GBM step
-            daily_return = (drift - 0.5 * volatility ** 2) * dt + volatility * dW
-            current = current * math.exp(daily_return)
-            path.append(current)
+            if opt_type in ("call", "put"):
+                multiplier = option_multiplier
+                premium = leg.get("premium", 0)
+            elif opt_type == "stock":
+                multiplier = stock_multiplier
+                premium = 0
+            else:
+                multiplier = 0
+                premium = 0
+            
+            strikes.append(leg.get("strike", 0))
+            premiums.append(premium)
+            weights.append(sign * qty * multiplier)
+            is_call.append(opt_type == "call")
+            is_put.append(opt_type == "put")
         
-        paths.append(path)
+        return cls(strikes, premiums, weights, is_call, is_put)
     
-    return paths
+    def __len__(self) -> int:
+        return len(self.strikes)
+    
+    def leg_values(self, leg_prices: np.ndarray) -> np.ndarray:
+        """
+        Per-leg expiration value for prices of shape (..., n_legs)
+        
+        The last axis lines up with the legs, so legs on different
+        underlyings can each be given their own price.
+        """
+        diff = np.asarray(leg_prices, dtype=float) - self.strikes
+        return np.where(
+            self.is_call, np.maximum(diff, 0),
+            np.where(self.is_put, np.maximum(-diff, 0), diff)
+        )
+    
+    def evaluate_per_leg(self, leg_prices: np.ndarray) -> np.ndarray:
+        """Total P/L for per-leg prices of shape (..., n_legs)"""
+        return (self.leg_values(leg_prices) - self.premiums) @ self.weights
+    
+    def evaluate(self, final_prices: np.ndarray) -> np.ndarray:
+        """Total P/L at each price in an array of terminal prices (any shape)"""
+        final_prices = np.asarray(final_prices, dtype=float)
+        if not len(self):
+            return np.zeros_like(final_prices)
+        return self.evaluate_per_leg(final_prices[..., None])
+    
+    def kinks(self) -> np.ndarray:
+        """Prices where the expiration P/L can change slope"""
+        return np.unique(self.strikes[self.is_call | self.is_put])
 
 
 def calculate_strategy_payoff(
@@ -69,27 +288,39 @@ def calculate_strategy_payoff(
     
     Each leg has: option_type, position (long/short), strike, premium, quantity
     """
-    payoff = 0
+    return float(PayoffPlan.from_legs(legs).evaluate(final_price))
+
+
+def expiration_curve(legs: List[Dict], spot: float, range_percent: float = 0.20,
+                     num_points: int = 200) -> Dict:
+    """
+    Expiration P/L curve for charting, centered on the spot price
     
-    for leg in legs:
-        opt_type = leg.get("option_type", "call")
-        position = leg.get("position", "long")
-        strike = leg.get("strike", 0)
-        premium = leg.get("premium", 0)
-        qty = leg.get("quantity", 1)
-        
-        sign = 1 if position == "long" else -1
-        
-        if opt_type == "call":
-            intrinsic = max(0, final_price - strike)
-            payoff += sign * qty * 100 * (intrinsic - premium)
-        elif opt_type == "put":
-            intrinsic = max(0, strike - final_price)
-            payoff += sign * qty * 100 * (intrinsic - premium)
-        elif opt_type == "stock":
-            payoff += sign * qty * (final_price - strike)
+    Strikes inside the range are added to the grid so the hockey-stick
+    corners are drawn exactly.
+    """
+    plan = PayoffPlan.from_legs(legs)
+    low, high = spot * (1 - range_percent), spot * (1 + range_percent)
     
-    return payoff
+    kinks = plan.kinks()
+    prices = np.union1d(np.linspace(low, high, num_points), kinks[(kinks > low) & (kinks < high)])
+    pnls = plan.evaluate(prices)
+    
+    return {
+        "prices": np.round(prices, 2).tolist(),
+        "pnl": np.round(pnls, 2).tolist(),
+        "max_profit": round(float(pnls.max()), 2),
+        "max_loss": round(float(pnls.min()), 2)
+    }
+
+
+def _terminal_price_bounds(spot: float, drift: float, volatility: float,
+                           days: int) -> tuple:
+    """Terminal price range covering +/- STREAMING_RANGE_SIGMAS of log price"""
+    T = days / TRADING_DAYS_PER_YEAR
+    center = math.log(spot) + (drift - 0.5 * volatility ** 2) * T
+    width = STREAMING_RANGE_SIGMAS * volatility * math.sqrt(T)
+    return math.exp(center - width), math.exp(center + width)
 
 
 def monte_carlo_pop(
@@ -98,86 +329,156 @@ def monte_carlo_pop(
     days: int,
     legs: List[Dict],
     risk_free_rate: float = 0.05,
-    num_simulations: int = 1000
+    num_simulations: int = 1000,
+    seed: int = None,
+    streaming: Optional[bool] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
 ) -> SimulationResult:
     """
     Run Monte Carlo simulation to calculate Probability of Profit
     
+    Only terminal prices matter for expiration P/L, so they are sampled
+    directly; the visualization paths are simulated separately. With
+    streaming (default: num_simulations > STREAMING_THRESHOLD) prices are
+    generated and folded in blocks of chunk_size, keeping memory constant.
+    
     Returns detailed simulation results
     """
-    # Simulate price paths
-    paths = simulate_gbm_paths(
+    rng = _make_rng(seed)
+    if streaming is None:
+        streaming = num_simulations > STREAMING_THRESHOLD
+    
+    # Only return sampled paths for visualization (max 100)
+    sampled_paths = simulate_gbm_paths(
         spot=spot,
         drift=risk_free_rate,
         volatility=volatility,
         days=days,
-        num_paths=num_simulations
-    )
+        num_paths=min(100, num_simulations),
+        rng=rng
+    ).tolist()
+    
+    if streaming:
+        return _monte_carlo_pop_streaming(
+            spot, volatility, days, legs, risk_free_rate,
+            num_simulations, chunk_size, rng, sampled_paths
+        )
     
-    # Get final prices
-    final_prices = [path[-1] for path in paths]
+    final_prices = simulate_terminal_prices(
+        spot, risk_free_rate, volatility, days, num_simulations, rng=rng
+    )
     
     # Calculate P/L for each path
-    pnls = [calculate_strategy_payoff(fp, legs) for fp in final_prices]
+    pnls = PayoffPlan.from_legs(legs).evaluate(final_prices)
     
     # Statistics
-    profitable_count = sum(1 for pnl in pnls if pnl > 0)
-    pop = profitable_count / num_simulations
-    
-    expected_return = sum(pnls) / num_simulations
-    max_profit = max(pnls)
-    max_loss = min(pnls)
+    pop = np.count_nonzero(pnls > 0) / num_simulations
     
     # Percentiles
-    sorted_pnls = sorted(pnls)
+    sorted_pnls = np.sort(pnls)
     percentiles = {
-        "5th": sorted_pnls[int(0.05 * len(sorted_pnls))],
-        "25th": sorted_pnls[int(0.25 * len(sorted_pnls))],
-        "50th": sorted_pnls[int(0.50 * len(sorted_pnls))],
-        "75th": sorted_pnls[int(0.75 * len(sorted_pnls))],
-        "95th": sorted_pnls[int(0.95 * len(sorted_pnls))]
+        label: float(sorted_pnls[int(q * len(sorted_pnls))])
+        for label, q in PERCENTILES.items()
     }
     
-    # Only return sampled paths for visualization (max 100)
-    sampled_paths = paths[:min(100, len(paths))]
-    
     return SimulationResult(
         paths=sampled_paths,
         final_prices=final_prices,
         pop=round(pop * 100, 2),  # As percentage
-        expected_return=round(expected_return, 2),
-        max_profit=round(max_profit, 2),
-        max_loss=round(max_loss, 2),
+        expected_return=round(float(pnls.mean()), 2),
+        max_profit=round(float(pnls.max()), 2),
+        max_loss=round(float(pnls.min()), 2),
         percentiles=percentiles
     )
 
 
-def price_distribution(final_prices: List[float], bins: int = 50) -> Dict:
+def _monte_carlo_pop_streaming(
+    spot: float,
+    volatility: float,
+    days: int,
+    legs: List[Dict],
+    risk_free_rate: float,
+    num_simulations: int,
+    chunk_size: int,
+    rng: np.random.Generator,
+    sampled_paths: List[List[float]]
+) -> SimulationResult:
+    """Fold P/L and price statistics block by block in constant memory"""
+    plan = PayoffPlan.from_legs(legs)
+    price_low, price_high = _terminal_price_bounds(spot, risk_free_rate, volatility, days)
+    
+    # Expiration P/L is piecewise linear with kinks at the strikes, so its
+    # range over the price bounds is attained at a bound or a strike
+    kinks = plan.kinks()
+    probe = np.concatenate((
+        [price_low, price_high], kinks[(kinks > price_low) & (kinks < price_high)]
+    ))
+    probe_pnls = plan.evaluate(probe)
+    
+    prices = StreamingHistogram(price_low, price_high)
+    pnls = StreamingHistogram(float(probe_pnls.min()), float(probe_pnls.max()))
+    profitable_count = 0
+    
+    for block in iter_terminal_price_chunks(
+        spot, risk_free_rate, volatility, days, num_simulations, chunk_size, rng=rng
+    ):
+        block_pnls = plan.evaluate(block)
+        profitable_count += int(np.count_nonzero(block_pnls > 0))
+        pnls.add(block_pnls)
+        prices.add(block)
+    
+    pop = profitable_count / num_simulations
+    percentiles = {label: pnls.quantile(q) for label, q in PERCENTILES.items()}
+    
+    return SimulationResult(
+        paths=sampled_paths,
+        final_prices=np.empty(0),
+        pop=round(pop * 100, 2),  # As percentage
+        expected_return=round(pnls.mean, 2),
+        max_profit=round(pnls.max, 2),
+        max_loss=round(pnls.min, 2),
+        percentiles=percentiles,
+        distribution=_histogram_distribution(prices)
+    )
+
+
+def _histogram_distribution(prices: StreamingHistogram, bins: int = 50) -> Dict:
+    """price_distribution output built from a streaming histogram"""
+    edges, counts = prices.rebin(bins)
+    
+    return {
+        "histogram": [
+            {
+                "bin_start": round(float(edges[i]), 2),
+                "bin_end": round(float(edges[i + 1]), 2),
+                "count": int(counts[i]),
+                "frequency": round(int(counts[i]) / prices.count, 4)
+            }
+            for i in range(bins)
+        ],
+        "mean": round(prices.mean, 2),
+        "std": round(prices.std, 2)
+    }
+
+
+def price_distribution(final_prices: np.ndarray, bins: int = 50) -> Dict:
     """
     Create histogram of final price distribution
     """
-    min_price = min(final_prices)
-    max_price = max(final_prices)
-    bin_width = (max_price - min_price) / bins
+    final_prices = np.asarray(final_prices, dtype=float)
+    counts, edges = np.histogram(final_prices, bins=bins)
     
     histogram = []
     for i in range(bins):
-        bin_start = min_price + i * bin_width
-        bin_end = bin_start + bin_width
-        count = sum(1 for p in final_prices if bin_start <= p < bin_end)
         histogram.append({
-            "bin_start": round(bin_start, 2),
-            "bin_end": round(bin_end, 2),
-            "count": count,
-            "frequency": round(count / len(final_prices), 4)
+            "bin_start": round(float(edges[i]), 2),
+            "bin_end": round(float(edges[i + 1]), 2),
+            "count": int(counts[i]),
+            "frequency": round(int(counts[i]) / len(final_prices), 4)
         })
     
     return {
         "histogram": histogram,
-        "mean": round(sum(final_prices) / len(final_prices), 2),
-        "std": round(
-            math.sqrt(sum((p - sum(final_prices)/len(final_prices))**2 
-                         for p in final_prices) / len(final_prices)),
-            2
-        )
+        "mean": round(float(final_prices.mean()), 2),
+        "std": round(float(final_prices.std()), 2)
     }
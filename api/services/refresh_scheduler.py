@@ -0,0 +1,266 @@
+"""
+Refresh-Ahead Scheduler
+Stale-while-revalidate for hot cache keys: popular entries are recomputed
+in the background shortly before they expire, within a concurrency budget
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from services.cache_service import CacheService, get_cache_instance
+
+
+class RefreshConfig:
+    """Refresh-ahead tuning"""
+    MAX_CONCURRENT = int(os.getenv("CACHE_REFRESH_CONCURRENCY", "4"))  # Background refreshes at once
+    REFRESH_AHEAD = 0.2  # Refresh once less than this fraction of the TTL remains
+    MIN_SCORE = 2.0  # Decayed request count that makes a key "hot"
+    COLD_SCORE = 0.05  # Keys decayed below this are forgotten
+    HALFLIFE = 120.0  # seconds - popularity half-life
+    INTERVAL = 1.0  # seconds between scheduler passes
+    MAX_KEYS = 2048
+
+
+@dataclass
+class RefreshRecipe:
+    """How to recompute one key, plus its decayed popularity"""
+    fn: Callable
+    ttl: Optional[float]
+    tags: Tuple[str, ...]
+    args: tuple
+    kwargs: Dict[str, Any]
+    score: float = 0.0
+    last_access: float = field(default_factory=time.time)
+
+    def popularity(self, now: float, halflife: float) -> float:
+        return self.score * 0.5 ** ((now - self.last_access) / halflife)
+
+    def touch(self, now: float, halflife: float):
+        self.score = self.popularity(now, halflife) + 1.0
+        self.last_access = now
+
+
+class RefreshScheduler:
+    """
+    Keep hot cache keys warm
+
+    Requests go through get_or_compute, which records how to recompute
+    each key and how often it is asked for. Fresh values are returned
+    directly; stale values are returned immediately while a refresh runs
+    in the background. A periodic pass also refreshes hot keys that are
+    about to expire, hottest first, so popular endpoints rarely go stale.
+
+    At most `max_concurrent` background refreshes run at once; keys that
+    do not fit are picked up by a later pass. Refreshes share the cache's
+    single-flight layer, so a request that misses while a refresh is
+    running waits for that refresh instead of starting another.
+
+    Args:
+        cache: Cache to serve from (default: the process-wide cache)
+        max_concurrent: Background refresh budget
+        refresh_ahead: Fraction of the TTL left at which hot keys refresh
+        min_score: Popularity needed for refresh-ahead
+        halflife: Popularity half-life in seconds
+        interval: Seconds between scheduler passes
+    """
+
+    def __init__(
+        self,
+        cache: Optional[CacheService] = None,
+        max_concurrent: int = RefreshConfig.MAX_CONCURRENT,
+        refresh_ahead: float = RefreshConfig.REFRESH_AHEAD,
+        min_score: float = RefreshConfig.MIN_SCORE,
+        halflife: float = RefreshConfig.HALFLIFE,
+        interval: float = RefreshConfig.INTERVAL,
+        max_keys: int = RefreshConfig.MAX_KEYS
+    ):
+        self.cache = cache if cache is not None else get_cache_instance()
+        self.max_concurrent = max_concurrent
+        self.refresh_ahead = refresh_ahead
+        self.min_score = min_score
+        self.halflife = halflife
+        self.interval = interval
+        self.max_keys = max_keys
+        self._recipes: Dict[str, RefreshRecipe] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {
+            "requests": 0, "fresh": 0, "stale_served": 0, "misses": 0,
+            "refreshes": 0, "refreshed_ahead": 0, "refresh_errors": 0, "deferred": 0
+        }
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute_fn,
+        ttl: Optional[float] = None,
+        *args,
+        tags: Iterable[str] = (),
+        **kwargs
+    ) -> Any:
+        """
+        Serve a key from cache, refreshing it in the background when stale
+
+        Args:
+            key: Cache key (its prefix is the cache namespace)
+            compute_fn: Sync or async function producing the value
+            ttl: Time to live in seconds (default: namespace TTL)
+            *args, **kwargs: Arguments to pass to compute_fn
+            tags: Extra invalidation tags
+
+        Returns:
+            Fresh, stale or newly computed value
+        """
+        now = time.time()
+        self.stats["requests"] += 1
+        recipe = self._remember(key, compute_fn, ttl, tuple(tags), args, kwargs, now)
+
+        entry = await self.cache.lookup(key)
+        if entry is not None:
+            if entry.ttl_remaining > 0:
+                self.stats["fresh"] += 1
+            else:
+                self.stats["stale_served"] += 1
+                self._schedule(key, recipe)
+            return entry.value
+
+        self.stats["misses"] += 1
+        return await self.cache.recompute(key, compute_fn, ttl, recipe.tags, *args, **kwargs)
+
+    def _remember(self, key, compute_fn, ttl, tags, args, kwargs, now) -> RefreshRecipe:
+        recipe = self._recipes.get(key)
+        if recipe is None:
+            if len(self._recipes) >= self.max_keys:
+                self._prune(now, force=True)
+            recipe = RefreshRecipe(compute_fn, ttl, tags, args, kwargs, last_access=now)
+            self._recipes[key] = recipe
+        else:
+            # The latest request defines how the key is recomputed
+            recipe.fn, recipe.ttl, recipe.tags, recipe.args, recipe.kwargs = compute_fn, ttl, tags, args, kwargs
+        recipe.touch(now, self.halflife)
+        return recipe
+
+    def _prune(self, now: float, force: bool = False):
+        """Forget cold keys; when forced, also the coldest half of the rest"""
+        scores = {key: r.popularity(now, self.halflife) for key, r in self._recipes.items()}
+        drop = [key for key, score in scores.items() if score < RefreshConfig.COLD_SCORE]
+        if force and len(drop) < len(scores) // 2:
+            drop = sorted(scores, key=scores.get)[:len(scores) // 2]
+        for key in drop:
+            if key not in self._running:
+                del self._recipes[key]
+
+    def _schedule(self, key: str, recipe: RefreshRecipe) -> bool:
+        """Start a background refresh if the key is idle and the budget allows"""
+        if key in self._running:
+            return True
+        if len(self._running) >= self.max_concurrent:
+            self.stats["deferred"] += 1
+            return False
+        self._running[key] = asyncio.get_running_loop().create_task(self._refresh(key, recipe))
+        return True
+
+    async def _refresh(self, key: str, recipe: RefreshRecipe):
+        try:
+            await self.cache.recompute(key, recipe.fn, recipe.ttl, recipe.tags, *recipe.args, **recipe.kwargs)
+            self.stats["refreshes"] += 1
+        except Exception as e:
+            self.stats["refresh_errors"] += 1
+            print(f"[Refresh] Error for {key}: {e}")
+        finally:
+            self._running.pop(key, None)
+
+    def due(self, now: Optional[float] = None) -> list:
+        """
+        Hot keys that are stale or about to expire, hottest first
+
+        Only entries held in this process's L1 are considered; keys that
+        have fallen out entirely are recomputed by the next request.
+        """
+        now = time.time() if now is None else now
+        due = []
+        for key, recipe in self._recipes.items():
+            if key in self._running:
+                continue
+            score = recipe.popularity(now, self.halflife)
+            if score < self.min_score:
+                continue
+            entry = self.cache.l1.get(key)
+            if entry is None:
+                continue
+            ttl = self.cache.ttl_for(key, recipe.ttl)
+            if entry.fresh_until - now < self.refresh_ahead * ttl:
+                due.append((score, key))
+        due.sort(reverse=True)
+        return [key for _, key in due]
+
+    def run_once(self) -> int:
+        """
+        One scheduler pass (must be called from the event loop)
+
+        Returns:
+            Number of refreshes started
+        """
+        now = time.time()
+        self._prune(now)
+
+        started = 0
+        for key in self.due(now):
+            if not self._schedule(key, self._recipes[key]):
+                break
+            started += 1
+        self.stats["refreshed_ahead"] += started
+        return started
+
+    async def _loop(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"[Refresh] Scheduler error: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start the periodic refresh-ahead pass on the running loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self):
+        """Stop the scheduler and cancel refreshes still running"""
+        tasks = list(self._running.values())
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._running.clear()
+
+    def get_stats(self) -> Dict:
+        """Counters plus tracked/hot key counts"""
+        now = time.time()
+        hot = sum(1 for r in self._recipes.values() if r.popularity(now, self.halflife) >= self.min_score)
+        served = self.stats["fresh"] + self.stats["stale_served"]
+        return {
+            **self.stats,
+            "hit_rate_pct": round(100 * served / self.stats["requests"], 1) if self.stats["requests"] else 0.0,
+            "tracked_keys": len(self._recipes),
+            "hot_keys": hot,
+            "running": len(self._running),
+            "max_concurrent": self.max_concurrent
+        }
+
+
+# Global instance
+_refresh_scheduler: Optional[RefreshScheduler] = None
+
+
+def get_refresh_scheduler() -> RefreshScheduler:
+    """Get or create the process-wide refresh scheduler"""
+    global _refresh_scheduler
+    if _refresh_scheduler is None:
+        _refresh_scheduler = RefreshScheduler()
+    return _refresh_scheduler
@@ -9,6 +9,8 @@ from typing import List, Dict, Optional, Tuple
 from enum import Enum
 import math
 
+from indicators import StreamingADX, StreamingRSI
+
 
 class MarketRegime(Enum):
     TRENDING = "trending"    # Strong directional movement - favor Momentum
@@ -202,51 +204,13 @@ class RegimeDetector:
             return 20.0  # Default to neutral
         
         try:
-            # Calculate True Range and Directional Movement
-            tr_list = []
-            plus_dm_list = []
-            minus_dm_list = []
-            
-            for i in range(1, len(bars)):
-                high = bars[i]["high"]
-                low = bars[i]["low"]
-                close_prev = bars[i-1]["close"]
-                high_prev = bars[i-1]["high"]
-                low_prev = bars[i-1]["low"]
-                
-                # True Range
-                tr = max(high - low, abs(high - close_prev), abs(low - close_prev))
-                tr_list.append(tr)
-                
-                # Directional Movement
-                up_move = high - high_prev
-                down_move = low_prev - low
-                
-                plus_dm = up_move if up_move > down_move and up_move > 0 else 0
-                minus_dm = down_move if down_move > up_move and down_move > 0 else 0
-                
-                plus_dm_list.append(plus_dm)
-                minus_dm_list.append(minus_dm)
-            
-            # Smooth with EMA
-            def ema(data, period):
-                if len(data) < period:
-                    return sum(data) / len(data) if data else 0
-                alpha = 2 / (period + 1)
-                result = sum(data[:period]) / period
-                for val in data[period:]:
-                    result = alpha * val + (1 - alpha) * result
-                return result
-            
-            atr = ema(tr_list[-period*2:], period)
-            plus_di = 100 * ema(plus_dm_list[-period*2:], period) / atr if atr > 0 else 0
-            minus_di = 100 * ema(minus_dm_list[-period*2:], period) / atr if atr > 0 else 0
-            
-            # Calculate DX
-            dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di) if (plus_di + minus_di) > 0 else 0
+            adx = StreamingADX(period)
+            for bar in bars:
+                adx.update_bar(bar["high"], bar["low"], bar["close"])
             
-            # ADX is smoothed DX (simplified here)
-            return max(0, min(dx, 100))
+            if adx.value is None:
+                return 20.0
+            return max(0, min(adx.value, 100))
             
         except Exception as e:
             print(f"ADX calculation error: {e}")
@@ -258,27 +222,7 @@ class RegimeDetector:
             return 50.0
         
         try:
-            gains = []
-            losses = []
-            
-            for i in range(1, len(bars)):
-                change = bars[i]["close"] - bars[i-1]["close"]
-                if change > 0:
-                    gains.append(change)
-                    losses.append(0)
-                else:
-                    gains.append(0)
-                    losses.append(abs(change))
-            
-            # Use last 'period' values
-            avg_gain = sum(gains[-period:]) / period
-            avg_loss = sum(losses[-period:]) / period
-            
-            if avg_loss == 0:
-                return 100.0
-            
-            rs = avg_gain / avg_loss
-            rsi = 100 - (100 / (1 + rs))
+            rsi = StreamingRSI(period).update_many(bar["close"] for bar in bars)
             
             return max(0, min(rsi, 100))
             
@@ -91,22 +91,22 @@ class MarketScanner:
         tickers = tickers or SP100_TICKERS
         candidates = []
         
-        # Process in batches to avoid rate limiting
-        batch_size = 10
-        for i in range(0, len(tickers), batch_size):
-            batch = tickers[i:i + batch_size]
-            batch_results = await asyncio.gather(
-                *[self._analyze_ticker(ticker) for ticker in batch],
-                return_exceptions=True
-            )
-            
-            for result in batch_results:
-                if isinstance(result, ActiveCandidate):
-                    candidates.append(result)
-            
-            # Small delay between batches to be nice to API
-            if i + batch_size < len(tickers):
-                await asyncio.sleep(0.5)
+        # Quotes and daily bars for the whole universe in a few batched calls
+        prices, bars = await asyncio.gather(
+            self.alpaca.get_current_prices(tickers),
+            self.alpaca.get_multi_bars(tickers, "1Day", 21)
+        )
+        
+        # Per-ticker analysis (only the IV lookup still hits the API); the
+        # shared HTTP client caps concurrent requests per host
+        results = await asyncio.gather(
+            *[self._analyze_ticker(ticker, prices.get(ticker), bars.get(ticker, [])) for ticker in tickers],
+            return_exceptions=True
+        )
+        
+        for result in results:
+            if isinstance(result, ActiveCandidate):
+                candidates.append(result)
         
         # Sort by score and cache results
         candidates.sort(key=lambda x: x.score, reverse=True)
@@ -115,11 +115,22 @@ class MarketScanner:
         
         return candidates
     
-    async def _analyze_ticker(self, ticker: str) -> Optional[ActiveCandidate]:
-        """Analyze a single ticker for trade signals."""
+    async def _analyze_ticker(
+        self,
+        ticker: str,
+        price_data: Optional[Dict] = None,
+        bars: Optional[List[Dict]] = None
+    ) -> Optional[ActiveCandidate]:
+        """
+        Analyze a single ticker for trade signals.
+        
+        price_data and bars come from the batched fetch in scan(); they
+        are requested individually when not supplied.
+        """
         try:
             # Get current price and quote
-            price_data = await self.alpaca.get_current_price(ticker)
+            if price_data is None:
+                price_data = await self.alpaca.get_current_price(ticker)
             if not price_data:
                 return None
             
@@ -135,7 +146,8 @@ class MarketScanner:
                 return None
             
             # Get historical bars for volume analysis
-            bars = await self.alpaca.get_historical_bars(ticker, "1Day", 21)
+            if bars is None:
+                bars = await self.alpaca.get_historical_bars(ticker, "1Day", 21)
             if len(bars) < 20:
                 return None
             
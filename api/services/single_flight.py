@@ -0,0 +1,155 @@
+"""
+Request Coalescing
+Single-flight deduplication of identical upstream calls with a short result TTL
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class CoalesceConfig:
+    """Result TTLs for coalesced market-data calls"""
+    PRICE_TTL = 1.0  # seconds - quotes move fast; only collapses bursts
+    BARS_TTL = 5.0  # seconds
+    CHAIN_TTL = 2.0  # seconds - option chain snapshots
+    IV_TTL = 2.0  # seconds
+    MAX_ENTRIES = 2048
+
+
+class SingleFlight:
+    """
+    Share one upstream call between concurrent identical requests
+
+    The first caller for a key starts the call; callers arriving while it
+    is in flight await the same future ("coalesced"). A successful result
+    is then served from memory for `ttl` seconds ("hit"). Falsy results
+    (the services' error/empty sentinels) and exceptions are not cached.
+
+    Results are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = CoalesceConfig.MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._results: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], ttl: float = 1.0) -> Any:
+        """
+        Return the cached, in-flight or freshly fetched result for key
+
+        Args:
+            key: Identity of the request
+            fn: Zero-argument coroutine function performing the upstream call
+            ttl: Seconds a successful result stays reusable
+        """
+        entry = self._results.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._results.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+            del self._results[key]
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leading caller was cancelled; make the call ourselves
+                return await self.do(key, fn, ttl)
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            self.stats["errors"] += 1
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else was waiting
+            raise
+        else:
+            future.set_result(result)
+            if result and ttl > 0:
+                self._store(key, result, ttl)
+            return result
+        finally:
+            self._in_flight.pop(key, None)
+
+    def _store(self, key: Hashable, value: Any, ttl: float):
+        self._results[key] = (time.monotonic() + ttl, value)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    def invalidate(self, prefix: Optional[str] = None):
+        """Drop cached results (all, or those whose key starts with prefix)"""
+        if prefix is None:
+            self._results.clear()
+            return
+        for key in [k for k in self._results if isinstance(k, tuple) and k and k[0] == prefix]:
+            del self._results[key]
+
+    def get_stats(self) -> Dict:
+        """Counters plus current sizes"""
+        requests = self.stats["hits"] + self.stats["misses"] + self.stats["coalesced"]
+        return {
+            **self.stats,
+            "requests": requests,
+            "upstream_saved_pct": round(100 * (requests - self.stats["misses"]) / requests, 1) if requests else 0.0,
+            "cached_entries": len(self._results),
+            "in_flight": len(self._in_flight)
+        }
+
+
+def _freeze(value: Any) -> Hashable:
+    """Hashable form of call arguments (lists/dicts become tuples)"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def coalesced(ttl: float):
+    """
+    Decorator for AlpacaService-style methods
+
+    The key is the method name, the instance's upstream (data_url) and
+    the call arguments; the instance's `flight` does the coalescing.
+
+    Usage:
+        @coalesced(CoalesceConfig.PRICE_TTL)
+        async def get_current_price(self, ticker: str):
+            ...
+    """
+    def decorator(method):
+        @wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            key = (method.__name__, getattr(self, "data_url", None), _freeze(args), _freeze(kwargs))
+            return await self.flight.do(key, lambda: method(self, *args, **kwargs), ttl)
+
+        return wrapper
+    return decorator
+
+
+# Global instance
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    """Get or create the process-wide coalescing layer"""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
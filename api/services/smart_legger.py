@@ -3,13 +3,14 @@ Smart Legging Execution
 RSI-based entry timing for multi-leg strategies
 """
 
-import numpy as np
 import asyncio
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from dataclasses import dataclass
 from enum import Enum
 
+from indicators import StreamingRSI
+
 
 class LegStatus(Enum):
     PENDING = "pending"
@@ -61,22 +62,7 @@ class SmartLegger:
         if len(prices) < period + 1:
             return 50.0  # Neutral
         
-        prices = np.array(prices)
-        deltas = np.diff(prices)
-        
-        gains = np.where(deltas > 0, deltas, 0)
-        losses = np.where(deltas < 0, -deltas, 0)
-        
-        avg_gain = np.mean(gains[-period:])
-        avg_loss = np.mean(losses[-period:])
-        
-        if avg_loss == 0:
-            return 100.0
-        
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        return rsi
+        return StreamingRSI(period).update_many(prices)
     
     def determine_entry_condition(self, leg: Dict) -> str:
         """
@@ -4,10 +4,22 @@ Rolling window train/test backtesting for robust strategy validation
 """
 
 import math
-from typing import Dict, List, Optional, Callable
+from typing import Dict, List, Optional, Callable, Union
 from datetime import datetime, timedelta
 import random
 
+from bar_store import BarSeries, BarStore, get_bar_store
+
+# Walk-forward input: bar dicts, or memory-mapped columns from the bar store
+BarData = Union[List[Dict], BarSeries]
+
+
+def _closes(data: BarData) -> List[float]:
+    """Close prices of a window as a list (materializes only this window)"""
+    if isinstance(data, BarSeries):
+        return data.close.tolist()
+    return [bar["close"] for bar in data]
+
 
 class WalkForwardAnalyzer:
     """
@@ -65,11 +77,29 @@ class WalkForwardAnalyzer:
         
         return data
     
-    def split_periods(self, data: List[Dict]) -> List[Dict]:
+    def load_bars(
+        self,
+        ticker: str,
+        timeframe: str = "1day",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        store: Optional[BarStore] = None
+    ) -> BarSeries:
+        """
+        Load bars from the on-disk bar store
+        
+        The result is a memory-mapped view, so multi-year minute histories
+        are paged in window by window as the analysis walks forward.
+        """
+        store = store or get_bar_store()
+        return store.read(ticker, timeframe, start, end)
+    
+    def split_periods(self, data: BarData) -> List[Dict]:
         """
         Split data into walk-forward periods
         
         Returns list of {train_start, train_end, test_start, test_end, train_data, test_data}
+        (slices of a BarSeries are views, not copies)
         """
         total_days = len(data)
         periods = []
@@ -102,7 +132,7 @@ class WalkForwardAnalyzer:
     
     def run_simple_strategy(
         self,
-        data: List[Dict],
+        data: BarData,
         params: Dict
     ) -> Dict:
         """
@@ -119,10 +149,11 @@ class WalkForwardAnalyzer:
         position = 0  # 0 = flat, 1 = long, -1 = short
         entry_price = 0
         pnl = 0
+        closes = _closes(data)
         
-        for i in range(lookback, len(data)):
-            current_price = data[i]["close"]
-            past_price = data[i - lookback]["close"]
+        for i in range(lookback, len(closes)):
+            current_price = closes[i]
+            past_price = closes[i - lookback]
             momentum = (current_price / past_price) - 1
             
             # Signal generation
@@ -147,8 +178,8 @@ class WalkForwardAnalyzer:
                 trades.append({"type": "short", "price": current_price, "day": i})
         
         # Close final position
-        if position != 0 and len(data) > 0:
-            final_price = data[-1]["close"]
+        if position != 0 and len(closes) > 0:
+            final_price = closes[-1]
             if position == 1:
                 pnl += final_price - entry_price
             else:
@@ -159,7 +190,7 @@ class WalkForwardAnalyzer:
         winning_trades = len([t for t in trades if t.get("pnl", 0) > 0])
         win_rate = (winning_trades / num_trades * 100) if num_trades > 0 else 0
         
-        start_price = data[0]["close"] if data else 100
+        start_price = closes[0] if closes else 100
         total_return = pnl / start_price * 100
         
         return {
@@ -171,7 +202,7 @@ class WalkForwardAnalyzer:
             "trades": trades[-5:]  # Last 5 trades only
         }
     
-    def optimize_params(self, train_data: List[Dict]) -> Dict:
+    def optimize_params(self, train_data: BarData) -> Dict:
         """
         Find optimal parameters for the strategy on training data
         
@@ -191,7 +222,7 @@ class WalkForwardAnalyzer:
         
         return best_params
     
-    def run_walk_forward(self, data: List[Dict]) -> Dict:
+    def run_walk_forward(self, data: BarData) -> Dict:
         """
         Execute full walk-forward analysis
         """
@@ -274,15 +305,20 @@ class WalkForwardAnalyzer:
 async def run_walk_forward_analysis(
     num_days: int = 756,  # 3 years
     train_window: int = 252,
-    test_window: int = 63
+    test_window: int = 63,
+    ticker: Optional[str] = None,
+    timeframe: str = "1day"
 ) -> Dict:
-    """API endpoint helper for walk-forward analysis"""
+    """API endpoint helper for walk-forward analysis (stored bars when ticker is given)"""
     analyzer = WalkForwardAnalyzer(
         train_window=train_window,
         test_window=test_window
     )
     
-    data = analyzer.generate_sample_data(num_days)
+    if ticker:
+        data = analyzer.load_bars(ticker, timeframe)
+    else:
+        data = analyzer.generate_sample_data(num_days)
     result = analyzer.run_walk_forward(data)
     
     return result
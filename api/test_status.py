@@ -5,6 +5,7 @@ import sys
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from services.alpaca import AlpacaService
 from services.regime_detector import get_regime_detector
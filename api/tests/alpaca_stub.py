@@ -0,0 +1,151 @@
+"""
+Local Alpaca stub server
+Serves canned market-data responses over real HTTP so AlpacaService can be
+exercised end to end without network access or API keys
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+def _bars(ticker: str, count: int):
+    base = 100.0 + len(ticker)
+    return [
+        {"t": f"2026-01-{(i % 28) + 1:02d}T05:00:00Z", "o": base + i, "h": base + i + 1,
+         "l": base + i - 1, "c": base + i + 0.5, "v": 1_000_000 if i < count - 1 else 3_000_000}
+        for i in range(count)
+    ]
+
+
+def _snapshots(ticker: str):
+    root = ticker.ljust(6)[:6].strip()
+    return {
+        f"{root}261218{side}{strike * 1000:08d}": {
+            "latestQuote": {"bp": 4.9, "ap": 5.1},
+            "greeks": {"impliedVolatility": 0.25, "delta": 0.5, "gamma": 0.02, "theta": -0.05, "vega": 0.2}
+        }
+        for side in "CP" for strike in (95, 100, 105)
+    }
+
+
+class AlpacaStub:
+    """
+    Threaded HTTP server mimicking the Alpaca data and trading endpoints
+
+    Args:
+        latency: Seconds each response is delayed (simulates network RTT)
+        page_size: Maximum bars per multi-symbol bars page
+    """
+
+    ROUTES = [
+        (re.compile(r"^/v2/stocks/([^/]+)/quotes/latest$"), "quote"),
+        (re.compile(r"^/v2/stocks/([^/]+)/trades/latest$"), "trade"),
+        (re.compile(r"^/v2/stocks/([^/]+)/bars$"), "bars"),
+        (re.compile(r"^/v1beta1/options/snapshots/([^/]+)$"), "options"),
+    ]
+
+    def __init__(self, latency: float = 0.0, page_size: int = 10000):
+        self.latency = latency
+        self.page_size = page_size
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def respond(self, method: str, path: str, query: dict, body: bytes):
+        """Return (status, payload) for a request"""
+        if method == "POST" and path == "/v2/orders":
+            return 201, {"id": "stub-order", **json.loads(body or b"{}")}
+
+        symbols = [s for s in query.get("symbols", [""])[0].split(",") if s]
+        if path == "/v2/stocks/snapshots":
+            return 200, {
+                symbol: {"latestQuote": {"bp": 99.95, "ap": 100.05}, "latestTrade": {"p": 100.0}}
+                for symbol in symbols
+            }
+        if path == "/v2/stocks/bars":
+            return 200, self._bars_page(symbols, query)
+
+        for pattern, kind in self.ROUTES:
+            match = pattern.match(path)
+            if not match:
+                continue
+            ticker = match.group(1)
+            if kind == "quote":
+                return 200, {"symbol": ticker, "quote": {"bp": 99.95, "ap": 100.05}}
+            if kind == "trade":
+                return 200, {"symbol": ticker, "trade": {"p": 100.0}}
+            if kind == "bars":
+                limit = int(query.get("limit", ["100"])[0])
+                return 200, {"symbol": ticker, "bars": _bars(ticker, min(limit, 30))}
+            return 200, {"snapshots": _snapshots(ticker)}
+
+        return 404, {"message": "not found"}
+
+    def _bars_page(self, symbols, query):
+        """One page of a multi-symbol bars response; page_token is a row offset"""
+        rows = [(symbol, bar) for symbol in symbols for bar in _bars(symbol, 30)]
+        offset = int(query.get("page_token", ["0"])[0])
+        size = min(int(query.get("limit", ["1000"])[0]), self.page_size)
+
+        page = {}
+        for symbol, bar in rows[offset:offset + size]:
+            page.setdefault(symbol, []).append(bar)
+        next_offset = offset + size
+        return {"bars": page, "next_page_token": str(next_offset) if next_offset < len(rows) else None}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive
+
+            def _serve(self):
+                with stub._lock:
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    parts = urlsplit(self.path)
+                    length = int(self.headers.get("Content-Length") or 0)
+                    body = self.rfile.read(length) if length else b""
+                    stub.requests.append((self.command, parts.path))
+                    if stub.latency:
+                        time.sleep(stub.latency)
+                    status, payload = stub.respond(self.command, parts.path, parse_qs(parts.query), body)
+                    data = json.dumps(payload).encode()
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            do_GET = _serve
+            do_POST = _serve
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,199 @@
+"""
+Tests for the pooled async Alpaca client
+Runs AlpacaService and MarketScanner against the local stub server
+"""
+
+import pytest
+import asyncio
+import time
+import sys
+sys.path.insert(0, '..')
+
+from services.alpaca import AlpacaService
+from services.http_client import PooledHTTPClient
+from services.scanner import MarketScanner
+from services.single_flight import SingleFlight
+from tests.alpaca_stub import AlpacaStub
+
+
+def _service(stub, per_host_limit=16):
+    http = PooledHTTPClient(per_host_limit=per_host_limit)
+    return AlpacaService(http=http, base_url=stub.url, data_url=stub.url, flight=SingleFlight())
+
+
+class TestAlpacaService:
+    """Same service code, local upstream"""
+
+    def test_quotes_bars_chain_and_orders(self):
+        """Responses should be parsed exactly as before"""
+        with AlpacaStub() as stub:
+            alpaca = _service(stub)
+
+            async def run():
+                price = await alpaca.get_current_price("SPY")
+                bars = await alpaca.get_historical_bars("SPY", "1Day", 10)
+                chain = await alpaca.get_options_chain("SPY")
+                order = await alpaca.submit_order("SPY", 1, "buy")
+                await alpaca.http.aclose()
+                return price, bars, chain, order
+
+            price, bars, chain, order = asyncio.run(run())
+
+        assert price["price"] == pytest.approx(100.0)
+        assert len(bars) == 10 and bars[-1]["volume"] == 3_000_000
+        assert [c["strike"] for c in chain["calls"]] == [95.0, 100.0, 105.0]
+        assert order["symbol"] == "SPY"
+
+    def test_client_survives_new_event_loop(self):
+        """Successive asyncio.run calls should each get a working client"""
+        with AlpacaStub() as stub:
+            alpaca = _service(stub)
+            first = asyncio.run(alpaca.get_current_price("AAPL"))
+            second = asyncio.run(alpaca.get_current_price("AAPL"))
+
+        assert first["price"] == second["price"]
+
+
+class TestBatchedRequests:
+    """Multi-symbol snapshot and bar requests"""
+
+    def test_prices_and_bars_fan_out(self):
+        """Chunked, paginated responses should be split back per ticker"""
+        tickers = [f"T{i:03d}" for i in range(150)] + ["GC"]
+
+        with AlpacaStub(page_size=1000) as stub:
+            alpaca = _service(stub)
+
+            async def run():
+                return await asyncio.gather(
+                    alpaca.get_current_prices(tickers),
+                    alpaca.get_multi_bars(tickers, "1Day", 21)
+                )
+
+            prices, bars = asyncio.run(run())
+
+        snapshot_calls = [p for _, p in stub.requests if p == "/v2/stocks/snapshots"]
+        bar_calls = [p for _, p in stub.requests if p == "/v2/stocks/bars"]
+        assert len(snapshot_calls) == 2
+        assert len(bar_calls) == 5  # 100 and 51 symbols x 30 bars, in 1000-bar pages
+        assert len(stub.requests) == 7
+
+        assert prices["T007"]["price"] == pytest.approx(100.0)
+        assert prices["GC"]["price"] == pytest.approx(1000.0)
+        assert all(len(bars[t]) == 21 for t in tickers)
+        assert bars["GC"][-1]["close"] == pytest.approx(10 * 132.5)  # GLD proxy x 10
+
+    def test_scan_uses_batched_calls(self):
+        """A scan should make no per-ticker quote or bar requests"""
+        tickers = [f"T{i:03d}" for i in range(100)]
+
+        with AlpacaStub() as stub:
+            candidates = asyncio.run(MarketScanner(_service(stub)).scan(tickers))
+
+        per_ticker = [p for _, p in stub.requests if p.endswith(("/quotes/latest", "/bars")) and p != "/v2/stocks/bars"]
+        assert per_ticker == []
+        assert len(stub.requests) == 2 + len(tickers)  # snapshots + bars, then one options chain each
+        assert len(candidates) == 100
+
+
+class TestCoalescing:
+    """Single-flight and short-TTL reuse"""
+
+    def test_concurrent_identical_calls_share_one_request(self):
+        """Simultaneous identical requests should hit upstream once"""
+        with AlpacaStub(latency=0.05) as stub:
+            alpaca = _service(stub)
+
+            async def run():
+                results = await asyncio.gather(*[alpaca.get_historical_bars("SPY", "1Day", 20) for _ in range(10)])
+                again = await alpaca.get_historical_bars("SPY", "1Day", 20)
+                other = await alpaca.get_historical_bars("SPY", "1Day", 10)
+                return results, again, other
+
+            results, again, other = asyncio.run(run())
+
+        assert len(stub.requests) == 2
+        assert all(r is results[0] for r in results) and again is results[0]
+        assert len(other) == 10
+        assert alpaca.flight.get_stats() == {
+            "hits": 1, "misses": 2, "coalesced": 9, "errors": 0, "requests": 12,
+            "upstream_saved_pct": 83.3, "cached_entries": 2, "in_flight": 0
+        }
+
+    def test_failures_are_not_cached(self):
+        """Errors propagate to every waiter and the next call retries"""
+        flight = SingleFlight()
+        calls = []
+
+        async def failing():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        async def run():
+            results = await asyncio.gather(*[flight.do("k", failing) for _ in range(3)], return_exceptions=True)
+            second = await asyncio.gather(flight.do("k", failing), return_exceptions=True)
+            return results + second
+
+        results = asyncio.run(run())
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert len(calls) == 2
+        assert flight.stats["errors"] == 2
+
+    def test_ttl_expiry(self):
+        """Results older than the TTL should be refetched"""
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return {"price": len(calls)}
+
+        async def run():
+            first = await flight.do("k", fetch, ttl=0.05)
+            cached = await flight.do("k", fetch, ttl=0.05)
+            await asyncio.sleep(0.06)
+            return first, cached, await flight.do("k", fetch, ttl=0.05)
+
+        first, cached, fresh = asyncio.run(run())
+
+        assert first == cached == {"price": 1}
+        assert fresh == {"price": 2}
+
+
+class TestConcurrency:
+    """Requests overlap instead of running back to back"""
+
+    def test_scan_is_latency_bound(self):
+        """A 40-ticker scan should take a few round trips, not the sum of them"""
+        tickers = [f"T{i:02d}" for i in range(40)]
+
+        with AlpacaStub(latency=0.05) as stub:
+            scanner = MarketScanner(_service(stub, per_host_limit=64))
+
+            start = time.perf_counter()
+            candidates = asyncio.run(scanner.scan(tickers))
+            elapsed = time.perf_counter() - start
+
+        # Per ticker, serially: quote + bars + chain = 120 x 50 ms = 6 s
+        assert len(stub.requests) == 2 + 40
+        assert elapsed < 1.5
+        assert len(candidates) == 40
+
+    def test_per_host_limit(self):
+        """No more than per_host_limit requests should be in flight to one host"""
+        with AlpacaStub(latency=0.02) as stub:
+            alpaca = _service(stub, per_host_limit=4)
+
+            async def run():
+                await asyncio.gather(*[alpaca.get_historical_bars(f"T{i}", "1Day", 5) for i in range(20)])
+
+            asyncio.run(run())
+
+        assert stub.max_in_flight <= 4
+        assert alpaca.http.stats["requests"] == 20
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
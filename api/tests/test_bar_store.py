@@ -0,0 +1,152 @@
+"""
+Tests for the memory-mapped bar store
+Validates append semantics, range lookups and walk-forward integration
+"""
+
+import pytest
+import sys
+sys.path.insert(0, '..')
+
+import numpy as np
+
+from bar_store import BarStore, BarSeries, INDEX_STRIDE
+from services.walk_forward import WalkForwardAnalyzer
+
+
+def _minute_bars(n, seed=5):
+    rng = np.random.default_rng(seed)
+    timestamps = np.datetime64("2020-01-01T00:00", "ns") + np.arange(n) * np.timedelta64(60, "s")
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 1e-3, n)))
+    volumes = rng.integers(100, 1000, n)
+    return timestamps, closes, volumes
+
+
+def _append(store, timestamps, closes, volumes, ticker="SPY", timeframe="1min"):
+    return store.append(ticker, timeframe, timestamps, closes, closes * 1.001,
+                        closes * 0.999, closes, volumes)
+
+
+class TestAppend:
+    """Append-only writes"""
+
+    def test_round_trip(self, tmp_path):
+        """Stored columns should read back unchanged"""
+        store = BarStore(str(tmp_path))
+        timestamps, closes, volumes = _minute_bars(1000)
+
+        assert _append(store, timestamps, closes, volumes) == 1000
+
+        bars = store.read("spy", "1MIN")
+        assert isinstance(bars, BarSeries)
+        assert np.array_equal(bars.timestamp, timestamps)
+        assert np.array_equal(bars.close, closes)
+        assert np.array_equal(bars.volume, volumes)
+
+    def test_overlap_is_dropped(self, tmp_path):
+        """Re-appending stored bars should only add the new tail"""
+        store = BarStore(str(tmp_path))
+        timestamps, closes, volumes = _minute_bars(500)
+
+        _append(store, timestamps[:300], closes[:300], volumes[:300])
+        assert _append(store, timestamps[200:], closes[200:], volumes[200:]) == 200
+        assert _append(store, timestamps, closes, volumes) == 0
+        assert store.info("SPY", "1min")["rows"] == 500
+
+    def test_unsorted_input(self, tmp_path):
+        """Input is sorted and de-duplicated before writing"""
+        store = BarStore(str(tmp_path))
+        timestamps, closes, volumes = _minute_bars(100)
+        order = np.random.default_rng(1).permutation(100)
+
+        _append(store, timestamps[order], closes[order], volumes[order])
+
+        assert np.array_equal(store.read("SPY", "1min").close, closes)
+
+    def test_append_bar_dicts(self, tmp_path):
+        """Bar dicts with ISO timestamps (Alpaca shape) should be accepted"""
+        store = BarStore(str(tmp_path))
+        bars = [
+            {"timestamp": "2024-01-02T14:30:00Z", "open": 1, "high": 2, "low": 0.5, "close": 1.5, "volume": 10},
+            {"timestamp": "2024-01-02T14:31:00Z", "open": 1.5, "high": 2, "low": 1, "close": 1.8, "volume": 12},
+        ]
+
+        assert store.append_bars("AAPL", "1Min", bars) == 2
+        assert store.read("AAPL", "1min")[1]["close"] == 1.8
+        assert store.info("AAPL", "1min")["last"] == "2024-01-02T14:31:00+00:00"
+
+
+class TestRangeReads:
+    """Time-range slicing"""
+
+    def test_locate_matches_searchsorted(self, tmp_path):
+        """Sparse-index lookups should agree with a full binary search"""
+        store = BarStore(str(tmp_path))
+        n = INDEX_STRIDE * 3 + 17
+        timestamps, closes, volumes = _minute_bars(n)
+        _append(store, timestamps[:INDEX_STRIDE + 5], closes[:INDEX_STRIDE + 5], volumes[:INDEX_STRIDE + 5])
+        _append(store, timestamps, closes, volumes)
+
+        rng = np.random.default_rng(2)
+        for _ in range(100):
+            a, b = sorted(rng.integers(0, n, 2))
+            start = timestamps[a] - np.timedelta64(30, "s")
+            end = timestamps[b]
+            expected = (np.searchsorted(timestamps, start), np.searchsorted(timestamps, end, side="right"))
+            assert store.locate("SPY", "1min", start, end) == expected
+
+    def test_read_is_memory_mapped(self, tmp_path):
+        """Range reads should be read-only views, not copies"""
+        store = BarStore(str(tmp_path))
+        timestamps, closes, volumes = _minute_bars(2000)
+        _append(store, timestamps, closes, volumes)
+
+        bars = store.read("SPY", "1min", "2020-01-01T01:00", "2020-01-01T02:00")
+
+        assert len(bars) == 61
+        assert isinstance(bars.close, np.memmap)
+        assert not bars.close.flags.writeable
+        assert np.array_equal(bars.close, closes[60:121])
+
+    def test_empty_series(self, tmp_path):
+        """Unknown series and out-of-range reads should return empty columns"""
+        store = BarStore(str(tmp_path))
+        assert len(store.read("QQQ", "1min")) == 0
+
+        timestamps, closes, volumes = _minute_bars(10)
+        _append(store, timestamps, closes, volumes)
+        assert len(store.read("SPY", "1min", start="2030-01-01")) == 0
+
+    def test_iter_chunks(self, tmp_path):
+        """Chunks should cover the range exactly once"""
+        store = BarStore(str(tmp_path))
+        timestamps, closes, volumes = _minute_bars(1050)
+        _append(store, timestamps, closes, volumes)
+
+        chunks = list(store.iter_chunks("SPY", "1min", chunk_rows=100))
+
+        assert [len(c) for c in chunks] == [100] * 10 + [50]
+        assert np.array_equal(np.concatenate([c.close for c in chunks]), closes)
+
+
+class TestWalkForwardFromStore:
+    """WalkForwardAnalyzer over stored bars"""
+
+    def test_matches_dict_input(self, tmp_path):
+        """Running on a BarSeries should match running on bar dicts"""
+        store = BarStore(str(tmp_path))
+        timestamps, closes, volumes = _minute_bars(3000)
+        _append(store, timestamps, closes, volumes)
+
+        analyzer = WalkForwardAnalyzer(train_window=500, test_window=200, step_size=400)
+        bars = analyzer.load_bars("SPY", "1min", store=store)
+        dict_bars = [bars[i] for i in range(len(bars))]
+
+        from_store = analyzer.run_walk_forward(bars)
+        from_dicts = analyzer.run_walk_forward(dict_bars)
+
+        assert from_store["status"] == "complete"
+        assert from_store["aggregate_metrics"] == from_dicts["aggregate_metrics"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
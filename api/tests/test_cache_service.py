@@ -0,0 +1,299 @@
+"""
+Tests for the tiered cache service
+Validates L1 eviction, stale-while-revalidate, tags and the L2 envelope
+"""
+
+import pytest
+import asyncio
+import fnmatch
+import time
+import sys
+sys.path.insert(0, '..')
+
+from services.cache_service import CacheService, cached, get_cache_instance
+
+
+class FakeRedis:
+    """
+    Minimal in-memory stand-in for the redis.asyncio commands the cache uses
+
+    Models key expiry like Redis: PTTL is -2 for a missing key and -1 for
+    one without a TTL, and expired keys vanish. Pipelined commands run on
+    execute() and return their results in order.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.sets = {}
+        self.expires = {}  # key -> epoch seconds
+        self.now = time.time
+
+    def _alive(self, key):
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= self.now():
+            self.data.pop(key, None)
+            self.sets.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data or key in self.sets
+
+    async def get(self, key):
+        return self.data.get(key) if self._alive(key) else None
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+            self.sets.pop(key, None)
+            self.expires.pop(key, None)
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, ())) if self._alive(key) else set()
+
+    async def scan_iter(self, match="*", count=None):
+        for key in list(self.data):
+            if self._alive(key) and fnmatch.fnmatchcase(key, match):
+                yield key
+
+    def _set(self, key, value, px=None):
+        self.data[key] = value
+        self.expires.pop(key, None)
+        if px is not None:
+            self.expires[key] = self.now() + px / 1000
+        return True
+
+    def _sadd(self, key, member):
+        self._alive(key)
+        members = self.sets.setdefault(key, set())
+        added = member not in members
+        members.add(member)
+        return int(added)
+
+    def _pttl(self, key):
+        if not self._alive(key):
+            return -2
+        deadline = self.expires.get(key)
+        return -1 if deadline is None else int((deadline - self.now()) * 1000)
+
+    def _pexpire(self, key, ms):
+        if not self._alive(key):
+            return 0
+        self.expires[key] = self.now() + ms / 1000
+        return 1
+
+    def pipeline(self, transaction=False):
+        redis = self
+
+        class Pipeline:
+            def __init__(self):
+                self.commands = []
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            def set(self, key, value, px=None):
+                self.commands.append(lambda: redis._set(key, value, px))
+
+            def sadd(self, key, member):
+                self.commands.append(lambda: redis._sadd(key, member))
+
+            def pttl(self, key):
+                self.commands.append(lambda: redis._pttl(key))
+
+            def pexpire(self, key, ms):
+                self.commands.append(lambda: redis._pexpire(key, ms))
+
+            async def execute(self):
+                results = [command() for command in self.commands]
+                self.commands = []
+                return results
+
+        return Pipeline()
+
+
+def _cache(**kwargs):
+    cache = CacheService(**kwargs)
+    cache._enabled = False
+    return cache
+
+
+class TestL1:
+    """In-process tier"""
+
+    def test_namespace_ttl_and_expiry(self):
+        """Keys take their namespace TTL and stop being fresh after it"""
+        cache = _cache()
+        cache.ttl["quick"] = 0.05
+
+        async def run():
+            await cache.set("quick:SPY", {"v": 1})
+            first = await cache.get("quick:SPY")
+            await asyncio.sleep(0.06)
+            return first, await cache.get("quick:SPY")
+
+        first, expired = asyncio.run(run())
+
+        assert first == {"v": 1}
+        assert expired is None
+        assert cache.ttl_for("regime:SPY") == 60
+
+    def test_lru_eviction_by_size(self):
+        """Least-recently-used entries are evicted once the byte budget is exceeded"""
+        cache = _cache(max_bytes=30_000)
+
+        async def run():
+            for i in range(5):
+                await cache.set(f"blob:{i}", "x" * 8000)
+                await cache.get("blob:0")  # Keep the first entry hot
+            return [await cache.get(f"blob:{i}") is not None for i in range(5)]
+
+        present = asyncio.run(run())
+
+        assert present[0] and present[4]
+        assert not all(present)
+        assert cache.l1.size <= 30_000
+        assert cache.l1.evictions >= 1
+
+
+class TestGetOrCompute:
+    """Compute, coalescing and stale-while-revalidate"""
+
+    def test_concurrent_misses_compute_once(self):
+        """Simultaneous misses for one key share a single computation"""
+        cache = _cache()
+        calls = []
+
+        async def compute(ticker):
+            calls.append(ticker)
+            await asyncio.sleep(0.02)
+            return {"ticker": ticker}
+
+        async def run():
+            return await asyncio.gather(*[cache.get_or_compute("oi:SPY", compute, None, "SPY") for _ in range(5)])
+
+        results = asyncio.run(run())
+
+        assert calls == ["SPY"]
+        assert all(r == {"ticker": "SPY"} for r in results)
+
+    def test_stale_while_revalidate(self):
+        """An expired value is served immediately while a refresh runs"""
+        cache = _cache()
+        version = {"n": 0}
+
+        def compute():
+            version["n"] += 1
+            return {"version": version["n"]}
+
+        async def run():
+            first = await cache.get_or_compute("forecast:SPY", compute, 0.05)
+            await asyncio.sleep(0.06)
+            stale = await cache.get_or_compute("forecast:SPY", compute, 0.05)
+            await asyncio.sleep(0.01)  # Let the background refresh finish
+            fresh = await cache.get_or_compute("forecast:SPY", compute, 0.05)
+            return first, stale, fresh
+
+        first, stale, fresh = asyncio.run(run())
+
+        assert first == stale == {"version": 1}
+        assert fresh == {"version": 2}
+        assert cache.stats["stale_served"] == 1 and cache.stats["refreshes"] == 1
+
+    def test_cached_decorator(self):
+        """The decorator should cache per argument set in the shared instance"""
+        calls = []
+
+        @cached("sentiment", ttl=60)
+        async def score(ticker: str) -> dict:
+            calls.append(ticker)
+            return {"ticker": ticker, "score": 0.5}
+
+        async def run():
+            return [await score("NVDA"), await score("NVDA"), await score("AMD")]
+
+        results = asyncio.run(run())
+
+        assert calls == ["NVDA", "AMD"]
+        assert results[0] is results[1]
+        assert get_cache_instance().l1.get("sentiment:NVDA") is not None
+
+
+class TestInvalidation:
+    """Tags and patterns"""
+
+    def test_tags_and_namespace_patterns(self):
+        """Tag invalidation removes tagged keys; namespace patterns use the namespace tag"""
+        cache = _cache()
+
+        async def run():
+            await cache.set("oi:SPY:580", 1, tags=["ticker:SPY"])
+            await cache.set("gex:SPY", 2, tags=["ticker:SPY"])
+            await cache.set("oi:QQQ:500", 3)
+            await cache.set("price:QQQ", 4)
+
+            removed = await cache.invalidate_tags("ticker:SPY")
+            after_tag = [await cache.get(k) for k in ("oi:SPY:580", "gex:SPY", "oi:QQQ:500")]
+
+            await cache.clear_pattern("oi:*")
+            await cache.clear_pattern("price:Q*")
+            return removed, after_tag, await cache.get("oi:QQQ:500"), await cache.get("price:QQQ")
+
+        removed, after_tag, oi, price = asyncio.run(run())
+
+        assert removed == 2
+        assert after_tag == [None, None, 3]
+        assert oi is None and price is None
+
+
+class TestL2:
+    """Shared Redis tier"""
+
+    def test_l2_promotes_to_l1(self):
+        """A value written by one process should be readable by another"""
+        redis = FakeRedis()
+        writer, reader = _cache(), _cache()
+        for cache in (writer, reader):
+            cache._enabled = True
+            cache._client = redis
+
+        async def run():
+            await writer.set("regime:SPY", {"regime": "TRENDING"}, tags=["ticker:SPY"])
+            first = await reader.get("regime:SPY")
+            second = await reader.get("regime:SPY")
+            await writer.invalidate_tags("ticker:SPY")
+            return first, second, redis.data.get("regime:SPY")
+
+        first, second, remaining = asyncio.run(run())
+
+        assert first == second == {"regime": "TRENDING"}
+        assert reader.stats["l2_hits"] == 1 and reader.stats["l1_hits"] == 1
+        assert remaining is None
+
+    def test_tag_sets_expire_after_their_longest_member(self):
+        """Tag sets get a TTL when created and are only ever extended"""
+        redis = FakeRedis()
+        clock = [1000.0]
+        redis.now = lambda: clock[0]
+        cache = _cache()
+        cache._enabled = True
+        cache._client = redis
+
+        async def run():
+            await cache.set("oi:SPY", 1, ttl=10, tags=["ticker:SPY"])
+            created = redis._pttl("tag:ticker:SPY"), redis._pttl("tag:ns:oi")
+            await cache.set("oi:QQQ", 2, ttl=60, tags=["ticker:QQQ"])
+            await cache.set("oi:IWM", 3, ttl=5)
+            extended = redis._pttl("tag:ns:oi")
+            clock[0] += 121
+            return created, extended, await redis.smembers("tag:ns:oi")
+
+        created, extended, members = asyncio.run(run())
+
+        assert created == (20_000, 20_000)  # ttl x (1 + STALE_FACTOR)
+        assert extended == 120_000  # The shorter IWM entry did not shorten it
+        assert members == set()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
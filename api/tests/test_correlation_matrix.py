@@ -0,0 +1,142 @@
+"""
+Tests for the incremental correlation matrix engine
+Validates rolling updates against full recomputation
+"""
+
+import pytest
+import sys
+sys.path.insert(0, '..')
+
+import numpy as np
+
+from services.correlation_matrix import (
+    CorrelationMatrix, RollingCovariance, calculate_correlation
+)
+
+
+def _prices(bars=300, tickers=6, seed=11):
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0, 0.01, (bars, 1))
+    returns = 1.5 * market + 0.01 * rng.normal(size=(bars, tickers))
+    return 100 * np.exp(np.cumsum(returns, axis=0))
+
+
+def _loaded(prices):
+    matrix = CorrelationMatrix()
+    matrix.set_prices([f"T{i}" for i in range(prices.shape[1])], prices)
+    return matrix
+
+
+class TestCorrelationArray:
+    """Full-matrix queries"""
+
+    def test_matches_pairwise(self):
+        """Each entry should equal the pairwise Pearson correlation"""
+        prices = _prices()
+        matrix = _loaded(prices)
+        returns = np.diff(np.log(prices), axis=0)
+
+        for lookback in (None, 60):
+            corr = matrix.correlation_array(lookback)
+            window = returns if lookback is None else returns[-lookback:]
+            assert np.isclose(corr[1, 4], calculate_correlation(window[:, 1].tolist(), window[:, 4].tolist()))
+            assert np.allclose(np.diag(corr), 1.0)
+
+    def test_add_price_series_aligns_on_latest_bar(self):
+        """Series of different lengths should be trimmed to the shortest"""
+        matrix = CorrelationMatrix()
+        matrix.add_price_series("A", [1.0, 2.0, 3.0, 4.0])
+        matrix.add_price_series("B", [30.0, 40.0])
+
+        assert matrix.prices.tolist() == [[3.0, 30.0], [4.0, 40.0]]
+        assert list(matrix.get_correlation_matrix()) == ["A", "B"]
+
+    def test_zero_variance_is_zero_correlation(self):
+        """A flat series should correlate 0 with everything, itself included"""
+        prices = _prices(tickers=2)
+        prices[:, 1] = 50.0
+        corr = _loaded(prices).correlation_array(60)
+
+        assert corr[1].tolist() == [0.0, 0.0]
+
+
+class TestIncrementalUpdates:
+    """Maintained covariance state"""
+
+    def test_rolling_window_tracks_recompute(self):
+        """Appending bars should match a fresh computation on the same history"""
+        prices = _prices(bars=400)
+        matrix = _loaded(prices[:200])
+        matrix.correlation_array(20)
+        matrix.correlation_array(60)
+
+        for row in prices[200:]:
+            matrix.append_prices(row)
+
+        fresh = _loaded(prices)
+        for lookback in (20, 60):
+            assert np.allclose(matrix.correlation_array(lookback), fresh.correlation_array(lookback), atol=1e-12)
+
+    def test_window_fills_before_rolling(self):
+        """A window longer than the history should grow until full"""
+        prices = _prices(bars=100)
+        matrix = _loaded(prices[:30])
+        state = matrix.rolling_covariance(60)
+
+        for row in prices[30:]:
+            matrix.append_prices(dict(zip(matrix.tickers, row)))
+
+        assert state.count == 60
+        assert np.allclose(state.correlation(), _loaded(prices).correlation_array(60))
+
+    def test_ewm_matches_weighted_covariance(self):
+        """EW updates should equal the recursively weighted covariance"""
+        returns = np.random.default_rng(3).normal(size=(50, 3))
+        state = RollingCovariance(returns[:1], halflife=10)
+        for row in returns[1:]:
+            state.update(row)
+
+        alpha = 1 - 0.5 ** (1 / 10)
+        mean, cov = returns[0], np.zeros((3, 3))
+        for row in returns[1:]:
+            delta = row - mean
+            mean = mean + alpha * delta
+            cov = (1 - alpha) * (cov + alpha * np.outer(delta, delta))
+
+        assert np.allclose(state.covariance(), cov)
+
+    def test_history_is_bounded(self):
+        """Reads should see exactly the last max_history + 1 bars, whatever the buffer phase"""
+        matrix = CorrelationMatrix(max_history=50)
+        prices = _prices(bars=300)
+        matrix.set_prices(["A", "B", "C", "D", "E", "F"], prices[:10])
+
+        for end, row in enumerate(prices[10:], start=11):
+            matrix.append_prices(row)
+            expected = prices[max(end - 51, 0):end]
+            assert np.array_equal(matrix.prices, expected)
+
+        bounded = _loaded(prices[-51:]).correlation_array()
+        assert np.allclose(matrix.correlation_array(), bounded)
+
+
+class TestSignals:
+    """Pairs scanning and breakdown detection"""
+
+    def test_pairs_and_breakdown(self):
+        """Signals should read the maintained correlations"""
+        matrix = _loaded(_prices())
+        corr = matrix.correlation_array(60)
+
+        pairs = matrix.find_pairs_opportunities(min_correlation=0.5, lookback=60)
+        assert pairs
+        assert all(p["correlation"] == round(corr[int(p["ticker1"][1]), int(p["ticker2"][1])], 3) for p in pairs)
+        assert [abs(p["z_score"]) for p in pairs] == sorted((abs(p["z_score"]) for p in pairs), reverse=True)
+
+        breakdown = matrix.detect_correlation_breakdown("T0", "T1")
+        assert breakdown["long_term_correlation"] == round(corr[0, 1], 3)
+        assert matrix.detect_correlation_breakdown("T0", "XYZ") == {"error": "Insufficient data"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -8,7 +8,13 @@ import math
 import sys
 sys.path.insert(0, '..')
 
-from services.greeks import calculate_all_greeks, normal_cdf, normal_pdf
+from services.greeks import (
+    calculate_all_greeks,
+    calculate_greeks_batch,
+    calculate_portfolio_greeks,
+    normal_cdf,
+    normal_pdf
+)
 
 
 class TestNormalDistribution:
@@ -194,5 +200,62 @@ class TestEdgeCases:
         assert greeks["delta"] == 0
 
 
+class TestBatchGreeks:
+    """Tests for the columnar Greeks engine"""
+    
+    def test_batch_matches_scalar(self):
+        """Each batch row should equal the scalar calculation"""
+        types = ["call", "put", "call", "put"]
+        spots = [100, 100, 90, 120]
+        strikes = [100, 95, 110, 100]
+        expiries = [30/365, 60/365, 7/365, 1.0]
+        vols = [0.20, 0.35, 0.50, 0.15]
+        
+        batch = calculate_greeks_batch(types, spots, strikes, expiries, 0.05, vols)
+        
+        for i in range(len(types)):
+            scalar = calculate_all_greeks(
+                types[i], spots[i], strikes[i], expiries[i], 0.05, vols[i]
+            )
+            for name, value in scalar.items():
+                assert abs(round(float(batch[name][i]), 8) - value) < 1e-4
+    
+    def test_batch_invalid_rows_zeroed(self):
+        """Expired or zero-vol rows should be zero without affecting others"""
+        batch = calculate_greeks_batch(
+            "call", [100, 100, 100], [100, 100, 100], [0, 30/365, 30/365], 0.05, [0.2, 0.2, 0]
+        )
+        
+        assert batch["delta"][0] == 0
+        assert batch["delta"][2] == 0
+        assert 0.45 < batch["delta"][1] < 0.6
+    
+    def test_portfolio_prices_raw_positions(self):
+        """Positions with pricing inputs should be priced and aggregated"""
+        positions = [
+            {"option_type": "call", "strike": 100, "time_to_expiry": 30/365,
+             "iv": 0.2, "underlying_price": 100, "quantity": 1},
+            {"option_type": "put", "strike": 100, "time_to_expiry": 30/365,
+             "iv": 0.2, "underlying_price": 100, "quantity": 1},
+        ]
+        single = calculate_all_greeks("call", 100, 100, 30/365, 0.05, 0.2)
+        
+        totals = calculate_portfolio_greeks(positions, spy_price=100)
+        
+        # Straddle: call delta + put delta = 2 * N(d1) - 1
+        assert abs(totals["delta"] - (2 * single["delta"] - 1) * 100) < 0.05
+        assert abs(totals["gamma"] - 2 * single["gamma"] * 100) < 1e-3
+        assert abs(totals["beta_weighted_delta"] - totals["delta"]) < 1e-3
+    
+    def test_portfolio_uses_precomputed_greeks(self):
+        """Positions that already carry Greeks should be summed as-is"""
+        positions = [{"delta": 0.5, "gamma": 0.02, "quantity": 2}]
+        
+        totals = calculate_portfolio_greeks(positions)
+        
+        assert totals["delta"] == 100
+        assert totals["gamma"] == 4
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
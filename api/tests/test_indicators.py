@@ -0,0 +1,115 @@
+"""
+Tests for streaming indicators
+Validates incremental state against the batch implementations
+"""
+
+import pytest
+import json
+import sys
+sys.path.insert(0, '..')
+
+import numpy as np
+
+from indicators import (
+    ema, rsi, bollinger_bands, macd,
+    StreamingEMA, StreamingRSI, StreamingBollinger, StreamingMACD,
+    StreamingADX, StreamingIndicator, IndicatorBank
+)
+from bar_builder import LiveBar
+
+
+def _prices(n=200, seed=3):
+    rng = np.random.default_rng(seed)
+    return 100 + np.cumsum(rng.normal(0, 1, n))
+
+
+class TestStreamingMatchesBatch:
+    """Streaming values should equal batch values wherever both exist"""
+    
+    def test_ema(self):
+        prices = _prices()
+        indicator = StreamingEMA(20)
+        streamed = [indicator.update(p) for p in prices]
+        
+        assert streamed[18] is None
+        assert np.allclose(streamed[19:], ema(prices, 20)[19:])
+    
+    def test_rsi(self):
+        prices = _prices()
+        indicator = StreamingRSI(14)
+        streamed = [indicator.update(p) for p in prices]
+        
+        assert np.allclose(streamed[15:], rsi(prices, 14)[15:])
+    
+    def test_bollinger(self):
+        prices = _prices()
+        indicator = StreamingBollinger(20, 2.0)
+        streamed = [indicator.update(p) for p in prices]
+        upper, middle, lower = bollinger_bands(prices, 20, 2.0)
+        
+        assert np.allclose([s[0] for s in streamed[19:]], upper[19:])
+        assert np.allclose([s[1] for s in streamed[19:]], middle[19:])
+        assert np.allclose([s[2] for s in streamed[19:]], lower[19:])
+    
+    def test_macd_signal(self):
+        prices = _prices()
+        indicator = StreamingMACD(12, 26, 9)
+        streamed = [indicator.update(p) for p in prices]
+        _, signal_line, _ = macd(prices, 12, 26, 9)
+        
+        assert streamed[32] is None
+        assert np.allclose([s[1] for s in streamed[33:]], signal_line[33:])
+
+
+class TestStreamingState:
+    """Tests for ADX warm-up and snapshot/restore"""
+    
+    def test_adx_available_on_short_history(self):
+        """ADX should produce a value from 20 daily bars"""
+        indicator = StreamingADX(14)
+        for p in _prices(20):
+            indicator.update_bar(p + 1, p - 1, p)
+        
+        assert indicator.value is not None
+        assert 0 <= indicator.value <= 100
+    
+    def test_bank_snapshot_round_trip(self):
+        """Restored bank should continue exactly like the original"""
+        prices = _prices()
+        original = IndicatorBank()
+        for p in prices[:120]:
+            original.update_bar("SPY", p + 1, p - 1, p)
+        
+        restored = IndicatorBank()
+        restored.restore(json.loads(json.dumps(original.snapshot())))
+        for p in prices[120:]:
+            original.update_bar("SPY", p + 1, p - 1, p)
+            restored.update_bar("SPY", p + 1, p - 1, p)
+        
+        assert original.values("SPY") == restored.values("SPY")
+    
+    def test_bank_folds_in_completed_bars_of_its_timeframe(self):
+        """on_bar should use 1min bars and ignore other widths"""
+        prices = _prices(40)
+        from_bars = IndicatorBank()
+        direct = IndicatorBank()
+        for i, p in enumerate(prices):
+            ts = f"2026-01-02T14:{i:02d}"
+            from_bars.on_bar(LiveBar("SPY", "1min", ts, ts + ":00Z", 0.0, p, p + 1, p - 1, p))
+            from_bars.on_bar(LiveBar("SPY", "1sec", ts + ":00", ts + ":00Z", 0.0, p, p + 5, p - 5, p + 3))
+            direct.update_bar("SPY", p + 1, p - 1, p)
+        
+        assert from_bars.values("SPY") == direct.values("SPY")
+    
+    def test_incomplete_indicator_cannot_be_instantiated(self):
+        """Subclasses must implement update() and value"""
+        class NoValue(StreamingIndicator):
+            def update(self, price):
+                return price
+        
+        with pytest.raises(TypeError):
+            NoValue()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
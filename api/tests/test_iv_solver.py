@@ -0,0 +1,115 @@
+"""
+Tests for the vectorized implied-volatility solver
+Validates round trips, status codes and chain calibration
+"""
+
+import pytest
+import sys
+sys.path.insert(0, '..')
+
+import numpy as np
+from scipy.special import ndtr
+
+from services.iv_solver import implied_vol_batch, IVStatus
+from services.local_vol import LocalVolatilityModel
+
+
+def _bs_prices(S, K, T, r, sigma, is_call):
+    """Reference Black-Scholes prices"""
+    d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
+    d2 = d1 - sigma * np.sqrt(T)
+    call = S * ndtr(d1) - K * np.exp(-r * T) * ndtr(d2)
+    put = K * np.exp(-r * T) * ndtr(-d2) - S * ndtr(-d1)
+    return np.where(is_call, call, put)
+
+
+def _chain(n=5000, seed=7):
+    rng = np.random.default_rng(seed)
+    S = 5000.0
+    K = S * np.exp(rng.uniform(-0.5, 0.4, n))
+    T = rng.uniform(2 / 365, 2.0, n)
+    sigma = rng.uniform(0.05, 1.5, n)
+    is_call = rng.random(n) < 0.5
+    return S, K, T, sigma, is_call
+
+
+class TestImpliedVolBatch:
+    """Round trips and edge cases"""
+
+    def test_round_trip_chain(self):
+        """Solved vols should reproduce the generating vols wherever the quote carries time value"""
+        S, K, T, sigma, is_call = _chain()
+        prices = _bs_prices(S, K, T, 0.05, sigma, is_call)
+
+        intrinsic = np.where(is_call, np.maximum(S - K * np.exp(-0.05 * T), 0),
+                             np.maximum(K * np.exp(-0.05 * T) - S, 0))
+
+        solution = implied_vol_batch(prices, S, K, T, 0.05, np.where(is_call, "call", "put"))
+
+        # Quotes whose time value is lost to rounding carry no vol information
+        informative = solution.converged & (prices - intrinsic > 1e-6 * S)
+        assert informative.sum() > 0.9 * len(K)
+        assert np.allclose(solution.iv[informative], sigma[informative], atol=1e-7)
+        assert solution.iterations < 30
+
+    def test_deep_otm_short_dated(self):
+        """Tiny premiums where scalar Newton from 0.3 oscillates should still converge"""
+        K = np.array([130.0, 70.0, 150.0])
+        T = np.array([3 / 365, 5 / 365, 30 / 365])
+        sigma = np.array([0.6, 0.8, 0.4])
+        is_call = np.array([True, False, True])
+        prices = _bs_prices(100.0, K, T, 0.05, sigma, is_call)
+
+        solution = implied_vol_batch(prices, 100.0, K, T, 0.05, ["call", "put", "call"])
+
+        assert solution.converged.all()
+        assert np.allclose(solution.iv, sigma, rtol=1e-6)
+
+    def test_status_codes(self):
+        """Unsolvable quotes should be flagged rather than returning a vol"""
+        solution = implied_vol_batch(
+            price=[0.0, 1e6, np.nan, 5.0, 5.0],
+            S=100.0,
+            K=100.0,
+            T=[0.5, 0.5, 0.5, 0.0, 0.5],
+            r=0.05
+        )
+
+        assert solution.status.tolist() == [
+            IVStatus.BELOW_INTRINSIC, IVStatus.ABOVE_MAXIMUM, IVStatus.INVALID_INPUT,
+            IVStatus.INVALID_INPUT, IVStatus.CONVERGED
+        ]
+        assert np.isnan(solution.iv[:4]).all()
+        assert solution.status_counts()["invalid_input"] == 2
+
+    def test_put_call_parity(self):
+        """A call and put at the same strike should imply the same vol"""
+        prices = _bs_prices(100.0, 110.0, 0.5, 0.05, 0.3, np.array([True, False]))
+
+        solution = implied_vol_batch(prices, 100.0, 110.0, 0.5, 0.05, ["call", "put"])
+
+        assert abs(solution.iv[0] - solution.iv[1]) < 1e-8
+
+
+class TestCalibrateFromChain:
+    """LocalVolatilityModel calibration through the batch solver"""
+
+    def test_calibration(self):
+        """Calibrated surface should hold the solved vols and skip bad quotes"""
+        model = LocalVolatilityModel(spot=100.0, rate=0.05)
+        options = [
+            {'strike': K, 'expiry_years': 0.25,
+             'price': float(_bs_prices(100.0, K, 0.25, 0.05, 0.2 + 0.001 * (100 - K), True))}
+            for K in (90.0, 100.0, 110.0)
+        ]
+        options.append({'strike': 120.0, 'expiry_years': 0.25, 'price': 0.0})
+
+        counts = model.calibrate_from_chain(options)
+
+        assert counts == {'converged': 3, 'below_intrinsic': 1}
+        assert (120.0, 0.25) not in model.vol_surface
+        assert abs(model.vol_surface[(90.0, 0.25)] - 0.21) < 1e-6
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,118 @@
+"""
+Tests for the vectorized Merton jump-diffusion pricer
+Validates series truncation, pricing identities and chain pricing
+"""
+
+import pytest
+import sys
+sys.path.insert(0, '..')
+
+import numpy as np
+
+from services.jump_diffusion import (
+    MertonJumpDiffusion, black_scholes_call_array, analyze_tail_risk
+)
+
+
+def _chain():
+    strikes = np.linspace(250, 750, 200)
+    tenors = np.array([7, 14, 21, 30, 45, 60, 90, 120, 180, 365]) / 365
+    return np.meshgrid(strikes, tenors)
+
+
+class TestSeries:
+    """Truncated Poisson series"""
+
+    def test_adaptive_truncation(self):
+        """Terms should stop once the neglected mass is below tolerance"""
+        model = MertonJumpDiffusion(spot=100.0, lam=1.0)
+
+        short_weights = model.series_terms(7 / 365)[0]
+        long_weights = model.series_terms(2.0)[0]
+
+        assert len(short_weights) < len(long_weights) < 50
+        assert 1 - long_weights.sum() < 1e-12
+
+    def test_no_jumps_is_black_scholes(self):
+        """With zero intensity the model reduces to Black-Scholes"""
+        model = MertonJumpDiffusion(spot=100.0, sigma=0.25, lam=0.0)
+        K = np.linspace(80, 120, 9)
+
+        assert np.allclose(model.price_calls(K, 0.5), black_scholes_call_array(100.0, K, 0.5, 0.05, 0.25))
+
+
+class TestPricing:
+    """Pricing identities"""
+
+    def test_monte_carlo_agreement(self):
+        """Series prices should match a simulated jump-diffusion"""
+        model = MertonJumpDiffusion(spot=500.0, rate=0.05, sigma=0.2, lam=1.0, mu_j=-0.05, sigma_j=0.10)
+        rng = np.random.default_rng(0)
+        n, T = 400_000, 0.5
+
+        jumps = rng.poisson(model.lam * T, n)
+        log_jump = rng.normal(model.mu_j * jumps, model.sigma_j * np.sqrt(jumps))
+        drift = (model.rate - model.lam * model.k - 0.5 * model.sigma ** 2) * T
+        terminal = 500.0 * np.exp(drift + model.sigma * np.sqrt(T) * rng.standard_normal(n) + log_jump)
+
+        for K in (450.0, 500.0, 550.0):
+            simulated = np.exp(-model.rate * T) * np.maximum(terminal - K, 0).mean()
+            assert abs(model.price_call(K, T) - simulated) / simulated < 0.01
+
+    def test_deep_itm_call_tends_to_spot(self):
+        """A call struck near zero is worth the spot (martingale condition)"""
+        model = MertonJumpDiffusion(spot=100.0)
+        assert abs(model.price_call(1e-6, 1.0) - 100.0) < 1e-6
+
+    def test_vectorized_matches_scalar(self):
+        """Array pricing should equal scalar pricing element-wise"""
+        model = MertonJumpDiffusion(spot=100.0)
+        K, T = np.array([90.0, 100.0, 110.0]), np.array([0.1, 0.5, 0.0])
+
+        calls = model.price_calls(K, T)
+        puts = model.price_puts(K, T)
+
+        assert calls[2] == 0.0
+        for i in range(3):
+            assert np.isclose(calls[i], model.price_call(K[i], T[i]))
+            assert np.isclose(puts[i], model.price_put(K[i], T[i]))
+
+    def test_jumps_raise_otm_put_prices(self):
+        """Negative mean jumps should add premium to OTM puts"""
+        result = analyze_tail_risk(spot=100.0, strikes=[80.0, 100.0], expiry_years=0.25)
+
+        otm_put = next(r for r in result if r['strike'] == 80.0 and r['option_type'] == 'put')
+        assert len(result) == 4
+        assert otm_put['jump_premium'] > 0
+
+    def test_implied_jump_vol_reprices(self):
+        """The implied jump vol should reproduce the jump price under Black-Scholes"""
+        model = MertonJumpDiffusion(spot=100.0)
+        vol = model.implied_jump_vol(90.0, 0.25)
+
+        assert np.isclose(black_scholes_call_array(100.0, 90.0, 0.25, 0.05, vol), model.price_call(90.0, 0.25))
+
+
+class TestChainPricing:
+    """Whole-chain pricing"""
+
+    def test_full_chain_builds_one_series_per_tenor(self):
+        """2,000 strike/tenor pairs, calls and puts, share one short series per tenor"""
+        K, T = _chain()
+        model = MertonJumpDiffusion(spot=500.0)
+
+        calls = model.compare_chain(K, T, 'call')
+        puts = model.compare_chain(K, T, 'put')
+
+        assert calls['jump_price'].shape == puts['jump_price'].shape == K.shape
+        assert len(model._series) == len(np.unique(T))
+        assert all(len(weights) <= 20 for weights, _, _ in model._series.values())
+
+        for row, col in [(0, 0), (3, 100), (9, 199)]:
+            assert np.isclose(calls['jump_price'][row, col], model.price_call(K[row, col], T[row, col]))
+            assert np.isclose(puts['jump_price'][row, col], model.price_put(K[row, col], T[row, col]))
+        assert len(model._series) == len(np.unique(T))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
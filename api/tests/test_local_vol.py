@@ -0,0 +1,119 @@
+"""
+Tests for the precomputed volatility surface
+Validates interpolation, arbitrage smoothing and the Dupire grid
+"""
+
+import pytest
+import asyncio
+import sys
+sys.path.insert(0, '..')
+
+import numpy as np
+
+from services.local_vol import (
+    VolSurface, LocalVolatilityModel, _bs_call_grid, _synthetic_surface, price_with_local_vol
+)
+
+
+def _skewed_quotes(spot=100.0):
+    quotes = {}
+    for k_mult in [0.85, 0.90, 0.95, 1.0, 1.05, 1.10, 1.15]:
+        for T in [0.083, 0.25, 0.5, 1.0]:
+            skew = 0.1 * (1 - k_mult) if k_mult < 1 else 0.05 * (k_mult - 1)
+            quotes[(spot * k_mult, T)] = 0.25 + skew
+    return quotes
+
+
+class TestVolSurface:
+    """Surface construction and lookup"""
+
+    def test_reproduces_quotes(self):
+        """Quoted points should be returned (to grid accuracy)"""
+        quotes = _skewed_quotes()
+        surface = VolSurface.from_quotes(quotes, spot=100.0)
+
+        K = np.array([k for k, _ in quotes])
+        T = np.array([t for _, t in quotes])
+        assert np.allclose(surface.evaluate(K, T), list(quotes.values()), atol=1e-3)
+
+    def test_vectorized_evaluate(self):
+        """evaluate should broadcast and clamp outside the quoted range"""
+        surface = VolSurface.from_quotes(_skewed_quotes(), spot=100.0)
+
+        grid = surface.evaluate(np.linspace(50, 150, 40)[:, None], np.linspace(0.01, 2.0, 30)[None, :])
+
+        assert grid.shape == (40, 30)
+        assert np.isclose(surface.evaluate(50.0, 0.5), surface.evaluate(85.0, 0.5))
+        assert np.isclose(surface.evaluate(100.0, 5.0), surface.evaluate(100.0, 1.0))
+
+    def test_immutable(self):
+        """Surface grids should not be writable"""
+        surface = VolSurface.from_quotes(_skewed_quotes(), spot=100.0)
+
+        with pytest.raises(ValueError):
+            surface.iv[0, 0] = 1.0
+        with pytest.raises(Exception):
+            surface.spot = 50.0
+
+    def test_calendar_arbitrage_removed(self):
+        """Total variance should be non-decreasing in expiry"""
+        quotes = {(K, T): 0.40 if T == 0.25 else 0.20 for K in (90.0, 100.0, 110.0) for T in (0.25, 0.5)}
+        surface = VolSurface.from_quotes(quotes, spot=100.0)
+
+        total_var = surface.iv ** 2 * surface.tenors[:, None]
+        assert (np.diff(total_var, axis=0) >= -1e-12).all()
+
+    def test_butterfly_arbitrage_removed(self):
+        """Call prices on the grid should be convex in strike after smoothing"""
+        quotes = {(K, 0.25): iv for K, iv in [(90.0, 0.25), (95.0, 0.25), (100.0, 0.60), (105.0, 0.25), (110.0, 0.25)]}
+        surface = VolSurface.from_quotes(quotes, spot=100.0)
+
+        calls = _bs_call_grid(100.0, surface.strikes[None, :], surface.tenors[:, None], 0.05, surface.iv)
+        assert (np.diff(calls, n=2, axis=1) >= -1e-8).all()
+
+    def test_flat_surface_local_vol(self):
+        """A flat implied surface should have local vol equal to implied vol"""
+        quotes = {(K, T): 0.3 for K in (80.0, 100.0, 120.0) for T in (0.25, 0.5, 1.0)}
+        surface = VolSurface.from_quotes(quotes, spot=100.0)
+
+        assert np.allclose(surface.local_vol(np.linspace(85, 115, 7), 0.5), 0.3, atol=1e-3)
+
+
+class TestLocalVolatilityModel:
+    """Model wiring"""
+
+    def test_surface_rebuilt_after_calibration(self):
+        """get_implied_vol should use the surface built from the current quotes"""
+        model = LocalVolatilityModel(spot=100.0)
+        assert model.get_implied_vol(100.0, 0.5) == 0.25
+
+        model.vol_surface.update(_skewed_quotes())
+        model.invalidate_surface()
+
+        assert abs(model.get_implied_vol(90.0, 0.5) - 0.26) < 1e-3
+        assert model.surface is model.surface
+        assert model.price_option(95.0, 0.4, 'put')['local_vol'] > 0
+
+    @pytest.mark.parametrize("spot", [100.0, 437.21])
+    def test_quick_quote_matches_full_model(self, spot):
+        """The shared moneyness surface should price like a per-spot model"""
+        model = LocalVolatilityModel(spot=spot)
+        model.vol_surface.update(_skewed_quotes(spot))
+
+        for k_mult, T, option_type in [(0.9, 0.3, 'put'), (1.0, 0.5, 'call'), (1.12, 0.9, 'call')]:
+            quick = asyncio.run(price_with_local_vol(spot, spot * k_mult, T, option_type))
+            full = model.price_option(spot * k_mult, T, option_type)
+            assert quick == pytest.approx(full, abs=1e-4)
+
+    def test_quick_quotes_reuse_surface(self):
+        """Requests at new spots should not rebuild the synthetic surface"""
+        _synthetic_surface.cache_clear()
+        for spot in (99.5, 100.0, 100.25, 101.0):
+            asyncio.run(price_with_local_vol(spot, 100.0, 0.25, rate=0.05, base_iv=0.25))
+
+        info = _synthetic_surface.cache_info()
+        assert info.misses == 1 and info.hits == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,107 @@
+"""
+Tests for the prefix-sum Max Pain and grouped GEX calculators
+Validates against brute-force payouts and multi-expiry profiles
+"""
+
+import pytest
+import sys
+sys.path.insert(0, '..')
+
+import numpy as np
+
+from services.maxpain import (
+    calculate_max_pain, calculate_gamma_exposure,
+    calculate_max_pain_by_expiration, calculate_gamma_exposure_by_expiration
+)
+
+
+def _chain(n=200, seed=3):
+    rng = np.random.default_rng(seed)
+
+    def side():
+        return [
+            {"strike": float(rng.choice(np.arange(400, 600, 5))),
+             "open_interest": int(rng.integers(0, 5000)),
+             "gamma": float(rng.uniform(0, 0.1)),
+             "expiration": f"2026-10-{16 + int(rng.integers(0, 3))}"}
+            for _ in range(n)
+        ]
+
+    return {"calls": side(), "puts": side()}
+
+
+def _brute_force_pain(chain, settlement):
+    calls = sum(c["open_interest"] * max(settlement - c["strike"], 0) * 100 for c in chain["calls"])
+    puts = sum(p["open_interest"] * max(p["strike"] - settlement, 0) * 100 for p in chain["puts"])
+    return calls + puts
+
+
+class TestMaxPain:
+    """Prefix-sum payout curve"""
+
+    def test_matches_brute_force(self):
+        """Pain at every strike should equal the direct payout sum"""
+        chain = _chain()
+        result = calculate_max_pain(chain, 500.0)
+
+        for row in result["pain_by_strike"]:
+            assert np.isclose(row["pain"], _brute_force_pain(chain, row["strike"]))
+        assert result["min_total_pain"] == min(r["pain"] for r in result["pain_by_strike"])
+
+    def test_default_open_interest_and_empty_chain(self):
+        """Missing open interest counts as 100 contracts; no strikes falls back to spot"""
+        chain = {"calls": [{"strike": 100.0}], "puts": [{"strike": 110.0}]}
+
+        result = calculate_max_pain(chain, 105.0)
+
+        assert [r["pain"] for r in result["pain_by_strike"]] == [100000.0, 100000.0]
+        assert calculate_max_pain({}, 105.0) == {"max_pain": 105.0, "pain_by_strike": []}
+
+    def test_by_expiration(self):
+        """Per-expiry profiles should equal the calculation on each expiry alone"""
+        chain = _chain()
+        result = calculate_max_pain_by_expiration(chain, 500.0)
+
+        assert result["aggregate"] == calculate_max_pain(chain, 500.0)
+        assert len(result["expirations"]) == 3
+        for expiration, profile in result["expirations"].items():
+            subset = {side: [o for o in chain[side] if o["expiration"] == expiration] for side in ("calls", "puts")}
+            assert profile == calculate_max_pain(subset, 500.0)
+
+
+class TestGammaExposure:
+    """Grouped dealer gamma"""
+
+    def test_grouped_by_strike(self):
+        """Contracts at the same strike should be summed, puts negative"""
+        chain = {
+            "calls": [{"strike": 100.0, "gamma": 0.02, "open_interest": 10},
+                      {"strike": 100.0, "gamma": 0.01, "open_interest": 10}],
+            "puts": [{"strike": 95.0, "gamma": 0.04, "open_interest": 10}]
+        }
+
+        result = calculate_gamma_exposure(chain, 100.0)
+
+        assert [r["strike"] for r in result["gex_by_strike"]] == [95.0, 100.0]
+        assert np.allclose([r["gex"] for r in result["gex_by_strike"]], [-4000.0, 3000.0])
+        assert result["flip_point"] == 100.0
+        assert np.isclose(result["total_gex"], -1000.0)
+
+    def test_by_expiration(self):
+        """Per-expiry profiles should cover only that expiry's strikes and sum to the aggregate"""
+        chain = _chain()
+        result = calculate_gamma_exposure_by_expiration(chain, 500.0)
+
+        assert result["aggregate"] == calculate_gamma_exposure(chain, 500.0)
+        for expiration, profile in result["expirations"].items():
+            subset = {side: [o for o in chain[side] if o["expiration"] == expiration] for side in ("calls", "puts")}
+            expected = calculate_gamma_exposure(subset, 500.0)
+            assert [r["strike"] for r in profile["gex_by_strike"]] == [r["strike"] for r in expected["gex_by_strike"]]
+            assert profile["flip_point"] == expected["flip_point"]
+
+        total = sum(p["total_gex"] for p in result["expirations"].values())
+        assert np.isclose(total, result["aggregate"]["total_gex"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -9,8 +9,12 @@ sys.path.insert(0, '..')
 
 from services.montecarlo import (
     simulate_gbm_paths,
+    simulate_terminal_prices,
+    iter_terminal_price_chunks,
     calculate_strategy_payoff,
+    expiration_curve,
     monte_carlo_pop,
+    PayoffPlan,
     price_distribution
 )
 
@@ -89,6 +93,31 @@ class TestGBMSimulation:
             for price in path:
                 assert price > 0
 
+    
+    def test_terminal_prices_match_path_distribution(self):
+        """Terminal-only sampling should match the full-path terminal moments"""
+        paths = simulate_gbm_paths(
+            spot=100, drift=0.05, volatility=0.20,
+            days=30, num_paths=20000, seed=1
+        )
+        terminal = simulate_terminal_prices(
+            spot=100, drift=0.05, volatility=0.20,
+            days=30, num_paths=20000, seed=2
+        )
+        
+        assert terminal.shape == (20000,)
+        assert abs(paths[:, -1].mean() - terminal.mean()) < 0.3
+        assert abs(paths[:, -1].std() - terminal.std()) < 0.3
+    
+    def test_chunks_cover_all_paths(self):
+        """Streaming chunks should be bounded and sum to num_paths"""
+        chunks = list(iter_terminal_price_chunks(
+            spot=100, drift=0.05, volatility=0.20,
+            days=30, num_paths=2500, chunk_size=1000, seed=42
+        ))
+        
+        assert [len(c) for c in chunks] == [1000, 1000, 500]
+
 
 class TestPayoffCalculation:
     """Tests for strategy payoff calculation"""
@@ -169,6 +198,42 @@ class TestPayoffCalculation:
         payoff_low = calculate_strategy_payoff(90, legs)
         assert payoff_low == -300
 
+    
+    def test_plan_matches_per_leg_payoffs(self):
+        """Vectorized plan should equal the hand-computed per-leg sum"""
+        legs = [
+            {"option_type": "put", "position": "long", "strike": 90, "premium": 1, "quantity": 1},
+            {"option_type": "put", "position": "short", "strike": 95, "premium": 2, "quantity": 1},
+            {"option_type": "call", "position": "short", "strike": 105, "premium": 2, "quantity": 2},
+            {"option_type": "stock", "position": "long", "strike": 100, "quantity": 100}
+        ]
+        prices = [80, 92.5, 100, 104, 110, 130]
+        
+        # long put 90 + short put 95 + 2 short calls 105 + 100 shares from 100
+        expected = [
+            900 - 1300 + 400 - 2000,   # 80
+            -100 - 50 + 400 - 750,     # 92.5
+            -100 + 200 + 400 + 0,      # 100
+            -100 + 200 + 400 + 400,    # 104
+            -100 + 200 - 600 + 1000,   # 110
+            -100 + 200 - 4600 + 3000,  # 130
+        ]
+        
+        pnls = PayoffPlan.from_legs(legs).evaluate(prices)
+        
+        assert list(pnls) == pytest.approx(expected)
+        for price, pnl in zip(prices, expected):
+            assert calculate_strategy_payoff(price, legs) == pytest.approx(pnl)
+    
+    def test_expiration_curve_includes_strikes(self):
+        """Chart grid should hit each strike exactly"""
+        legs = [{"option_type": "call", "position": "long", "strike": 101.3, "premium": 2, "quantity": 1}]
+        
+        curve = expiration_curve(legs, spot=100, num_points=11)
+        
+        assert 101.3 in curve["prices"]
+        assert curve["max_loss"] == -200
+
 
 class TestMonteCarloPoP:
     """Tests for probability of profit calculation"""
@@ -228,6 +293,30 @@ class TestMonteCarloPoP:
         
         # Very unlikely to profit
         assert result.pop < 10
+    
+    def test_streaming_matches_in_memory(self):
+        """Streaming mode should reproduce in-memory statistics"""
+        kwargs = dict(
+            spot=100,
+            volatility=0.25,
+            days=30,
+            legs=[
+                {"option_type": "put", "position": "short", "strike": 95, "premium": 1.5, "quantity": 1},
+                {"option_type": "call", "position": "short", "strike": 105, "premium": 1.5, "quantity": 1}
+            ],
+            num_simulations=50000,
+            seed=7
+        )
+        
+        in_memory = monte_carlo_pop(streaming=False, **kwargs)
+        streamed = monte_carlo_pop(streaming=True, chunk_size=4096, **kwargs)
+        
+        assert streamed.pop == in_memory.pop
+        assert streamed.expected_return == in_memory.expected_return
+        assert streamed.max_loss == in_memory.max_loss
+        assert abs(streamed.percentiles["5th"] - in_memory.percentiles["5th"]) < 5
+        assert len(streamed.final_prices) == 0
+        assert streamed.distribution["mean"] == price_distribution(in_memory.final_prices)["mean"]
 
 
 class TestPriceDistribution:
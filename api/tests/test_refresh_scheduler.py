@@ -0,0 +1,197 @@
+"""
+Tests for the refresh-ahead scheduler
+Stale-while-revalidate serving, popularity tracking and the refresh budget
+"""
+
+import pytest
+import asyncio
+import time
+import sys
+sys.path.insert(0, '..')
+
+from services.cache_service import CacheService
+from services.refresh_scheduler import RefreshScheduler
+
+
+def _scheduler(**kwargs):
+    return RefreshScheduler(cache=CacheService(), **kwargs)
+
+
+class Counter:
+    """Async compute function that counts its calls"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, name):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"name": name, "version": self.calls}
+
+
+def _expire(scheduler, key, remaining=-0.01):
+    """Move an entry's fresh_until so it has `remaining` seconds left"""
+    entry = scheduler.cache.l1.get(key)
+    entry.fresh_until = time.time() + remaining
+
+
+class TestStaleWhileRevalidate:
+    """Request-path behaviour"""
+
+    def test_miss_then_fresh_hit(self):
+        """The first request computes; later ones are served from cache"""
+        scheduler = _scheduler()
+        compute = Counter()
+
+        async def run():
+            first = await scheduler.get_or_compute("oi:SPY", compute, 60, "SPY")
+            second = await scheduler.get_or_compute("oi:SPY", compute, 60, "SPY")
+            return first, second
+
+        first, second = asyncio.run(run())
+
+        assert first == second == {"name": "SPY", "version": 1}
+        assert compute.calls == 1
+        assert scheduler.stats["misses"] == 1 and scheduler.stats["fresh"] == 1
+
+    def test_stale_value_served_during_refresh(self):
+        """A stale request returns at once; concurrent misses don't recompute"""
+        scheduler = _scheduler()
+        compute = Counter(delay=0.05)
+
+        async def run():
+            await scheduler.get_or_compute("gex:QQQ", compute, 60, "QQQ")
+            _expire(scheduler, "gex:QQQ")
+
+            start = time.perf_counter()
+            stale = await asyncio.gather(*[scheduler.get_or_compute("gex:QQQ", compute, 60, "QQQ") for _ in range(5)])
+            elapsed = time.perf_counter() - start
+
+            await asyncio.sleep(0.1)
+            fresh = await scheduler.get_or_compute("gex:QQQ", compute, 60, "QQQ")
+            return stale, elapsed, fresh
+
+        stale, elapsed, fresh = asyncio.run(run())
+
+        assert all(v["version"] == 1 for v in stale)
+        assert elapsed < 0.04
+        assert fresh["version"] == 2
+        assert compute.calls == 2
+        assert scheduler.stats["stale_served"] == 5 and scheduler.stats["refreshes"] == 1
+
+    def test_refresh_errors_keep_stale_value(self):
+        """A failing refresh is counted and the stale value stays servable"""
+        scheduler = _scheduler()
+        calls = []
+
+        async def flaky():
+            calls.append(1)
+            if len(calls) > 1:
+                raise RuntimeError("upstream down")
+            return {"ok": True}
+
+        async def run():
+            await scheduler.get_or_compute("forecast:SPY", flaky, 60)
+            _expire(scheduler, "forecast:SPY")
+            stale = await scheduler.get_or_compute("forecast:SPY", flaky, 60)
+            await asyncio.sleep(0.01)
+            return stale, await scheduler.get_or_compute("forecast:SPY", flaky, 60)
+
+        stale, again = asyncio.run(run())
+
+        assert stale == again == {"ok": True}
+        assert scheduler.stats["refresh_errors"] >= 1
+
+
+class TestRefreshAhead:
+    """Scheduler passes"""
+
+    def test_hot_keys_refresh_before_expiry(self):
+        """Popular keys near expiry are recomputed; cold ones are left alone"""
+        scheduler = _scheduler(min_score=3)
+        compute = Counter()
+
+        async def run():
+            for _ in range(5):
+                await scheduler.get_or_compute("oi:SPY", compute, 10, "SPY")
+            await scheduler.get_or_compute("oi:IWM", compute, 10, "IWM")
+            _expire(scheduler, "oi:SPY", remaining=1.0)  # < 20% of 10 s left
+            _expire(scheduler, "oi:IWM", remaining=1.0)
+
+            assert scheduler.due() == ["oi:SPY"]
+            started = scheduler.run_once()
+            await asyncio.sleep(0.01)
+            return started, scheduler.cache.l1.get("oi:SPY")
+
+        started, entry = asyncio.run(run())
+
+        assert started == 1
+        assert entry.value["version"] == 3  # SPY, IWM, then the refresh
+        assert entry.ttl_remaining > 9
+        assert scheduler.stats["refreshed_ahead"] == 1
+
+    def test_budget_limits_concurrent_refreshes(self):
+        """Hottest keys go first; the rest wait for a later pass"""
+        scheduler = _scheduler(max_concurrent=2, min_score=0.5)
+        compute = Counter(delay=0.05)
+        tickers = ["A", "B", "C", "D"]
+
+        async def run():
+            for hits, ticker in enumerate(tickers, start=1):
+                for _ in range(hits):
+                    await scheduler.get_or_compute(f"gex:{ticker}", compute, 10, ticker)
+            for ticker in tickers:
+                _expire(scheduler, f"gex:{ticker}", remaining=0.5)
+
+            first = scheduler.run_once()
+            running = sorted(scheduler._running)
+            second = scheduler.run_once()
+            await asyncio.sleep(0.1)
+            third = scheduler.run_once()
+            await asyncio.sleep(0.1)
+            return first, running, second, third
+
+        first, running, second, third = asyncio.run(run())
+
+        assert first == 2 and running == ["gex:C", "gex:D"]
+        assert second == 0
+        assert third == 2
+        assert compute.calls == 4 + 4
+
+    def test_background_loop(self):
+        """start() runs passes periodically until stop()"""
+        scheduler = _scheduler(min_score=0.5, interval=0.01)
+        compute = Counter()
+
+        async def run():
+            scheduler.start()
+            await scheduler.get_or_compute("oi:SPY", compute, 10, "SPY")
+            _expire(scheduler, "oi:SPY", remaining=0.5)
+            await asyncio.sleep(0.05)
+            await scheduler.stop()
+            return scheduler.get_stats()
+
+        stats = asyncio.run(run())
+
+        assert compute.calls == 2
+        assert stats["refreshed_ahead"] == 1
+        assert stats["running"] == 0 and stats["tracked_keys"] == 1
+
+    def test_cold_keys_are_forgotten(self):
+        """Decayed popularity drops keys from tracking"""
+        scheduler = _scheduler(halflife=0.01)
+        compute = Counter()
+
+        async def run():
+            await scheduler.get_or_compute("oi:SPY", compute, 10, "SPY")
+            await asyncio.sleep(0.1)
+            scheduler.run_once()
+
+        asyncio.run(run())
+
+        assert scheduler.get_stats()["tracked_keys"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
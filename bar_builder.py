@@ -0,0 +1,353 @@
+"""
+Bar Builder Module
+Forms live OHLCV bars from streamed quotes and trades
+
+Consumes StreamingPriceManager updates and builds 1-second and 1-minute
+bars per symbol in memory. Completed bars are emitted to subscribers
+immediately and written to the candle store in batched transactions, so
+charts see a new bar within a second of it closing and REST polling is
+only needed to fill gaps (e.g. after a disconnect).
+
+Bars that cannot be complete (a symbol's first bucket after the builder
+starts, and buckets that straddle a reconnect) are marked partial, and
+neither they nor quote-only bars are written to the store, so they never
+overwrite a complete REST bar for the same minute.
+
+Buckets are taken from the feed's RFC 3339 UTC timestamps by prefix
+("2026-01-02T14:30:05.123Z"[:16] is its minute), so assigning an update
+to a bar costs a string slice rather than a datetime parse.
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+# Timestamp prefix length that identifies a bucket, and its width in seconds
+BAR_TIMEFRAMES: Dict[str, Tuple[int, int]] = {
+    "1sec": (19, 1),  # 2026-01-02T14:30:05
+    "1min": (16, 60),  # 2026-01-02T14:30
+}
+
+DEFAULT_PERSIST = ("1min",)
+FLUSH_INTERVAL = 1.0  # seconds between sweeps/candle-store flushes
+CLOSE_GRACE = 2.0  # seconds past a bucket's end before an idle symbol's bar is closed
+RECENT_BARS = 500  # Completed bars kept in memory per (ticker, timeframe)
+MAX_PENDING_ROWS = 500_000  # Unflushed rows kept if the store is unavailable
+
+
+def _utc_timestamp() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _bucket_end(bucket: str, seconds: int) -> float:
+    """Epoch seconds at which a bucket (timestamp prefix) ends"""
+    return datetime.fromisoformat(bucket).replace(tzinfo=timezone.utc).timestamp() + seconds
+
+
+@dataclass(slots=True)
+class LiveBar:
+    """One OHLCV bar being built (or just completed) for a symbol"""
+    ticker: str
+    timeframe: str
+    bucket: str  # Timestamp prefix shared by every update in the bar
+    timestamp: str  # Bar start, RFC 3339
+    end: float  # Epoch seconds when the bucket ends
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: int = 0
+    trades: int = 0
+    quotes: int = 0
+    partial: bool = False  # Missed updates: opened mid-stream or straddled a gap
+
+    def to_dict(self) -> Dict:
+        """Candle dict as used by database.store_candles"""
+        return {
+            "timestamp": self.timestamp,
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "volume": self.volume
+        }
+
+    def to_row(self) -> tuple:
+        """Row as used by database.ingest_candle_rows"""
+        return (self.ticker, self.timestamp, self.timeframe,
+                self.open, self.high, self.low, self.close, self.volume)
+
+
+class BarBuilder:
+    """
+    Aggregate a tick stream into per-symbol OHLCV bars
+
+    Trades set OHLC and volume. A bar that sees no trades (common on the
+    IEX feed for less liquid names) is built from quote midpoints with
+    zero volume; its first trade replaces those prices.
+
+    A bar closes when its symbol's next update falls in a later bucket,
+    or, for symbols that go quiet, when the periodic sweep finds the
+    bucket ended more than `grace` seconds ago. Updates for a bucket that
+    has already closed are counted as late and dropped.
+
+    Only complete bars with at least one trade are persisted. A bar is
+    partial when it is the first for its symbol since the builder started,
+    or when it was open during, or began before the end of, a stream gap
+    reported through mark_gap().
+
+    Args:
+        timeframes: Bar widths to build (keys of BAR_TIMEFRAMES)
+        persist: Timeframes written to the candle store
+        flush_interval: Seconds between sweeps and store flushes
+        grace: Allowance for late updates before a quiet bar is closed
+        store: Callable taking candle rows (default: database.ingest_candle_rows)
+    """
+
+    def __init__(self, timeframes: Iterable[str] = ("1sec", "1min"),
+                 persist: Iterable[str] = DEFAULT_PERSIST,
+                 flush_interval: float = FLUSH_INTERVAL,
+                 grace: float = CLOSE_GRACE,
+                 store: Optional[Callable[[List[tuple]], int]] = None):
+        self.timeframes = tuple(timeframes)
+        for timeframe in self.timeframes:
+            if timeframe not in BAR_TIMEFRAMES:
+                raise ValueError(f"Unsupported bar timeframe: {timeframe}")
+        self.persist = frozenset(persist)
+        self.flush_interval = flush_interval
+        self.grace = grace
+        self._store = store
+        self._prefixes = [(tf, *BAR_TIMEFRAMES[tf]) for tf in self.timeframes]
+
+        self._bars: Dict[Tuple[str, str], LiveBar] = {}
+        self._recent: Dict[Tuple[str, str], Deque[LiveBar]] = {}
+        self._last_closed: Dict[Tuple[str, str], str] = {}
+        self._resumed_at = 0.0  # Epoch seconds the stream last (re)connected
+        self._pending_rows: List[tuple] = []
+        self._subscribers: List[Callable[[LiveBar], None]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"updates": 0, "late_updates": 0, "bars_closed": 0, "bars_not_persisted": 0,
+                      "rows_flushed": 0, "flushes": 0, "flush_errors": 0, "rows_dropped": 0}
+
+    # -------------------------------------------------------------------------
+    # Input
+    # -------------------------------------------------------------------------
+
+    def on_price_update(self, update):
+        """StreamingPriceManager callback: fold a PriceUpdate into its bars"""
+        self.on_price_updates((update,))
+
+    def on_price_updates(self, updates: Iterable):
+        """Batch callback: fold updates (in arrival order) into their bars"""
+        closed = []
+        bars, last_closed, stats = self._bars, self._last_closed, self.stats
+
+        with self._lock:
+            for update in updates:
+                price = update.price
+                if not price:
+                    continue
+                ts = update.timestamp
+                if len(ts) < 19:
+                    ts = _utc_timestamp()
+                is_trade = getattr(update, "is_trade", False)
+                stats["updates"] += 1
+
+                for timeframe, width, seconds in self._prefixes:
+                    key = (update.ticker, timeframe)
+                    bucket = ts[:width]
+                    bar = bars.get(key)
+
+                    if bar is None or bar.bucket != bucket:
+                        # ISO prefixes sort chronologically
+                        if (bar is not None and bucket < bar.bucket) or bucket <= last_closed.get(key, ""):
+                            stats["late_updates"] += 1
+                            continue
+                        first = bar is None and key not in last_closed
+                        if bar is not None:
+                            self._record(bar)
+                            closed.append(bar)
+                        end = _bucket_end(bucket, seconds)
+                        bar = bars[key] = LiveBar(
+                            update.ticker, timeframe, bucket,
+                            bucket + ("Z" if seconds == 1 else ":00Z"),
+                            end, price, price, price, price,
+                            partial=first or end - seconds < self._resumed_at
+                        )
+
+                    if is_trade:
+                        if bar.trades == 0:  # First trade replaces quote-derived prices
+                            bar.open = bar.high = bar.low = price
+                        elif price > bar.high:
+                            bar.high = price
+                        elif price < bar.low:
+                            bar.low = price
+                        bar.close = price
+                        bar.volume += update.volume
+                        bar.trades += 1
+                    elif bar.trades == 0:
+                        if price > bar.high:
+                            bar.high = price
+                        elif price < bar.low:
+                            bar.low = price
+                        bar.close = price
+                        bar.quotes += 1
+
+        self._emit(closed)
+
+    def _record(self, bar: LiveBar):
+        """Keep a completed bar and queue it for the store (lock held)"""
+        key = (bar.ticker, bar.timeframe)
+        self._last_closed[key] = bar.bucket
+        recent = self._recent.get(key)
+        if recent is None:
+            recent = self._recent[key] = deque(maxlen=RECENT_BARS)
+        recent.append(bar)
+        self.stats["bars_closed"] += 1
+        if bar.timeframe in self.persist:
+            if bar.partial or bar.trades == 0:
+                self.stats["bars_not_persisted"] += 1
+            else:
+                self._pending_rows.append(bar.to_row())
+
+    def mark_gap(self, now: Optional[float] = None):
+        """
+        Report that the stream was interrupted and has just resumed
+
+        Open bars missed updates and are marked partial, as is any later
+        bar whose bucket began before `now`.
+        """
+        with self._lock:
+            self._resumed_at = time.time() if now is None else now
+            for bar in self._bars.values():
+                bar.partial = True
+
+    def _emit(self, bars: List[LiveBar]):
+        for bar in bars:
+            for callback in list(self._subscribers):
+                try:
+                    callback(bar)
+                except Exception as e:
+                    print(f"Error in bar subscriber: {e}")
+
+    # -------------------------------------------------------------------------
+    # Sweep and flush
+    # -------------------------------------------------------------------------
+
+    def sweep(self, now: Optional[float] = None) -> List[LiveBar]:
+        """Close bars whose bucket ended more than `grace` seconds ago"""
+        now = time.time() if now is None else now
+        cutoff = now - self.grace
+        with self._lock:
+            closed = [bar for bar in self._bars.values() if bar.end <= cutoff]
+            for bar in closed:
+                del self._bars[(bar.ticker, bar.timeframe)]
+                self._record(bar)
+        self._emit(closed)
+        return closed
+
+    def flush(self) -> int:
+        """
+        Write queued bars to the candle store in one batched call
+
+        Returns:
+            Number of rows written (0 if nothing was queued or the write failed)
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending_rows = self._pending_rows, []
+            if not rows:
+                return 0
+
+            try:
+                store = self._store
+                if store is None:
+                    from database import ingest_candle_rows
+                    store = ingest_candle_rows
+                store(rows)
+            except Exception as e:
+                self.stats["flush_errors"] += 1
+                print(f"Bar flush error: {e}")
+                with self._lock:
+                    # Retry on the next flush, keeping the newest rows if the backlog grows
+                    self._pending_rows[:0] = rows
+                    overflow = len(self._pending_rows) - MAX_PENDING_ROWS
+                    if overflow > 0:
+                        del self._pending_rows[:overflow]
+                        self.stats["rows_dropped"] += overflow
+                return 0
+
+            self.stats["flushes"] += 1
+            self.stats["rows_flushed"] += len(rows)
+            return len(rows)
+
+    def start(self):
+        """Run sweep + flush every flush_interval on a background thread"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread and flush what has completed"""
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while self._running:
+            time.sleep(self.flush_interval)
+            try:
+                self.sweep()
+                self.flush()
+            except Exception as e:
+                print(f"Bar builder error: {e}")
+
+    # -------------------------------------------------------------------------
+    # Output
+    # -------------------------------------------------------------------------
+
+    def add_subscriber(self, callback: Callable[[LiveBar], None]):
+        """Call back with every completed bar"""
+        self._subscribers.append(callback)
+
+    def remove_subscriber(self, callback: Callable):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def get_open_bar(self, ticker: str, timeframe: str = "1min") -> Optional[Dict]:
+        """The bar still being built, as a candle dict"""
+        with self._lock:
+            bar = self._bars.get((ticker.upper(), timeframe))
+            return bar.to_dict() if bar else None
+
+    def get_bars(self, ticker: str, timeframe: str = "1min", limit: int = 100,
+                 include_open: bool = True) -> List[Dict]:
+        """
+        Recently completed bars (oldest first), plus the open bar
+
+        Args:
+            ticker: Stock symbol
+            timeframe: Bar width ("1sec" or "1min")
+            limit: Maximum bars returned
+            include_open: Append the bar still being built
+        """
+        key = (ticker.upper(), timeframe)
+        with self._lock:
+            bars = list(self._recent.get(key, ()))
+            if include_open and key in self._bars:
+                bars.append(self._bars[key])
+            return [bar.to_dict() for bar in bars[-limit:]]
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self.stats, "open_bars": len(self._bars), "pending_rows": len(self._pending_rows)}
@@ -0,0 +1,435 @@
+"""
+Bar Store Module
+Append-only, memory-mapped columnar storage for long OHLCV histories
+
+Each (ticker, timeframe) series lives in its own directory with one
+fixed-width little-endian binary file per column plus a small JSON index:
+
+    <root>/<TICKER>/<timeframe>/timestamp.bin   int64 ns since epoch (UTC)
+                                open.bin        float64
+                                high.bin        float64
+                                low.bin         float64
+                                close.bin       float64
+                                volume.bin      int64
+                                index.json      row count, first/last, marks
+
+Reads open the columns with numpy.memmap, so slicing a time range is a
+binary search plus a view: nothing is copied or paged in until used.
+"""
+
+import os
+import json
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# Store location; override with the BAR_STORE_DIR environment variable
+BAR_STORE_DIR = os.getenv(
+    "BAR_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "bar_store")
+)
+
+# On-disk column layout (fixed width, little-endian)
+BAR_COLUMNS: Dict[str, np.dtype] = {
+    "timestamp": np.dtype("<i8"),
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+    "volume": np.dtype("<i8"),
+}
+
+INDEX_FILE = "index.json"
+INDEX_VERSION = 1
+
+# Every INDEX_STRIDE-th timestamp is kept in the index, so a range lookup
+# bisects the index and then searches a single block of the timestamp
+# column instead of faulting in pages across the whole file
+INDEX_STRIDE = 4096
+
+# Default rows per chunk for iter_chunks
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+TimeLike = Union[datetime, str, np.datetime64, pd.Timestamp, None]
+
+
+@dataclass
+class BarSeries:
+    """OHLCV bars as parallel columns (memory-mapped views when read from a BarStore)"""
+    timestamp: np.ndarray  # datetime64[ns], UTC
+    open: np.ndarray  # float64
+    high: np.ndarray  # float64
+    low: np.ndarray  # float64
+    close: np.ndarray  # float64
+    volume: np.ndarray  # int64
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def __getitem__(self, item):
+        """Slices return a BarSeries of views; integers return a bar dict"""
+        if isinstance(item, slice):
+            return BarSeries(**{name: getattr(self, name)[item] for name in BAR_COLUMNS})
+
+        return {
+            "timestamp": pd.Timestamp(self.timestamp[item], tz="UTC").isoformat(),
+            "open": float(self.open[item]),
+            "high": float(self.high[item]),
+            "low": float(self.low[item]),
+            "close": float(self.close[item]),
+            "volume": int(self.volume[item]),
+        }
+
+    @classmethod
+    def empty(cls) -> "BarSeries":
+        return cls(**{
+            name: np.empty(0, dtype="datetime64[ns]" if name == "timestamp" else dtype)
+            for name, dtype in BAR_COLUMNS.items()
+        })
+
+
+def _to_ns(value: TimeLike) -> Optional[int]:
+    """Convert a point in time to int64 nanoseconds since epoch (naive = UTC)"""
+    if value is None:
+        return None
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return int(ts.value)
+
+
+def _timestamps_to_ns(timestamps) -> np.ndarray:
+    """Convert a sequence of timestamps (datetime64, datetime or ISO strings) to int64 ns"""
+    arr = np.asarray(timestamps)
+    if np.issubdtype(arr.dtype, np.datetime64):
+        return arr.astype("datetime64[ns]").view("i8")
+    parsed = pd.to_datetime(arr, utc=True, format="ISO8601")
+    return np.asarray(parsed.as_unit("ns").asi8, dtype=np.int64)
+
+
+class BarStore:
+    """
+    Append-only columnar bar store
+
+    Writers append whole batches: column files are extended first and the
+    index (which holds the committed row count) is replaced atomically
+    afterwards, so a crash mid-append leaves readers on the previous
+    length and the next append truncates the torn tail. Timestamps are
+    strictly increasing within a series; rows at or before the last stored
+    bar are dropped, which makes re-importing overlapping ranges harmless.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or BAR_STORE_DIR
+        self._lock = threading.Lock()
+        # (ticker, timeframe) -> (row count, {column: memmap})
+        self._maps: Dict[Tuple[str, str], Tuple[int, Dict[str, np.memmap]]] = {}
+
+    # ==================== LAYOUT ====================
+
+    @staticmethod
+    def _key(ticker: str, timeframe: str) -> Tuple[str, str]:
+        return ticker.upper(), timeframe.lower()
+
+    def _series_dir(self, ticker: str, timeframe: str) -> str:
+        ticker, timeframe = self._key(ticker, timeframe)
+        return os.path.join(self.root, ticker, timeframe)
+
+    def _read_index(self, series_dir: str) -> Dict:
+        path = os.path.join(series_dir, INDEX_FILE)
+        if not os.path.exists(path):
+            return {"version": INDEX_VERSION, "rows": 0, "first": None, "last": None,
+                    "stride": INDEX_STRIDE, "marks": []}
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_index(self, series_dir: str, index: Dict):
+        path = os.path.join(series_dir, INDEX_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def list_series(self) -> List[Tuple[str, str]]:
+        """List stored (ticker, timeframe) pairs"""
+        series = []
+        if not os.path.isdir(self.root):
+            return series
+        for ticker in sorted(os.listdir(self.root)):
+            ticker_dir = os.path.join(self.root, ticker)
+            if not os.path.isdir(ticker_dir):
+                continue
+            for timeframe in sorted(os.listdir(ticker_dir)):
+                if os.path.exists(os.path.join(ticker_dir, timeframe, INDEX_FILE)):
+                    series.append((ticker, timeframe))
+        return series
+
+    def info(self, ticker: str, timeframe: str = "1min") -> Dict:
+        """
+        Get the index for a series
+
+        Returns:
+            Dict with rows, first and last (ISO timestamps or None)
+        """
+        index = self._read_index(self._series_dir(ticker, timeframe))
+
+        def iso(ns):
+            return None if ns is None else pd.Timestamp(ns, tz="UTC").isoformat()
+
+        return {
+            "ticker": ticker.upper(),
+            "timeframe": timeframe.lower(),
+            "rows": index["rows"],
+            "first": iso(index["first"]),
+            "last": iso(index["last"]),
+        }
+
+    # ==================== WRITE ====================
+
+    def append(self, ticker: str, timeframe: str, timestamps, opens, highs, lows,
+               closes, volumes) -> int:
+        """
+        Append bars to a series
+
+        Input may be unsorted and may overlap what is already stored; it is
+        sorted, de-duplicated (last occurrence wins) and trimmed to bars
+        after the last stored timestamp.
+
+        Args:
+            ticker: Stock symbol
+            timeframe: Bar timeframe (case-insensitive, e.g. "1min", "1Day")
+            timestamps: datetime64 array, datetimes or ISO strings
+            opens, highs, lows, closes, volumes: Columns aligned with timestamps
+
+        Returns:
+            Number of bars appended
+        """
+        ts = _timestamps_to_ns(timestamps)
+        columns = {
+            "timestamp": ts,
+            "open": np.asarray(opens, dtype=np.float64),
+            "high": np.asarray(highs, dtype=np.float64),
+            "low": np.asarray(lows, dtype=np.float64),
+            "close": np.asarray(closes, dtype=np.float64),
+            "volume": np.asarray(volumes, dtype=np.float64).astype(np.int64),
+        }
+        if any(len(col) != len(ts) for col in columns.values()):
+            raise ValueError("All bar columns must have the same length")
+        if len(ts) == 0:
+            return 0
+
+        # Sort and keep the last occurrence of each timestamp
+        order = np.argsort(ts, kind="stable")
+        ts_sorted = ts[order]
+        keep = np.ones(len(ts_sorted), dtype=bool)
+        keep[:-1] = ts_sorted[1:] != ts_sorted[:-1]
+        order = order[keep]
+
+        series_dir = self._series_dir(ticker, timeframe)
+
+        with self._lock:
+            os.makedirs(series_dir, exist_ok=True)
+            index = self._read_index(series_dir)
+            rows = index["rows"]
+
+            if index["last"] is not None:
+                order = order[ts[order] > index["last"]]
+            if len(order) == 0:
+                return 0
+
+            for name, dtype in BAR_COLUMNS.items():
+                path = os.path.join(series_dir, f"{name}.bin")
+                with open(path, "ab") as f:
+                    # Drop any tail left by an append that never committed
+                    f.truncate(rows * dtype.itemsize)
+                    f.write(np.ascontiguousarray(columns[name][order], dtype=dtype).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            new_ts = ts[order]
+            stride = index.get("stride", INDEX_STRIDE)
+            first_mark = -(-rows // stride) * stride  # next multiple of stride >= rows
+            index["marks"].extend(int(v) for v in new_ts[first_mark - rows::stride])
+            index["rows"] = rows + len(order)
+            index["last"] = int(new_ts[-1])
+            if index["first"] is None:
+                index["first"] = int(new_ts[0])
+            self._write_index(series_dir, index)
+            self._maps.pop(self._key(ticker, timeframe), None)
+
+        return len(order)
+
+    def append_bars(self, ticker: str, timeframe: str, bars: Iterable[Dict]) -> int:
+        """
+        Append bar dicts (timestamp, open, high, low, close, volume)
+
+        Returns:
+            Number of bars appended
+        """
+        bars = list(bars)
+        return self.append(
+            ticker, timeframe,
+            [bar["timestamp"] for bar in bars],
+            [bar["open"] for bar in bars],
+            [bar["high"] for bar in bars],
+            [bar["low"] for bar in bars],
+            [bar["close"] for bar in bars],
+            [bar.get("volume", 0) or 0 for bar in bars],
+        )
+
+    # ==================== READ ====================
+
+    def _columns(self, ticker: str, timeframe: str) -> Tuple[int, Dict[str, np.memmap], Dict]:
+        """Open (or reuse) read-only memmaps for a series' committed rows"""
+        key = self._key(ticker, timeframe)
+        series_dir = self._series_dir(ticker, timeframe)
+        index = self._read_index(series_dir)
+        rows = index["rows"]
+
+        with self._lock:
+            cached = self._maps.get(key)
+            if cached is not None and cached[0] == rows:
+                return rows, cached[1], index
+
+            maps = {}
+            if rows > 0:
+                for name, dtype in BAR_COLUMNS.items():
+                    maps[name] = np.memmap(
+                        os.path.join(series_dir, f"{name}.bin"), dtype=dtype, mode="r", shape=(rows,)
+                    )
+            self._maps[key] = (rows, maps)
+
+        return rows, maps, index
+
+    @staticmethod
+    def _search(timestamps: np.ndarray, marks: List[int], stride: int, value: int, side: str) -> int:
+        """searchsorted on the timestamp column, narrowed to one block by the sparse index"""
+        block = int(np.searchsorted(np.asarray(marks, dtype=np.int64), value, side=side))
+        lo = max(block - 1, 0) * stride
+        hi = min(block * stride + 1, len(timestamps))
+        return lo + int(np.searchsorted(timestamps[lo:hi], value, side=side))
+
+    def locate(self, ticker: str, timeframe: str = "1min", start: TimeLike = None,
+               end: TimeLike = None) -> Tuple[int, int]:
+        """
+        Find the row range [lo, hi) of bars with start <= timestamp <= end
+
+        Returns:
+            (lo, hi) row offsets into the series
+        """
+        rows, maps, index = self._columns(ticker, timeframe)
+        if rows == 0:
+            return 0, 0
+
+        timestamps = maps["timestamp"]
+        stride = index.get("stride", INDEX_STRIDE)
+        marks = index["marks"]
+        start_ns, end_ns = _to_ns(start), _to_ns(end)
+
+        lo = 0 if start_ns is None else self._search(timestamps, marks, stride, start_ns, "left")
+        hi = rows if end_ns is None else self._search(timestamps, marks, stride, end_ns, "right")
+        return lo, max(lo, hi)
+
+    def read(self, ticker: str, timeframe: str = "1min", start: TimeLike = None,
+             end: TimeLike = None) -> BarSeries:
+        """
+        Read bars in a time range as zero-copy memory-mapped views
+
+        Args:
+            ticker: Stock symbol
+            timeframe: Bar timeframe
+            start: Start time, inclusive (optional; naive times are UTC)
+            end: End time, inclusive (optional)
+
+        Returns:
+            BarSeries whose columns are read-only views into the store
+        """
+        lo, hi = self.locate(ticker, timeframe, start, end)
+        if hi == lo:
+            return BarSeries.empty()
+
+        _, maps, _ = self._columns(ticker, timeframe)
+        return BarSeries(
+            timestamp=maps["timestamp"][lo:hi].view("datetime64[ns]"),
+            open=maps["open"][lo:hi],
+            high=maps["high"][lo:hi],
+            low=maps["low"][lo:hi],
+            close=maps["close"][lo:hi],
+            volume=maps["volume"][lo:hi],
+        )
+
+    def iter_chunks(self, ticker: str, timeframe: str = "1min", start: TimeLike = None,
+                    end: TimeLike = None, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[BarSeries]:
+        """Yield a time range as consecutive BarSeries views of at most chunk_rows bars"""
+        series = self.read(ticker, timeframe, start, end)
+        for offset in range(0, len(series), chunk_rows):
+            yield series[offset:offset + chunk_rows]
+
+    def last_timestamp(self, ticker: str, timeframe: str = "1min") -> Optional[pd.Timestamp]:
+        """Get the timestamp of the newest stored bar (UTC), or None"""
+        last = self._read_index(self._series_dir(ticker, timeframe))["last"]
+        return None if last is None else pd.Timestamp(last, tz="UTC")
+
+
+# ==================== IMPORTERS ====================
+
+def import_from_database(ticker: str, timeframe: str = "1min",
+                         store: Optional[BarStore] = None) -> int:
+    """
+    Copy candles from the SQLite `candles` table into the bar store
+
+    Run this before cleanup_old_candles prunes the table to keep the
+    full history on disk.
+
+    Args:
+        ticker: Stock symbol
+        timeframe: Candle timeframe as stored in the table
+        store: Target store (defaults to the shared store)
+
+    Returns:
+        Number of bars appended
+    """
+    import database
+
+    store = store or get_bar_store()
+    candles = database.get_candle_arrays(ticker, timeframe=timeframe, limit=None)
+    return store.append(ticker, timeframe, candles.timestamp, candles.open, candles.high,
+                        candles.low, candles.close, candles.volume)
+
+
+def import_from_alpaca(ticker: str, timeframe: str = "1Min", limit: int = 10000,
+                       store: Optional[BarStore] = None) -> int:
+    """
+    Fetch recent bars from Alpaca and append them to the bar store
+
+    Args:
+        ticker: Stock symbol
+        timeframe: Alpaca bar timeframe (1Min, 5Min, 15Min, 1Hour, 1Day)
+        limit: Number of bars to fetch
+        store: Target store (defaults to the shared store)
+
+    Returns:
+        Number of bars appended
+    """
+    from data_manager import get_historical_bars
+
+    store = store or get_bar_store()
+    bars = get_historical_bars(ticker, timeframe=timeframe, limit=limit)
+    return store.append_bars(ticker, timeframe, bars)
+
+
+# Singleton
+_store: Optional[BarStore] = None
+
+
+def get_bar_store() -> BarStore:
+    """Get or create the shared bar store"""
+    global _store
+    if _store is None:
+        _store = BarStore()
+    return _store
@@ -0,0 +1,232 @@
+"""
+Compute Cache for Options Supergraph Dashboard
+Content-addressed memoization of payoff curves, position metrics and
+indicator series
+
+Streamlit re-executes main.py on every widget interaction, but imported
+modules stay loaded for the life of the server process. The caches below
+therefore survive reruns and are shared by every session: a rerun with the
+same legs, price grid, IV and days (or the same closes) is a dict lookup.
+
+Keys are digests of the inputs' contents, not their identities, so equal
+legs rebuilt from scratch on each rerun still hit. Cached arrays are marked
+read-only because they are shared between sessions.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import astuple, is_dataclass
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from config import DEFAULT_RISK_FREE_RATE
+from logic import (
+    OptionLeg, calculate_expiration_payoff, calculate_theoretical_payoff,
+    calculate_position_greeks, find_breakeven_points, calculate_max_profit_loss,
+    calculate_probability_of_profit, calculate_sma, calculate_ema,
+    calculate_rsi, calculate_bollinger_bands
+)
+
+PAYOFF_CACHE_SIZE = 256  # Payoff curves and position metrics
+INDICATOR_CACHE_SIZE = 128  # Indicator series
+
+
+def fingerprint(*parts) -> str:
+    """
+    Digest of the contents of legs, arrays and scalars
+
+    Arrays contribute dtype, shape and raw bytes; dataclasses (OptionLeg)
+    their field values; floats their exact repr.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+
+    def feed(value):
+        if isinstance(value, np.ndarray):
+            array = np.ascontiguousarray(value)
+            digest.update(f"a{array.dtype.str}{array.shape}".encode())
+            digest.update(array.tobytes())
+        elif is_dataclass(value):
+            digest.update(type(value).__name__.encode())
+            feed(astuple(value))
+        elif isinstance(value, (list, tuple)):
+            digest.update(f"l{len(value)}(".encode())
+            for item in value:
+                feed(item)
+            digest.update(b")")
+        else:
+            digest.update(f"{type(value).__name__}:{value!r};".encode())
+
+    for part in parts:
+        feed(part)
+    return digest.hexdigest()
+
+
+def _freeze(value: Any) -> Any:
+    """Make cached arrays (also inside tuples) read-only"""
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, tuple):
+        for item in value:
+            _freeze(item)
+    return value
+
+
+class LRUCache:
+    """
+    Bounded, thread-safe LRU map with hit/miss counters
+
+    Streamlit serves each session from its own thread, so lookups and
+    inserts are locked; the computation itself runs outside the lock.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = _freeze(compute())
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate_pct": round(100 * self.hits / lookups, 1) if lookups else 0.0
+        }
+
+
+# Global caches (one per server process, shared across sessions)
+payoff_cache = LRUCache(PAYOFF_CACHE_SIZE)
+indicator_cache = LRUCache(INDICATOR_CACHE_SIZE)
+
+
+# =============================================================================
+# Payoffs and Position Metrics
+# =============================================================================
+
+def expiration_payoff(legs: List[OptionLeg], price_range: np.ndarray) -> np.ndarray:
+    """Memoized calculate_expiration_payoff"""
+    key = fingerprint("expiration", legs, price_range)
+    return payoff_cache.get_or_compute(key, lambda: calculate_expiration_payoff(legs, price_range))
+
+
+def theoretical_payoff(legs: List[OptionLeg], price_range: np.ndarray,
+                       days_remaining: float, iv_adjustment: float = 0.0,
+                       r: float = DEFAULT_RISK_FREE_RATE) -> np.ndarray:
+    """Memoized calculate_theoretical_payoff (live and ghost curves)"""
+    key = fingerprint("theoretical", legs, price_range, float(days_remaining), float(iv_adjustment), r)
+    return payoff_cache.get_or_compute(
+        key, lambda: calculate_theoretical_payoff(legs, price_range, days_remaining, iv_adjustment, r)
+    )
+
+
+def position_greeks(legs: List[OptionLeg], current_price: float,
+                    days_remaining: float) -> Dict[str, float]:
+    """Memoized calculate_position_greeks (returns a copy)"""
+    key = fingerprint("greeks", legs, float(current_price), float(days_remaining))
+    greeks = payoff_cache.get_or_compute(
+        key, lambda: calculate_position_greeks(legs, current_price, days_remaining)
+    )
+    return dict(greeks)
+
+
+def breakeven_points(legs: List[OptionLeg], price_range: np.ndarray) -> List[float]:
+    """Memoized find_breakeven_points (returns a copy)"""
+    key = fingerprint("breakevens", legs, price_range)
+    return list(payoff_cache.get_or_compute(key, lambda: tuple(find_breakeven_points(legs, price_range))))
+
+
+def max_profit_loss(legs: List[OptionLeg], price_range: np.ndarray) -> Tuple[float, float]:
+    """Memoized calculate_max_profit_loss"""
+    key = fingerprint("max_pl", legs, price_range)
+    return payoff_cache.get_or_compute(key, lambda: calculate_max_profit_loss(legs, price_range))
+
+
+def probability_of_profit(legs: List[OptionLeg], current_price: float,
+                          days_remaining: float, iv: float) -> float:
+    """Memoized calculate_probability_of_profit"""
+    key = fingerprint("pop", legs, float(current_price), float(days_remaining), float(iv))
+    return payoff_cache.get_or_compute(
+        key, lambda: calculate_probability_of_profit(legs, current_price, days_remaining, iv)
+    )
+
+
+# =============================================================================
+# Indicators
+# =============================================================================
+
+def _closes(prices) -> np.ndarray:
+    return np.asarray(prices, dtype=float).ravel()
+
+
+def sma(prices, period: int) -> np.ndarray:
+    """Memoized calculate_sma"""
+    closes = _closes(prices)
+    return indicator_cache.get_or_compute(
+        fingerprint("sma", closes, period), lambda: calculate_sma(closes, period)
+    )
+
+
+def ema(prices, period: int) -> np.ndarray:
+    """Memoized calculate_ema"""
+    closes = _closes(prices)
+    return indicator_cache.get_or_compute(
+        fingerprint("ema", closes, period), lambda: calculate_ema(closes, period)
+    )
+
+
+def rsi(prices, period: int = 14) -> np.ndarray:
+    """Memoized calculate_rsi"""
+    closes = _closes(prices)
+    return indicator_cache.get_or_compute(
+        fingerprint("rsi", closes, period), lambda: calculate_rsi(closes, period)
+    )
+
+
+def bollinger_bands(prices, period: int = 20,
+                    std_dev: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Memoized calculate_bollinger_bands"""
+    closes = _closes(prices)
+    return indicator_cache.get_or_compute(
+        fingerprint("bb", closes, period, float(std_dev)),
+        lambda: tuple(calculate_bollinger_bands(closes, period, std_dev))
+    )
+
+
+def get_cache_stats() -> Dict[str, Dict]:
+    """Hit/miss counters for both caches"""
+    return {"payoff": payoff_cache.get_stats(), "indicator": indicator_cache.get_stats()}
+
+
+def clear_caches():
+    """Drop every memoized result"""
+    payoff_cache.clear()
+    indicator_cache.clear()
@@ -3,13 +3,27 @@ Data Manager Module for Options Supergraph Dashboard
 Handles all Alpaca API interactions for stock and options data
 """
 
+import heapq
+import random
+import threading
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List, Tuple
+from typing import Callable, Iterable, Optional, Dict, List, Tuple
 import numpy as np
+from requests.adapters import HTTPAdapter
 
 from config import ALPACA_API_KEY, ALPACA_API_SECRET, ALPACA_ENDPOINT
 
+# Symbols per multi-symbol data request
+MULTI_SYMBOL_CHUNK = 100
+
+# Shared HTTP session: pooled keep-alive connections per host
+HTTP_POOL_SIZE = 16
+HTTP_TIMEOUT = 10  # seconds
+
 
 class AlpacaDataManager:
     """Manages all data fetching from Alpaca API"""
@@ -23,6 +37,16 @@ class AlpacaDataManager:
             "APCA-API-KEY-ID": self.api_key,
             "APCA-API-SECRET-KEY": self.api_secret
         }
+        self.session = self._create_session()
+    
+    def _create_session(self) -> requests.Session:
+        """One keep-alive session shared by every request (and thread)"""
+        session = requests.Session()
+        session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
     
     def get_current_price(self, ticker: str) -> Optional[float]:
         """
@@ -36,7 +60,7 @@ class AlpacaDataManager:
         """
         try:
             url = f"{self.data_url}/v2/stocks/{ticker}/quotes/latest"
-            response = requests.get(url, headers=self.headers)
+            response = self.session.get(url, timeout=HTTP_TIMEOUT)
             
             if response.status_code == 200:
                 data = response.json()
@@ -54,11 +78,47 @@ class AlpacaDataManager:
             print(f"Exception fetching price: {e}")
             return None
     
+    def get_current_prices(self, tickers: List[str]) -> Dict[str, float]:
+        """
+        Fetch current prices for many tickers with multi-symbol snapshots
+        
+        Args:
+            tickers: Stock symbols
+            
+        Returns:
+            Dict mapping ticker to mid price (last trade when the quote is
+            one-sided); tickers without data are omitted
+        """
+        prices = {}
+        
+        for i in range(0, len(tickers), MULTI_SYMBOL_CHUNK):
+            chunk = tickers[i:i + MULTI_SYMBOL_CHUNK]
+            try:
+                url = f"{self.data_url}/v2/stocks/snapshots"
+                params = {"symbols": ",".join(chunk), "feed": "iex"}
+                response = self.session.get(url, params=params, timeout=HTTP_TIMEOUT)
+                
+                if response.status_code != 200:
+                    print(f"Error fetching snapshots: {response.status_code} - {response.text}")
+                    continue
+                
+                for ticker, snapshot in (response.json() or {}).items():
+                    quote = (snapshot or {}).get("latestQuote") or {}
+                    bid = quote.get("bp", 0)
+                    ask = quote.get("ap", 0)
+                    price = (bid + ask) / 2 if bid and ask else ((snapshot or {}).get("latestTrade") or {}).get("p")
+                    if price:
+                        prices[ticker] = price
+            except Exception as e:
+                print(f"Exception fetching snapshots: {e}")
+        
+        return prices
+    
     def _get_last_trade(self, ticker: str) -> Optional[float]:
         """Fallback to get last trade price"""
         try:
             url = f"{self.data_url}/v2/stocks/{ticker}/trades/latest"
-            response = requests.get(url, headers=self.headers)
+            response = self.session.get(url, timeout=HTTP_TIMEOUT)
             if response.status_code == 200:
                 data = response.json()
                 return data.get("trade", {}).get("p")
@@ -85,7 +145,7 @@ class AlpacaDataManager:
             if expiration_date:
                 params["expiration_date"] = expiration_date
             
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, params=params, timeout=HTTP_TIMEOUT)
             
             if response.status_code == 200:
                 data = response.json()
@@ -256,6 +316,11 @@ def get_current_price(ticker: str) -> Optional[float]:
     return data_manager.get_current_price(ticker)
 
 
+def get_current_prices(tickers: List[str]) -> Dict[str, float]:
+    """Convenience function to get current prices for many tickers"""
+    return data_manager.get_current_prices(tickers)
+
+
 def get_implied_volatility(ticker: str, current_price: float) -> float:
     """Convenience function to get implied volatility"""
     return data_manager.get_implied_volatility(ticker, current_price)
@@ -283,7 +348,16 @@ def get_historical_bars(ticker: str, timeframe: str = "1Day",
         
     Returns:
         List of bar dictionaries with OHLCV data
+        
+    Higher timeframes are derived from locally held 1-minute bars when
+    those cover `limit` bars (see _derived_bars); 1Min bars fetched here
+    are written to the candle store so later roll-ups can use them.
     """
+    if timeframe != "1Min":
+        bars = _derived_bars(ticker, timeframe, limit)
+        if bars is not None:
+            return bars
+    
     try:
         from datetime import datetime, timedelta
         
@@ -306,7 +380,7 @@ def get_historical_bars(ticker: str, timeframe: str = "1Day",
             "feed": "iex"
         }
         
-        response = requests.get(url, headers=data_manager.headers, params=params)
+        response = data_manager.session.get(url, params=params, timeout=HTTP_TIMEOUT)
         
         if response.status_code == 200:
             data = response.json()
@@ -322,6 +396,8 @@ def get_historical_bars(ticker: str, timeframe: str = "1Day",
                     "volume": bar.get("v", 0)
                 })
             
+            if timeframe == "1Min" and bars:
+                _store_minute_bars(ticker, bars)
             return bars
         else:
             print(f"Error fetching bars: {response.status_code}")
@@ -331,77 +407,429 @@ def get_historical_bars(ticker: str, timeframe: str = "1Day",
         return []
 
 
+def _derived_bars(ticker: str, timeframe: str, limit: int) -> Optional[List[Dict]]:
+    """
+    Roll up 1-minute bars held locally instead of requesting a higher timeframe
+    
+    Tries the live roll-up cache first, then the candle store. Returns None
+    (fetch from Alpaca) for timeframes the resampler does not derive, or
+    when neither source holds `limit` complete bars.
+    """
+    from resampler import get_resample_cache, normalize_timeframe, resample_candles, to_bar_dicts
+    
+    try:
+        normalize_timeframe(timeframe)
+    except ValueError:
+        return None
+    
+    # The oldest cached bucket may have begun filling mid-bucket
+    cached = get_resample_cache().get(ticker, timeframe)
+    if len(cached) > limit:
+        return to_bar_dicts(cached[len(cached) - limit:])
+    
+    try:
+        derived = resample_candles(ticker, timeframe, limit=limit)
+    except Exception as e:
+        print(f"Exception reading stored candles: {e}")
+        return None
+    if len(derived) >= limit:
+        return to_bar_dicts(derived)
+    return None
+
+
+def _store_minute_bars(ticker: str, bars: List[Dict]):
+    """Keep fetched minute bars in the candle store (the roll-up source)"""
+    try:
+        from database import store_candles
+        
+        store_candles(ticker, bars, timeframe="1min")
+    except Exception as e:
+        print(f"Exception storing minute bars: {e}")
+
+
+# Polling defaults
+POLL_INTERVAL = 3.0  # seconds between price refreshes per symbol
+IV_INTERVAL = 30.0  # seconds between IV refreshes (one chain request each)
+POLL_JITTER = 0.1  # +/- fraction of each interval, spreads symbols apart
+POLL_BATCH_WINDOW = 1.0  # seconds; price refreshes due this soon join the current batch
+POLL_MAX_BACKOFF = 60.0  # seconds; cap on the delay after repeated failures
+POLL_WORKERS = 4  # Concurrent upstream requests
+POLL_MAX_RPS = 10.0  # Upstream requests per second across all symbols
+STREAM_STALE_AFTER = 5.0  # seconds without a stream push before polling resumes
+STREAM_MAX_RATE = 2.0  # Stream pushes per symbol per second delivered to callbacks
+
+
+class RateLimiter:
+    """Token bucket shared by the polling workers"""
+    
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens: float = 1.0):
+        """Block until `tokens` requests may be made"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+@dataclass
+class PollTarget:
+    """Refresh state for one watched symbol"""
+    ticker: str
+    interval: float
+    iv_interval: float
+    data: Dict = field(default_factory=dict)
+    price_due: float = 0.0  # Monotonic time of the scheduled price refresh
+    iv_due: float = 0.0
+    failures: int = 0
+    iv_failures: int = 0
+    last_push: float = float("-inf")  # Monotonic time of the last stream update
+
+
 class PollingEngine:
     """
-    Background polling engine for periodic data updates.
-    Polls Greeks/IV at configurable intervals.
+    Multi-symbol refresh scheduler for prices and IV.
+    
+    One scheduler thread keeps a heap of due times per symbol; HTTP runs
+    on a small worker pool through the data manager's pooled session,
+    under a shared requests-per-second budget. Prices due within a short
+    window are fetched together with multi-symbol snapshots, so the price
+    request rate stays nearly flat as symbols are added.
+    
+    Each symbol has its own price and IV interval with jitter, and backs
+    off exponentially while its refreshes fail. When a stream is attached
+    (attach_stream), its pushes update prices directly and a symbol is
+    only polled once its stream has been silent for `stale_after` seconds.
+    
+    Callbacks receive the symbol's data dict (ticker, price, iv,
+    last_update, source) after every update. Callback errors are logged
+    and counted, never raised into the scheduler.
     """
     
-    def __init__(self):
+    def __init__(self, manager: Optional["AlpacaDataManager"] = None,
+                 workers: int = POLL_WORKERS, max_rps: float = POLL_MAX_RPS,
+                 jitter: float = POLL_JITTER, max_backoff: float = POLL_MAX_BACKOFF,
+                 stale_after: float = STREAM_STALE_AFTER, batch_window: float = POLL_BATCH_WINDOW):
+        self._manager = manager
+        self.workers = workers
+        self.jitter = jitter
+        self.batch_window = batch_window
+        self.max_backoff = max_backoff
+        self.stale_after = stale_after
+        self._limiter = RateLimiter(max_rps)
+        self._targets: Dict[str, PollTarget] = {}
+        self._primary: Optional[str] = None
+        self._heap: List[Tuple[float, int, str, str]] = []
+        self._seq = 0
+        self._iv_in_flight = 0
+        self._cond = threading.Condition()
+        self._callbacks: List[Callable[[Dict], None]] = []
+        self._subscription = None
+        self._pool: Optional[ThreadPoolExecutor] = None
         self._running = False
         self._thread = None
-        self._interval = 3  # seconds
-        self._cached_data = {}
-        self._callbacks = []
+        self.stats = {
+            "price_requests": 0, "iv_requests": 0, "prices_polled": 0,
+            "polls_skipped": 0, "stream_updates": 0, "failures": 0, "callback_errors": 0
+        }
     
-    def start(self, ticker: str, interval: int = 3):
-        """Start polling for a ticker"""
-        import threading
+    @property
+    def manager(self) -> "AlpacaDataManager":
+        return self._manager if self._manager is not None else data_manager
+    
+    # -------------------------------------------------------------------------
+    # Watch list
+    # -------------------------------------------------------------------------
+    
+    def start(self, ticker: Optional[str] = None, interval: float = POLL_INTERVAL,
+              iv_interval: float = IV_INTERVAL):
+        """
+        Watch a ticker (more can be added at any time) and start the scheduler
+        
+        Args:
+            ticker: Symbol to add to the watch list
+            interval: Seconds between its price refreshes
+            iv_interval: Seconds between its IV refreshes
+        """
+        if ticker:
+            self.watch([ticker], interval, iv_interval)
         
         if self._running:
             return
-        
-        self._interval = interval
         self._running = True
-        self._thread = threading.Thread(
-            target=self._poll_loop,
-            args=(ticker,),
-            daemon=True
-        )
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="poll")
+        self._thread = threading.Thread(target=self._schedule_loop, daemon=True)
         self._thread.start()
     
     def stop(self):
-        """Stop polling"""
+        """Stop polling; refreshes still queued are rescheduled for the next start"""
         self._running = False
+        with self._cond:
+            self._cond.notify_all()
         if self._thread:
             self._thread.join(timeout=2)
+            self._thread = None
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
     
-    def _poll_loop(self, ticker: str):
-        """Main polling loop"""
-        import time
+    def watch(self, tickers: Iterable[str], interval: float = POLL_INTERVAL,
+              iv_interval: float = IV_INTERVAL):
+        """Add symbols (or change their intervals); new ones refresh right away"""
+        now = time.monotonic()
+        with self._cond:
+            for ticker in tickers:
+                ticker = ticker.upper()
+                target = self._targets.get(ticker)
+                if target is None:
+                    target = self._targets[ticker] = PollTarget(ticker, interval, iv_interval, {"ticker": ticker})
+                    # Stagger first refreshes over a fraction of the interval
+                    self._push(target, "price", now + random.uniform(0, self.jitter * interval))
+                    self._push(target, "iv", now + random.uniform(0, self.jitter * iv_interval))
+                else:
+                    target.interval, target.iv_interval = interval, iv_interval
+                if self._primary is None:
+                    self._primary = ticker
+            self._cond.notify_all()
+        self._update_stream_symbols()
+    
+    def unwatch(self, tickers: Iterable[str]):
+        """Stop refreshing symbols"""
+        with self._cond:
+            for ticker in tickers:
+                self._targets.pop(ticker.upper(), None)
+                if self._primary == ticker.upper():
+                    self._primary = next(iter(self._targets), None)
+        self._update_stream_symbols()
+    
+    def attach_stream(self, streaming=None, max_rate: float = STREAM_MAX_RATE):
+        """
+        Take prices from a StreamingPriceManager while its feed is live
         
+        Args:
+            streaming: StreamingPriceManager (default: websocket_client.streaming_manager)
+            max_rate: Pushes per symbol per second forwarded to callbacks
+        """
+        if self._subscription is not None:
+            return
+        if streaming is None:
+            from websocket_client import streaming_manager as streaming
+        self._subscription = streaming.subscribe(self._on_stream_update, list(self._targets), max_rate)
+    
+    def _update_stream_symbols(self):
+        if self._subscription is not None:
+            self._subscription.set_symbols(list(self._targets))
+    
+    # -------------------------------------------------------------------------
+    # Scheduling
+    # -------------------------------------------------------------------------
+    
+    def _push(self, target: PollTarget, kind: str, due: float):
+        """Schedule a refresh (lock held); superseded heap entries are skipped"""
+        if kind == "price":
+            target.price_due = due
+        else:
+            target.iv_due = due
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, kind, target.ticker))
+    
+    def _delay(self, interval: float, failures: int) -> float:
+        """Next refresh delay: jittered interval, doubled per consecutive failure"""
+        delay = min(self.max_backoff, interval * (2 ** failures)) if failures else interval
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+    
+    def _schedule_loop(self):
+        """Pop due symbols and hand their refreshes to the worker pool"""
         while self._running:
-            try:
-                # Get current price
-                price = get_current_price(ticker)
-                if price:
-                    self._cached_data["price"] = price
-                    self._cached_data["last_update"] = datetime.now().isoformat()
-                
-                # Get IV
-                if price:
-                    iv = get_implied_volatility(ticker, price)
-                    self._cached_data["iv"] = iv
+            with self._cond:
+                now = time.monotonic()
+                prices, ivs, deferred = [], [], []
                 
-                # Notify callbacks
-                for callback in self._callbacks:
-                    try:
-                        callback(self._cached_data)
-                    except:
-                        pass
+                # Once anything is due, price refreshes due within the batch
+                # window are pulled forward so they share snapshot requests
+                horizon = now + self.batch_window if self._heap and self._heap[0][0] <= now else now
+                while self._heap and self._heap[0][0] <= horizon:
+                    entry = heapq.heappop(self._heap)
+                    due, _, kind, ticker = entry
+                    target = self._targets.get(ticker)
+                    if target is None or due != (target.price_due if kind == "price" else target.iv_due):
+                        continue  # Unwatched or rescheduled
+                    if kind == "iv":
+                        # IV requests may occupy all but one worker, so
+                        # price refreshes never queue behind a burst of them
+                        if due > now or self._iv_in_flight + len(ivs) >= max(1, self.workers - 1):
+                            deferred.append(entry)
+                        else:
+                            ivs.append(target)
+                    elif now - target.last_push < self.stale_after:
+                        # Stream is live: no request, check again later
+                        self.stats["polls_skipped"] += 1
+                        self._push(target, "price", now + self._delay(target.interval, 0))
+                    else:
+                        prices.append(target)
+                for entry in deferred:
+                    heapq.heappush(self._heap, entry)
+                self._iv_in_flight += len(ivs)
                 
+                if not prices and not ivs:
+                    timeout = self._heap[0][0] - now if self._heap else 1.0
+                    if timeout <= 0:  # Only IV held back by the worker budget
+                        timeout = self.batch_window
+                    self._cond.wait(timeout=min(timeout, 1.0))
+                    continue
+            
+            for i in range(0, len(prices), MULTI_SYMBOL_CHUNK):
+                chunk = prices[i:i + MULTI_SYMBOL_CHUNK]
+                self._submit(self._refresh_prices, chunk, "price", chunk)
+            for target in ivs:
+                self._submit(self._refresh_iv, target, "iv", [target])
+    
+    def _submit(self, fn, arg, kind: str, targets: List[PollTarget]):
+        """
+        Run a refresh on the pool
+    
+        Popped targets are only rescheduled by the refresh itself, so a job
+        that never runs (pool shut down, or cancelled by stop()) puts them
+        back on the heap instead.
+        """
+        def on_done(future):
+            if future.cancelled():
+                self._requeue(kind, targets)
+    
+        try:
+            self._pool.submit(fn, arg).add_done_callback(on_done)
+        except (RuntimeError, AttributeError):  # Pool shut down by stop()
+            self._requeue(kind, targets)
+    
+    def _requeue(self, kind: str, targets: List[PollTarget]):
+        """Make targets due again after their refresh was dropped"""
+        now = time.monotonic()
+        with self._cond:
+            if kind == "iv":
+                self._iv_in_flight -= len(targets)
+            for target in targets:
+                if self._targets.get(target.ticker) is target:
+                    self._push(target, kind, now)
+            self._cond.notify_all()
+    
+    def _refresh_prices(self, targets: List[PollTarget]):
+        """Worker: one multi-symbol snapshot request for a chunk of symbols"""
+        self._limiter.acquire()
+        self.stats["price_requests"] += 1
+        try:
+            prices = self.manager.get_current_prices([t.ticker for t in targets])
+        except Exception as e:
+            print(f"Polling error: {e}")
+            prices = {}
+        
+        now = time.monotonic()
+        updated = []
+        with self._cond:
+            for target in targets:
+                price = prices.get(target.ticker)
+                if price:
+                    target.failures = 0
+                    target.data.update(price=price, last_update=datetime.now().isoformat(), source="poll")
+                    updated.append(dict(target.data))
+                    self.stats["prices_polled"] += 1
+                else:
+                    target.failures += 1
+                    self.stats["failures"] += 1
+                if self._targets.get(target.ticker) is target:
+                    self._push(target, "price", now + self._delay(target.interval, target.failures))
+            self._cond.notify_all()
+        
+        for data in updated:
+            self._notify(data)
+    
+    def _refresh_iv(self, target: PollTarget):
+        """Worker: ATM IV from one options-chain request"""
+        price = target.data.get("price")
+        iv = None
+        if price:
+            self._limiter.acquire()
+            self.stats["iv_requests"] += 1
+            try:
+                iv = self.manager.get_implied_volatility(target.ticker, price)
             except Exception as e:
                 print(f"Polling error: {e}")
-            
-            time.sleep(self._interval)
+        
+        with self._cond:
+            self._iv_in_flight -= 1
+            if iv is not None:
+                target.iv_failures = 0
+                target.data["iv"] = iv
+            elif price:
+                target.iv_failures += 1
+                self.stats["failures"] += 1
+            # Without a price yet, retry IV shortly after the first price lands
+            interval = target.iv_interval if price else target.interval
+            if self._targets.get(target.ticker) is target:
+                self._push(target, "iv", time.monotonic() + self._delay(interval, target.iv_failures))
+            self._cond.notify_all()
+            data = dict(target.data)
+        
+        if iv is not None:
+            self._notify(data)
+    
+    def _on_stream_update(self, update):
+        """Conflated stream push: refresh the price without polling"""
+        with self._cond:
+            target = self._targets.get(update.ticker)
+            if target is None or not update.price:
+                return
+            target.last_push = time.monotonic()
+            target.failures = 0
+            target.data.update(price=update.price, last_update=datetime.now().isoformat(), source="stream")
+            self.stats["stream_updates"] += 1
+            data = dict(target.data)
+        self._notify(data)
+    
+    def _notify(self, data: Dict):
+        for callback in list(self._callbacks):
+            try:
+                callback(data)
+            except Exception as e:
+                self.stats["callback_errors"] += 1
+                print(f"Polling callback error: {e}")
+    
+    # -------------------------------------------------------------------------
+    # Output
+    # -------------------------------------------------------------------------
     
     def add_callback(self, callback):
         """Add a callback for data updates"""
         self._callbacks.append(callback)
     
-    def get_cached_data(self) -> Dict:
-        """Get the latest cached data"""
-        return self._cached_data.copy()
+    def remove_callback(self, callback):
+        """Remove a data-update callback"""
+        if callback in self._callbacks:
+            self._callbacks.remove(callback)
+    
+    def get_cached_data(self, ticker: Optional[str] = None) -> Dict:
+        """Get the latest cached data (default: the first ticker started)"""
+        with self._cond:
+            target = self._targets.get((ticker or self._primary or "").upper())
+            return dict(target.data) if target else {}
+    
+    def get_stats(self) -> Dict:
+        """Request and update counters"""
+        with self._cond:
+            now = time.monotonic()
+            streaming = sum(1 for t in self._targets.values() if now - t.last_push < self.stale_after)
+            return {**self.stats, "watched": len(self._targets), "stream_live": streaming,
+                    "backing_off": sum(1 for t in self._targets.values() if t.failures)}
 
 
 # Singleton polling engine
@@ -439,7 +867,7 @@ def submit_order_to_alpaca(symbol: str, qty: int, side: str,
         if type == "limit" and limit_price:
             payload["limit_price"] = limit_price
             
-        response = requests.post(url, headers=data_manager.headers, json=payload)
+        response = data_manager.session.post(url, json=payload, timeout=HTTP_TIMEOUT)
         
         if response.status_code == 200:
             return response.json()
@@ -5,119 +5,308 @@ SQLite storage for OHLCV candles and trading data
 
 import sqlite3
 import os
+import threading
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+from itertools import islice
+from typing import List, Dict, Optional, Tuple, Iterable
 from contextlib import contextmanager
+from dataclasses import dataclass
 import json
 
+import numpy as np
+import pandas as pd
+
 # Database file path
 DB_PATH = os.path.join(os.path.dirname(__file__), "trading_data.db")
 
+# Per-connection pragmas; none of these change the database file. NORMAL
+# sync is durable across app crashes once init_db() has switched the file
+# to WAL (only an OS crash can lose the last commits)
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",  # 64 MB page cache
+    "PRAGMA mmap_size=268435456",  # 256 MB memory-mapped reads
+    "PRAGMA busy_timeout=5000",
+)
+
+# Rows per executemany/transaction in bulk candle ingestion
+CANDLE_BATCH_SIZE = 50_000
+
+# Upsert that leaves identical rows untouched: unchanged candles cost an
+# index probe but no page write, unlike INSERT OR REPLACE which deletes
+# and re-inserts every row
+CANDLE_UPSERT_SQL = """
+    INSERT INTO candles
+    (ticker, timestamp, timeframe, open, high, low, close, volume)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(ticker, timestamp, timeframe) DO UPDATE SET
+        open = excluded.open,
+        high = excluded.high,
+        low = excluded.low,
+        close = excluded.close,
+        volume = excluded.volume
+    WHERE open IS NOT excluded.open
+       OR high IS NOT excluded.high
+       OR low IS NOT excluded.low
+       OR close IS NOT excluded.close
+       OR volume IS NOT excluded.volume
+"""
+
+# Row layout for columnar candle reads; timestamps are parsed afterwards
+CANDLE_ROW_DTYPE = np.dtype([
+    ("timestamp", "U40"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "i8"),
+])
+
+_thread_local = threading.local()
+
+
+@dataclass
+class CandleArrays:
+    """OHLCV candles as contiguous columns in chronological order"""
+    timestamp: np.ndarray  # datetime64[ns], UTC
+    open: np.ndarray  # float64
+    high: np.ndarray  # float64
+    low: np.ndarray  # float64
+    close: np.ndarray  # float64
+    volume: np.ndarray  # int64
+    
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+
+def _open_connection(path: str) -> sqlite3.Connection:
+    """Open and tune a new SQLite connection"""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
 
 @contextmanager
 def get_connection():
-    """Context manager for database connections"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    """
+    Context manager for database connections
+    
+    Each thread reuses one long-lived connection per database path
+    instead of reconnecting on every call. Work left uncommitted when the
+    block exits is rolled back, as closing a connection used to do.
+    """
+    pool = getattr(_thread_local, "connections", None)
+    if pool is None:
+        pool = _thread_local.connections = {}
+    
+    conn = pool.get(DB_PATH)
+    if conn is None:
+        conn = pool[DB_PATH] = _open_connection(DB_PATH)
+    
     try:
         yield conn
     finally:
+        if conn.in_transaction:
+            conn.rollback()
+
+
+def close_connections():
+    """Close the calling thread's pooled connections"""
+    pool = getattr(_thread_local, "connections", {})
+    for conn in pool.values():
         conn.close()
+    pool.clear()
+
+
+def _create_tables(conn: sqlite3.Connection):
+    """Create missing tables (a no-op on an existing database)"""
+    cursor = conn.cursor()
+    
+    # OHLCV Candles table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS candles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticker TEXT NOT NULL,
+            timestamp DATETIME NOT NULL,
+            timeframe TEXT NOT NULL DEFAULT '1min',
+            open REAL NOT NULL,
+            high REAL NOT NULL,
+            low REAL NOT NULL,
+            close REAL NOT NULL,
+            volume INTEGER NOT NULL,
+            UNIQUE(ticker, timestamp, timeframe)
+        )
+    """)
+    
+    # Paper trading positions table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS paper_positions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticker TEXT NOT NULL,
+            position_type TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            entry_price REAL NOT NULL,
+            strike REAL,
+            expiration TEXT,
+            option_type TEXT,
+            opened_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            closed_at DATETIME,
+            close_price REAL,
+            pnl REAL
+        )
+    """)
+    
+    # Paper trading account balance
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS paper_account (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            balance REAL NOT NULL DEFAULT 100000.0,
+            initial_balance REAL NOT NULL DEFAULT 100000.0,
+            last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Initialize account if not exists
+    cursor.execute("""
+        INSERT OR IGNORE INTO paper_account (id, balance, initial_balance)
+        VALUES (1, 100000.0, 100000.0)
+    """)
+    
+    # Trade history table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS trade_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticker TEXT NOT NULL,
+            action TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            price REAL NOT NULL,
+            total_value REAL NOT NULL,
+            strategy_name TEXT,
+            executed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Cached indicators table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS indicators (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticker TEXT NOT NULL,
+            timestamp DATETIME NOT NULL,
+            indicator_type TEXT NOT NULL,
+            period INTEGER NOT NULL,
+            value REAL NOT NULL,
+            UNIQUE(ticker, timestamp, indicator_type, period)
+        )
+    """)
 
 
 def init_db():
-    """Initialize database with required tables"""
+    """
+    Initialize database with required tables, indexes and WAL journaling
+    
+    Called explicitly by the app entry points: switching the journal mode
+    and replacing the candle index rewrite the database file, so this
+    does not run on import.
+    """
     with get_connection() as conn:
-        cursor = conn.cursor()
+        # WAL lets readers run alongside the writer and makes commits a
+        # sequential log append; the mode persists in the file
+        conn.execute("PRAGMA journal_mode=WAL")
         
-        # OHLCV Candles table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS candles (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ticker TEXT NOT NULL,
-                timestamp DATETIME NOT NULL,
-                timeframe TEXT NOT NULL DEFAULT '1min',
-                open REAL NOT NULL,
-                high REAL NOT NULL,
-                low REAL NOT NULL,
-                close REAL NOT NULL,
-                volume INTEGER NOT NULL,
-                UNIQUE(ticker, timestamp, timeframe)
-            )
-        """)
+        _create_tables(conn)
         
-        # Index for fast lookups
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_candles_ticker_time 
-            ON candles(ticker, timestamp DESC)
-        """)
-        
-        # Paper trading positions table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS paper_positions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ticker TEXT NOT NULL,
-                position_type TEXT NOT NULL,
-                quantity INTEGER NOT NULL,
-                entry_price REAL NOT NULL,
-                strike REAL,
-                expiration TEXT,
-                option_type TEXT,
-                opened_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                closed_at DATETIME,
-                close_price REAL,
-                pnl REAL
-            )
-        """)
-        
-        # Paper trading account balance
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS paper_account (
-                id INTEGER PRIMARY KEY CHECK (id = 1),
-                balance REAL NOT NULL DEFAULT 100000.0,
-                initial_balance REAL NOT NULL DEFAULT 100000.0,
-                last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Initialize account if not exists
-        cursor.execute("""
-            INSERT OR IGNORE INTO paper_account (id, balance, initial_balance)
-            VALUES (1, 100000.0, 100000.0)
-        """)
-        
-        # Trade history table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS trade_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ticker TEXT NOT NULL,
-                action TEXT NOT NULL,
-                quantity INTEGER NOT NULL,
-                price REAL NOT NULL,
-                total_value REAL NOT NULL,
-                strategy_name TEXT,
-                executed_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Cached indicators table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS indicators (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ticker TEXT NOT NULL,
-                timestamp DATETIME NOT NULL,
-                indicator_type TEXT NOT NULL,
-                period INTEGER NOT NULL,
-                value REAL NOT NULL,
-                UNIQUE(ticker, timestamp, indicator_type, period)
-            )
+        # Index for time-range lookups: equality on ticker and timeframe,
+        # then a range scan on timestamp in either direction. Replaces the
+        # old (ticker, timestamp DESC) index, which had to filter every
+        # timeframe's rows for the ticker
+        conn.execute("DROP INDEX IF EXISTS idx_candles_ticker_time")
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_candles_ticker_tf_time
+            ON candles(ticker, timeframe, timestamp)
         """)
         
         conn.commit()
         print(f"Database initialized at {DB_PATH}")
 
 
-def store_candles(ticker: str, candles: List[Dict], timeframe: str = "1min"):
+def _format_timestamp(ts) -> str:
+    """
+    Candle timestamp in the stored form, 2024-01-02T09:30:00Z
+    
+    The UNIQUE(ticker, timestamp, timeframe) key compares strings, so
+    every writer has to spell a bar's time the same way. Strings are
+    passed through; datetimes (naive ones taken as UTC), pandas
+    Timestamps and datetime64 values are formatted.
+    """
+    if isinstance(ts, str):
+        return ts
+    ts = pd.Timestamp(ts)
+    if ts is pd.NaT:
+        raise ValueError("missing timestamp")
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC")
+    return ts.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _candle_row(ticker: str, timeframe: str, candle: Dict) -> tuple:
+    return (
+        ticker,
+        candle["timestamp"],
+        timeframe,
+        candle["open"],
+        candle["high"],
+        candle["low"],
+        candle["close"],
+        candle.get("volume", 0)
+    )
+
+
+def _valid_rows(rows: Iterable[tuple]):
+    """Yield rows with normalized types, skipping (and reporting) bad ones"""
+    for row in rows:
+        try:
+            ticker, timestamp, timeframe, open_, high, low, close, volume = row
+            yield (
+                str(ticker), _format_timestamp(timestamp), str(timeframe),
+                float(open_), float(high), float(low), float(close), int(volume or 0)
+            )
+        except (ValueError, TypeError) as e:
+            print(f"Error storing candle {row!r}: {e}")
+
+
+def ingest_candle_rows(rows: Iterable[tuple], batch_size: int = CANDLE_BATCH_SIZE) -> int:
+    """
+    Bulk-upsert candle rows
+    
+    Rows are (ticker, timestamp, timeframe, open, high, low, close, volume)
+    tuples and may span many tickers and timeframes. Each row is checked
+    and normalized first (a bad row is skipped, not the whole batch), then
+    they are written with executemany in batches of batch_size, one
+    transaction per batch, so memory stays bounded for arbitrarily long
+    iterables.
+    
+    Returns:
+        Number of rows inserted or changed (identical rows are skipped)
+    """
+    written = 0
+    rows = _valid_rows(rows)
+    
+    with get_connection() as conn:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            
+            with conn:  # One transaction per batch
+                written += conn.executemany(CANDLE_UPSERT_SQL, batch).rowcount
+    
+    return written
+
+
+def store_candles(ticker: str, candles: List[Dict], timeframe: str = "1min") -> int:
     """
     Store OHLCV candle data
     
@@ -125,30 +314,47 @@ def store_candles(ticker: str, candles: List[Dict], timeframe: str = "1min"):
         ticker: Stock symbol
         candles: List of dicts with keys: timestamp, open, high, low, close, volume
         timeframe: Candle timeframe (1min, 5min, 1hour, 1day)
-    """
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        
-        for candle in candles:
-            try:
-                cursor.execute("""
-                    INSERT OR REPLACE INTO candles 
-                    (ticker, timestamp, timeframe, open, high, low, close, volume)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    ticker.upper(),
-                    candle["timestamp"],
-                    timeframe,
-                    candle["open"],
-                    candle["high"],
-                    candle["low"],
-                    candle["close"],
-                    candle.get("volume", 0)
-                ))
-            except Exception as e:
-                print(f"Error storing candle: {e}")
         
-        conn.commit()
+    Returns:
+        Number of candles inserted or changed
+    """
+    ticker = ticker.upper()
+    rows = []
+    
+    for candle in candles:
+        try:
+            rows.append(_candle_row(ticker, timeframe, candle))
+        except KeyError as e:
+            print(f"Error storing candle: missing {e}")
+    
+    return ingest_candle_rows(rows)
+
+
+def store_candle_arrays(ticker: str, timestamps, opens, highs, lows, closes,
+                        volumes, timeframe: str = "1min") -> int:
+    """
+    Store candles given as parallel columns (lists or NumPy arrays)
+    
+    Avoids building one dict per candle when backfilling from columnar
+    sources. datetime64 columns are formatted to the stored timestamp
+    form in one vectorized pass.
+    
+    Returns:
+        Number of candles inserted or changed
+    """
+    ticker = ticker.upper()
+    if isinstance(timestamps, (np.ndarray, pd.Index, pd.Series)) and np.issubdtype(
+            np.asarray(timestamps).dtype, np.datetime64):
+        timestamps = np.char.add(
+            np.datetime_as_string(np.asarray(timestamps, dtype="datetime64[s]"), unit="s"), "Z"
+        )
+    rows = zip(
+        (ticker for _ in range(len(timestamps))),
+        timestamps,
+        (timeframe for _ in range(len(timestamps))),
+        opens, highs, lows, closes, volumes
+    )
+    return ingest_candle_rows(rows)
 
 
 def get_candles(ticker: str, start: datetime = None, end: datetime = None,
@@ -204,6 +410,69 @@ def get_candles(ticker: str, start: datetime = None, end: datetime = None,
         return candles
 
 
+def get_candle_arrays(ticker: str, start: datetime = None, end: datetime = None,
+                      timeframe: str = "1min", limit: Optional[int] = 500) -> CandleArrays:
+    """
+    Retrieve candle data for a ticker as NumPy columns
+    
+    Rows stream from the cursor straight into a structured array (no
+    per-row dict), and the time range is filtered in SQL on the
+    (ticker, timeframe, timestamp) index. With limit=None the whole range
+    is read in ascending index order; with a limit, the most recent
+    `limit` candles are returned.
+    
+    Args:
+        ticker: Stock symbol
+        start: Start datetime (optional)
+        end: End datetime (optional)
+        timeframe: Candle timeframe
+        limit: Maximum number of candles to return (None for no limit)
+        
+    Returns:
+        CandleArrays in chronological order
+    """
+    query = """
+        SELECT timestamp, open, high, low, close, volume
+        FROM candles
+        WHERE ticker = ? AND timeframe = ?
+    """
+    params = [ticker.upper(), timeframe]
+    
+    if start:
+        query += " AND timestamp >= ?"
+        params.append(start.isoformat())
+    
+    if end:
+        query += " AND timestamp <= ?"
+        params.append(end.isoformat())
+    
+    if limit is None:
+        query += " ORDER BY timestamp ASC"
+    else:
+        query += " ORDER BY timestamp DESC LIMIT ?"
+        params.append(limit)
+    
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = None  # Plain tuples
+        cursor.execute(query, params)
+        rows = np.fromiter(cursor, dtype=CANDLE_ROW_DTYPE)
+    
+    if limit is not None:
+        rows = rows[::-1]
+    
+    timestamps = pd.to_datetime(rows["timestamp"], utc=True, format="ISO8601")
+    
+    return CandleArrays(
+        timestamp=timestamps.to_numpy(dtype="datetime64[ns]"),
+        open=np.ascontiguousarray(rows["open"]),
+        high=np.ascontiguousarray(rows["high"]),
+        low=np.ascontiguousarray(rows["low"]),
+        close=np.ascontiguousarray(rows["close"]),
+        volume=np.ascontiguousarray(rows["volume"])
+    )
+
+
 def get_latest_candle(ticker: str, timeframe: str = "1min") -> Optional[Dict]:
     """Get the most recent candle for a ticker"""
     candles = get_candles(ticker, timeframe=timeframe, limit=1)
@@ -266,5 +535,8 @@ def cleanup_old_candles(days_to_keep: int = 30):
         return deleted
 
 
-# Initialize database on module import
-init_db()
+# Create missing tables on module import; init_db() (journal mode and
+# indexes) is left to the entry points
+with get_connection() as _conn:
+    _create_tables(_conn)
+    _conn.commit()
@@ -0,0 +1,623 @@
+"""
+Indicators Module for Options Supergraph Dashboard
+O(n) rolling-window technical indicators on NumPy arrays, plus O(1)
+streaming indicator state for live feeds
+
+Every batch function takes an array-like of prices and returns float64
+arrays of the same length, NaN-padded exactly like the original
+list-based implementations in logic.py.
+"""
+
+import math
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+import numpy as np
+from scipy.signal import lfilter
+from typing import Callable, Dict, Optional, Tuple
+
+
+def _as_array(prices) -> np.ndarray:
+    """Coerce input prices to a 1-D float64 array"""
+    return np.asarray(prices, dtype=float).ravel()
+
+
+def _nan_array(n: int) -> np.ndarray:
+    return np.full(n, np.nan)
+
+
+# =============================================================================
+# Rolling Windows
+# =============================================================================
+
+def rolling_sum(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Sum over each trailing window of `period` values via one cumulative sum
+
+    Returns:
+        Array of length len(values) - period + 1 (one value per full window)
+    """
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    return cumulative[period:] - cumulative[:-period]
+
+
+def rolling_mean_var(prices, period: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rolling mean and population variance (ddof=0) in O(n)
+
+    Values are shifted by their overall mean before the cumulative sums
+    so that sum(x^2) - sum(x)^2 / n does not cancel catastrophically for
+    price-level data.
+
+    Returns:
+        Tuple of (mean, variance), NaN for the first period-1 values
+    """
+    x = _as_array(prices)
+    n = len(x)
+    mean = _nan_array(n)
+    var = _nan_array(n)
+    if n < period:
+        return mean, var
+
+    shift = x.mean()
+    centered = x - shift
+    window_sum = rolling_sum(centered, period)
+    window_sq_sum = rolling_sum(centered * centered, period)
+
+    window_mean = window_sum / period
+    mean[period - 1:] = window_mean + shift
+    var[period - 1:] = np.maximum(window_sq_sum / period - window_mean * window_mean, 0.0)
+    return mean, var
+
+
+# =============================================================================
+# Moving Averages
+# =============================================================================
+
+def sma(prices, period: int) -> np.ndarray:
+    """
+    Simple Moving Average
+
+    Returns:
+        SMA values (NaN for first period-1 values)
+    """
+    x = _as_array(prices)
+    out = _nan_array(len(x))
+    if len(x) < period:
+        return out
+
+    out[period - 1:] = rolling_sum(x, period) / period
+    return out
+
+
+def recursive_smooth(values: np.ndarray, alpha: float, seed: float) -> np.ndarray:
+    """
+    Exponential recursion y[i] = y[i-1] + alpha * (x[i] - y[i-1]) from y[-1] = seed
+
+    Runs as a first-order IIR filter in compiled code instead of a Python
+    loop. EMA uses alpha = 2 / (period + 1), Wilder smoothing 1 / period.
+    """
+    if len(values) == 0:
+        return np.empty(0)
+
+    decay = 1.0 - alpha
+    smoothed, _ = lfilter([alpha], [1.0, -decay], values, zi=[decay * seed])
+    return smoothed
+
+
+def ema(prices, period: int) -> np.ndarray:
+    """
+    Exponential Moving Average, seeded with the SMA of the first period values
+
+    Returns:
+        EMA values (NaN for first period-1 values)
+    """
+    x = _as_array(prices)
+    out = _nan_array(len(x))
+    if len(x) < period:
+        return out
+
+    seed = x[:period].mean()
+    out[period - 1] = seed
+    out[period:] = recursive_smooth(x[period:], 2 / (period + 1), seed)
+    return out
+
+
+# =============================================================================
+# Oscillators and Bands
+# =============================================================================
+
+def rsi(prices, period: int = 14) -> np.ndarray:
+    """
+    Relative Strength Index with Wilder smoothing (0-100)
+
+    Matches the original padding: the first period + 1 values are NaN and
+    the first emitted value already includes one smoothing step.
+    """
+    x = _as_array(prices)
+    out = _nan_array(len(x))
+    if len(x) < period + 1:
+        return out
+
+    deltas = np.diff(x)
+    gains = np.where(deltas > 0, deltas, 0.0)
+    losses = np.where(deltas < 0, -deltas, 0.0)
+
+    avg_gain = recursive_smooth(gains[period:], 1 / period, gains[:period].mean())
+    avg_loss = recursive_smooth(losses[period:], 1 / period, losses[:period].mean())
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = 100 - 100 / (1 + avg_gain / avg_loss)
+    out[period + 1:] = np.where(avg_loss == 0, 100.0, values)
+    return out
+
+
+def bollinger_bands(prices, period: int = 20,
+                    std_dev: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Bollinger Bands using population standard deviation
+
+    Returns:
+        Tuple of (upper_band, middle_band, lower_band)
+    """
+    x = _as_array(prices)
+    middle = sma(x, period)
+    _, var = rolling_mean_var(x, period)
+
+    width = std_dev * np.sqrt(var)
+    return middle + width, middle, middle - width
+
+
+def macd(prices, fast: int = 12, slow: int = 26,
+         signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    MACD (Moving Average Convergence Divergence)
+
+    Returns:
+        Tuple of (macd_line, signal_line, histogram)
+    """
+    x = _as_array(prices)
+    macd_line = ema(x, fast) - ema(x, slow)
+
+    # Signal line is an EMA over the valid (non-NaN) part of the MACD line
+    signal_line = _nan_array(len(x))
+    valid = ~np.isnan(macd_line)
+    first_valid = int(np.argmax(valid)) if valid.any() else len(x)
+    signal_line[first_valid:] = ema(macd_line[first_valid:], signal)
+
+    return macd_line, signal_line, macd_line - signal_line
+
+
+# =============================================================================
+# Streaming Indicators
+# =============================================================================
+#
+# Stateful counterparts of the batch functions above for live feeds. Each
+# update is O(1), `value` is None until enough data has arrived, and
+# snapshot()/restore() round-trip the full state through a plain dict so
+# indicators can be persisted and resumed without replaying history.
+
+class StreamingIndicator(ABC):
+    """Base class for O(1)-per-update indicator state objects"""
+
+    @abstractmethod
+    def update(self, price: float):
+        """Fold in one new price and return the current value"""
+
+    def update_many(self, prices):
+        """Fold in a sequence of prices and return the final value"""
+        value = self.value
+        for price in prices:
+            value = self.update(float(price))
+        return value
+
+    @property
+    @abstractmethod
+    def value(self):
+        """Current value, or None until enough data has arrived"""
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def snapshot(self) -> Dict:
+        """Plain-dict copy of the full state (JSON serializable)"""
+        state = {key: getattr(self, key) for key in self._state_fields}
+        state["type"] = type(self).__name__
+        return state
+
+    @classmethod
+    def restore(cls, snapshot: Dict) -> "StreamingIndicator":
+        """Rebuild an indicator from snapshot() output"""
+        obj = cls.__new__(cls)
+        for key in cls._state_fields:
+            setattr(obj, key, snapshot[key])
+        return obj
+
+
+class StreamingEMA(StreamingIndicator):
+    """EMA seeded with the SMA of the first `period` values, like ema()"""
+
+    _state_fields = ("period", "alpha", "count", "seed_sum", "_value")
+
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.count = 0
+        self.seed_sum = 0.0
+        self._value = None
+
+    def update(self, price: float) -> Optional[float]:
+        self.count += 1
+        if self._value is None:
+            self.seed_sum += price
+            if self.count == self.period:
+                self._value = self.seed_sum / self.period
+        else:
+            self._value += self.alpha * (price - self._value)
+        return self._value
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._value
+
+
+class StreamingRSI(StreamingIndicator):
+    """
+    Wilder RSI
+
+    The first value is emitted once `period` changes have been seen
+    (simple averages); later values use Wilder smoothing. Wherever rsi()
+    has a non-NaN value the two agree.
+    """
+
+    _state_fields = ("period", "count", "prev_price", "avg_gain", "avg_loss", "_value")
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.count = 0  # Number of price changes seen
+        self.prev_price = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self._value = None
+
+    def update(self, price: float) -> Optional[float]:
+        if self.prev_price is None:
+            self.prev_price = price
+            return self._value
+
+        change = price - self.prev_price
+        self.prev_price = price
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        self.count += 1
+
+        if self.count <= self.period:
+            # Warm-up: accumulate simple averages
+            self.avg_gain += gain / self.period
+            self.avg_loss += loss / self.period
+            if self.count < self.period:
+                return self._value
+        else:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+
+        if self.avg_loss == 0:
+            self._value = 100.0
+        else:
+            self._value = 100 - 100 / (1 + self.avg_gain / self.avg_loss)
+        return self._value
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._value
+
+
+class StreamingATR(StreamingIndicator):
+    """
+    Wilder Average True Range over OHLC bars
+
+    True range needs the previous close, so the first bar only seeds it.
+    update(price) treats a tick as a bar with high == low == close.
+    """
+
+    _state_fields = ("period", "count", "prev_close", "seed_sum", "_value")
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.count = 0  # Number of true ranges seen
+        self.prev_close = None
+        self.seed_sum = 0.0
+        self._value = None
+
+    def update_bar(self, high: float, low: float, close: float) -> Optional[float]:
+        if self.prev_close is None:
+            self.prev_close = close
+            return self._value
+
+        true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        self.count += 1
+
+        if self.count <= self.period:
+            self.seed_sum += true_range
+            if self.count == self.period:
+                self._value = self.seed_sum / self.period
+        else:
+            self._value = (self._value * (self.period - 1) + true_range) / self.period
+        return self._value
+
+    def update(self, price: float) -> Optional[float]:
+        return self.update_bar(price, price, price)
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._value
+
+
+class StreamingADX(StreamingIndicator):
+    """
+    Wilder Average Directional Index over OHLC bars
+
+    TR, +DM and -DM use Wilder running sums seeded over the first
+    `period` bars. ADX is available from the first DX value: it is the
+    running mean of the DX values seen so far until `period` of them
+    exist, then Wilder-smoothed. This keeps short histories (e.g. 20
+    daily bars) usable instead of waiting for 2 * period bars.
+    """
+
+    _state_fields = (
+        "period", "count", "prev_high", "prev_low", "prev_close",
+        "tr_sum", "plus_dm_sum", "minus_dm_sum",
+        "dx_count", "plus_di", "minus_di", "dx", "_value"
+    )
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.count = 0  # Number of bar-to-bar moves seen
+        self.prev_high = None
+        self.prev_low = None
+        self.prev_close = None
+        self.tr_sum = 0.0
+        self.plus_dm_sum = 0.0
+        self.minus_dm_sum = 0.0
+        self.dx_count = 0
+        self.plus_di = None
+        self.minus_di = None
+        self.dx = None
+        self._value = None
+
+    def update_bar(self, high: float, low: float, close: float) -> Optional[float]:
+        if self.prev_close is None:
+            self.prev_high, self.prev_low, self.prev_close = high, low, close
+            return self._value
+
+        true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        up_move = high - self.prev_high
+        down_move = self.prev_low - low
+        plus_dm = up_move if up_move > down_move and up_move > 0 else 0.0
+        minus_dm = down_move if down_move > up_move and down_move > 0 else 0.0
+        self.prev_high, self.prev_low, self.prev_close = high, low, close
+        self.count += 1
+
+        if self.count <= self.period:
+            self.tr_sum += true_range
+            self.plus_dm_sum += plus_dm
+            self.minus_dm_sum += minus_dm
+            if self.count < self.period:
+                return self._value
+        else:
+            decay = 1 - 1 / self.period
+            self.tr_sum = self.tr_sum * decay + true_range
+            self.plus_dm_sum = self.plus_dm_sum * decay + plus_dm
+            self.minus_dm_sum = self.minus_dm_sum * decay + minus_dm
+
+        if self.tr_sum > 0:
+            self.plus_di = 100 * self.plus_dm_sum / self.tr_sum
+            self.minus_di = 100 * self.minus_dm_sum / self.tr_sum
+        else:
+            self.plus_di = self.minus_di = 0.0
+        di_sum = self.plus_di + self.minus_di
+        self.dx = 100 * abs(self.plus_di - self.minus_di) / di_sum if di_sum > 0 else 0.0
+
+        self.dx_count += 1
+        if self.dx_count <= self.period:
+            previous = self._value or 0.0
+            self._value = previous + (self.dx - previous) / self.dx_count
+        else:
+            self._value = (self._value * (self.period - 1) + self.dx) / self.period
+        return self._value
+
+    def update(self, price: float) -> Optional[float]:
+        return self.update_bar(price, price, price)
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._value
+
+
+class StreamingBollinger(StreamingIndicator):
+    """
+    Bollinger Bands over a sliding window
+
+    The window mean and sum of squared deviations are maintained with
+    Welford's add/remove updates, so each new price is O(1) and the
+    variance does not suffer from sum-of-squares cancellation.
+    """
+
+    _state_fields = ("period", "std_dev", "window", "mean", "m2")
+
+    def __init__(self, period: int = 20, std_dev: float = 2.0):
+        self.period = period
+        self.std_dev = std_dev
+        self.window = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, price: float) -> Optional[Tuple[float, float, float]]:
+        window = self.window
+        window.append(price)
+
+        if len(window) > self.period:
+            # Slide: replace the oldest value with the new one
+            old = window.popleft()
+            new_mean = self.mean + (price - old) / self.period
+            self.m2 += (price - old) * (price - new_mean + old - self.mean)
+            self.mean = new_mean
+        else:
+            delta = price - self.mean
+            self.mean += delta / len(window)
+            self.m2 += delta * (price - self.mean)
+
+        return self.value
+
+    @property
+    def value(self) -> Optional[Tuple[float, float, float]]:
+        """(upper, middle, lower) once the window is full"""
+        if len(self.window) < self.period:
+            return None
+        width = self.std_dev * math.sqrt(max(self.m2, 0.0) / self.period)
+        return self.mean + width, self.mean, self.mean - width
+
+    def snapshot(self) -> Dict:
+        state = super().snapshot()
+        state["window"] = list(self.window)
+        return state
+
+    @classmethod
+    def restore(cls, snapshot: Dict) -> "StreamingBollinger":
+        obj = super().restore(snapshot)
+        obj.window = deque(snapshot["window"])
+        return obj
+
+
+class StreamingMACD(StreamingIndicator):
+    """MACD line, signal and histogram matching macd()"""
+
+    _state_fields = ()
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = StreamingEMA(fast)
+        self.slow = StreamingEMA(slow)
+        self.signal = StreamingEMA(signal)
+        self.line = None
+
+    def update(self, price: float) -> Optional[Tuple[float, float, float]]:
+        fast = self.fast.update(price)
+        slow = self.slow.update(price)
+        if fast is not None and slow is not None:
+            self.line = fast - slow
+            self.signal.update(self.line)
+        return self.value
+
+    @property
+    def value(self) -> Optional[Tuple[float, float, float]]:
+        """(macd_line, signal_line, histogram) once the signal line exists"""
+        signal = self.signal.value
+        if signal is None:
+            return None
+        return self.line, signal, self.line - signal
+
+    def snapshot(self) -> Dict:
+        return {
+            "type": type(self).__name__,
+            "fast": self.fast.snapshot(),
+            "slow": self.slow.snapshot(),
+            "signal": self.signal.snapshot(),
+            "line": self.line,
+        }
+
+    @classmethod
+    def restore(cls, snapshot: Dict) -> "StreamingMACD":
+        obj = cls.__new__(cls)
+        obj.fast = StreamingEMA.restore(snapshot["fast"])
+        obj.slow = StreamingEMA.restore(snapshot["slow"])
+        obj.signal = StreamingEMA.restore(snapshot["signal"])
+        obj.line = snapshot["line"]
+        return obj
+
+
+STREAMING_INDICATORS = {
+    cls.__name__: cls
+    for cls in (StreamingEMA, StreamingRSI, StreamingATR, StreamingADX,
+                StreamingBollinger, StreamingMACD)
+}
+
+
+def restore_indicator(snapshot: Dict) -> StreamingIndicator:
+    """Rebuild any streaming indicator from its snapshot() output"""
+    return STREAMING_INDICATORS[snapshot["type"]].restore(snapshot)
+
+
+def default_indicator_set() -> Dict[str, StreamingIndicator]:
+    """Indicators kept hot per symbol by IndicatorBank unless told otherwise"""
+    return {
+        "ema_20": StreamingEMA(20),
+        "rsi_14": StreamingRSI(14),
+        "atr_14": StreamingATR(14),
+        "adx_14": StreamingADX(14),
+        "bb_20": StreamingBollinger(20, 2.0),
+        "macd": StreamingMACD(12, 26, 9),
+    }
+
+
+class IndicatorBank:
+    """
+    Per-symbol streaming indicators fed from completed live bars
+
+    on_bar() has the BarBuilder subscriber signature, so
+    `bar_builder.add_subscriber(bank.on_bar)` keeps every tracked symbol's
+    indicators current without recomputing history. Only bars of
+    `timeframe` are folded in: RSI, ATR and ADX are defined per bar, and
+    feeding raw ticks would give per-tick values that don't compare with
+    the bar-based ones computed elsewhere.
+    """
+
+    def __init__(self, factory: Callable[[], Dict[str, StreamingIndicator]] = default_indicator_set,
+                 timeframe: str = "1min"):
+        self.factory = factory
+        self.timeframe = timeframe
+        self._lock = threading.Lock()
+        self._indicators: Dict[str, Dict[str, StreamingIndicator]] = {}
+
+    def _for(self, ticker: str) -> Dict[str, StreamingIndicator]:
+        indicators = self._indicators.get(ticker)
+        if indicators is None:
+            indicators = self._indicators[ticker] = self.factory()
+        return indicators
+
+    def update_bar(self, ticker: str, high: float, low: float, close: float):
+        """Fold a completed OHLC bar into every indicator for the ticker"""
+        with self._lock:
+            for indicator in self._for(ticker.upper()).values():
+                if hasattr(indicator, "update_bar"):
+                    indicator.update_bar(high, low, close)
+                else:
+                    indicator.update(close)
+
+    def on_bar(self, bar):
+        """BarBuilder subscriber: fold in a completed LiveBar of our timeframe"""
+        if bar.timeframe == self.timeframe:
+            self.update_bar(bar.ticker, bar.high, bar.low, bar.close)
+
+    def values(self, ticker: str) -> Dict:
+        """Current value of every indicator for the ticker"""
+        with self._lock:
+            indicators = self._indicators.get(ticker.upper(), {})
+            return {name: indicator.value for name, indicator in indicators.items()}
+
+    def snapshot(self) -> Dict:
+        """State of every tracked symbol's indicators"""
+        with self._lock:
+            return {
+                ticker: {name: ind.snapshot() for name, ind in indicators.items()}
+                for ticker, indicators in self._indicators.items()
+            }
+
+    def restore(self, snapshot: Dict):
+        """Replace tracked state with snapshot() output"""
+        with self._lock:
+            self._indicators = {
+                ticker: {name: restore_indicator(state) for name, state in indicators.items()}
+                for ticker, indicators in snapshot.items()
+            }
@@ -5,11 +5,13 @@ Contains Black-Scholes pricing, Greeks calculations, and P/L computations
 
 import numpy as np
 from scipy.stats import norm
+from scipy.special import ndtr
 from scipy.optimize import brentq
 from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
 
 from config import DEFAULT_RISK_FREE_RATE, NUM_PRICE_POINTS, PRICE_RANGE_PERCENT
+import indicators
 
 
 @dataclass
@@ -159,6 +161,51 @@ class BlackScholes:
         else:
             return -K * T * np.exp(-r * T) * norm.cdf(-d2) / 100
 
+    @staticmethod
+    def price_array(S: np.ndarray, K: np.ndarray, T: np.ndarray, r: float,
+                    sigma: np.ndarray, is_call: np.ndarray) -> np.ndarray:
+        """
+        Vectorized Black-Scholes price for arrays of inputs
+        
+        All array arguments are broadcast against each other, so a
+        (n_legs, 1) column of strikes against a (n_points,) grid of spots
+        prices every leg at every grid point in a single call.
+        
+        Args:
+            S: Stock prices
+            K: Strike prices
+            T: Times to expiration in years
+            r: Risk-free interest rate
+            sigma: Implied volatilities
+            is_call: Boolean mask, True for calls and False for puts
+            
+        Returns:
+            Array of theoretical option prices (intrinsic where T <= 0)
+        """
+        S, K, T, sigma, is_call = np.broadcast_arrays(
+            np.asarray(S, dtype=float), np.asarray(K, dtype=float),
+            np.asarray(T, dtype=float), np.asarray(sigma, dtype=float),
+            np.asarray(is_call, dtype=bool)
+        )
+        
+        expired = T <= 0
+        safe_T = np.where(expired, 1.0, T)
+        safe_sigma = np.where(sigma > 0, sigma, 1e-12)
+        
+        sqrt_T = np.sqrt(safe_T)
+        d1 = (np.log(S / K) + (r + 0.5 * safe_sigma ** 2) * safe_T) / (safe_sigma * sqrt_T)
+        d2 = d1 - safe_sigma * sqrt_T
+        discounted_K = K * np.exp(-r * safe_T)
+        
+        # ndtr is the same standard normal CDF as norm.cdf without the
+        # per-call distribution-object overhead
+        call = S * ndtr(d1) - discounted_K * ndtr(d2)
+        put = discounted_K * ndtr(-d2) - S * ndtr(-d1)
+        price = np.where(is_call, call, put)
+        
+        intrinsic = np.where(is_call, np.maximum(0.0, S - K), np.maximum(0.0, K - S))
+        return np.where(expired, intrinsic, price)
+
 
 def calculate_option_price(S: float, K: float, T_days: float, r: float, 
                           sigma: float, option_type: str) -> float:
@@ -256,26 +303,32 @@ def calculate_theoretical_payoff(legs: List[OptionLeg], price_range: np.ndarray,
     Returns:
         Array of theoretical P/L values
     """
+    price_range = np.asarray(price_range, dtype=float)
     payoff = np.zeros_like(price_range)
     
-    for leg in legs:
-        if leg.option_type == "stock":
-            # Stock position value
-            leg_payoff = (price_range - leg.strike) * leg.quantity * leg.sign
-        else:
-            # Option theoretical value
-            adjusted_iv = max(0.01, leg.iv + iv_adjustment)  # Minimum 1% IV
-            
-            theoretical_values = np.array([
-                calculate_option_price(S, leg.strike, days_remaining, r, 
-                                       adjusted_iv, leg.option_type)
-                for S in price_range
-            ])
-            
-            # P/L = (current value - entry premium) * quantity * direction
-            leg_payoff = (theoretical_values - leg.premium) * 100 * leg.quantity * leg.sign
+    stock_legs = [leg for leg in legs if leg.option_type == "stock"]
+    option_legs = [leg for leg in legs if leg.option_type != "stock"]
+    
+    for leg in stock_legs:
+        # Stock position value
+        payoff += (price_range - leg.strike) * leg.quantity * leg.sign
+    
+    if option_legs:
+        # Price every option leg at every grid point in one broadcast call:
+        # leg parameters are (n_legs, 1) columns against the (n_points,) grid
+        strikes = np.array([leg.strike for leg in option_legs])[:, None]
+        premiums = np.array([leg.premium for leg in option_legs])[:, None]
+        multipliers = np.array([100 * leg.quantity * leg.sign for leg in option_legs])[:, None]
+        is_call = np.array([leg.option_type == "call" for leg in option_legs])[:, None]
+        # Minimum 1% IV
+        ivs = np.maximum(0.01, np.array([leg.iv for leg in option_legs]) + iv_adjustment)[:, None]
         
-        payoff += leg_payoff
+        theoretical_values = BlackScholes.price_array(
+            price_range, strikes, days_remaining / 365.0, r, ivs, is_call
+        )
+        
+        # P/L = (current value - entry premium) * quantity * direction
+        payoff += ((theoretical_values - premiums) * multipliers).sum(axis=0)
     
     return payoff
 
@@ -522,136 +575,71 @@ def build_strategy_legs(strategy_template: List[Dict], current_price: float,
 # Technical Indicators
 # =============================================================================
 
-def calculate_sma(prices: List[float], period: int) -> List[float]:
+def calculate_sma(prices: List[float], period: int) -> np.ndarray:
     """
     Calculate Simple Moving Average
     
     Args:
-        prices: List of closing prices
+        prices: Closing prices (list or array)
         period: Number of periods for SMA
         
     Returns:
-        List of SMA values (NaN for first period-1 values)
+        Array of SMA values (NaN for first period-1 values)
     """
-    if len(prices) < period:
-        return [np.nan] * len(prices)
-    
-    sma = []
-    for i in range(len(prices)):
-        if i < period - 1:
-            sma.append(np.nan)
-        else:
-            sma.append(np.mean(prices[i - period + 1:i + 1]))
-    
-    return sma
+    return indicators.sma(prices, period)
 
 
-def calculate_ema(prices: List[float], period: int) -> List[float]:
+def calculate_ema(prices: List[float], period: int) -> np.ndarray:
     """
     Calculate Exponential Moving Average
     
     Args:
-        prices: List of closing prices
+        prices: Closing prices (list or array)
         period: Number of periods for EMA
         
     Returns:
-        List of EMA values
+        Array of EMA values
     """
-    if len(prices) < period:
-        return [np.nan] * len(prices)
-    
-    multiplier = 2 / (period + 1)
-    ema = [np.nan] * (period - 1)
-    
-    # First EMA is SMA
-    ema.append(np.mean(prices[:period]))
-    
-    # Calculate subsequent EMAs
-    for i in range(period, len(prices)):
-        ema.append((prices[i] - ema[-1]) * multiplier + ema[-1])
-    
-    return ema
+    return indicators.ema(prices, period)
 
 
-def calculate_rsi(prices: List[float], period: int = 14) -> List[float]:
+def calculate_rsi(prices: List[float], period: int = 14) -> np.ndarray:
     """
     Calculate Relative Strength Index
     
     Args:
-        prices: List of closing prices
+        prices: Closing prices (list or array)
         period: RSI period (typically 14)
         
     Returns:
-        List of RSI values (0-100)
+        Array of RSI values (0-100)
     """
-    if len(prices) < period + 1:
-        return [np.nan] * len(prices)
-    
-    # Calculate price changes
-    deltas = [prices[i] - prices[i - 1] for i in range(1, len(prices))]
-    
-    gains = [d if d > 0 else 0 for d in deltas]
-    losses = [-d if d < 0 else 0 for d in deltas]
-    
-    rsi = [np.nan] * period
-    
-    # First average
-    avg_gain = np.mean(gains[:period])
-    avg_loss = np.mean(losses[:period])
-    
-    for i in range(period, len(deltas)):
-        avg_gain = (avg_gain * (period - 1) + gains[i]) / period
-        avg_loss = (avg_loss * (period - 1) + losses[i]) / period
-        
-        if avg_loss == 0:
-            rsi.append(100)
-        else:
-            rs = avg_gain / avg_loss
-            rsi.append(100 - (100 / (1 + rs)))
-    
-    # Pad to match original length
-    rsi = [np.nan] + rsi
-    
-    return rsi
+    return indicators.rsi(prices, period)
 
 
 def calculate_bollinger_bands(prices: List[float], period: int = 20, 
-                               std_dev: float = 2.0) -> Tuple[List[float], List[float], List[float]]:
+                               std_dev: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
     Calculate Bollinger Bands
     
     Args:
-        prices: List of closing prices
+        prices: Closing prices (list or array)
         period: SMA period (typically 20)
         std_dev: Number of standard deviations
         
     Returns:
         Tuple of (upper_band, middle_band, lower_band)
     """
-    middle = calculate_sma(prices, period)
-    
-    upper = []
-    lower = []
-    
-    for i in range(len(prices)):
-        if i < period - 1:
-            upper.append(np.nan)
-            lower.append(np.nan)
-        else:
-            std = np.std(prices[i - period + 1:i + 1])
-            upper.append(middle[i] + std_dev * std)
-            lower.append(middle[i] - std_dev * std)
-    
-    return upper, middle, lower
+    return indicators.bollinger_bands(prices, period, std_dev)
 
 
 def calculate_macd(prices: List[float], fast: int = 12, slow: int = 26, 
-                   signal: int = 9) -> Tuple[List[float], List[float], List[float]]:
+                   signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
     Calculate MACD (Moving Average Convergence Divergence)
     
     Args:
-        prices: List of closing prices
+        prices: Closing prices (list or array)
         fast: Fast EMA period
         slow: Slow EMA period
         signal: Signal line period
@@ -659,26 +647,7 @@ def calculate_macd(prices: List[float], fast: int = 12, slow: int = 26,
     Returns:
         Tuple of (macd_line, signal_line, histogram)
     """
-    ema_fast = calculate_ema(prices, fast)
-    ema_slow = calculate_ema(prices, slow)
-    
-    # MACD line
-    macd_line = [f - s if not (np.isnan(f) or np.isnan(s)) else np.nan 
-                 for f, s in zip(ema_fast, ema_slow)]
-    
-    # Signal line (EMA of MACD)
-    valid_macd = [m for m in macd_line if not np.isnan(m)]
-    signal_ema = calculate_ema(valid_macd, signal) if len(valid_macd) >= signal else []
-    
-    # Pad signal line
-    nan_count = len(macd_line) - len(signal_ema)
-    signal_line = [np.nan] * nan_count + signal_ema
-    
-    # Histogram
-    histogram = [m - s if not (np.isnan(m) or np.isnan(s)) else np.nan 
-                 for m, s in zip(macd_line, signal_line)]
-    
-    return macd_line, signal_line, histogram
+    return indicators.macd(prices, fast, slow, signal)
 
 
 # =============================================================================
@@ -33,17 +33,14 @@ from data_manager import (
 )
 from logic import (
     OptionLeg, build_strategy_legs, generate_price_range,
-    calculate_expiration_payoff, calculate_theoretical_payoff,
-    calculate_position_greeks, find_breakeven_points,
-    calculate_max_profit_loss, calculate_probability_of_profit,
-    calculate_pnl_at_price, calculate_sma, calculate_ema,
-    calculate_rsi, calculate_bollinger_bands, calculate_iv_surface
+    calculate_pnl_at_price, calculate_iv_surface
 )
 from database import (
     init_db, store_candles, get_candles, get_candle_count
 )
 from paper_trading import paper_account
 from strategy import Strategy, StrategyBuilder
+import compute_cache
 
 # =============================================================================
 # Page Configuration
@@ -56,6 +53,16 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+
+@st.cache_resource
+def _init_database() -> bool:
+    """Journal mode and index migration, once per server process"""
+    init_db()
+    return True
+
+
+_init_database()
+
 # Custom CSS for premium look
 st.markdown("""
 <style>
@@ -384,30 +391,32 @@ price_range = generate_price_range(current_price, price_range_pct)
 # =============================================================================
 # Calculate Payoffs
 # =============================================================================
+# Memoized on leg set, price grid, IV and days (shared across reruns and
+# sessions), so unrelated widget changes and the ghost curve cost nothing
 
 if legs:
     # Expiration payoff
-    expiration_payoff = calculate_expiration_payoff(legs, price_range)
+    expiration_payoff = compute_cache.expiration_payoff(legs, price_range)
     
     # Current theoretical payoff
-    theoretical_payoff = calculate_theoretical_payoff(
+    theoretical_payoff = compute_cache.theoretical_payoff(
         legs, price_range, days_remaining, iv_adjustment
     )
     
     # Ghost curve (if locked)
     ghost_payoff = None
     if st.session_state.lock_curve and st.session_state.locked_iv is not None:
-        ghost_payoff = calculate_theoretical_payoff(
+        ghost_payoff = compute_cache.theoretical_payoff(
             legs, price_range, 
             st.session_state.locked_days, 
             0  # No adjustment for locked curve
         )
     
     # Greeks and metrics
-    position_greeks = calculate_position_greeks(legs, current_price, days_remaining)
-    breakevens = find_breakeven_points(legs, price_range)
-    max_profit, max_loss = calculate_max_profit_loss(legs, price_range)
-    pop = calculate_probability_of_profit(legs, current_price, days_remaining, adjusted_iv)
+    position_greeks = compute_cache.position_greeks(legs, current_price, days_remaining)
+    breakevens = compute_cache.breakeven_points(legs, price_range)
+    max_profit, max_loss = compute_cache.max_profit_loss(legs, price_range)
+    pop = compute_cache.probability_of_profit(legs, current_price, days_remaining, adjusted_iv)
 else:
     expiration_payoff = np.zeros_like(price_range)
     theoretical_payoff = np.zeros_like(price_range)
@@ -463,7 +472,7 @@ with left_col:
     df = pd.DataFrame(candle_data)
     
     # Calculate indicators
-    closes = df["close"].tolist()
+    closes = df["close"].to_numpy()
     
     fig_candles = make_subplots(
         rows=2 if show_rsi else 1, 
@@ -490,7 +499,7 @@ with left_col:
     
     # SMA 20
     if show_sma20:
-        sma20 = calculate_sma(closes, 20)
+        sma20 = compute_cache.sma(closes, 20)
         fig_candles.add_trace(
             go.Scatter(
                 x=df["timestamp"],
@@ -503,7 +512,7 @@ with left_col:
     
     # SMA 50
     if show_sma50:
-        sma50 = calculate_sma(closes, 50)
+        sma50 = compute_cache.sma(closes, 50)
         fig_candles.add_trace(
             go.Scatter(
                 x=df["timestamp"],
@@ -516,7 +525,7 @@ with left_col:
     
     # Bollinger Bands
     if show_bb:
-        upper, middle, lower = calculate_bollinger_bands(closes, 20, 2.0)
+        upper, middle, lower = compute_cache.bollinger_bands(closes, 20, 2.0)
         fig_candles.add_trace(
             go.Scatter(
                 x=df["timestamp"],
@@ -542,7 +551,7 @@ with left_col:
     
     # RSI
     if show_rsi:
-        rsi = calculate_rsi(closes, 14)
+        rsi = compute_cache.rsi(closes, 14)
         fig_candles.add_trace(
             go.Scatter(
                 x=df["timestamp"],
@@ -0,0 +1,341 @@
+"""
+Resampler Module
+Derives higher-timeframe OHLCV bars from 1-minute base bars
+
+Roll-ups are computed with NumPy segment reductions (reduceat) instead of
+fetching and storing every timeframe separately, so 5min/15min/1hour/1day
+bars always agree with the minute bars they come from. ResampleCache keeps
+the rolled-up bars in memory and folds new minute bars into them
+incrementally; on_live_bar feeds it from the live BarBuilder, and
+data_manager.get_historical_bars serves 5Min/15Min/1Hour/1Day from it or
+from the stored minute candles (resample_candles) before asking Alpaca.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from bar_store import BarSeries, BAR_COLUMNS
+
+BASE_TIMEFRAME = "1min"
+
+# Bucket widths in nanoseconds. Intraday buckets are aligned to the UTC
+# epoch (whole hours in New York too); daily buckets follow the session
+# calendar instead, see _bucket_starts
+TIMEFRAME_NS: Dict[str, int] = {
+    "1min": 60 * 10**9,
+    "5min": 5 * 60 * 10**9,
+    "15min": 15 * 60 * 10**9,
+    "1hour": 60 * 60 * 10**9,
+    "1day": 24 * 60 * 60 * 10**9,
+}
+
+DERIVED_TIMEFRAMES = ("5min", "15min", "1hour", "1day")
+
+# Daily bars are New York session dates, labelled at New York midnight
+# like Alpaca's 1Day bars. Extended-hours bars up to 20:00 ET fall past
+# midnight UTC, so UTC calendar days would split an evening session off
+# into the next day
+SESSION_TZ = "America/New_York"
+
+# Roll-up bars kept per (ticker, timeframe) in the cache
+DEFAULT_MAX_BARS = 20_000
+
+
+def normalize_timeframe(timeframe: str) -> str:
+    """Map Alpaca-style names (5Min, 1Hour, 1Day) onto TIMEFRAME_NS keys"""
+    key = timeframe.lower()
+    if key not in TIMEFRAME_NS:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+    return key
+
+
+def _timestamps_ns(bars) -> np.ndarray:
+    return np.asarray(bars.timestamp).astype("datetime64[ns]").view("i8")
+
+
+def _as_series(bars) -> BarSeries:
+    """Accept any object with OHLCV column attributes (e.g. CandleArrays)"""
+    if isinstance(bars, BarSeries):
+        return bars
+    return BarSeries(**{name: np.asarray(getattr(bars, name)) for name in BAR_COLUMNS})
+
+
+def _bucket_starts(ts: np.ndarray, timeframe: str) -> np.ndarray:
+    """Start (epoch ns, UTC) of the bucket each timestamp falls into"""
+    if timeframe != "1day":
+        return ts - ts % TIMEFRAME_NS[timeframe]
+
+    import pandas as pd
+
+    local = pd.DatetimeIndex(ts.view("datetime64[ns]"), tz="UTC").tz_convert(SESSION_TZ)
+    return local.normalize().tz_convert("UTC").asi8
+
+
+def resample(bars, timeframe: str) -> BarSeries:
+    """
+    Roll base bars up to a coarser timeframe
+
+    Args:
+        bars: BarSeries or CandleArrays in chronological order
+        timeframe: Target timeframe (e.g. "5min", "15Min", "1Hour", "1Day")
+
+    Returns:
+        BarSeries labelled by bucket start; the last bar may be a bucket
+        that is still filling
+    """
+    timeframe = normalize_timeframe(timeframe)
+    ts = _timestamps_ns(bars)
+    if len(ts) == 0:
+        return BarSeries.empty()
+
+    buckets = _bucket_starts(ts, timeframe)
+    starts = np.concatenate(([0], np.flatnonzero(buckets[1:] != buckets[:-1]) + 1))
+    ends = np.append(starts[1:], len(ts)) - 1
+
+    return BarSeries(
+        timestamp=buckets[starts].view("datetime64[ns]"),
+        open=np.asarray(bars.open, dtype=np.float64)[starts],
+        high=np.maximum.reduceat(np.asarray(bars.high, dtype=np.float64), starts),
+        low=np.minimum.reduceat(np.asarray(bars.low, dtype=np.float64), starts),
+        close=np.asarray(bars.close, dtype=np.float64)[ends],
+        volume=np.add.reduceat(np.asarray(bars.volume, dtype=np.int64), starts),
+    )
+
+
+def resample_all(bars, timeframes: Iterable[str] = DERIVED_TIMEFRAMES) -> Dict[str, BarSeries]:
+    """Roll base bars up to several timeframes at once"""
+    return {normalize_timeframe(tf): resample(bars, tf) for tf in timeframes}
+
+
+def to_bar_dicts(bars: BarSeries) -> List[Dict]:
+    """Convert a BarSeries to bar dicts (ISO timestamps), the shape get_historical_bars returns"""
+    return [bars[i] for i in range(len(bars))]
+
+
+class _RollupBuffer:
+    """Growable OHLCV columns whose last row may still be filling"""
+
+    def __init__(self, max_bars: int):
+        self.max_bars = max_bars
+        self.size = 0
+        self.columns = {
+            name: np.empty(64, dtype=np.int64 if name == "timestamp" else dtype)
+            for name, dtype in BAR_COLUMNS.items()
+        }
+
+    def _reserve(self, extra: int):
+        needed = self.size + extra
+        capacity = len(self.columns["timestamp"])
+        if needed <= capacity:
+            return
+        # Drop the oldest bars before growing past twice the retention
+        if needed > 2 * self.max_bars and self.size > self.max_bars:
+            drop = min(self.size - self.max_bars, needed - self.max_bars)
+            for col in self.columns.values():
+                col[:self.size - drop] = col[drop:self.size]
+            self.size -= drop
+            needed -= drop
+        if needed > capacity:
+            capacity = max(needed, 2 * capacity)
+            for name, col in self.columns.items():
+                grown = np.empty(capacity, dtype=col.dtype)
+                grown[:self.size] = col[:self.size]
+                self.columns[name] = grown
+
+    def merge(self, rollup: BarSeries):
+        """Fold freshly rolled-up bars in, merging a bucket that continues the last row"""
+        ts = rollup.timestamp.view("i8")
+        if len(ts) == 0:
+            return
+
+        first = 0
+        if self.size and ts[0] == self.columns["timestamp"][self.size - 1]:
+            last = self.size - 1
+            self.columns["high"][last] = max(self.columns["high"][last], rollup.high[0])
+            self.columns["low"][last] = min(self.columns["low"][last], rollup.low[0])
+            self.columns["close"][last] = rollup.close[0]
+            self.columns["volume"][last] += rollup.volume[0]
+            first = 1
+
+        count = len(ts) - first
+        if count == 0:
+            return
+        self._reserve(count)
+        for name in BAR_COLUMNS:
+            source = ts if name == "timestamp" else getattr(rollup, name)
+            self.columns[name][self.size:self.size + count] = source[first:]
+        self.size += count
+
+    def view(self, limit: Optional[int] = None) -> BarSeries:
+        start = 0 if limit is None else max(self.size - limit, 0)
+        data = {name: col[start:self.size].copy() for name, col in self.columns.items()}
+        data["timestamp"] = data["timestamp"].view("datetime64[ns]")
+        return BarSeries(**data)
+
+
+class ResampleCache:
+    """
+    Incrementally maintained roll-ups of 1-minute bars
+
+    Feed minute bars with update(); every derived timeframe is extended in
+    place, touching only the buckets the new bars fall into. Minute bars at
+    or before the last one seen for a ticker are ignored, so replaying an
+    overlapping batch does not double count volume.
+    """
+
+    def __init__(self, timeframes: Iterable[str] = DERIVED_TIMEFRAMES,
+                 max_bars: int = DEFAULT_MAX_BARS):
+        self.timeframes = tuple(normalize_timeframe(tf) for tf in timeframes)
+        self.max_bars = max_bars
+        self._lock = threading.Lock()
+        self._last_base: Dict[str, int] = {}
+        self._rollups: Dict[Tuple[str, str], _RollupBuffer] = {}
+
+    def update(self, ticker: str, bars) -> int:
+        """
+        Fold new 1-minute bars into every cached timeframe
+
+        Args:
+            ticker: Stock symbol
+            bars: BarSeries or CandleArrays of minute bars, chronological
+
+        Returns:
+            Number of minute bars applied
+        """
+        ticker = ticker.upper()
+        bars = _as_series(bars)
+        ts = _timestamps_ns(bars)
+
+        with self._lock:
+            last = self._last_base.get(ticker)
+            if last is not None:
+                bars = bars[int(np.searchsorted(ts, last, side="right")):]
+                ts = _timestamps_ns(bars)
+            if len(ts) == 0:
+                return 0
+
+            for timeframe in self.timeframes:
+                key = (ticker, timeframe)
+                if key not in self._rollups:
+                    self._rollups[key] = _RollupBuffer(self.max_bars)
+                self._rollups[key].merge(resample(bars, timeframe))
+
+            self._last_base[ticker] = int(ts[-1])
+
+        return len(ts)
+
+    def update_bars(self, ticker: str, bars: List[Dict]) -> int:
+        """Fold bar dicts (timestamp, open, high, low, close, volume) in"""
+        if not bars:
+            return 0
+        import pandas as pd
+
+        timestamps = pd.to_datetime([bar["timestamp"] for bar in bars], utc=True, format="ISO8601")
+        series = BarSeries(
+            timestamp=timestamps.as_unit("ns").asi8.view("datetime64[ns]"),
+            open=np.array([bar["open"] for bar in bars], dtype=np.float64),
+            high=np.array([bar["high"] for bar in bars], dtype=np.float64),
+            low=np.array([bar["low"] for bar in bars], dtype=np.float64),
+            close=np.array([bar["close"] for bar in bars], dtype=np.float64),
+            volume=np.array([bar.get("volume", 0) or 0 for bar in bars], dtype=np.int64),
+        )
+        order = np.argsort(series.timestamp, kind="stable")
+        if np.any(order != np.arange(len(order))):
+            series = BarSeries(**{name: getattr(series, name)[order] for name in BAR_COLUMNS})
+        return self.update(ticker, series)
+
+    def get(self, ticker: str, timeframe: str, limit: Optional[int] = None) -> BarSeries:
+        """
+        Get cached roll-ups for a ticker
+
+        Args:
+            ticker: Stock symbol
+            timeframe: One of the cached timeframes
+            limit: Most recent bars to return (None for all cached)
+
+        Returns:
+            BarSeries copy; the last bar may still be filling
+        """
+        key = (ticker.upper(), normalize_timeframe(timeframe))
+        with self._lock:
+            buffer = self._rollups.get(key)
+            if buffer is None:
+                return BarSeries.empty()
+            return buffer.view(limit)
+
+    def clear(self, ticker: Optional[str] = None):
+        """Drop cached roll-ups for one ticker, or all"""
+        with self._lock:
+            if ticker is None:
+                self._rollups.clear()
+                self._last_base.clear()
+                return
+            ticker = ticker.upper()
+            self._last_base.pop(ticker, None)
+            for key in [k for k in self._rollups if k[0] == ticker]:
+                del self._rollups[key]
+
+
+def resample_candles(ticker: str, timeframe: str, start=None, end=None,
+                     limit: Optional[int] = None) -> BarSeries:
+    """
+    Derive a timeframe from the 1-minute candles in the SQLite candle store
+
+    Args:
+        ticker: Stock symbol
+        timeframe: Target timeframe
+        start: Start datetime (optional)
+        end: End datetime (optional)
+        limit: Most recent roll-up bars wanted (None for the whole range);
+            only the minute candles that can fall into them are read
+
+    Returns:
+        Rolled-up BarSeries. With a limit, the oldest bucket is dropped
+        when the row cap may have cut it short
+    """
+    import database
+
+    timeframe = normalize_timeframe(timeframe)
+    rows = None
+    if limit is not None:
+        rows = (limit + 1) * (TIMEFRAME_NS[timeframe] // TIMEFRAME_NS[BASE_TIMEFRAME])
+
+    candles = database.get_candle_arrays(ticker, start=start, end=end,
+                                         timeframe=BASE_TIMEFRAME, limit=rows)
+    bars = resample(candles, timeframe)
+    if rows is None:
+        return bars
+    if len(candles) == rows:
+        bars = bars[1:]
+    return bars[max(len(bars) - limit, 0):]
+
+
+def on_live_bar(bar):
+    """
+    BarBuilder subscriber: fold completed 1-minute bars into the shared cache
+
+    Follows what the builder persists. Quote-only bars are skipped, and a
+    partial bar (first after start, or around a reconnect) clears the
+    ticker's roll-ups, so cached buckets never silently span a gap.
+    """
+    if bar.timeframe != BASE_TIMEFRAME:
+        return
+    cache = get_resample_cache()
+    if bar.partial:
+        cache.clear(bar.ticker)
+    elif bar.trades:
+        cache.update_bars(bar.ticker, [bar.to_dict()])
+
+
+# Singleton
+_cache: Optional[ResampleCache] = None
+
+
+def get_resample_cache() -> ResampleCache:
+    """Get or create the shared resample cache"""
+    global _cache
+    if _cache is None:
+        _cache = ResampleCache()
+    return _cache
@@ -0,0 +1,176 @@
+"""
+Test Live Bar Builder
+
+Verifies bar formation from streamed quotes and trades:
+- Updates roll over into a new bar at each bucket boundary
+- Updates for closed buckets are dropped
+- Quiet symbols are closed by the sweep
+- Failed store writes are retried
+- Partial and quote-only bars are never persisted
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from bar_builder import BarBuilder, _bucket_end
+
+
+def _quote(ts: str, price: float, ticker: str = "SPY"):
+    return SimpleNamespace(ticker=ticker, price=price, timestamp=ts, volume=0, is_trade=False)
+
+
+def _trade(ts: str, price: float, size: int = 100, ticker: str = "SPY"):
+    return SimpleNamespace(ticker=ticker, price=price, timestamp=ts, volume=size, is_trade=True)
+
+
+class RecordingStore:
+    """Candle store stand-in that can be made to fail."""
+
+    def __init__(self):
+        self.rows = []
+        self.fail = False
+
+    def __call__(self, rows):
+        if self.fail:
+            raise RuntimeError("database is locked")
+        self.rows.extend(rows)
+        return len(rows)
+
+
+@pytest.fixture
+def store():
+    return RecordingStore()
+
+
+@pytest.fixture
+def builder(store):
+    """Minute bars only, already streaming (first bars are complete)."""
+    builder = BarBuilder(timeframes=("1min",), store=store)
+    builder._last_closed[("SPY", "1min")] = "2026-01-02T14:29"
+    return builder
+
+
+class TestBarFormation:
+    """Test suite for bucket rollover and late updates."""
+
+    def test_bucket_rollover(self, builder):
+        """Trades set OHLCV; the next bucket's first update closes the bar."""
+        closed = []
+        builder.add_subscriber(closed.append)
+
+        builder.on_price_updates([
+            _quote("2026-01-02T14:30:00.100Z", 99.9),
+            _trade("2026-01-02T14:30:01.000Z", 100.0, 100),
+            _trade("2026-01-02T14:30:20.000Z", 101.5, 50),
+            _trade("2026-01-02T14:30:40.000Z", 99.5, 25),
+            _trade("2026-01-02T14:30:59.900Z", 100.5, 10),
+        ])
+        assert closed == []
+        assert builder.get_open_bar("SPY")["close"] == 100.5
+
+        builder.on_price_update(_trade("2026-01-02T14:31:00.000Z", 100.7, 5))
+
+        assert len(closed) == 1
+        bar = closed[0]
+        assert (bar.timestamp, bar.open, bar.high, bar.low, bar.close, bar.volume) == (
+            "2026-01-02T14:30:00Z", 100.0, 101.5, 99.5, 100.5, 185
+        )
+        assert bar.trades == 4 and not bar.partial
+        assert builder.get_bars("SPY")[-1]["open"] == 100.7
+
+    def test_late_updates_dropped(self, builder):
+        """Updates for a closed bucket are counted and ignored."""
+        builder.on_price_updates([
+            _trade("2026-01-02T14:30:10Z", 100.0),
+            _trade("2026-01-02T14:31:10Z", 101.0),
+            _trade("2026-01-02T14:30:50Z", 150.0),
+        ])
+
+        assert builder.stats["late_updates"] == 1
+        assert [b["high"] for b in builder.get_bars("SPY")] == [100.0, 101.0]
+
+
+class TestSweepAndFlush:
+    """Test suite for closing quiet bars and writing to the store."""
+
+    def test_sweep_closes_quiet_bars_after_grace(self, builder):
+        """A bar closes only once its bucket ended more than `grace` ago."""
+        builder.on_price_update(_trade("2026-01-02T14:30:10Z", 100.0))
+        end = _bucket_end("2026-01-02T14:30", 60)
+
+        assert builder.sweep(now=end + builder.grace - 0.5) == []
+        assert [b.bucket for b in builder.sweep(now=end + builder.grace)] == ["2026-01-02T14:30"]
+        assert builder.get_open_bar("SPY") is None
+
+        # The swept bucket stays closed
+        builder.on_price_update(_trade("2026-01-02T14:30:59Z", 100.0))
+        assert builder.stats["late_updates"] == 1
+
+    def test_flush_retries_after_store_failure(self, builder, store):
+        """Rows from a failed write are kept and written by the next flush."""
+        builder.on_price_updates([
+            _trade("2026-01-02T14:30:10Z", 100.0),
+            _trade("2026-01-02T14:31:10Z", 101.0),
+        ])
+
+        store.fail = True
+        assert builder.flush() == 0
+        assert builder.stats["flush_errors"] == 1
+        assert builder.get_stats()["pending_rows"] == 1
+
+        store.fail = False
+        builder.on_price_update(_trade("2026-01-02T14:32:10Z", 102.0))
+        assert builder.flush() == 2
+        assert [row[1] for row in store.rows] == ["2026-01-02T14:30:00Z", "2026-01-02T14:31:00Z"]
+
+
+class TestPersistence:
+    """Test suite for which bars reach the store."""
+
+    def test_first_bar_after_start_is_partial(self, store):
+        """A fresh builder saw only part of its first minute per symbol."""
+        builder = BarBuilder(timeframes=("1min",), store=store)
+        builder.on_price_updates([
+            _trade("2026-01-02T14:30:45Z", 100.0),
+            _trade("2026-01-02T14:31:05Z", 100.2),
+            _trade("2026-01-02T14:32:05Z", 100.4),
+        ])
+        builder.flush()
+
+        partial, complete = builder._recent[("SPY", "1min")]
+        assert partial.partial and not complete.partial
+        assert [row[1] for row in store.rows] == ["2026-01-02T14:31:00Z"]
+
+    def test_bars_around_a_gap_are_partial(self, builder, store):
+        """The open bar and any bucket begun before the reconnect are skipped."""
+        builder.on_price_update(_trade("2026-01-02T14:30:05Z", 100.0))
+        builder.mark_gap(now=_bucket_end("2026-01-02T14:32", 60) - 30)  # Resumed 14:32:30
+        builder.on_price_updates([
+            _trade("2026-01-02T14:32:40Z", 101.0),
+            _trade("2026-01-02T14:33:00Z", 101.5),
+            _trade("2026-01-02T14:34:00Z", 102.0),
+        ])
+        builder.flush()
+
+        assert [b.partial for b in builder._recent[("SPY", "1min")]] == [True, True, False]
+        assert [row[1] for row in store.rows] == ["2026-01-02T14:33:00Z"]
+        assert builder.stats["bars_not_persisted"] == 2
+
+    def test_quote_only_bars_not_persisted(self, builder, store):
+        """Bars built from quote midpoints alone are emitted but not stored."""
+        emitted = []
+        builder.add_subscriber(emitted.append)
+        builder.on_price_updates([
+            _quote("2026-01-02T14:30:05Z", 100.0),
+            _quote("2026-01-02T14:30:35Z", 100.4),
+            _trade("2026-01-02T14:31:05Z", 100.2),
+        ])
+        builder.flush()
+
+        assert emitted[0].quotes == 2 and emitted[0].volume == 0
+        assert store.rows == []
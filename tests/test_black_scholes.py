@@ -0,0 +1,159 @@
+"""
+Test Vectorized Black-Scholes
+
+Verifies BlackScholes.price_array and the T+0 payoff curve built on it:
+- Prices match the scalar call_price/put_price over a spot grid
+- Expired options price at intrinsic value
+- Zero volatility prices at discounted intrinsic value, never below zero
+- calculate_theoretical_payoff matches a per-leg, per-point scalar loop
+"""
+
+import os
+import sys
+import pytest
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from logic import (
+    BlackScholes, OptionLeg, DEFAULT_RISK_FREE_RATE,
+    calculate_option_price, calculate_theoretical_payoff
+)
+
+
+SPOTS = np.linspace(50.0, 150.0, 201)
+
+
+def _scalar_prices(spots, K, T, r, sigma, option_type):
+    price = BlackScholes.call_price if option_type == "call" else BlackScholes.put_price
+    return np.array([price(S, K, T, r, sigma) for S in spots])
+
+
+def _scalar_payoff(legs, price_range, days_remaining, iv_adjustment=0.0, r=DEFAULT_RISK_FREE_RATE):
+    """The previous per-leg, per-point calculate_theoretical_payoff body."""
+    payoff = np.zeros_like(price_range)
+
+    for leg in legs:
+        if leg.option_type == "stock":
+            leg_payoff = (price_range - leg.strike) * leg.quantity * leg.sign
+        else:
+            adjusted_iv = max(0.01, leg.iv + iv_adjustment)
+            theoretical_values = np.array([
+                calculate_option_price(S, leg.strike, days_remaining, r, adjusted_iv, leg.option_type)
+                for S in price_range
+            ])
+            leg_payoff = (theoretical_values - leg.premium) * 100 * leg.quantity * leg.sign
+
+        payoff += leg_payoff
+
+    return payoff
+
+
+class TestPriceArray:
+    """Test suite for the broadcast pricing kernel."""
+
+    @pytest.mark.parametrize("option_type", ["call", "put"])
+    @pytest.mark.parametrize("K,T,sigma", [
+        (100.0, 30 / 365, 0.25), (80.0, 0.5, 0.60), (125.0, 2 / 365, 0.15), (100.0, 1.0, 0.05)
+    ])
+    def test_matches_scalar_over_spot_grid(self, option_type, K, T, sigma):
+        r = DEFAULT_RISK_FREE_RATE
+        prices = BlackScholes.price_array(SPOTS, K, T, r, sigma, option_type == "call")
+
+        np.testing.assert_allclose(prices, _scalar_prices(SPOTS, K, T, r, sigma, option_type),
+                                   rtol=1e-10, atol=1e-10)
+
+    def test_broadcasts_legs_against_grid(self):
+        """An (n_legs, 1) column of leg inputs prices every leg at every spot."""
+        strikes = np.array([90.0, 100.0, 110.0])[:, None]
+        sigmas = np.array([0.2, 0.3, 0.4])[:, None]
+        is_call = np.array([True, False, True])[:, None]
+
+        prices = BlackScholes.price_array(SPOTS, strikes, 0.25, 0.04, sigmas, is_call)
+
+        assert prices.shape == (3, len(SPOTS))
+        for row, (K, sigma, call) in enumerate(zip(strikes[:, 0], sigmas[:, 0], is_call[:, 0])):
+            expected = _scalar_prices(SPOTS, K, 0.25, 0.04, sigma, "call" if call else "put")
+            np.testing.assert_allclose(prices[row], expected, rtol=1e-10, atol=1e-10)
+
+    @pytest.mark.parametrize("T", [0.0, -1 / 365])
+    def test_expired_prices_at_intrinsic(self, T):
+        """T <= 0 takes the intrinsic branch, like the scalar path."""
+        calls = BlackScholes.price_array(SPOTS, 100.0, T, 0.05, 0.3, True)
+        puts = BlackScholes.price_array(SPOTS, 100.0, T, 0.05, 0.3, False)
+
+        np.testing.assert_array_equal(calls, np.maximum(SPOTS - 100.0, 0.0))
+        np.testing.assert_array_equal(puts, np.maximum(100.0 - SPOTS, 0.0))
+        np.testing.assert_array_equal(calls, _scalar_prices(SPOTS, 100.0, T, 0.05, 0.3, "call"))
+        np.testing.assert_array_equal(puts, _scalar_prices(SPOTS, 100.0, T, 0.05, 0.3, "put"))
+
+    def test_mixed_expired_and_live(self):
+        """Expired entries in a broadcast do not disturb live ones."""
+        T = np.array([0.0, 0.25])[:, None]
+        prices = BlackScholes.price_array(SPOTS, 100.0, T, 0.05, 0.3, True)
+
+        np.testing.assert_array_equal(prices[0], np.maximum(SPOTS - 100.0, 0.0))
+        np.testing.assert_allclose(prices[1], _scalar_prices(SPOTS, 100.0, 0.25, 0.05, 0.3, "call"),
+                                   rtol=1e-10, atol=1e-10)
+
+    def test_zero_vol_prices_at_discounted_intrinsic(self):
+        """sigma == 0 is clamped: a forward-intrinsic price, never negative.
+
+        The scalar call_price/put_price set d1 = d2 = 0 when sigma <= 0,
+        which prices deep out-of-the-money options below zero, so they
+        are not the reference here.
+        """
+        K, T, r = 100.0, 0.5, 0.05
+        discounted_K = K * np.exp(-r * T)
+
+        calls = BlackScholes.price_array(SPOTS, K, T, r, 0.0, True)
+        puts = BlackScholes.price_array(SPOTS, K, T, r, 0.0, False)
+
+        np.testing.assert_allclose(calls, np.maximum(SPOTS - discounted_K, 0.0), atol=1e-12)
+        np.testing.assert_allclose(puts, np.maximum(discounted_K - SPOTS, 0.0), atol=1e-12)
+        assert calls.min() >= 0.0 and puts.min() >= 0.0
+        assert BlackScholes.call_price(50.0, K, T, r, 0.0) < 0.0
+
+
+class TestTheoreticalPayoff:
+    """Test suite for the vectorized T+0 curve."""
+
+    @staticmethod
+    def _iron_condor_with_stock():
+        return [
+            OptionLeg("put", "long", 85.0, 0.80, 1, 30, 0.32),
+            OptionLeg("put", "short", 95.0, 2.10, 1, 30, 0.28),
+            OptionLeg("call", "short", 105.0, 1.95, 1, 30, 0.26),
+            OptionLeg("call", "long", 115.0, 0.70, 2, 30, 0.30),
+            OptionLeg("stock", "long", 100.0, 0.0, 50, 0),
+        ]
+
+    @pytest.mark.parametrize("days,iv_adjustment", [(30, 0.0), (7, -0.10), (1, 0.25), (0, 0.0)])
+    def test_matches_scalar_loop(self, days, iv_adjustment):
+        legs = self._iron_condor_with_stock()
+        grid = np.linspace(70.0, 130.0, 121)
+
+        np.testing.assert_allclose(
+            calculate_theoretical_payoff(legs, grid, days, iv_adjustment),
+            _scalar_payoff(legs, grid, days, iv_adjustment),
+            rtol=1e-9, atol=1e-7
+        )
+
+    def test_iv_floor(self):
+        """An IV crush below 1% is floored at 1% for every leg."""
+        legs = self._iron_condor_with_stock()
+        grid = np.linspace(70.0, 130.0, 61)
+
+        np.testing.assert_allclose(
+            calculate_theoretical_payoff(legs, grid, 10, iv_adjustment=-0.5),
+            _scalar_payoff(legs, grid, 10, iv_adjustment=-0.5),
+            rtol=1e-9, atol=1e-7
+        )
+
+    def test_list_grid_and_no_legs(self):
+        assert calculate_theoretical_payoff([], [90.0, 100.0], 30).tolist() == [0.0, 0.0]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
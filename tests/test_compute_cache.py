@@ -0,0 +1,157 @@
+"""
+Test Compute Cache
+
+Verifies the dashboard's cross-session memoization:
+- Equal legs rebuilt on a rerun hit the cache
+- Changing days, IV or the price grid misses
+- The LRU stays within its size bound
+- Cached arrays are read-only
+"""
+
+import os
+import sys
+import threading
+import pytest
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import compute_cache
+from compute_cache import LRUCache, fingerprint
+from logic import OptionLeg, calculate_theoretical_payoff
+
+
+def _legs(iv: float = 0.30):
+    """Bull call spread, rebuilt from scratch like a Streamlit rerun does."""
+    return [
+        OptionLeg("call", "long", 100.0, 5.0, 1, 30, iv),
+        OptionLeg("call", "short", 110.0, 2.0, 1, 30, iv),
+    ]
+
+
+@pytest.fixture(autouse=True)
+def clean_caches():
+    """Start every test from empty caches with zeroed counters."""
+    for cache in (compute_cache.payoff_cache, compute_cache.indicator_cache):
+        cache.clear()
+        cache.hits = cache.misses = 0
+    yield
+
+
+class TestMemoization:
+    """Test suite for hits and misses."""
+
+    def test_rebuilt_equal_legs_hit(self):
+        """Equal legs and an equal (new) grid reuse the cached curve."""
+        first = compute_cache.theoretical_payoff(_legs(), np.linspace(80, 120, 101), 30)
+        second = compute_cache.theoretical_payoff(_legs(), np.linspace(80, 120, 101), 30)
+
+        assert second is first
+        assert compute_cache.payoff_cache.hits == 1
+        assert compute_cache.payoff_cache.misses == 1
+        np.testing.assert_allclose(first, calculate_theoretical_payoff(_legs(), np.linspace(80, 120, 101), 30))
+
+    @pytest.mark.parametrize("change", ["days", "leg_iv", "iv_adjustment", "grid"])
+    def test_changed_inputs_miss(self, change):
+        """Days, IV and the price grid are all part of the key."""
+        legs, grid, days, iv_adjustment = _legs(), np.linspace(80, 120, 101), 30, 0.0
+        baseline = compute_cache.theoretical_payoff(legs, grid, days, iv_adjustment)
+
+        if change == "days":
+            days = 29
+        elif change == "leg_iv":
+            legs = _legs(iv=0.35)
+        elif change == "iv_adjustment":
+            iv_adjustment = 0.05
+        else:
+            grid = np.linspace(80, 120, 201)
+
+        changed = compute_cache.theoretical_payoff(legs, grid, days, iv_adjustment)
+
+        assert compute_cache.payoff_cache.misses == 2
+        assert changed is not baseline
+
+    def test_probability_of_profit_keyed_on_iv(self):
+        """PoP misses on a new IV and hits on a repeat."""
+        a = compute_cache.probability_of_profit(_legs(), 100.0, 30, 0.25)
+        b = compute_cache.probability_of_profit(_legs(), 100.0, 30, 0.40)
+        c = compute_cache.probability_of_profit(_legs(), 100.0, 30, 0.25)
+
+        assert a == c and a != b
+        assert compute_cache.payoff_cache.misses == 2
+        assert compute_cache.payoff_cache.hits == 1
+
+    def test_fingerprint_is_content_based(self):
+        """Dtype and shape are part of an array's key, identity is not."""
+        values = np.arange(6, dtype=float)
+
+        assert fingerprint(values) == fingerprint(values.copy())
+        assert fingerprint(values) != fingerprint(values.astype(np.float32))
+        assert fingerprint(values) != fingerprint(values.reshape(2, 3))
+        assert fingerprint(_legs()) == fingerprint(_legs())
+        assert fingerprint(_legs()) != fingerprint(_legs(iv=0.31))
+
+
+class TestLRUCache:
+    """Test suite for the bounded cache itself."""
+
+    def test_evicts_least_recently_used(self):
+        """Entries beyond max_entries drop the least recently used."""
+        cache = LRUCache(max_entries=3)
+        for key in "abc":
+            cache.get_or_compute(key, lambda key=key: key.upper())
+        cache.get_or_compute("a", lambda: "unused")  # Touch "a"
+        cache.get_or_compute("d", lambda: "D")
+
+        assert len(cache) == 3
+        assert cache.get_or_compute("a", lambda: "recomputed") == "A"
+        assert cache.get_or_compute("b", lambda: "recomputed") == "recomputed"
+
+    def test_concurrent_lookups(self):
+        """Sessions on several threads share entries without errors."""
+        cache = LRUCache(max_entries=16)
+        errors = []
+
+        def session(offset):
+            try:
+                for i in range(500):
+                    key = str((i + offset) % 32)
+                    assert cache.get_or_compute(key, lambda key=key: int(key)) == int(key)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=session, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+        assert len(cache) <= 16
+
+
+class TestReadOnly:
+    """Test suite for shared-array safety."""
+
+    def test_cached_arrays_are_read_only(self):
+        """Callers cannot mutate arrays shared with other sessions."""
+        grid = np.linspace(80, 120, 101)
+        curve = compute_cache.expiration_payoff(_legs(), grid)
+        upper, middle, lower = compute_cache.bollinger_bands(np.linspace(100, 110, 50), 20)
+
+        for array in (curve, upper, middle, lower):
+            assert not array.flags.writeable
+            with pytest.raises(ValueError):
+                array[0] = 0.0
+
+    def test_copies_returned_for_mutable_results(self):
+        """Greeks and breakevens come back as fresh containers."""
+        grid = np.linspace(80, 120, 401)
+        greeks = compute_cache.position_greeks(_legs(), 100.0, 30)
+        greeks["delta"] = 99.0
+        breakevens = compute_cache.breakeven_points(_legs(), grid)
+        breakevens.append(-1.0)
+
+        assert compute_cache.position_greeks(_legs(), 100.0, 30)["delta"] != 99.0
+        assert -1.0 not in compute_cache.breakeven_points(_legs(), grid)
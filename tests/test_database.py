@@ -0,0 +1,174 @@
+"""
+Test Candle Storage
+
+Verifies bulk candle ingestion into SQLite:
+- Identical rows are skipped, changed rows are updated in place
+- Rows are written in batches across many tickers and timeframes
+- Bad rows are skipped without failing their batch
+- Column input uses the same timestamp spelling as dict input
+- Columnar reads return what was stored, in chronological order
+"""
+
+import os
+import sys
+import hashlib
+import pytest
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import database
+
+
+def _candle(minute: int, close: float = 100.0, volume: int = 1000) -> dict:
+    return {
+        "timestamp": f"2024-01-02T14:{minute:02d}:00Z",
+        "open": 100.0,
+        "high": 101.0,
+        "low": 99.0,
+        "close": close,
+        "volume": volume
+    }
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Point the module at a fresh database file."""
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "test_candles.db"))
+    database.init_db()
+    yield database
+    database.close_connections()
+
+
+class TestCandleUpsert:
+    """Test suite for store_candles / ingest_candle_rows."""
+
+    def test_identical_rows_skipped_changed_rows_updated(self, db):
+        """Re-storing a bar only writes when its values changed."""
+        candles = [_candle(m) for m in range(5)]
+        assert db.store_candles("spy", candles) == 5
+        assert db.store_candles("SPY", candles) == 0
+
+        candles[2] = _candle(2, close=100.5, volume=1500)
+        assert db.store_candles("SPY", candles) == 1
+
+        stored = db.get_candles("SPY")
+        assert len(stored) == 5
+        assert stored[2]["close"] == 100.5 and stored[2]["volume"] == 1500
+
+    def test_batches_span_tickers_and_timeframes(self, db):
+        """Rows are written across several batches in one call."""
+        rows = [
+            (ticker, f"2024-01-02T14:{m:02d}:00Z", timeframe, 1.0, 2.0, 0.5, 1.5, m)
+            for ticker in ("SPY", "QQQ")
+            for timeframe in ("1min", "5min")
+            for m in range(25)
+        ]
+
+        assert db.ingest_candle_rows(iter(rows), batch_size=7) == 100
+        assert db.get_candle_count("SPY", "1min") == 25
+        assert db.get_candle_count("QQQ", "5min") == 25
+
+    def test_bad_rows_skipped(self, db):
+        """A malformed row is reported and skipped; its batch still lands."""
+        candles = [_candle(0), {"timestamp": "2024-01-02T14:01:00Z", "open": 1.0}, _candle(2)]
+        candles.append({**_candle(3), "close": None})
+        candles.append({**_candle(4), "high": "n/a"})
+
+        assert db.store_candles("SPY", candles) == 2
+        assert [c["timestamp"] for c in db.get_candles("SPY")] == [
+            "2024-01-02T14:00:00Z", "2024-01-02T14:02:00Z"
+        ]
+
+    def test_array_timestamps_match_stored_format(self, db):
+        """datetime64 and Timestamp columns upsert onto existing rows."""
+        db.store_candles("SPY", [_candle(m) for m in range(5)])
+
+        timestamps = np.array([f"2024-01-02T14:{m:02d}" for m in range(6)], dtype="datetime64[ns]")
+        ones = np.ones(6)
+        assert db.store_candle_arrays("SPY", timestamps, ones * 100, ones * 101, ones * 99,
+                                      ones * 100, np.full(6, 1000)) == 1
+
+        aware = pd.DatetimeIndex(timestamps).tz_localize("UTC").tz_convert("America/New_York")
+        assert db.store_candle_arrays("SPY", list(aware), ones * 100, ones * 101, ones * 99,
+                                      ones * 100, np.full(6, 1000)) == 0
+
+        stored = db.get_candles("SPY")
+        assert len(stored) == 6
+        assert stored[-1]["timestamp"] == "2024-01-02T14:05:00Z"
+
+
+class TestCandleArrays:
+    """Test suite for get_candle_arrays."""
+
+    def test_round_trip(self, db):
+        """Stored candles come back as typed columns, oldest first."""
+        candles = [_candle(m, close=100.0 + m, volume=1000 + m) for m in range(10)]
+        db.store_candles("SPY", candles)
+        db.store_candles("SPY", [_candle(0, close=1.0)], timeframe="5min")
+
+        arrays = db.get_candle_arrays("SPY", limit=None)
+
+        assert len(arrays) == 10
+        assert arrays.timestamp.dtype == np.dtype("datetime64[ns]")
+        assert arrays.timestamp[0] == np.datetime64("2024-01-02T14:00:00")
+        assert np.all(np.diff(arrays.timestamp) == np.timedelta64(60, "s"))
+        np.testing.assert_array_equal(arrays.close, [c["close"] for c in candles])
+        np.testing.assert_array_equal(arrays.volume, [c["volume"] for c in candles])
+        assert arrays.volume.dtype == np.int64
+
+    def test_limit_and_range_match_get_candles(self, db):
+        """A limit returns the most recent bars; ranges filter in SQL."""
+        db.store_candles("SPY", [_candle(m, close=100.0 + m) for m in range(10)])
+
+        latest = db.get_candle_arrays("SPY", limit=3)
+        np.testing.assert_array_equal(latest.close, [c["close"] for c in db.get_candles("SPY", limit=3)])
+
+        start = pd.Timestamp("2024-01-02T14:04:00").to_pydatetime()
+        end = pd.Timestamp("2024-01-02T14:06:30").to_pydatetime()
+        window = db.get_candle_arrays("SPY", start=start, end=end, limit=None)
+        np.testing.assert_array_equal(window.close, [104.0, 105.0, 106.0])
+
+        assert len(db.get_candle_arrays("QQQ")) == 0
+
+
+class TestSchemaMigration:
+    """Test suite for import-time vs explicit initialization."""
+
+    @pytest.fixture
+    def legacy_db(self, tmp_path, monkeypatch):
+        """A database created by the previous schema."""
+        path = tmp_path / "legacy.db"
+        monkeypatch.setattr(database, "DB_PATH", str(path))
+        with database.get_connection() as conn:
+            database._create_tables(conn)
+            conn.execute("CREATE INDEX idx_candles_ticker_time ON candles(ticker, timestamp DESC)")
+            conn.commit()
+        database.close_connections()
+        yield path
+        database.close_connections()
+
+    def test_table_creation_leaves_existing_file_unchanged(self, legacy_db):
+        """What runs on import must not rewrite an existing database."""
+        before = hashlib.md5(legacy_db.read_bytes()).hexdigest()
+
+        with database.get_connection() as conn:
+            database._create_tables(conn)
+            conn.commit()
+        database.close_connections()
+
+        assert hashlib.md5(legacy_db.read_bytes()).hexdigest() == before
+        assert not os.path.exists(f"{legacy_db}-wal")
+
+    def test_init_db_migrates_journal_and_index(self, legacy_db):
+        """init_db switches to WAL and replaces the candle index."""
+        database.init_db()
+
+        with database.get_connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            indexes = {row[1] for row in conn.execute("PRAGMA index_list(candles)")}
+
+        assert "idx_candles_ticker_tf_time" in indexes
+        assert "idx_candles_ticker_time" not in indexes
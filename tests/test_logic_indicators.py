@@ -0,0 +1,210 @@
+"""
+Test Dashboard Indicators
+
+Verifies the vectorized calculate_* indicators against the list-based
+implementations they replaced:
+- NaN padding is identical, including inputs shorter than the period
+- Values agree to floating-point tolerance
+"""
+
+import os
+import sys
+import pytest
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from logic import (
+    calculate_sma, calculate_ema, calculate_rsi,
+    calculate_bollinger_bands, calculate_macd
+)
+
+
+# =============================================================================
+# Reference implementations (the previous logic.py bodies, unchanged)
+# =============================================================================
+
+def reference_sma(prices, period):
+    if len(prices) < period:
+        return [np.nan] * len(prices)
+
+    sma = []
+    for i in range(len(prices)):
+        if i < period - 1:
+            sma.append(np.nan)
+        else:
+            sma.append(np.mean(prices[i - period + 1:i + 1]))
+
+    return sma
+
+
+def reference_ema(prices, period):
+    if len(prices) < period:
+        return [np.nan] * len(prices)
+
+    multiplier = 2 / (period + 1)
+    ema = [np.nan] * (period - 1)
+
+    # First EMA is SMA
+    ema.append(np.mean(prices[:period]))
+
+    # Calculate subsequent EMAs
+    for i in range(period, len(prices)):
+        ema.append((prices[i] - ema[-1]) * multiplier + ema[-1])
+
+    return ema
+
+
+def reference_rsi(prices, period=14):
+    if len(prices) < period + 1:
+        return [np.nan] * len(prices)
+
+    # Calculate price changes
+    deltas = [prices[i] - prices[i - 1] for i in range(1, len(prices))]
+
+    gains = [d if d > 0 else 0 for d in deltas]
+    losses = [-d if d < 0 else 0 for d in deltas]
+
+    rsi = [np.nan] * period
+
+    # First average
+    avg_gain = np.mean(gains[:period])
+    avg_loss = np.mean(losses[:period])
+
+    for i in range(period, len(deltas)):
+        avg_gain = (avg_gain * (period - 1) + gains[i]) / period
+        avg_loss = (avg_loss * (period - 1) + losses[i]) / period
+
+        if avg_loss == 0:
+            rsi.append(100)
+        else:
+            rs = avg_gain / avg_loss
+            rsi.append(100 - (100 / (1 + rs)))
+
+    # Pad to match original length
+    rsi = [np.nan] + rsi
+
+    return rsi
+
+
+def reference_bollinger_bands(prices, period=20, std_dev=2.0):
+    middle = reference_sma(prices, period)
+
+    upper = []
+    lower = []
+
+    for i in range(len(prices)):
+        if i < period - 1:
+            upper.append(np.nan)
+            lower.append(np.nan)
+        else:
+            std = np.std(prices[i - period + 1:i + 1])
+            upper.append(middle[i] + std_dev * std)
+            lower.append(middle[i] - std_dev * std)
+
+    return upper, middle, lower
+
+
+def reference_macd(prices, fast=12, slow=26, signal=9):
+    ema_fast = reference_ema(prices, fast)
+    ema_slow = reference_ema(prices, slow)
+
+    # MACD line
+    macd_line = [f - s if not (np.isnan(f) or np.isnan(s)) else np.nan
+                 for f, s in zip(ema_fast, ema_slow)]
+
+    # Signal line (EMA of MACD)
+    valid_macd = [m for m in macd_line if not np.isnan(m)]
+    signal_ema = reference_ema(valid_macd, signal) if len(valid_macd) >= signal else []
+
+    # Pad signal line
+    nan_count = len(macd_line) - len(signal_ema)
+    signal_line = [np.nan] * nan_count + signal_ema
+
+    # Histogram
+    histogram = [m - s if not (np.isnan(m) or np.isnan(s)) else np.nan
+                 for m, s in zip(macd_line, signal_line)]
+
+    return macd_line, signal_line, histogram
+
+
+# =============================================================================
+# Tests
+# =============================================================================
+
+def _prices(n, seed=5):
+    rng = np.random.default_rng(seed)
+    return list(400 + np.cumsum(rng.normal(0, 2, n)))
+
+
+def assert_matches(result, expected):
+    """Same length, NaN in the same positions, close values elsewhere."""
+    result = np.asarray(result, dtype=float)
+    expected = np.asarray(expected, dtype=float)
+
+    assert result.shape == expected.shape
+    assert np.array_equal(np.isnan(result), np.isnan(expected))
+    np.testing.assert_allclose(result, expected, rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+# Lengths below, at and just past each period, plus a long series
+LENGTHS = [0, 1, 5, 13, 14, 15, 19, 20, 21, 25, 26, 27, 34, 35, 300]
+
+
+class TestMatchesListReference:
+    """Test suite comparing new and previous indicator output."""
+
+    @pytest.mark.parametrize("n", LENGTHS)
+    @pytest.mark.parametrize("period", [1, 5, 20])
+    def test_sma(self, n, period):
+        prices = _prices(n)
+        assert_matches(calculate_sma(prices, period), reference_sma(prices, period))
+
+    @pytest.mark.parametrize("n", LENGTHS)
+    @pytest.mark.parametrize("period", [1, 9, 26])
+    def test_ema(self, n, period):
+        prices = _prices(n)
+        assert_matches(calculate_ema(prices, period), reference_ema(prices, period))
+
+    @pytest.mark.parametrize("n", LENGTHS)
+    @pytest.mark.parametrize("period", [2, 14])
+    def test_rsi(self, n, period):
+        prices = _prices(n)
+        assert_matches(calculate_rsi(prices, period), reference_rsi(prices, period))
+
+    def test_rsi_without_losses(self):
+        """A run with no down moves pins RSI at 100 like the old branch."""
+        prices = [100.0 + i for i in range(30)] + [129.0, 129.0, 131.0]
+        assert_matches(calculate_rsi(prices, 14), reference_rsi(prices, 14))
+        assert calculate_rsi(prices, 14)[-1] == 100.0
+
+    @pytest.mark.parametrize("n", LENGTHS)
+    def test_bollinger_bands(self, n):
+        prices = _prices(n)
+        for result, expected in zip(calculate_bollinger_bands(prices, 20, 2.0),
+                                    reference_bollinger_bands(prices, 20, 2.0)):
+            assert_matches(result, expected)
+
+    def test_bollinger_flat_prices(self):
+        """Zero-width bands stay exactly on the mean."""
+        prices = [250.0] * 40
+        upper, middle, lower = calculate_bollinger_bands(prices, 20, 2.0)
+        for result, expected in zip((upper, middle, lower), reference_bollinger_bands(prices, 20, 2.0)):
+            assert_matches(result, expected)
+
+    @pytest.mark.parametrize("n", LENGTHS)
+    def test_macd(self, n):
+        prices = _prices(n)
+        for result, expected in zip(calculate_macd(prices), reference_macd(prices)):
+            assert_matches(result, expected)
+
+    def test_array_input(self):
+        """NumPy input gives the same output as a list."""
+        prices = _prices(120)
+        assert_matches(calculate_rsi(np.array(prices), 14), reference_rsi(prices, 14))
+        assert_matches(calculate_macd(np.array(prices))[1], reference_macd(prices)[1])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
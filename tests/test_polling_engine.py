@@ -0,0 +1,125 @@
+"""
+Test Polling Engine
+
+Verifies the multi-symbol refresh scheduler keeps every symbol scheduled:
+- Refreshes cancelled by stop() are rescheduled and run after start()
+- Cancelled IV refreshes release their worker budget
+- Refreshes that cannot be submitted are put back on the heap
+"""
+
+import os
+import sys
+import threading
+import time
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from data_manager import MULTI_SYMBOL_CHUNK, PollingEngine
+
+
+class BlockingManager:
+    """Data manager stand-in whose price requests wait for `release`."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+        self.price_calls = 0
+        self.priced = set()
+        self.iv_priced = set()
+
+    def get_current_prices(self, tickers):
+        with self.lock:
+            self.price_calls += 1
+        self.release.wait(timeout=10)
+        with self.lock:
+            self.priced.update(tickers)
+        return {ticker: 100.0 for ticker in tickers}
+
+    def get_implied_volatility(self, ticker, price):
+        with self.lock:
+            self.iv_priced.add(ticker)
+        return 0.25
+
+
+def _wait_for(condition, timeout: float = 10.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def _scheduled(engine: PollingEngine, kind: str) -> set:
+    """Tickers with a live (not superseded) heap entry of this kind."""
+    with engine._cond:
+        return {
+            ticker for due, _, entry_kind, ticker in engine._heap
+            if entry_kind == kind and due == getattr(engine._targets[ticker], f"{kind}_due")
+        }
+
+
+@pytest.fixture
+def manager():
+    manager = BlockingManager()
+    yield manager
+    manager.release.set()
+
+
+@pytest.fixture
+def engine(manager):
+    engine = PollingEngine(manager=manager, workers=2, max_rps=1e6, jitter=0.0, batch_window=0.05)
+    yield engine
+    engine.stop()
+
+
+class TestStopAndRestart:
+    """Test suite for work queued on the pool when stop() is called."""
+
+    def test_cancelled_refreshes_are_rescheduled(self, engine, manager):
+        """Every symbol is scheduled again after stop, and polled after start."""
+        tickers = [f"S{i:03d}" for i in range(7 * MULTI_SYMBOL_CHUNK)]
+        engine.watch(tickers, interval=60.0, iv_interval=60.0)
+        engine.start()
+
+        # Both workers busy; the other chunks and an IV refresh wait in the queue
+        assert _wait_for(lambda: manager.price_calls == 2)
+        pool = engine._pool
+        engine.stop()
+        manager.release.set()
+        pool.shutdown(wait=True)
+
+        assert engine._iv_in_flight == 0
+        assert _scheduled(engine, "price") == set(tickers)
+        assert _scheduled(engine, "iv") == set(tickers)
+
+        engine.start()
+        assert _wait_for(lambda: manager.priced == set(tickers))
+        assert _wait_for(lambda: len(manager.iv_priced) > 0)
+
+
+class TestSubmit:
+    """Test suite for refreshes the pool refuses."""
+
+    def test_failed_submit_requeues_targets(self, engine):
+        """Popped targets go back on the heap and IV budget is released."""
+        engine.watch(["SPY", "QQQ"], interval=60.0, iv_interval=60.0)
+        with engine._cond:
+            engine._heap.clear()  # As if the scheduler had popped them
+            engine._iv_in_flight = 1
+        targets = list(engine._targets.values())
+
+        # Not started, so there is no pool to submit to
+        engine._submit(engine._refresh_prices, targets, "price", targets)
+        engine._submit(engine._refresh_iv, targets[0], "iv", [targets[0]])
+
+        assert _scheduled(engine, "price") == {"SPY", "QQQ"}
+        assert _scheduled(engine, "iv") == {"SPY"}
+        assert engine._iv_in_flight == 0
+        assert all(t.price_due <= time.monotonic() for t in targets)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,258 @@
+"""
+Test Multi-Timeframe Resampling
+
+Verifies higher timeframes derived from 1-minute bars:
+- Vectorized roll-ups match pandas resample
+- The incremental cache matches a batch roll-up
+- Stored minute candles and live bars feed the roll-ups
+- get_historical_bars derives higher timeframes before asking Alpaca
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+import pytest
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import data_manager
+import database
+import resampler
+from bar_builder import BarBuilder
+from bar_store import BarSeries
+from resampler import resample, resample_all, ResampleCache, normalize_timeframe
+
+
+def _minute_bars(n=5000, seed=11):
+    """Minute bars with gaps, starting mid-session"""
+    rng = np.random.default_rng(seed)
+    steps = rng.integers(1, 4, n)
+    timestamps = np.datetime64("2024-01-02T14:30", "ns") + np.cumsum(steps) * np.timedelta64(60, "s")
+    closes = 100 + np.cumsum(rng.normal(0, 0.05, n))
+    opens = closes + rng.normal(0, 0.02, n)
+    return BarSeries(
+        timestamp=timestamps,
+        open=opens,
+        high=np.maximum(opens, closes) + 0.01,
+        low=np.minimum(opens, closes) - 0.01,
+        close=closes,
+        volume=rng.integers(1, 1000, n),
+    )
+
+
+class TestResample:
+    """Vectorized roll-ups"""
+
+    @pytest.mark.parametrize("timeframe,rule,tz", [
+        ("5min", "5min", "UTC"), ("15Min", "15min", "UTC"), ("1Hour", "1h", "UTC"),
+        ("1Day", "1D", "America/New_York")
+    ])
+    def test_matches_pandas(self, timeframe, rule, tz):
+        """OHLCV roll-ups should match pandas resample (empty buckets dropped)"""
+        bars = _minute_bars()
+        frame = pd.DataFrame(
+            {"open": bars.open, "high": bars.high, "low": bars.low,
+             "close": bars.close, "volume": bars.volume},
+            index=pd.DatetimeIndex(bars.timestamp).tz_localize("UTC").tz_convert(tz),
+        )
+        expected = frame.resample(rule).agg(
+            {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+        ).dropna()
+
+        result = resample(bars, timeframe)
+
+        assert np.array_equal(result.timestamp, expected.index.tz_convert("UTC").tz_localize(None).values)
+        for column in ("open", "high", "low", "close"):
+            assert np.allclose(getattr(result, column), expected[column])
+        assert np.array_equal(result.volume, expected["volume"].astype(np.int64))
+
+    def test_daily_bars_follow_session_dates(self):
+        """Post-market bars past midnight UTC stay in their New York session"""
+        timestamps = np.array([
+            "2024-01-02T14:30", "2024-01-02T20:59",  # Regular session, 09:30 and 15:59 ET
+            "2024-01-02T23:30", "2024-01-03T00:59",  # Post-market, 18:30 and 19:59 ET
+            "2024-01-03T09:00", "2024-01-03T14:30",  # Next day's pre-market and open
+            "2024-07-01T23:59", "2024-07-02T03:59",  # Summer post-market (EDT), 19:59 and 23:59 ET
+        ], dtype="datetime64[ns]")
+        n = len(timestamps)
+        bars = BarSeries(timestamp=timestamps, open=np.arange(n, dtype=float), high=np.arange(n) + 1.0,
+                         low=np.arange(n) - 1.0, close=np.arange(n, dtype=float), volume=np.ones(n, dtype=np.int64))
+
+        daily = resample(bars, "1Day")
+
+        assert list(daily.timestamp) == [
+            np.datetime64("2024-01-02T05:00", "ns"),  # New York midnight, as Alpaca labels 1Day bars
+            np.datetime64("2024-01-03T05:00", "ns"),
+            np.datetime64("2024-07-01T04:00", "ns"),
+        ]
+        assert list(daily.volume) == [4, 2, 2]
+        assert list(daily.close) == [3.0, 5.0, 7.0]
+
+    def test_unknown_timeframe(self):
+        """Unsupported timeframes should raise"""
+        with pytest.raises(ValueError):
+            normalize_timeframe("3Week")
+
+
+class TestResampleCache:
+    """Incremental roll-ups"""
+
+    def test_incremental_matches_batch(self):
+        """Feeding minute bars in batches should equal one batch roll-up"""
+        bars = _minute_bars()
+        cache = ResampleCache()
+
+        for offset in range(0, len(bars), 377):
+            cache.update("SPY", bars[offset:offset + 377])
+
+        for timeframe, expected in resample_all(bars).items():
+            cached = cache.get("spy", timeframe)
+            for column in ("timestamp", "open", "high", "low", "close", "volume"):
+                assert np.array_equal(getattr(cached, column), getattr(expected, column))
+
+    def test_replayed_bars_ignored(self):
+        """Overlapping batches should not double count volume"""
+        bars = _minute_bars(500)
+        cache = ResampleCache(timeframes=["1Day"])
+
+        cache.update("SPY", bars[:300])
+        assert cache.update("SPY", bars[200:]) == 200
+        assert cache.update("SPY", bars) == 0
+
+        assert cache.get("SPY", "1day").volume.sum() == bars.volume.sum()
+
+    def test_retention_bound(self):
+        """The cache should keep at least max_bars and stay bounded"""
+        bars = _minute_bars(5000)
+        cache = ResampleCache(timeframes=["5min"], max_bars=100)
+
+        for offset in range(0, len(bars), 50):
+            cache.update("SPY", bars[offset:offset + 50])
+
+        cached = cache.get("SPY", "5min")
+        expected = resample(bars, "5min")
+        assert 100 <= len(cached) <= 200
+        assert np.array_equal(cached.close, expected.close[-len(cached):])
+        assert len(cache.get("SPY", "5min", limit=10)) == 10
+
+    def test_update_bar_dicts(self):
+        """Bar dicts (Alpaca shape) are parsed and sorted"""
+        cache = ResampleCache(timeframes=["5min"])
+        bars = [
+            {"timestamp": "2024-01-02T14:31:00Z", "open": 2, "high": 3, "low": 1, "close": 2.5, "volume": 7},
+            {"timestamp": "2024-01-02T14:30:00Z", "open": 1, "high": 2, "low": 0.5, "close": 1.5, "volume": 3},
+        ]
+
+        cache.update_bars("QQQ", bars)
+        rolled = cache.get("QQQ", "5min")
+
+        assert len(rolled) == 1
+        assert rolled[0]["open"] == 1 and rolled[0]["close"] == 2.5
+        assert rolled[0]["high"] == 3 and rolled[0]["volume"] == 10
+
+
+def _store_minutes(bars: BarSeries):
+    database.store_candle_arrays("SPY", bars.timestamp, bars.open, bars.high,
+                                 bars.low, bars.close, bars.volume)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Fresh candle store and resample cache."""
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "test_resampler.db"))
+    monkeypatch.setattr(resampler, "_cache", ResampleCache())
+    database.init_db()
+    yield database
+    database.close_connections()
+
+
+class TestStoredCandles:
+    """Roll-ups of the candle store"""
+
+    @pytest.mark.parametrize("timeframe", ["5min", "1Hour", "1Day"])
+    def test_limit_returns_latest_complete_buckets(self, db, timeframe):
+        """A limited read matches the tail of a full roll-up"""
+        bars = _minute_bars(3000)
+        _store_minutes(bars)
+        expected = resample(bars, timeframe)
+
+        limit = min(12, len(expected) - 1)
+        derived = resampler.resample_candles("SPY", timeframe, limit=limit)
+
+        assert len(derived) == limit
+        for column in ("timestamp", "open", "high", "low", "close", "volume"):
+            assert np.array_equal(getattr(derived, column), getattr(expected, column)[-limit:])
+
+    def test_historical_bars_derived_without_request(self, db, monkeypatch):
+        """Higher timeframes come from stored minutes when they cover the limit"""
+        requests = []
+        monkeypatch.setattr(data_manager.data_manager.session, "get",
+                            lambda url, **kwargs: requests.append(kwargs["params"]))
+        _store_minutes(_minute_bars(3000))
+
+        bars = data_manager.get_historical_bars("SPY", "15Min", limit=20)
+
+        assert requests == []
+        assert len(bars) == 20
+        assert bars[-1] == resample(_minute_bars(3000), "15min")[-1]
+
+    def test_historical_bars_fall_back_to_alpaca(self, db, monkeypatch):
+        """Too little minute history, or an underived timeframe, is fetched"""
+        requests = []
+
+        def fake_get(url, params=None, **kwargs):
+            requests.append(params["timeframe"])
+            bars = [{"t": "2024-01-02T14:30:00Z", "o": 1, "h": 2, "l": 0.5, "c": 1.5, "v": 10}]
+            return SimpleNamespace(status_code=200, json=lambda: {"bars": bars})
+
+        monkeypatch.setattr(data_manager.data_manager.session, "get", fake_get)
+        _store_minutes(_minute_bars(50))
+
+        assert len(data_manager.get_historical_bars("SPY", "1Hour", limit=20)) == 1
+        data_manager.get_historical_bars("SPY", "30Min", limit=5)
+        data_manager.get_historical_bars("QQQ", "1Min", limit=5)
+
+        assert requests == ["1Hour", "30Min", "1Min"]
+        assert db.get_candle_count("QQQ") == 1
+
+
+class TestLiveBars:
+    """Feeding the cache from the live bar builder"""
+
+    @staticmethod
+    def _trade(ts: str, price: float):
+        return SimpleNamespace(ticker="SPY", price=price, timestamp=ts, volume=100, is_trade=True)
+
+    def test_complete_bars_extend_cache(self, db):
+        """Completed minute bars roll up; the partial first bar is left out"""
+        builder = BarBuilder(timeframes=("1sec", "1min"), store=lambda rows: len(rows))
+        builder.add_subscriber(resampler.on_live_bar)
+
+        builder.on_price_updates([
+            self._trade(f"2024-01-02T14:{m:02d}:05Z", 100.0 + m) for m in range(29, 41)
+        ])
+        rolled = resampler.get_resample_cache().get("SPY", "5min")
+
+        # 14:29 was partial; 14:30-14:39 closed, 14:40 still open
+        assert [bar["timestamp"][11:16] for bar in resampler.to_bar_dicts(rolled)] == ["14:30", "14:35"]
+        assert rolled.open[0] == 130.0 and rolled.close[1] == 139.0
+        assert rolled.volume.tolist() == [500, 500]
+
+    def test_gap_restarts_cache(self, db):
+        """A bar around a reconnect clears the ticker's roll-ups"""
+        cache = resampler.get_resample_cache()
+        cache.update_bars("SPY", [
+            {"timestamp": "2024-01-02T14:30:00Z", "open": 1, "high": 1, "low": 1, "close": 1, "volume": 1}
+        ])
+        bar = SimpleNamespace(ticker="SPY", timeframe="1min", partial=True, trades=3)
+
+        resampler.on_live_bar(bar)
+
+        assert len(cache.get("SPY", "5min")) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
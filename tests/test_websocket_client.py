@@ -0,0 +1,331 @@
+"""
+Test WebSocket Tick Fan-Out
+
+Verifies the lock-free tick ring and its readers:
+- Cursors read in order, across the end of the ring
+- A lapped cursor is handed the latest-value table and resumes at the head
+- Conflating cursors keep only the latest update per symbol
+- Dispatchers count callback errors and keep running
+- Conflated subscriptions deliver each symbol's latest update at a bounded rate
+"""
+
+import os
+import sys
+import threading
+import time
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from websocket_client import (ConflatedSubscription, PriceUpdate, StreamingPriceManager,
+                              TickDispatcher, TickRing)
+
+
+def _updates(start: int, count: int, symbols=("SPY",)):
+    """Updates priced by their sequence number, cycling through symbols"""
+    return [
+        PriceUpdate(symbols[i % len(symbols)], float(i), float(i), float(i), f"t{i}")
+        for i in range(start, start + count)
+    ]
+
+
+def _prices(batch):
+    return [update.price for update in batch]
+
+
+def _wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture
+def ring():
+    return TickRing(capacity=8)
+
+
+class TestTickRing:
+    """Test suite for ring publication and cursor reads."""
+
+    def test_capacity_must_be_power_of_two(self):
+        with pytest.raises(ValueError):
+            TickRing(capacity=6)
+
+    def test_cursor_starts_at_head(self, ring):
+        """Updates published before a cursor exists are not replayed."""
+        ring.publish(_updates(0, 3))
+        cursor = ring.cursor()
+
+        assert cursor.read() == []
+        ring.publish(_updates(3, 2))
+        assert _prices(cursor.read()) == [3.0, 4.0]
+        assert cursor.lag == 0
+
+    def test_wraparound_read(self, ring):
+        """A read spanning the end of the slot array comes back in order."""
+        cursor = ring.cursor()
+        ring.publish(_updates(0, 6))
+        assert _prices(cursor.read()) == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0]
+
+        ring.publish(_updates(6, 5))  # Slots 6, 7, 0, 1, 2
+        assert _prices(cursor.read()) == [6.0, 7.0, 8.0, 9.0, 10.0]
+        assert cursor.overruns == 0 and cursor.delivered == 11
+
+    def test_max_items_across_wraparound(self, ring):
+        """Capped reads resume where they stopped, including past the wrap."""
+        cursor = ring.cursor()
+        ring.publish(_updates(0, 5))
+        cursor.read()
+
+        ring.publish(_updates(5, 7))  # Slots 5, 6, 7, 0, 1, 2, 3
+        assert _prices(cursor.read(max_items=4)) == [5.0, 6.0, 7.0, 8.0]
+        assert cursor.lag == 3
+        assert _prices(cursor.read(max_items=4)) == [9.0, 10.0, 11.0]
+
+    def test_lapped_cursor_gets_latest_table(self, ring):
+        """A reader `capacity` behind skips to the head with one update per symbol."""
+        cursor = ring.cursor()
+        ring.publish(_updates(0, 20, symbols=("SPY", "QQQ", "IWM")))
+
+        batch = cursor.read()
+
+        assert sorted((u.ticker, u.price) for u in batch) == [("IWM", 17.0), ("QQQ", 19.0), ("SPY", 18.0)]
+        assert cursor.overruns == 1
+        assert cursor.conflated == 17
+        assert cursor.position == ring.sequence
+
+        ring.publish(_updates(20, 2, symbols=("SPY", "QQQ", "IWM")))
+        assert _prices(cursor.read()) == [20.0, 21.0]
+        assert cursor.overruns == 1
+
+    def test_exactly_capacity_behind_is_an_overrun(self, ring):
+        """A full ring counts as lapped: the next write lands on the oldest unread slot."""
+        cursor = ring.cursor()
+        ring.publish(_updates(0, 8))
+
+        assert _prices(cursor.read()) == [7.0]
+        assert cursor.overruns == 1
+
+    def test_torn_read_detected(self, ring, monkeypatch):
+        """A producer lapping the reader during the copy invalidates the batch."""
+        cursor = ring.cursor()
+        ring.publish(_updates(0, 4))
+
+        class LappingSlots(list):
+            """Slot list whose copy runs while the producer publishes a full ring."""
+            def __getitem__(self, item):
+                batch = list.__getitem__(self, item)
+                if isinstance(item, slice):
+                    monkeypatch.setattr(ring, "_slots", list(self))
+                    ring.publish(_updates(4, 8))
+                return batch
+
+        monkeypatch.setattr(ring, "_slots", LappingSlots(ring._slots))
+        batch = cursor.read()
+
+        assert cursor.overruns == 1
+        assert _prices(batch) == [11.0]
+        assert cursor.position == ring.sequence == 12
+
+    def test_conflating_cursor(self, ring):
+        """Each read delivers only the latest update per symbol."""
+        cursor = ring.cursor(conflate=True)
+        ring.publish(_updates(0, 6, symbols=("SPY", "QQQ")))
+
+        batch = cursor.read()
+
+        assert sorted((u.ticker, u.price) for u in batch) == [("QQQ", 5.0), ("SPY", 4.0)]
+        assert cursor.conflated == 4
+        assert cursor.delivered == 2
+        assert cursor.overruns == 0
+
+    def test_wait_returns_on_publish(self, ring):
+        """wait() wakes as soon as something past the given sequence lands."""
+        threading.Timer(0.05, ring.publish, args=(_updates(0, 1),)).start()
+
+        assert ring.wait(0, timeout=5.0)
+        assert not ring.wait(ring.sequence, timeout=0.01)
+
+
+class TestTickDispatcher:
+    """Test suite for per-callback dispatch threads."""
+
+    def test_every_update_delivered_in_order(self, ring):
+        received = []
+        dispatcher = TickDispatcher(ring, received.append)
+        dispatcher.start()
+        try:
+            for i in range(0, 24, 4):
+                ring.publish(_updates(i, 4))
+                assert _wait_for(lambda: len(received) == i + 4)
+        finally:
+            dispatcher.stop()
+
+        assert _prices(received) == [float(i) for i in range(24)]
+
+    def test_callback_errors_counted(self, ring):
+        """A raising callback is counted and later updates still arrive."""
+        received = []
+
+        def callback(update):
+            if update.price == 1.0:
+                raise RuntimeError("bad update")
+            received.append(update)
+
+        dispatcher = TickDispatcher(ring, callback)
+        dispatcher.start()
+        try:
+            ring.publish(_updates(0, 3))
+            assert _wait_for(lambda: len(received) == 2)
+            ring.publish(_updates(3, 1))
+            assert _wait_for(lambda: len(received) == 3)
+        finally:
+            dispatcher.stop()
+
+        assert dispatcher.errors == 1
+        assert _prices(received) == [0.0, 2.0, 3.0]
+
+    def test_batch_callback_errors_counted(self, ring):
+        """batch=True hands over lists; a failed batch does not stop the thread."""
+        batches = []
+
+        def callback(batch):
+            batches.append(_prices(batch))
+            if len(batches) == 1:
+                raise RuntimeError("store unavailable")
+
+        dispatcher = TickDispatcher(ring, callback, batch=True)
+        ring.publish(_updates(0, 3))  # Queued for the cursor before the thread starts
+        dispatcher.start()
+        try:
+            assert _wait_for(lambda: len(batches) == 1)
+            ring.publish(_updates(3, 2))
+            assert _wait_for(lambda: sum(map(len, batches)) == 5)
+        finally:
+            dispatcher.stop()
+
+        assert dispatcher.errors == 1
+        assert batches[0] == [0.0, 1.0, 2.0]
+        assert sum(batches[1:], []) == [3.0, 4.0]
+
+
+class TestConflatedSubscription:
+    """Test suite for rate-limited latest-value subscriptions."""
+
+    def test_poll_delivers_each_change_once(self, ring):
+        """A symbol is delivered once per new update, however many arrived."""
+        subscription = ConflatedSubscription(ring, lambda update: None)
+        ring.publish(_updates(0, 5, symbols=("SPY", "QQQ")))
+
+        assert sorted((u.ticker, u.price) for u in subscription.poll()) == [("QQQ", 3.0), ("SPY", 4.0)]
+        assert subscription.poll() == []
+
+        ring.publish(_updates(5, 1, symbols=("SPY", "QQQ")))  # QQQ only
+        assert [(u.ticker, u.price) for u in subscription.poll()] == [("QQQ", 5.0)]
+        assert subscription.poll() == []
+
+    def test_symbol_filter(self, ring):
+        """Only watched symbols are delivered; set_symbols changes the set."""
+        subscription = ConflatedSubscription(ring, lambda update: None, symbols=["spy"])
+        ring.publish(_updates(0, 4, symbols=("SPY", "QQQ")))
+
+        assert [u.ticker for u in subscription.poll()] == ["SPY"]
+
+        subscription.set_symbols(["QQQ", "IWM"])
+        assert [u.ticker for u in subscription.poll()] == ["QQQ"]
+
+        ring.publish(_updates(4, 3, symbols=("SPY", "QQQ", "IWM")))
+        subscription.set_symbols(None)
+        assert sorted(u.ticker for u in subscription.poll()) == ["IWM", "QQQ", "SPY"]
+
+    def test_max_rate_bounds_deliveries(self, ring):
+        """A symbol updating every millisecond is delivered at most max_rate times a second."""
+        received = []
+        subscription = ConflatedSubscription(ring, received.append, max_rate=10)
+        subscription.start()
+        try:
+            started = time.monotonic()
+            i = 0
+            while time.monotonic() - started < 0.5:
+                ring.publish(_updates(i, 1))
+                i += 1
+                time.sleep(0.001)
+            elapsed = time.monotonic() - started
+        finally:
+            subscription.stop()
+
+        assert 1 <= len(received) <= elapsed * 10 + 2
+        assert len(received) < i
+        assert _prices(received) == sorted(_prices(received))
+
+    def test_rejects_non_positive_rate(self, ring):
+        with pytest.raises(ValueError):
+            ConflatedSubscription(ring, lambda update: None, max_rate=0)
+
+    def test_callback_errors_counted(self, ring):
+        """A raising callback is counted and the subscription keeps delivering."""
+        received = []
+
+        def callback(update):
+            if update.price == 0.0:
+                raise RuntimeError("bad update")
+            received.append(update)
+
+        subscription = ConflatedSubscription(ring, callback)
+        subscription.start()
+        try:
+            ring.publish(_updates(0, 1))
+            assert _wait_for(lambda: subscription.errors == 1)
+            ring.publish(_updates(1, 1))
+            assert _wait_for(lambda: len(received) == 1)
+        finally:
+            subscription.stop()
+
+        assert subscription.delivered == 1
+        assert _prices(received) == [1.0]
+
+
+class TestStreamingPriceManager:
+    """Test suite for the manager's subscription API."""
+
+    @pytest.fixture
+    def manager(self, ring, monkeypatch):
+        """The singleton, on a fresh ring with no subscriptions."""
+        manager = StreamingPriceManager()
+        monkeypatch.setattr(manager, "ticks", ring)
+        monkeypatch.setattr(manager, "_subscriptions", [])
+        yield manager
+        for subscription in list(manager._subscriptions):
+            manager.unsubscribe(subscription)
+
+    def test_subscribe_and_unsubscribe(self, manager, ring):
+        """Subscriptions run on their own thread until unsubscribed."""
+        received = []
+        subscription = manager.subscribe(received.append, symbols=["SPY"], max_rate=100)
+
+        ring.publish(_updates(0, 2, symbols=("SPY", "QQQ")))
+        assert _wait_for(lambda: len(received) == 1)
+        assert received[0].ticker == "SPY"
+        assert manager.get_dispatch_stats()[-1]["symbols"] == ["SPY"]
+
+        manager.unsubscribe(subscription)
+        ring.publish(_updates(2, 1))
+        time.sleep(0.05)
+
+        assert manager._subscriptions == []
+        assert len(received) == 1
+
+    def test_get_latest(self, manager, ring):
+        """The latest-value table, optionally filtered (case-insensitively)."""
+        ring.publish(_updates(0, 5, symbols=("SPY", "QQQ")))
+
+        assert {t: u.price for t, u in manager.get_latest().items()} == {"SPY": 4.0, "QQQ": 3.0}
+        assert {t: u.price for t, u in manager.get_latest(["qqq", "IWM"]).items()} == {"QQQ": 3.0}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
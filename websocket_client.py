@@ -6,45 +6,328 @@ Real-time price streaming via Alpaca WebSocket
 import asyncio
 import json
 import threading
+import time
 from datetime import datetime
-from typing import Callable, Optional, Dict, Any, List
+from typing import Callable, Optional, Dict, Any, Iterable, List
 from dataclasses import dataclass
 import websockets
 
 from config import ALPACA_API_KEY, ALPACA_API_SECRET
+from indicators import IndicatorBank
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+    HAS_ORJSON = True
+except ImportError:
+    _json_loads = json.loads
+    HAS_ORJSON = False
 
-@dataclass
+
+TICK_RING_CAPACITY = 65536  # Updates buffered per ring (~1.3 s at 50k quotes/s)
+DISPATCH_BATCH = 1024  # Max updates a dispatcher takes from its cursor at once
+
+
+@dataclass(slots=True)
 class PriceUpdate:
-    """Represents a real-time price update"""
+    """
+    Represents a real-time price update
+    
+    Published updates are shared by every consumer without copying
+    and must be treated as read-only.
+    """
     ticker: str
     price: float
     bid: float
     ask: float
     timestamp: str
     volume: int = 0
+    is_trade: bool = False
+
+
+class TickRing:
+    """
+    Bounded single-producer ring buffer of price updates
+    
+    The socket thread publishes; any number of TickCursors read at their
+    own pace. A record is published by storing it in its slot and then
+    advancing `sequence` (each a single atomic step under the GIL), so
+    neither the producer nor the readers take a lock on the data path and
+    the producer never waits for a reader.
+    
+    `latest` holds the most recent update per symbol. A reader that falls
+    `capacity` updates behind has lost its place and is handed that table
+    instead (conflation), then resumes at the head.
+    """
+    
+    def __init__(self, capacity: int = TICK_RING_CAPACITY):
+        if capacity <= 0 or capacity & (capacity - 1):
+            raise ValueError("capacity must be a power of two")
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self._slots: List[Optional[PriceUpdate]] = [None] * capacity
+        self.sequence = 0  # Updates published so far
+        self.latest: Dict[str, PriceUpdate] = {}
+        self._wakeup = threading.Condition()
+    
+    def publish(self, updates: List[PriceUpdate]):
+        """Append a batch of updates and wake waiting readers (producer only)"""
+        slots, mask, latest = self._slots, self._mask, self.latest
+        sequence = self.sequence
+        for update in updates:
+            slots[sequence & mask] = update
+            latest[update.ticker] = update
+            sequence += 1
+            self.sequence = sequence
+        with self._wakeup:
+            self._wakeup.notify_all()
+    
+    def wait(self, sequence: int, timeout: float) -> bool:
+        """Block until something past `sequence` is published (or timeout)"""
+        with self._wakeup:
+            if self.sequence == sequence:
+                self._wakeup.wait(timeout)
+        return self.sequence != sequence
+    
+    def cursor(self, conflate: bool = False) -> "TickCursor":
+        """New reader positioned at the head"""
+        return TickCursor(self, conflate)
+
+
+class TickCursor:
+    """
+    One consumer's read position in a TickRing
+    
+    Args:
+        ring: Ring to read
+        conflate: Deliver only the latest update per symbol from each read
+    """
+    
+    def __init__(self, ring: TickRing, conflate: bool = False):
+        self.ring = ring
+        self.conflate = conflate
+        self.position = ring.sequence
+        self.delivered = 0
+        self.conflated = 0  # Updates superseded before delivery
+        self.overruns = 0  # Times the producer lapped this reader
+    
+    @property
+    def lag(self) -> int:
+        """Published updates not yet read"""
+        return self.ring.sequence - self.position
+    
+    def read(self, max_items: Optional[int] = None) -> List[PriceUpdate]:
+        """
+        Updates published since the last read, oldest first
+        
+        Args:
+            max_items: Cap on updates taken from the ring
+        """
+        ring = self.ring
+        start, end = self.position, ring.sequence
+        if end == start:
+            return []
+        if end - start >= ring.capacity:
+            return self._skip_to_head(end)
+        if max_items and end - start > max_items:
+            end = start + max_items
+        
+        i, j = start & ring._mask, end & ring._mask
+        batch = ring._slots[i:j] if i < j else ring._slots[i:] + ring._slots[:j]
+        
+        # The slot at `sequence` may be mid-write, so any slot the producer
+        # could have reached during the copy invalidates it
+        if ring.sequence - start >= ring.capacity:
+            return self._skip_to_head(ring.sequence)
+        self.position = end
+        
+        if self.conflate:
+            count = len(batch)
+            batch = list({update.ticker: update for update in batch}.values())
+            self.conflated += count - len(batch)
+        self.delivered += len(batch)
+        return batch
+    
+    def _skip_to_head(self, end: int) -> List[PriceUpdate]:
+        self.overruns += 1
+        skipped = end - self.position
+        self.position = end
+        batch = list(self.ring.latest.copy().values())
+        self.conflated += max(0, skipped - len(batch))
+        self.delivered += len(batch)
+        return batch
+
+
+class TickDispatcher:
+    """
+    Drive one price callback from its own cursor on its own thread
+    
+    A slow callback only delays itself: it falls behind on its cursor and
+    is conflated if the ring laps it, while the socket thread and other
+    callbacks keep going. With batch=True the callback receives each
+    read as a list instead of one update at a time.
+    """
+    
+    def __init__(self, ring: TickRing, callback: Callable,
+                 conflate: bool = False, batch_size: int = DISPATCH_BATCH,
+                 batch: bool = False):
+        self.cursor = ring.cursor(conflate)
+        self.callback = callback
+        self.batch_size = batch_size
+        self.batch = batch
+        self.errors = 0
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 2.0):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+    
+    def _run(self):
+        cursor, callback = self.cursor, self.callback
+        while self._running:
+            batch = cursor.read(self.batch_size)
+            if not batch:
+                cursor.ring.wait(cursor.position, timeout=0.5)
+                continue
+            if self.batch:
+                try:
+                    callback(batch)
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Error in price callback: {e}")
+                continue
+            for update in batch:
+                try:
+                    callback(update)
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Error in price callback: {e}")
+
+
+class ConflatedSubscription:
+    """
+    Rate-limited, per-symbol coalesced view of the tick stream
+    
+    Instead of reading every update, the subscription samples the ring's
+    latest-value table once per interval and delivers each watched symbol
+    whose latest update changed since its last delivery. However fast the
+    market moves, the callback runs at most once per symbol per interval.
+    
+    Args:
+        ring: Ring to sample
+        callback: Called with each coalesced PriceUpdate (on the subscription's thread)
+        symbols: Symbols to deliver (None = every streamed symbol)
+        max_rate: Deliveries per symbol per second (None = whenever new data arrives)
+    """
+    
+    def __init__(self, ring: TickRing, callback: Callable[[PriceUpdate], None],
+                 symbols: Optional[Iterable[str]] = None, max_rate: Optional[float] = None):
+        if max_rate is not None and max_rate <= 0:
+            raise ValueError("max_rate must be positive")
+        self.ring = ring
+        self.callback = callback
+        self.interval = 1.0 / max_rate if max_rate else 0.0
+        self.symbols: Optional[frozenset] = None
+        self.set_symbols(symbols)
+        self.delivered = 0
+        self.errors = 0
+        self._last_sent: Dict[str, PriceUpdate] = {}
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+    
+    def set_symbols(self, symbols: Optional[Iterable[str]]):
+        """Change the watched symbols (None = all)"""
+        self.symbols = frozenset(s.upper() for s in symbols) if symbols is not None else None
+    
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 2.0):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+    
+    def poll(self) -> List[PriceUpdate]:
+        """Watched symbols whose latest update has not been delivered yet"""
+        latest, last_sent = self.ring.latest, self._last_sent
+        symbols = self.symbols if self.symbols is not None else list(latest.copy())
+        
+        changed = []
+        for symbol in symbols:
+            update = latest.get(symbol)
+            if update is not None and update is not last_sent.get(symbol):
+                last_sent[symbol] = update
+                changed.append(update)
+        return changed
+    
+    def _run(self):
+        ring = self.ring
+        while self._running:
+            sequence = ring.sequence
+            started = time.monotonic()
+            for update in self.poll():
+                try:
+                    self.callback(update)
+                    self.delivered += 1
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Error in price subscription: {e}")
+            
+            remaining = self.interval - (time.monotonic() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+            if ring.sequence == sequence:
+                ring.wait(sequence, timeout=0.5)
 
 
 class AlpacaWebSocket:
     """
     WebSocket client for real-time Alpaca data streaming.
     Runs in a separate thread to avoid blocking the main UI.
+    
+    The socket thread only decodes frames and publishes them to a
+    TickRing; callbacks run on their own dispatcher threads.
     """
     
     # Alpaca WebSocket endpoints
     STOCK_STREAM_URL = "wss://stream.data.alpaca.markets/v2/iex"
     OPTIONS_STREAM_URL = "wss://stream.data.alpaca.markets/v1beta1/options"
     
-    def __init__(self, on_price_update: Optional[Callable[[PriceUpdate], None]] = None):
+    def __init__(self, on_price_update: Optional[Callable[[PriceUpdate], None]] = None,
+                 ring: Optional[TickRing] = None, trades: bool = False,
+                 on_connect: Optional[Callable[[], None]] = None):
         """
         Initialize WebSocket client
         
         Args:
             on_price_update: Callback function for price updates
+            ring: Ring to publish updates to (default: a private one)
+            trades: Also subscribe to trades (needed for bar volume)
+            on_connect: Called after every (re)subscription, i.e. when
+                streaming starts or resumes after a gap
         """
         self.api_key = ALPACA_API_KEY
         self.api_secret = ALPACA_API_SECRET
         self.on_price_update = on_price_update
+        self.trades = trades
+        self.on_connect = on_connect
+        self.ring = ring if ring is not None else TickRing()
+        self._dispatcher = TickDispatcher(self.ring, on_price_update) if on_price_update else None
         
         self._ws = None
         self._loop = None
@@ -53,7 +336,7 @@ class AlpacaWebSocket:
         self._subscribed_tickers: List[str] = []
         
         # Latest prices cache
-        self.latest_prices: Dict[str, PriceUpdate] = {}
+        self.latest_prices: Dict[str, PriceUpdate] = self.ring.latest
     
     def start(self, tickers: List[str]):
         """
@@ -68,6 +351,8 @@ class AlpacaWebSocket:
         
         self._subscribed_tickers = [t.upper() for t in tickers]
         self._running = True
+        if self._dispatcher:
+            self._dispatcher.start()
         
         # Create new event loop for the thread
         self._thread = threading.Thread(target=self._run_event_loop, daemon=True)
@@ -81,6 +366,8 @@ class AlpacaWebSocket:
             self._loop.call_soon_threadsafe(self._loop.stop)
         if self._thread:
             self._thread.join(timeout=2)
+        if self._dispatcher:
+            self._dispatcher.stop()
         print("WebSocket stopped")
     
     def _run_event_loop(self):
@@ -120,12 +407,10 @@ class AlpacaWebSocket:
                     
                     print("WebSocket authenticated successfully")
                     
-                    # Subscribe to quotes
-                    subscribe_msg = {
-                        "action": "subscribe",
-                        "quotes": self._subscribed_tickers
-                    }
-                    await ws.send(json.dumps(subscribe_msg))
+                    # Subscribe to quotes (and trades)
+                    await ws.send(json.dumps(self._subscription_msg("subscribe", self._subscribed_tickers)))
+                    if self.on_connect:
+                        self.on_connect()
                     
                     # Handle incoming messages
                     while self._running:
@@ -151,46 +436,56 @@ class AlpacaWebSocket:
                     return True
         return False
     
-    def _handle_message(self, message: str):
-        """Parse and handle incoming WebSocket message"""
+    def _handle_message(self, message):
+        """Parse an incoming WebSocket frame and publish its updates"""
+        try:
+            data = _json_loads(message)
+        except ValueError:  # Malformed frame (JSONDecodeError is a ValueError)
+            return
+        
         try:
-            data = json.loads(message)
-            
             if isinstance(data, list):
-                for item in data:
-                    msg_type = item.get("T")
-                    
-                    if msg_type == "q":  # Quote update
-                        update = PriceUpdate(
-                            ticker=item.get("S", ""),
-                            price=(item.get("bp", 0) + item.get("ap", 0)) / 2,
-                            bid=item.get("bp", 0),
-                            ask=item.get("ap", 0),
-                            timestamp=item.get("t", ""),
-                            volume=0
-                        )
-                        
-                        # Cache latest price
-                        self.latest_prices[update.ticker] = update
-                        
-                        # Call callback if provided
-                        if self.on_price_update:
-                            self.on_price_update(update)
-                    
-                    elif msg_type == "t":  # Trade update
-                        ticker = item.get("S", "")
-                        if ticker in self.latest_prices:
-                            self.latest_prices[ticker].price = item.get("p", 0)
-                            self.latest_prices[ticker].volume = item.get("s", 0)
-                            
-                            if self.on_price_update:
-                                self.on_price_update(self.latest_prices[ticker])
-                                
-        except json.JSONDecodeError:
-            pass
+                updates = self._parse_updates(data)
+                if updates:
+                    self.ring.publish(updates)
         except Exception as e:
             print(f"Error handling message: {e}")
     
+    def _parse_updates(self, items: List[Dict]) -> List[PriceUpdate]:
+        """Quote and trade messages of one frame as PriceUpdates"""
+        updates = []
+        batch_latest: Dict[str, PriceUpdate] = {}
+        latest = self.ring.latest
+        
+        for item in items:
+            msg_type = item.get("T")
+            
+            if msg_type == "q":  # Quote update
+                bid = item.get("bp", 0)
+                ask = item.get("ap", 0)
+                update = PriceUpdate(item.get("S", ""), (bid + ask) / 2, bid, ask, item.get("t", ""))
+            
+            elif msg_type == "t":  # Trade update (needs a quote for bid/ask)
+                ticker = item.get("S", "")
+                quote = batch_latest.get(ticker) or latest.get(ticker)
+                if quote is None:
+                    continue
+                update = PriceUpdate(ticker, item.get("p", 0), quote.bid, quote.ask,
+                                     item.get("t", quote.timestamp), item.get("s", 0), True)
+            else:
+                continue
+            
+            batch_latest[update.ticker] = update
+            updates.append(update)
+        
+        return updates
+    
+    def _subscription_msg(self, action: str, tickers: List[str]) -> Dict:
+        msg = {"action": action, "quotes": tickers}
+        if self.trades:
+            msg["trades"] = tickers
+        return msg
+    
     def subscribe(self, tickers: List[str]):
         """Subscribe to additional tickers"""
         new_tickers = [t.upper() for t in tickers if t.upper() not in self._subscribed_tickers]
@@ -198,10 +493,7 @@ class AlpacaWebSocket:
         if new_tickers and self._ws:
             self._subscribed_tickers.extend(new_tickers)
             
-            subscribe_msg = {
-                "action": "subscribe",
-                "quotes": new_tickers
-            }
+            subscribe_msg = self._subscription_msg("subscribe", new_tickers)
             
             if self._loop and self._running:
                 asyncio.run_coroutine_threadsafe(
@@ -209,6 +501,19 @@ class AlpacaWebSocket:
                     self._loop
                 )
     
+    def enable_trades(self):
+        """Start receiving trades for the subscribed tickers as well"""
+        if self.trades:
+            return
+        self.trades = True
+        
+        if self._ws and self._loop and self._running and self._subscribed_tickers:
+            subscribe_msg = {"action": "subscribe", "trades": list(self._subscribed_tickers)}
+            asyncio.run_coroutine_threadsafe(
+                self._ws.send(json.dumps(subscribe_msg)),
+                self._loop
+            )
+    
     def unsubscribe(self, tickers: List[str]):
         """Unsubscribe from tickers"""
         remove_tickers = [t.upper() for t in tickers if t.upper() in self._subscribed_tickers]
@@ -217,10 +522,7 @@ class AlpacaWebSocket:
             for t in remove_tickers:
                 self._subscribed_tickers.remove(t)
             
-            unsubscribe_msg = {
-                "action": "unsubscribe",
-                "quotes": remove_tickers
-            }
+            unsubscribe_msg = self._subscription_msg("unsubscribe", remove_tickers)
             
             if self._loop and self._running:
                 asyncio.run_coroutine_threadsafe(
@@ -256,8 +558,12 @@ class StreamingPriceManager:
         if self._initialized:
             return
         
+        self.ticks = TickRing()
         self._ws_client: Optional[AlpacaWebSocket] = None
-        self._price_callbacks: List[Callable] = []
+        self._price_callbacks: Dict[Callable, TickDispatcher] = {}
+        self._subscriptions: List[ConflatedSubscription] = []
+        self.indicators: Optional[IndicatorBank] = None
+        self.bars = None  # BarBuilder, once track_bars() is called
         self._initialized = True
     
     def start_streaming(self, tickers: List[str]):
@@ -265,7 +571,8 @@ class StreamingPriceManager:
         if self._ws_client:
             self._ws_client.subscribe(tickers)
         else:
-            self._ws_client = AlpacaWebSocket(on_price_update=self._on_price_update)
+            self._ws_client = AlpacaWebSocket(ring=self.ticks, trades=self.bars is not None,
+                                              on_connect=self._on_connect)
             self._ws_client.start(tickers)
     
     def stop_streaming(self):
@@ -274,22 +581,138 @@ class StreamingPriceManager:
             self._ws_client.stop()
             self._ws_client = None
     
-    def _on_price_update(self, update: PriceUpdate):
-        """Handle incoming price update"""
-        for callback in self._price_callbacks:
-            try:
-                callback(update)
-            except Exception as e:
-                print(f"Error in price callback: {e}")
+    def _on_connect(self):
+        """Streaming (re)started: anything before now was missed"""
+        if self.bars is not None:
+            self.bars.mark_gap()
     
-    def add_callback(self, callback: Callable[[PriceUpdate], None]):
-        """Add a callback for price updates"""
-        self._price_callbacks.append(callback)
+    def add_callback(self, callback: Callable, conflate: bool = False, batch: bool = False):
+        """
+        Add a callback for price updates
+        
+        Each callback runs on its own dispatcher thread, so a slow one
+        never stalls the feed or other callbacks.
+        
+        Args:
+            callback: Called with each PriceUpdate
+            conflate: Only deliver the latest update per symbol from each batch
+            batch: Call with a list of updates per read instead of one at a time
+        """
+        if callback in self._price_callbacks:
+            return
+        dispatcher = TickDispatcher(self.ticks, callback, conflate=conflate, batch=batch)
+        self._price_callbacks[callback] = dispatcher
+        dispatcher.start()
     
     def remove_callback(self, callback: Callable):
         """Remove a price callback"""
-        if callback in self._price_callbacks:
-            self._price_callbacks.remove(callback)
+        dispatcher = self._price_callbacks.pop(callback, None)
+        if dispatcher:
+            dispatcher.stop()
+    
+    def subscribe(self, callback: Callable[[PriceUpdate], None],
+                  symbols: Optional[Iterable[str]] = None,
+                  max_rate: Optional[float] = None) -> ConflatedSubscription:
+        """
+        Deliver only the latest quote per symbol, at most max_rate times a second
+        
+        Suited to consumers that redraw or re-evaluate on their own cadence
+        (charts, hedging and execution bots) rather than needing every tick.
+        
+        Args:
+            callback: Called with each coalesced PriceUpdate
+            symbols: Symbols of interest (None = all streamed symbols)
+            max_rate: Max deliveries per symbol per second (None = unthrottled)
+            
+        Returns:
+            The subscription (pass to unsubscribe, or call set_symbols on it)
+        """
+        subscription = ConflatedSubscription(self.ticks, callback, symbols, max_rate)
+        self._subscriptions.append(subscription)
+        subscription.start()
+        return subscription
+    
+    def unsubscribe(self, subscription: ConflatedSubscription):
+        """Stop a conflated subscription"""
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+        subscription.stop()
+    
+    def get_latest(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, PriceUpdate]:
+        """Snapshot of the latest-value table (optionally for some symbols)"""
+        latest = self.ticks.latest.copy()
+        if symbols is None:
+            return latest
+        return {s.upper(): latest[s.upper()] for s in symbols if s.upper() in latest}
+    
+    def get_dispatch_stats(self) -> List[Dict[str, Any]]:
+        """Per-callback and per-subscription delivery counters"""
+        stats = [
+            {
+                "callback": getattr(callback, "__qualname__", repr(callback)),
+                "lag": d.cursor.lag,
+                "delivered": d.cursor.delivered,
+                "conflated": d.cursor.conflated,
+                "overruns": d.cursor.overruns,
+                "errors": d.errors
+            }
+            for callback, d in list(self._price_callbacks.items())
+        ]
+        stats += [
+            {
+                "callback": getattr(sub.callback, "__qualname__", repr(sub.callback)),
+                "symbols": sorted(sub.symbols) if sub.symbols is not None else None,
+                "max_rate": 1.0 / sub.interval if sub.interval else None,
+                "delivered": sub.delivered,
+                "errors": sub.errors
+            }
+            for sub in list(self._subscriptions)
+        ]
+        return stats
+    
+    def track_indicators(self, bank: Optional[IndicatorBank] = None) -> IndicatorBank:
+        """
+        Keep streaming indicators hot for every streamed ticker
+        
+        Subscribes the bank to completed bars from track_bars(), so each
+        bar costs O(1) per indicator instead of a recompute over the bar
+        history. Calling again returns the already-attached bank.
+        """
+        if self.indicators is None:
+            self.indicators = bank or IndicatorBank()
+            self.track_bars().add_subscriber(self.indicators.on_bar)
+        return self.indicators
+    
+    def track_bars(self, builder=None):
+        """
+        Build live 1-second/1-minute bars from the stream
+        
+        Registers a BarBuilder as a price callback, turns on the trade
+        feed (bars need trade volume) and starts its background flush to
+        the candle store. Completed minute bars also extend the shared
+        resample cache (resampler.on_live_bar). Calling again returns the
+        already-attached builder.
+        
+        Returns:
+            The BarBuilder (add_subscriber() on it to receive completed bars)
+        """
+        if self.bars is None:
+            from bar_builder import BarBuilder
+            from resampler import on_live_bar
+            
+            self.bars = builder or BarBuilder()
+            self.bars.add_subscriber(on_live_bar)
+            self.add_callback(self.bars.on_price_updates, batch=True)
+            self.bars.start()
+            if self._ws_client:
+                self._ws_client.enable_trades()
+        return self.bars
+    
+    def get_indicators(self, ticker: str) -> Dict[str, Any]:
+        """Current streaming indicator values for a ticker"""
+        if self.indicators:
+            return self.indicators.values(ticker)
+        return {}
     
     def get_price(self, ticker: str) -> Optional[float]:
         """Get latest price for a ticker"""